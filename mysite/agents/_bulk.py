@@ -0,0 +1,37 @@
+"""Пакетный upsert моделей: bulk_create(update_conflicts=True) пачками.
+
+Замена цикла update_or_create (SELECT + UPDATE/INSERT на каждую строку)
+для снапшотов и зеркал: сотни строк — несколько INSERT ... ON CONFLICT
+DO UPDATE в одной транзакции.
+"""
+from django.db import transaction
+
+BATCH_SIZE = 500
+
+
+def bulk_upsert(model, objs, *, unique_fields, update_fields, batch_size=BATCH_SIZE) -> int:
+    """Вставить или обновить объекты по unique_fields. Возвращает число строк.
+
+    Дубли по ключу внутри objs схлопываются (побеждает последний) — как
+    при последовательных update_or_create; к тому же Postgres не даёт
+    ON CONFLICT обновить одну строку дважды в одном запросе.
+
+    update_fields — что перезаписывать у существующей строки; поля вроде
+    created_at (auto_now_add) туда не включают, чтобы они не сбрасывались.
+    """
+    attnames = [model._meta.get_field(f).attname for f in unique_fields]
+    by_key = {}
+    for obj in objs:
+        by_key[tuple(getattr(obj, a) for a in attnames)] = obj
+    if not by_key:
+        return 0
+
+    with transaction.atomic():
+        model.objects.bulk_create(
+            list(by_key.values()),
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+            batch_size=batch_size,
+        )
+    return len(by_key)
@@ -2,13 +2,28 @@
 
 Лемматизация через pymorphy3 — приводит падежи и формы к initial form
 («массажа/массажу/массажем» → «массаж»), затем token-overlap.
+
+Леммы кэшируются в два уровня:
+
+- в памяти процесса (warm) — до LOCAL_CACHE_SIZE слов;
+- в общем Django cache (Redis на проде, shared) — переживает рестарт
+  Celery-воркера и общий для всех воркеров. Предзаполняется командой
+  seed_lemma_cache из кластеров, запросов Вебмастера и лендингов.
+
+MorphAnalyzer (загрузка словарей — заметная часть старта воркера)
+создаётся лениво, только при первом слове, которого нет ни в одном
+кэше. Задачи, у которых все слова уже в кэше, pymorphy3 не импортируют.
+
+Счётчики warm/shared/miss — lemma_cache_stats(); flush_stats() сливает
+их в общий cache (видно в /api/agents/health/, секция lemma_cache).
 """
+import logging
 import re
-from functools import lru_cache
+import threading
 
-import pymorphy3
+from django.core.cache import cache
 
-_MORPH = pymorphy3.MorphAnalyzer()
+logger = logging.getLogger(__name__)
 
 STOP_WORDS = {
     "в", "на", "и", "или", "по", "с", "без", "для", "от", "до", "из",
@@ -16,18 +31,184 @@ STOP_WORDS = {
 }
 TOKEN_RE = re.compile(r"[а-яёa-z0-9]+", re.IGNORECASE)
 
+# Версия в ключе: смена словарей pymorphy3 → новый префикс, старые леммы
+# просто перестают читаться.
+CACHE_KEY_PREFIX = "lemma:v1:"
+STATS_KEY_PREFIX = "lemma:stats:"
+STAT_NAMES = ("warm", "shared", "miss")
+LOCAL_CACHE_SIZE = 20000
+
+_MORPH = None
+_MORPH_LOCK = threading.Lock()
+_local: dict[str, str] = {}
+_stats = dict.fromkeys(STAT_NAMES, 0)
+
+
+def _analyzer():
+    """MorphAnalyzer при первом промахе обоих кэшей (import + словари)."""
+    global _MORPH
+    if _MORPH is None:
+        with _MORPH_LOCK:
+            if _MORPH is None:
+                import pymorphy3
+                _MORPH = pymorphy3.MorphAnalyzer()
+    return _MORPH
+
+
+def _remember(lemmas: dict) -> None:
+    if len(_local) + len(lemmas) > LOCAL_CACHE_SIZE:
+        _local.clear()
+    _local.update(lemmas)
+
+
+def lemmas(words) -> dict:
+    """{слово: лемма} для набора слов: память → общий cache → pymorphy3.
+
+    Один round-trip в cache на вызов (get_many/set_many), поэтому выгодно
+    передавать сразу все слова фразы или пачки фраз.
+    """
+    result = {}
+    pending = []
+    for word in set(words):
+        lemma = _local.get(word)
+        if lemma is None:
+            pending.append(word)
+        else:
+            result[word] = lemma
+    _stats["warm"] += len(result)
+    if not pending:
+        return result
+
+    try:
+        shared = cache.get_many([CACHE_KEY_PREFIX + w for w in pending])
+    except Exception as exc:  # noqa: BLE001 — без Redis лемматизируем сами
+        logger.debug("lemma cache get failed: %s", exc)
+        shared = {}
+    found = {key[len(CACHE_KEY_PREFIX):]: lemma for key, lemma in shared.items()}
+    _stats["shared"] += len(found)
+
+    missing = [w for w in pending if w not in found]
+    if missing:
+        morph = _analyzer()
+        computed = {w: morph.parse(w)[0].normal_form for w in missing}
+        _stats["miss"] += len(computed)
+        try:
+            cache.set_many({CACHE_KEY_PREFIX + w: l for w, l in computed.items()}, None)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("lemma cache set failed: %s", exc)
+        found.update(computed)
+
+    _remember(found)
+    result.update(found)
+    return result
+
 
-@lru_cache(maxsize=20000)
 def _lemma(word: str) -> str:
-    return _MORPH.parse(word)[0].normal_form
+    return lemmas([word])[word]
+
+
+def _words(phrase: str) -> list:
+    return [
+        w for w in TOKEN_RE.findall(phrase.lower())
+        if w not in STOP_WORDS and len(w) >= 2
+    ]
 
 
 def tokens(phrase: str) -> frozenset:
     """Разбивает фразу на токены, убирает стоп-слова, лемматизирует."""
-    return frozenset(
-        _lemma(w) for w in TOKEN_RE.findall(phrase.lower())
-        if w not in STOP_WORDS and len(w) >= 2
-    )
+    words = _words(phrase)
+    if not words:
+        return frozenset()
+    lemma_of = lemmas(words)
+    return frozenset(lemma_of[w] for w in words)
+
+
+def tokens_many(phrases) -> list:
+    """tokens() для списка фраз одним обращением к общему кэшу."""
+    split = [_words(p or "") for p in phrases]
+    lemma_of = lemmas(w for words in split for w in words)
+    return [frozenset(lemma_of[w] for w in words) for words in split]
+
+
+# ── Счётчики и предзаполнение ─────────────────────────────────────────
+
+def lemma_cache_stats() -> dict:
+    """Счётчики этого процесса + hit_ratio (warm+shared от всех слов)."""
+    stats = dict(_stats)
+    total = sum(stats.values())
+    stats["hit_ratio"] = round((stats["warm"] + stats["shared"]) / total, 3) if total else 0.0
+    stats["analyzer_loaded"] = _MORPH is not None
+    stats["local_size"] = len(_local)
+    return stats
+
+
+def flush_stats() -> None:
+    """Добавить счётчики процесса в общий cache и обнулить их."""
+    for name in STAT_NAMES:
+        value = _stats[name]
+        if not value:
+            continue
+        key = STATS_KEY_PREFIX + name
+        try:
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                if not cache.add(key, value, None):
+                    cache.incr(key, value)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("lemma stats flush failed: %s", exc)
+            return
+        _stats[name] = 0
+
+
+def get_shared_stats() -> dict:
+    """Суммарные счётчики всех процессов (после их flush_stats)."""
+    raw = cache.get_many([STATS_KEY_PREFIX + n for n in STAT_NAMES])
+    stats = {n: int(raw.get(STATS_KEY_PREFIX + n) or 0) for n in STAT_NAMES}
+    total = sum(stats.values())
+    stats["hit_ratio"] = round((stats["warm"] + stats["shared"]) / total, 3) if total else 0.0
+    return stats
+
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def seed_from_db(batch_size: int = 500) -> int:
+    """Предзаполнить общий кэш словарём SEO: keywords кластеров, запросы
+    SeoRankSnapshot, тексты LandingPage. Возвращает число фраз."""
+    from agents.models import LandingPage, SeoKeywordCluster, SeoRankSnapshot
+
+    def phrases():
+        for keywords in SeoKeywordCluster.objects.values_list("keywords", flat=True):
+            yield from _iter_strings(keywords or [])
+        yield from (
+            SeoRankSnapshot.objects.exclude(query="")
+            .values_list("query", flat=True).distinct().iterator()
+        )
+        for row in LandingPage.objects.values_list(
+            "meta_title", "meta_description", "h1", "blocks",
+        ).iterator():
+            yield from _iter_strings(list(row))
+
+    count = 0
+    batch = []
+    for phrase in phrases():
+        batch.append(phrase)
+        if len(batch) >= batch_size:
+            tokens_many(batch)
+            count += len(batch)
+            batch = []
+    tokens_many(batch)
+    count += len(batch)
+    return count
 
 
 def cluster_match(kw_tokens: frozenset, q_tokens: frozenset, min_overlap: float = 0.5) -> bool:
@@ -42,3 +223,78 @@ def cluster_match(kw_tokens: frozenset, q_tokens: frozenset, min_overlap: float
     if len(kw_tokens) <= 2:
         return overlap == len(kw_tokens)
     return overlap / len(kw_tokens) >= min_overlap
+
+
+class QueryIndex:
+    """Инвертированный индекс «лемма → номера запросов» для cluster_match.
+
+    Прямой перебор — O(кластеры × keywords × запросы) пересечений
+    множеств. Здесь запросы лемматизируются один раз, а для keyword'а
+    кандидаты берутся из posting-листов его самых редких лемм, и overlap
+    считается только для них; запросы без этих лемм не рассматриваются.
+
+    Результат идентичен перебору с cluster_match: те же запросы в том же
+    порядке (по keyword'ам, внутри — в порядке запросов), поэтому суммы
+    и средние по ним совпадают до бита.
+
+    Example:
+        index = QueryIndex(q["query"] for q in query_stats)
+        matched = [query_stats[i] for i in index.match_keywords(cluster.keywords)]
+    """
+
+    def __init__(self, phrases, token_sets=None):
+        """phrases — тексты запросов; token_sets — уже посчитанные tokens()."""
+        self.token_sets = (
+            list(token_sets) if token_sets is not None else tokens_many(list(phrases))
+        )
+        self.postings: dict[str, list[int]] = {}
+        for qid, q_tokens in enumerate(self.token_sets):
+            for lemma in q_tokens:
+                self.postings.setdefault(lemma, []).append(qid)
+
+    def __len__(self) -> int:
+        return len(self.token_sets)
+
+    def match_tokens(self, kw_tokens: frozenset, min_overlap: float = 0.5) -> list[int]:
+        """Номера запросов (по возрастанию), для которых cluster_match(kw_tokens, q) истинно."""
+        if not kw_tokens:
+            return []
+        size = len(kw_tokens)
+        # Минимальный overlap, при котором cluster_match даёт True —
+        # тем же выражением, что в cluster_match, без своих округлений.
+        if size <= 2:
+            need = size
+        else:
+            need = next((k for k in range(size + 1) if k / size >= min_overlap), None)
+            if need is None:
+                return []
+        if need == 0:
+            return list(range(len(self.token_sets)))
+
+        # Запрос с ≥need общими леммами обязан содержать хотя бы одну из
+        # (size - need + 1) самых редких лемм keyword'а — остальные
+        # posting-листы (обычно длинные «массаж»/«пенза») не обходим.
+        lemmas = sorted(kw_tokens, key=lambda lemma: len(self.postings.get(lemma, ())))
+        candidates: set[int] = set()
+        for lemma in lemmas[:size - need + 1]:
+            candidates.update(self.postings.get(lemma, ()))
+
+        return sorted(
+            qid for qid in candidates
+            if len(kw_tokens & self.token_sets[qid]) >= need
+        )
+
+    def match_keywords(self, keywords, min_overlap: float = 0.5) -> list[int]:
+        """Номера запросов, совпавших хотя бы с одним keyword'ом кластера.
+
+        Порядок — как у вложенного цикла «keyword → запросы»: сначала
+        совпадения первого keyword'а, затем новые от второго и т.д.
+        """
+        seen: set[int] = set()
+        result: list[int] = []
+        for kw_tokens in tokens_many(keywords or []):
+            for qid in self.match_tokens(kw_tokens, min_overlap):
+                if qid not in seen:
+                    seen.add(qid)
+                    result.append(qid)
+        return result
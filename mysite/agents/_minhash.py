@@ -0,0 +1,165 @@
+"""MinHash-сигнатуры и LSH-индекс контента LandingPage (поиск почти-дублей).
+
+ContentDuplicateCheck сравнивал кандидата SequenceMatcher'ом с КАЖДЫМ
+опубликованным лендингом — O(страниц × длина²). Здесь:
+
+- у каждого LandingPage при сохранении считается MinHash-сигнатура
+  текста блоков (символьные SHINGLE_SIZE-граммы, NUM_PERM хешей) и
+  BANDS ключей LSH (по ROWS хешей в полосе) — модель LandingPageBand;
+- кандидаты в дубли — лендинги, у которых совпал хотя бы один ключ
+  полосы (индексированный запрос в БД, не перебор);
+- точный SequenceMatcher — только для кандидатов.
+
+32 полосы × 3 строки: пары с Jaccard ≥ 0.5 становятся кандидатами с
+вероятностью ≥ 98.6%, при Jaccard 0.15 — около 10%.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 31) - 1  # a·h < 2^62 — без переполнения int64
+
+_rng = np.random.RandomState(20260401)  # фиксированный seed: сигнатуры хранятся в БД
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64)
+
+
+def qc_text(blocks) -> str:
+    """Текст блоков ровно в том виде, в каком его сравнивает ContentDuplicateCheck."""
+    blocks = blocks or {}
+    return json.dumps(blocks, ensure_ascii=False) if isinstance(blocks, dict) else str(blocks)
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def shingles(blocks) -> set:
+    """Символьные n-граммы по значениям блоков (ключи JSON общие у всех
+    лендингов и только завышали бы сходство)."""
+    text = " ".join(" ".join(s.lower().split()) for s in _strings(blocks or {}))
+    if len(text) < SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(blocks) -> list:
+    """MinHash-сигнатура блоков (NUM_PERM int). [] — пустой контент."""
+    grams = shingles(blocks)
+    if not grams:
+        return []
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little") % _PRIME
+            for g in grams
+        ),
+        dtype=np.int64, count=len(grams),
+    )
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1).tolist()
+
+
+def band_keys(sig: list) -> list:
+    """LSH-ключи полос: "номер:хеш ROWS значений"."""
+    if len(sig) != NUM_PERM:
+        return []
+    keys = []
+    for band in range(BANDS):
+        chunk = ",".join(map(str, sig[band * ROWS:(band + 1) * ROWS]))
+        keys.append(f"{band}:{hashlib.md5(chunk.encode()).hexdigest()[:16]}")
+    return keys
+
+
+def estimate_jaccard(sig_a: list, sig_b: list) -> float:
+    """Оценка сходства множеств шинглов по двум сигнатурам."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return float(np.mean(np.asarray(sig_a) == np.asarray(sig_b)))
+
+
+# ── Индекс в БД ───────────────────────────────────────────────────────
+
+def replace_bands(landing, sig: list) -> None:
+    """Перезаписать LSH-ключи лендинга (вызывается из LandingPage.save)."""
+    from agents.models import LandingPageBand
+
+    LandingPageBand.objects.filter(landing=landing).delete()
+    LandingPageBand.objects.bulk_create(
+        [LandingPageBand(landing=landing, band=key) for key in band_keys(sig)]
+    )
+
+
+def candidate_ids(sig: list, exclude_pk=None) -> set:
+    """pk лендингов, делящих с сигнатурой хотя бы одну LSH-полосу."""
+    from agents.models import LandingPageBand
+
+    keys = band_keys(sig)
+    if not keys:
+        return set()
+    qs = LandingPageBand.objects.filter(band__in=keys)
+    if exclude_pk is not None:
+        qs = qs.exclude(landing_id=exclude_pk)
+    return set(qs.values_list("landing_id", flat=True).distinct())
+
+
+def candidate_pairs() -> set:
+    """Все пары (pk_a, pk_b), pk_a < pk_b, с общей LSH-полосой — по всему корпусу."""
+    from django.db.models import Count
+
+    from agents.models import LandingPageBand
+
+    shared = (
+        LandingPageBand.objects.values("band")
+        .annotate(n=Count("landing_id")).filter(n__gt=1).values("band")
+    )
+    by_band: dict = {}
+    for band, landing_id in LandingPageBand.objects.filter(band__in=shared).values_list("band", "landing_id"):
+        by_band.setdefault(band, []).append(landing_id)
+
+    pairs = set()
+    for ids in by_band.values():
+        ids = sorted(set(ids))
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                pairs.add((a, b))
+    return pairs
+
+
+def find_duplicate_pairs(threshold: float = 0.85, statuses=None) -> list:
+    """Пары почти-дублей по всему корпусу: [(slug_a, slug_b, ratio)] по убыванию ratio.
+
+    LSH отбирает кандидатов, точное сходство — тот же SequenceMatcher по
+    qc_text, что в ContentDuplicateCheck.
+    """
+    from difflib import SequenceMatcher
+
+    from agents.models import LandingPage
+
+    pairs = candidate_pairs()
+    if not pairs:
+        return []
+    qs = LandingPage.objects.filter(pk__in={pk for pair in pairs for pk in pair})
+    if statuses:
+        qs = qs.filter(status__in=statuses)
+    pages = {lp.pk: lp for lp in qs.only("slug", "blocks")}
+
+    result = []
+    for a, b in pairs:
+        if a not in pages or b not in pages:
+            continue
+        ratio = SequenceMatcher(None, qc_text(pages[a].blocks), qc_text(pages[b].blocks)).ratio()
+        if ratio >= threshold:
+            result.append((pages[a].slug, pages[b].slug, round(ratio, 3)))
+    result.sort(key=lambda row: (-row[2], row[0], row[1]))
+    return result
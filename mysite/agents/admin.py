@@ -10,6 +10,7 @@ from .models import (
     ContentPlan, DailyMetric,
     SeoKeywordCluster, SeoRankSnapshot, SeoClusterSnapshot,
     LandingPage, SeoTask, WeeklyBacklog, RetentionSnapshot,
+    YClientsRecord,
 )
 
 
@@ -434,12 +435,16 @@ class LandingPageAdmin(admin.ModelAdmin):
     @admin.action(description="Opublikovat")
     def action_publish(self, request, queryset):
         from django.utils import timezone
+        from agents.signals import purge_landing_pages
         to_publish = queryset.filter(status="review")
+        pks = list(to_publish.values_list("pk", flat=True))
         count = to_publish.update(
             status="published",
             published_at=timezone.now(),
             moderated_by=request.user,
         )
+        # update() мимо post_save — кэш страниц сбрасываем сами
+        purge_landing_pages(pks)
         skipped = queryset.count() - count
         self.message_user(request, f"Published: {count}. Skipped: {skipped}.")
 
@@ -650,3 +655,32 @@ class RetentionSnapshotAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(YClientsRecord)
+class YClientsRecordAdmin(admin.ModelAdmin):
+    list_display = [
+        "record_id", "date", "staff_name", "client_key",
+        "revenue", "status_id", "deleted", "changed_at",
+    ]
+    list_filter = ["deleted", "status_id"]
+    search_fields = ["record_id", "client_key", "client_phone", "staff_name"]
+    date_hierarchy = "date"
+    ordering = ["-date", "-record_id"]
+    readonly_fields = [
+        "record_id", "date", "datetime", "client_key", "client_id",
+        "client_phone", "staff_id", "staff_name", "service_id", "service_ids",
+        "revenue", "status_id", "attendance", "deleted", "changed_at",
+        "raw_display", "synced_at",
+    ]
+    exclude = ["raw"]
+
+    def raw_display(self, obj):
+        return _pretty_json_html(obj.raw)
+    raw_display.short_description = "Исходная запись"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
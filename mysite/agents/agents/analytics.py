@@ -29,16 +29,13 @@ YCLIENTS_STATUS_LABELS = {
 def _gather_yclients(start_date: str, end_date: str) -> dict:
     """Получить статистику из YClients API. Возвращает пустой dict при ошибке."""
     try:
-        from services_app.yclients_api import YClientsAPIError, get_yclients_api
-        api = get_yclients_api()
-        records = api.get_records(start_date=start_date, end_date=end_date)
+        from agents import yclients_records
+        records = yclients_records.iter_records(start_date, end_date)
     except Exception as exc:
         logger.warning("YClients get_records недоступен: %s", exc)
         return {}
 
-    if not records:
-        return {"yclients_total": 0, "yclients_records": []}
-
+    total = 0
     by_service: dict[str, int] = {}
     by_master: dict[str, int] = {}
     by_status: dict[str, int] = {}
@@ -46,6 +43,7 @@ def _gather_yclients(start_date: str, end_date: str) -> dict:
     revenue = 0.0
 
     for rec in records:
+        total += 1
         # Услуги
         for svc in rec.get("services", []):
             name = svc.get("title") or svc.get("name") or "Неизвестная услуга"
@@ -68,13 +66,16 @@ def _gather_yclients(start_date: str, end_date: str) -> dict:
         from agents.agents._revenue import extract_record_revenue
         revenue += extract_record_revenue(rec)
 
+    if not total:
+        return {"yclients_total": 0, "yclients_records": []}
+
     top_services = sorted(by_service.items(), key=lambda x: -x[1])[:10]
     top_masters = sorted(by_master.items(), key=lambda x: -x[1])[:5]
 
     return {
-        "yclients_total": len(records),
+        "yclients_total": total,
         "yclients_cancelled": cancelled,
-        "yclients_cancel_rate": round(cancelled / len(records) * 100) if records else 0,
+        "yclients_cancel_rate": round(cancelled / total * 100),
         "yclients_revenue": round(revenue),
         "yclients_top_services": top_services,
         "yclients_top_masters": top_masters,
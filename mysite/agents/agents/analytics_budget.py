@@ -52,19 +52,20 @@ class AnalyticsBudgetAgent:
     def _gather_yclients(self, start: str, end: str) -> dict:
         """Получить визиты и выручку из YClients."""
         try:
-            from services_app.yclients_api import get_yclients_api
-            api = get_yclients_api()
-            records = api.get_records(start_date=start, end_date=end)
-            if not records:
-                return {}
-            from agents.agents._revenue import sum_records_revenue
-            revenue = sum_records_revenue(records)
+            from agents import yclients_records
+            from agents.agents._revenue import extract_record_revenue
+            visits = 0
+            revenue = 0.0
             statuses: dict[int, int] = {}
-            for r in records:
+            for r in yclients_records.iter_records(start, end):
+                visits += 1
+                revenue += extract_record_revenue(r)
                 sid = int((r.get("status") or {}).get("id") or 0)
                 statuses[sid] = statuses.get(sid, 0) + 1
+            if not visits:
+                return {}
             return {
-                "yclients_visits": len(records),
+                "yclients_visits": visits,
                 "yclients_revenue": round(revenue),
                 "yclients_statuses": statuses,
             }
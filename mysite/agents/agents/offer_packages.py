@@ -66,19 +66,20 @@ class OfferPackagesAgent:
         # --- YClients (30д) ---
         yc_data: dict = {}
         try:
-            from services_app.yclients_api import get_yclients_api
-            api = get_yclients_api()
-            records = api.get_records(str(month_ago), str(today))
-            if records:
-                from agents.agents._revenue import sum_records_revenue
-                revenue = sum_records_revenue(records)
-                svc_counts: dict[str, int] = {}
-                for r in records:
-                    for s in r.get("services", []):
-                        n = s.get("title") or s.get("name") or "?"
-                        svc_counts[n] = svc_counts.get(n, 0) + 1
+            from agents import yclients_records
+            from agents.agents._revenue import extract_record_revenue
+            total = 0
+            revenue = 0.0
+            svc_counts: dict[str, int] = {}
+            for r in yclients_records.iter_records(month_ago, today):
+                total += 1
+                revenue += extract_record_revenue(r)
+                for s in r.get("services", []):
+                    n = s.get("title") or s.get("name") or "?"
+                    svc_counts[n] = svc_counts.get(n, 0) + 1
+            if total:
                 yc_data = {
-                    "yclients_total": len(records),
+                    "yclients_total": total,
                     "yclients_revenue_30d": round(revenue),
                     "yclients_top_services": sorted(svc_counts.items(), key=lambda x: -x[1])[:10],
                 }
@@ -194,36 +194,39 @@ class InternalLinksCheck(BaseQCCheck):
 
 
 class ContentDuplicateCheck(BaseQCCheck):
-    """Fuzzy-match контента с другими published LandingPage (порог 0.85)."""
+    """Fuzzy-match контента с другими published LandingPage (порог 0.85).
+
+    SequenceMatcher — только для кандидатов из LSH-индекса MinHash
+    (agents._minhash) и для ещё не проиндексированных страниц, а не для
+    всего корпуса.
+    """
     name = "content_duplicate"
     severity = "critical"
 
     SIMILARITY_THRESHOLD = 0.85
 
     def run(self, landing) -> QCResult:
+        from django.db.models import Q
+
+        from agents import _minhash
         from agents.models import LandingPage
 
-        blocks = landing.blocks or {}
-        text = json.dumps(blocks, ensure_ascii=False) if isinstance(blocks, dict) else str(blocks)
+        text = _minhash.qc_text(landing.blocks)
 
         if len(text) < 50:
             return self._fail("Контент слишком короткий (< 50 символов)")
 
+        candidates = _minhash.candidate_ids(_minhash.signature(landing.blocks), exclude_pk=landing.pk)
         published = (
             LandingPage.objects
             .filter(status=LandingPage.STATUS_PUBLISHED)
+            .filter(Q(pk__in=candidates) | Q(content_minhash=[]))
             .exclude(pk=landing.pk)
             .only("slug", "blocks")
         )
 
         for other in published:
-            other_blocks = other.blocks or {}
-            other_text = (
-                json.dumps(other_blocks, ensure_ascii=False)
-                if isinstance(other_blocks, dict)
-                else str(other_blocks)
-            )
-            ratio = SequenceMatcher(None, text, other_text).ratio()
+            ratio = SequenceMatcher(None, text, _minhash.qc_text(other.blocks)).ratio()
             if ratio >= self.SIMILARITY_THRESHOLD:
                 return self._fail(
                     f"Дубль контента с /{other.slug}/ (similarity {ratio:.0%})",
@@ -128,6 +128,8 @@ class SEOLandingAgent:
                 result["pages_map"][p["url"]] = p
 
             result["top_queries"] = wm.get_top_queries(date_from, date_to, limit=50)
+            # Под week_start окна запроса — не под сегодняшней датой дневных снимков
+            self._save_webmaster_snapshots(week_start, pages_wm, result["top_queries"])
 
             logger.info(
                 "SEOLandingAgent: Вебмастер API — %d страниц, %d запросов",
@@ -140,6 +142,34 @@ class SEOLandingAgent:
 
         return result
 
+    def _save_webmaster_snapshots(self, week_start: date, pages: list, queries: list) -> int:
+        """Сохранить данные fallback-вызова в SeoRankSnapshot одним пакетным upsert —
+        следующий прогон агента (и analyze_rank_changes) прочитает их из БД."""
+        from agents._bulk import bulk_upsert
+
+        rows = [
+            SeoRankSnapshot(
+                week_start=week_start, page_url=p["url"], query="",
+                clicks=p.get("clicks", 0), impressions=p.get("impressions", 0),
+                ctr=p.get("ctr", 0.0), avg_position=p.get("avg_position", 0.0),
+                source="webmaster",
+            )
+            for p in pages if p.get("url")
+        ] + [
+            SeoRankSnapshot(
+                week_start=week_start, page_url="", query=q["query"],
+                clicks=q.get("clicks", 0), impressions=q.get("impressions", 0),
+                ctr=q.get("ctr", 0.0), avg_position=q.get("avg_position", 0.0),
+                source="webmaster",
+            )
+            for q in queries if q.get("query")
+        ]
+        return bulk_upsert(
+            SeoRankSnapshot, rows,
+            unique_fields=SeoRankSnapshot.UPSERT_KEY,
+            update_fields=SeoRankSnapshot.UPSERT_FIELDS,
+        )
+
     def gather_data(self) -> dict:
         """
         Для каждой активной услуги:
@@ -5,3 +5,6 @@ class AgentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "agents"
     verbose_name = "AI Агенты"
+
+    def ready(self):
+        import agents.signals
@@ -0,0 +1,110 @@
+"""
+Бенчмарк сопоставления keywords ↔ запросы: перебор cluster_match vs QueryIndex.
+
+Использование:
+    python manage.py bench_seo_matching                     # до 10k запросов × 500 кластеров
+    python manage.py bench_seo_matching --max-queries 20000 --max-clusters 1000
+    python manage.py bench_seo_matching --no-naive          # только индекс (быстро)
+
+Данные синтетические: леммы с Zipf-распределением (несколько «частых»
+слов вроде «массаж»/«пенза» встречаются почти везде, хвост — редко),
+запросы по 2–5 лемм, кластеры по 3–8 keywords из 1–4 лемм. Лемматизация
+не меряется — токены строятся один раз и общие для обоих способов.
+Для каждой точки проверяется, что результаты совпадают 1:1.
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from agents._matching import QueryIndex, cluster_match
+
+
+def _make_data(n_queries: int, n_clusters: int, vocab: int, seed: int):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    weights = [1 / (i + 1) for i in range(vocab)]
+
+    def phrase(lo, hi):
+        return frozenset(rng.choices(words, weights, k=rng.randint(lo, hi)))
+
+    queries = [phrase(2, 5) for _ in range(n_queries)]
+    clusters = [[phrase(1, 4) for _ in range(rng.randint(3, 8))] for _ in range(n_clusters)]
+    return queries, clusters
+
+
+def _naive(queries, clusters):
+    result = []
+    for keywords in clusters:
+        matched_ids, matched = set(), []
+        for kw_tokens in keywords:
+            for qid, q_tokens in enumerate(queries):
+                if qid not in matched_ids and cluster_match(kw_tokens, q_tokens):
+                    matched.append(qid)
+                    matched_ids.add(qid)
+        result.append(matched)
+    return result
+
+
+def _indexed(queries, clusters):
+    index = QueryIndex(None, token_sets=queries)
+    result = []
+    for keywords in clusters:
+        seen, matched = set(), []
+        for kw_tokens in keywords:
+            for qid in index.match_tokens(kw_tokens):
+                if qid not in seen:
+                    seen.add(qid)
+                    matched.append(qid)
+        result.append(matched)
+    return result
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк fuzzy-matching SEO-кластеров: перебор vs инвертированный индекс"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-queries", type=int, default=10000)
+        parser.add_argument("--max-clusters", type=int, default=500)
+        parser.add_argument("--steps", type=int, default=4, help="Точек масштабирования")
+        parser.add_argument("--vocab", type=int, default=3000, help="Размер словаря лемм")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--no-naive", action="store_true", default=False,
+            help="Не запускать перебор (на больших объёмах он идёт минутами)",
+        )
+
+    def handle(self, *args, **options):
+        H = self.style.MIGRATE_HEADING
+        E = self.style.ERROR
+        S = self.style.SUCCESS
+
+        steps = max(options["steps"], 1)
+        self.stdout.write(H(
+            f"{'запросы':>8} {'кластеры':>9} {'перебор, с':>11} {'индекс, с':>10} {'ускорение':>10}"
+        ))
+        for step in range(1, steps + 1):
+            n_queries = options["max_queries"] * step // steps
+            n_clusters = options["max_clusters"] * step // steps
+            queries, clusters = _make_data(n_queries, n_clusters, options["vocab"], options["seed"])
+
+            started = time.perf_counter()
+            indexed = _indexed(queries, clusters)
+            t_index = time.perf_counter() - started
+
+            if options["no_naive"]:
+                self.stdout.write(f"{n_queries:>8} {n_clusters:>9} {'—':>11} {t_index:>10.3f} {'—':>10}")
+                continue
+
+            started = time.perf_counter()
+            naive = _naive(queries, clusters)
+            t_naive = time.perf_counter() - started
+
+            if naive != indexed:
+                self.stdout.write(E(f"РАСХОЖДЕНИЕ на {n_queries}×{n_clusters}"))
+                return
+            self.stdout.write(
+                f"{n_queries:>8} {n_clusters:>9} {t_naive:>11.3f} {t_index:>10.3f} "
+                f"{t_naive / t_index if t_index else 0:>9.0f}x"
+            )
+        self.stdout.write(S("Результаты индекса совпадают с перебором cluster_match"))
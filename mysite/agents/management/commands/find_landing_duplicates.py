@@ -0,0 +1,54 @@
+"""
+Отчёт о почти-дублях среди LandingPage по всему корпусу (MinHash + LSH).
+
+Использование:
+    python manage.py find_landing_duplicates                      # все статусы, порог 0.85
+    python manage.py find_landing_duplicates --status published --status review
+    python manage.py find_landing_duplicates --threshold 0.7
+    python manage.py find_landing_duplicates --reindex            # пересобрать сигнатуры
+
+Кандидаты — пары с общей LSH-полосой (agents._minhash), для них считается
+тот же SequenceMatcher, что в ContentDuplicateCheck. --reindex нужен после
+смены параметров MinHash или массовой правки blocks через queryset.update().
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Поиск пар почти-дублей контента среди посадочных страниц"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=0.85)
+        parser.add_argument(
+            "--status", action="append", default=None,
+            help="Статус лендингов (можно несколько раз); по умолчанию — все",
+        )
+        parser.add_argument(
+            "--reindex", action="store_true", default=False,
+            help="Пересчитать MinHash-сигнатуры и LSH-полосы всех лендингов",
+        )
+
+    def handle(self, *args, **options):
+        from agents import _minhash
+        from agents.models import LandingPage
+
+        if options["reindex"]:
+            started = time.monotonic()
+            count = 0
+            for landing in LandingPage.objects.only("pk", "blocks").iterator():
+                sig = _minhash.signature(landing.blocks)
+                LandingPage.objects.filter(pk=landing.pk).update(content_minhash=sig)
+                _minhash.replace_bands(landing, sig)
+                count += 1
+            self.stdout.write(f"Переиндексировано лендингов: {count} ({time.monotonic() - started:.1f}с)")
+
+        started = time.monotonic()
+        pairs = _minhash.find_duplicate_pairs(options["threshold"], statuses=options["status"])
+        elapsed = time.monotonic() - started
+
+        for slug_a, slug_b, ratio in pairs:
+            self.stdout.write(f"/{slug_a}/ ↔ /{slug_b}/  {ratio:.0%}")
+        style = self.style.WARNING if pairs else self.style.SUCCESS
+        self.stdout.write(style(f"Пар-дублей: {len(pairs)} ({elapsed:.1f}с)"))
@@ -0,0 +1,31 @@
+"""
+Предзаполнение общего кэша лемм (agents._matching) словарём SEO.
+
+Использование:
+    python manage.py seed_lemma_cache
+
+Берёт keywords всех SeoKeywordCluster, запросы SeoRankSnapshot и тексты
+LandingPage (meta, H1, блоки). После этого collect_rank_snapshots и
+агенты на свежем воркере получают леммы из Redis и не грузят pymorphy3.
+Запускать после деплоя или после seed_seo_clusters.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Предзаполнение общего кэша лемм из SEO-кластеров, запросов и лендингов"
+
+    def handle(self, *args, **options):
+        from agents._matching import flush_stats, lemma_cache_stats, seed_from_db
+
+        started = time.monotonic()
+        phrases = seed_from_db()
+        stats = lemma_cache_stats()
+        flush_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Фраз: {phrases}, новых лемм: {stats['miss']}, "
+            f"уже в кэше: {stats['warm'] + stats['shared']} "
+            f"({time.monotonic() - started:.1f}с)"
+        ))
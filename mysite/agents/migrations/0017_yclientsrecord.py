@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0016_rename_week_start_verbose'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YClientsRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_id', models.BigIntegerField(unique=True, verbose_name='ID записи YClients')),
+                ('date', models.DateField(db_index=True, verbose_name='Дата визита')),
+                ('datetime', models.DateTimeField(blank=True, null=True, verbose_name='Дата и время визита')),
+                ('client_key', models.CharField(blank=True, db_index=True, help_text='client.id или телефон — как группирует collect_retention_metrics', max_length=64, verbose_name='Ключ клиента')),
+                ('client_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID клиента')),
+                ('client_phone', models.CharField(blank=True, max_length=32, verbose_name='Телефон клиента')),
+                ('staff_id', models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='ID мастера')),
+                ('staff_name', models.CharField(blank=True, max_length=200, verbose_name='Мастер')),
+                ('service_id', models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='ID первой услуги')),
+                ('service_ids', models.JSONField(blank=True, default=list, verbose_name='ID услуг')),
+                ('revenue', models.FloatField(db_index=True, default=0.0, verbose_name='Выручка (руб)')),
+                ('status_id', models.SmallIntegerField(default=0, verbose_name='Статус')),
+                ('attendance', models.SmallIntegerField(default=0, verbose_name='Посещение')),
+                ('deleted', models.BooleanField(default=False, verbose_name='Удалена')),
+                ('changed_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Изменена в YClients')),
+                ('raw', models.JSONField(default=dict, verbose_name='Исходная запись')),
+                ('synced_at', models.DateTimeField(auto_now=True, verbose_name='Синхронизирована')),
+            ],
+            options={
+                'verbose_name': 'Запись YClients',
+                'verbose_name_plural': 'Записи YClients',
+                'ordering': ['-date', '-record_id'],
+                'indexes': [models.Index(fields=['date', 'staff_id'], name='agents_ycrec_date_staff'), models.Index(fields=['client_key', 'date'], name='agents_ycrec_client_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+import hashlib
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+
+
+# Снимок agents._minhash на момент миграции: живой модуль не импортируем —
+# смена параметров там не должна менять то, что пишет эта миграция.
+SHINGLE_SIZE = 5
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+PRIME = (1 << 31) - 1
+SEED = 20260401
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def _signature(blocks, coef_a, coef_b) -> list:
+    text = " ".join(" ".join(s.lower().split()) for s in _strings(blocks or {}))
+    if len(text) < SHINGLE_SIZE:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    if not grams:
+        return []
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little") % PRIME
+            for g in grams
+        ),
+        dtype=np.int64, count=len(grams),
+    )
+    return ((coef_a[:, None] * hashes[None, :] + coef_b[:, None]) % PRIME).min(axis=1).tolist()
+
+
+def _band_keys(sig: list) -> list:
+    if len(sig) != NUM_PERM:
+        return []
+    keys = []
+    for band in range(BANDS):
+        chunk = ",".join(map(str, sig[band * ROWS:(band + 1) * ROWS]))
+        keys.append(f"{band}:{hashlib.md5(chunk.encode()).hexdigest()[:16]}")
+    return keys
+
+
+def backfill_minhash(apps, schema_editor):
+    """Сигнатуры и LSH-полосы для уже существующих лендингов.
+
+    Новые и изменённые страницы индексирует LandingPage.save(); при смене
+    параметров MinHash индекс пересобирает find_landing_duplicates --reindex.
+    """
+    rng = np.random.RandomState(SEED)
+    coef_a = rng.randint(1, PRIME, size=NUM_PERM, dtype=np.int64)
+    coef_b = rng.randint(0, PRIME, size=NUM_PERM, dtype=np.int64)
+
+    LandingPage = apps.get_model("agents", "LandingPage")
+    LandingPageBand = apps.get_model("agents", "LandingPageBand")
+    for landing in LandingPage.objects.only("pk", "blocks").iterator():
+        sig = _signature(landing.blocks, coef_a, coef_b)
+        LandingPage.objects.filter(pk=landing.pk).update(content_minhash=sig)
+        LandingPageBand.objects.bulk_create(
+            [LandingPageBand(landing_id=landing.pk, band=key) for key in _band_keys(sig)]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0017_yclientsrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landingpage',
+            name='content_minhash',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Сигнатура блоков для поиска дублей (agents._minhash). Пересчитывается при сохранении.', verbose_name='MinHash контента'),
+        ),
+        migrations.CreateModel(
+            name='LandingPageBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.CharField(db_index=True, max_length=40, verbose_name='Ключ полосы')),
+                ('landing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_bands', to='agents.landingpage')),
+            ],
+            options={
+                'verbose_name': 'LSH-полоса лендинга',
+                'verbose_name_plural': 'LSH-полосы лендингов',
+            },
+        ),
+        migrations.RunPython(backfill_minhash, migrations.RunPython.noop),
+    ]
@@ -245,6 +245,10 @@ class SeoRankSnapshot(models.Model):
     source       = models.CharField("Источник", max_length=50, default="webmaster")
     created_at   = models.DateTimeField("Создан", auto_now_add=True)
 
+    # Ключ и перезаписываемые поля для пакетного upsert (agents._bulk.bulk_upsert)
+    UPSERT_KEY = ["week_start", "page_url", "query"]
+    UPSERT_FIELDS = ["clicks", "impressions", "ctr", "avg_position", "source"]
+
     class Meta:
         verbose_name = "SEO-снимок позиций"
         verbose_name_plural = "SEO-снимки позиций"
@@ -353,6 +357,10 @@ class LandingPage(models.Model):
     )
     created_at        = models.DateTimeField("Создано", auto_now_add=True)
     published_at      = models.DateTimeField("Опубликовано", null=True, blank=True)
+    content_minhash   = models.JSONField(
+        "MinHash контента", default=list, blank=True, editable=False,
+        help_text="Сигнатура блоков для поиска дублей (agents._minhash). Пересчитывается при сохранении.",
+    )
 
     objects = LandingPageQuerySet.as_manager()
 
@@ -364,6 +372,35 @@ class LandingPage(models.Model):
     def __str__(self):
         return f"{self.h1} [{self.get_status_display()}]"
 
+    def save(self, *args, **kwargs):
+        from agents import _minhash
+
+        update_fields = kwargs.get("update_fields")
+        reindex = update_fields is None or "blocks" in update_fields
+        if reindex:
+            self.content_minhash = _minhash.signature(self.blocks)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "content_minhash"}
+        super().save(*args, **kwargs)
+        if reindex:
+            _minhash.replace_bands(self, self.content_minhash)
+
+
+class LandingPageBand(models.Model):
+    """LSH-ключ полосы MinHash-сигнатуры лендинга (индекс кандидатов в дубли)."""
+    landing = models.ForeignKey(
+        LandingPage, on_delete=models.CASCADE,
+        related_name="lsh_bands",
+    )
+    band    = models.CharField("Ключ полосы", max_length=40, db_index=True)
+
+    class Meta:
+        verbose_name = "LSH-полоса лендинга"
+        verbose_name_plural = "LSH-полосы лендингов"
+
+    def __str__(self):
+        return f"{self.landing_id} | {self.band}"
+
 
 class SeoTask(models.Model):
     """
@@ -546,3 +583,59 @@ class RetentionSnapshot(models.Model):
             f"Удержание {self.date}: {self.total_clients} клиентов, "
             f"R30={self.retention_30d:.0f}%, отток={self.churn_rate:.0f}%"
         )
+
+
+class YClientsRecord(models.Model):
+    """
+    Локальное зеркало записей (визитов) YClients.
+
+    Заполняется инкрементально задачей sync_yclients_records
+    (agents.yclients_records.sync_records): первый запуск — бэкфилл за
+    YCLIENTS_RECORDS_BACKFILL_DAYS, дальше только изменённые после
+    watermark (max changed_at). Агенты и collect_retention_metrics читают
+    отсюда вместо постраничного обхода /records при каждом запуске.
+
+    raw — исходный dict YClients: читатели получают те же записи, что
+    отдавал get_records, и агрегируют их прежним кодом.
+    """
+    record_id = models.BigIntegerField("ID записи YClients", unique=True)
+    date = models.DateField("Дата визита", db_index=True)
+    datetime = models.DateTimeField("Дата и время визита", null=True, blank=True)
+
+    client_key = models.CharField(
+        "Ключ клиента", max_length=64, blank=True, db_index=True,
+        help_text="client.id или телефон — как группирует collect_retention_metrics",
+    )
+    client_id = models.BigIntegerField("ID клиента", null=True, blank=True)
+    client_phone = models.CharField("Телефон клиента", max_length=32, blank=True)
+
+    staff_id = models.BigIntegerField("ID мастера", null=True, blank=True, db_index=True)
+    staff_name = models.CharField("Мастер", max_length=200, blank=True)
+
+    service_id = models.BigIntegerField(
+        "ID первой услуги", null=True, blank=True, db_index=True,
+    )
+    service_ids = models.JSONField("ID услуг", default=list, blank=True)
+
+    revenue = models.FloatField("Выручка (руб)", default=0.0, db_index=True)
+    status_id = models.SmallIntegerField("Статус", default=0)
+    attendance = models.SmallIntegerField("Посещение", default=0)
+    deleted = models.BooleanField("Удалена", default=False)
+
+    changed_at = models.DateTimeField(
+        "Изменена в YClients", null=True, blank=True, db_index=True,
+    )
+    raw = models.JSONField("Исходная запись", default=dict)
+    synced_at = models.DateTimeField("Синхронизирована", auto_now=True)
+
+    class Meta:
+        verbose_name = "Запись YClients"
+        verbose_name_plural = "Записи YClients"
+        ordering = ["-date", "-record_id"]
+        indexes = [
+            models.Index(fields=["date", "staff_id"], name="agents_ycrec_date_staff"),
+            models.Index(fields=["client_key", "date"], name="agents_ycrec_client_date"),
+        ]
+
+    def __str__(self):
+        return f"Запись #{self.record_id} {self.date} — {self.staff_name or 'мастер?'}"
@@ -0,0 +1,302 @@
+"""Векторизованный расчёт удержания и когорт (NumPy).
+
+collect_retention_metrics раньше считал всё циклом по клиентам:
+fromisoformat на каждую дату, set на каждую ячейку когорты. Здесь
+визиты один раз раскладываются в колонки (VisitFrame: клиент, день,
+выручка, мастер + пары визит→услуга), а метрики считаются group-by
+операциями NumPy (unique/bincount) — годы истории за доли секунды.
+
+Семантика 1:1 с прежним циклом:
+
+- визит клиента = уникальный день (две записи в один день — один визит),
+  выручка — по всем записям;
+- R30/R60/R90 — второй визит не позже N дней после первого;
+- отток — последний визит больше CHURN_DAYS дней назад; по ушедшим —
+  сколько клиентов пользовались каждой услугой;
+- когорта — месяц первого визита, m{k} — доля клиентов когорты,
+  приходивших через k месяцев.
+
+Окна без повторной выгрузки: frame.window(start, end, staff_id=...)
+отдаёт срез (например, 365 дней или когорты одного мастера), compute()
+считает по нему.
+
+Example:
+    frame = VisitFrame.from_mirror()                 # вся история один раз
+    last_180 = frame.window(today - timedelta(days=180), today).compute(today, 180)
+    olga = frame.window(staff_id=7).compute(today, 365)
+"""
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import numpy as np
+
+CHURN_DAYS = 90
+RETENTION_WINDOWS = (30, 60, 90)
+TOP_CHURNED_LIMIT = 10
+
+
+@dataclass
+class RetentionMetrics:
+    """Результат расчёта — поля RetentionSnapshot без округления."""
+    period_days: int
+    total_clients: int
+    new_clients: int
+    returning_clients: int
+    retention_30d: float
+    retention_60d: float
+    retention_90d: float
+    avg_frequency: float
+    avg_check: float
+    avg_ltv: float
+    churn_count: int
+    churn_rate: float
+    total_visits: int
+    total_revenue: float
+    top_churned_services: list = field(default_factory=list)
+    cohort_data: dict = field(default_factory=dict)
+
+    def as_snapshot_defaults(self) -> dict:
+        """defaults для RetentionSnapshot.update_or_create (с прежним округлением)."""
+        return {
+            "period_days": self.period_days,
+            "total_clients": self.total_clients,
+            "new_clients": self.new_clients,
+            "returning_clients": self.returning_clients,
+            "retention_30d": round(self.retention_30d, 1),
+            "retention_60d": round(self.retention_60d, 1),
+            "retention_90d": round(self.retention_90d, 1),
+            "avg_frequency": round(self.avg_frequency, 2),
+            "avg_check": round(self.avg_check),
+            "avg_ltv_180d": round(self.avg_ltv),
+            "churn_count": self.churn_count,
+            "churn_rate": round(self.churn_rate, 1),
+            "top_churned_services": self.top_churned_services,
+            "cohort_data": self.cohort_data,
+        }
+
+
+def _pct(part: int, whole: int) -> float:
+    return part / whole * 100 if whole else 0.0
+
+
+class VisitFrame:
+    """Колонки визитов для расчёта удержания.
+
+    client/day/revenue/staff — по одному элементу на запись YClients;
+    svc_visit/svc_name — пары «индекс записи → код услуги».
+    client_keys/service_names — расшифровка кодов.
+    """
+
+    def __init__(
+        self,
+        client: np.ndarray,
+        day: np.ndarray,
+        revenue: np.ndarray,
+        staff: np.ndarray,
+        svc_visit: np.ndarray,
+        svc_name: np.ndarray,
+        client_keys: list,
+        service_names: list,
+    ):
+        self.client = client
+        self.day = day
+        self.revenue = revenue
+        self.staff = staff
+        self.svc_visit = svc_visit
+        self.svc_name = svc_name
+        self.client_keys = client_keys
+        self.service_names = service_names
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    # ── Построение ────────────────────────────────────────────────────
+
+    @classmethod
+    def _from_rows(cls, rows: Iterable[tuple]) -> "VisitFrame":
+        """rows: (client_key, "YYYY-MM-DD", revenue, staff_id, [service dicts])."""
+        client_codes: dict = {}
+        service_codes: dict = {}
+        client, day, revenue, staff = [], [], [], []
+        svc_visit, svc_name = [], []
+
+        for client_key, visit_date, rec_revenue, staff_id, services in rows:
+            if not client_key or not visit_date or len(visit_date) < 10:
+                continue
+            idx = len(day)
+            client.append(client_codes.setdefault(client_key, len(client_codes)))
+            day.append(visit_date)
+            revenue.append(rec_revenue)
+            staff.append(staff_id if staff_id is not None else -1)
+            for svc in services or []:
+                name = svc.get("title") or svc.get("name") or "?"
+                svc_visit.append(idx)
+                svc_name.append(service_codes.setdefault(name, len(service_codes)))
+
+        return cls(
+            client=np.asarray(client, dtype=np.int64),
+            day=np.asarray(day, dtype="datetime64[D]").astype(np.int64),
+            revenue=np.asarray(revenue, dtype=np.float64),
+            staff=np.asarray(staff, dtype=np.int64),
+            svc_visit=np.asarray(svc_visit, dtype=np.int64),
+            svc_name=np.asarray(svc_name, dtype=np.int64),
+            client_keys=list(client_codes),
+            service_names=list(service_codes),
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "VisitFrame":
+        """Из записей YClients (dict'ы /records) — один проход по потоку."""
+        from agents.agents._revenue import extract_record_revenue
+
+        def rows():
+            for rec in records:
+                client = rec.get("client") or {}
+                yield (
+                    client.get("id") or client.get("phone"),
+                    str(rec.get("date", ""))[:10],
+                    extract_record_revenue(rec),
+                    (rec.get("staff") or {}).get("id"),
+                    rec.get("services"),
+                )
+
+        return cls._from_rows(rows())
+
+    @classmethod
+    def from_mirror(cls, start=None, end=None) -> "VisitFrame":
+        """Из зеркала YClientsRecord: индексированные колонки, из raw — только services."""
+        from agents.models import YClientsRecord
+
+        qs = YClientsRecord.objects.filter(deleted=False).exclude(client_key="")
+        if start is not None:
+            qs = qs.filter(date__gte=start)
+        if end is not None:
+            qs = qs.filter(date__lte=end)
+        rows = (
+            (key, visit_date.isoformat(), revenue, staff_id, services)
+            for key, visit_date, revenue, staff_id, services in qs.values_list(
+                "client_key", "date", "revenue", "staff_id", "raw__services",
+            ).iterator(chunk_size=5000)
+        )
+        return cls._from_rows(rows)
+
+    # ── Окна ──────────────────────────────────────────────────────────
+
+    def window(self, start=None, end=None, staff_id=None) -> "VisitFrame":
+        """Срез визитов по датам [start, end] и/или мастеру — без новой выгрузки."""
+        mask = np.ones(len(self.day), dtype=bool)
+        if start is not None:
+            mask &= self.day >= np.datetime64(start, "D").astype(np.int64)
+        if end is not None:
+            mask &= self.day <= np.datetime64(end, "D").astype(np.int64)
+        if staff_id is not None:
+            mask &= self.staff == int(staff_id)
+
+        new_index = np.cumsum(mask) - 1
+        svc_mask = mask[self.svc_visit] if len(self.svc_visit) else np.zeros(0, dtype=bool)
+        return VisitFrame(
+            client=self.client[mask],
+            day=self.day[mask],
+            revenue=self.revenue[mask],
+            staff=self.staff[mask],
+            svc_visit=new_index[self.svc_visit[svc_mask]],
+            svc_name=self.svc_name[svc_mask],
+            client_keys=self.client_keys,
+            service_names=self.service_names,
+        )
+
+    # ── Расчёт ────────────────────────────────────────────────────────
+
+    def compute(self, today: datetime.date, period_days: int) -> RetentionMetrics | None:
+        """Метрики удержания по визитам фрейма. None — нет ни одного клиента."""
+        if not len(self.day):
+            return None
+
+        # Уникальные (клиент, день), отсортированы по клиенту, затем по дню
+        day_min = int(self.day.min())
+        span = int(self.day.max()) - day_min + 1
+        pairs = np.unique(self.client * span + (self.day - day_min))
+        pair_client = pairs // span
+        pair_day = pairs % span + day_min
+
+        clients, first_idx, visit_counts = np.unique(
+            pair_client, return_index=True, return_counts=True,
+        )
+        total_clients = len(clients)
+        first = pair_day[first_idx]
+        last = pair_day[first_idx + visit_counts - 1]
+
+        returning = visit_counts >= 2
+        second = pair_day[np.minimum(first_idx + 1, len(pair_day) - 1)]
+        gap = second - first
+        retained = {w: int(np.count_nonzero(returning & (gap <= w))) for w in RETENTION_WINDOWS}
+
+        today_day = int(np.datetime64(today, "D").astype(np.int64))
+        churned = (today_day - last) > CHURN_DAYS
+        churn_count = int(np.count_nonzero(churned))
+
+        total_visits = int(visit_counts.sum())
+        total_revenue = float(self.revenue.sum())
+        months_in_period = max(period_days / 30.0, 1)
+
+        return RetentionMetrics(
+            period_days=period_days,
+            total_clients=total_clients,
+            new_clients=int(np.count_nonzero(visit_counts == 1)),
+            returning_clients=int(np.count_nonzero(returning)),
+            retention_30d=_pct(retained[30], total_clients),
+            retention_60d=_pct(retained[60], total_clients),
+            retention_90d=_pct(retained[90], total_clients),
+            avg_frequency=(total_visits / total_clients) / months_in_period,
+            avg_check=total_revenue / total_visits if total_visits else 0.0,
+            avg_ltv=total_revenue / total_clients,
+            churn_count=churn_count,
+            churn_rate=_pct(churn_count, total_clients),
+            total_visits=total_visits,
+            total_revenue=total_revenue,
+            top_churned_services=self._top_churned(clients[churned]),
+            cohort_data=self._cohorts(pair_day, first_idx, visit_counts),
+        )
+
+    def _top_churned(self, churned_clients: np.ndarray) -> list[dict]:
+        """Услуги ушедших клиентов: сколько разных клиентов брали каждую."""
+        if not len(self.svc_visit) or not len(churned_clients):
+            return []
+        is_churned = np.zeros(len(self.client_keys), dtype=bool)
+        is_churned[churned_clients] = True
+        svc_client = self.client[self.svc_visit]
+        mask = is_churned[svc_client]
+        n_names = len(self.service_names)
+        distinct = np.unique(svc_client[mask] * n_names + self.svc_name[mask])
+        counts = np.bincount(distinct % n_names, minlength=n_names)
+
+        codes = np.flatnonzero(counts)
+        ranked = sorted(codes, key=lambda c: (-counts[c], self.service_names[c]))
+        return [
+            {"service": self.service_names[c], "count": int(counts[c])}
+            for c in ranked[:TOP_CHURNED_LIMIT]
+        ]
+
+    @staticmethod
+    def _cohorts(pair_day, first_idx, visit_counts) -> dict:
+        """{"YYYY-MM": {"m0": 100, "m1": 45, ...}} — % клиентов когорты по месяцам."""
+        month = pair_day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        first_month = month[first_idx]
+        owner = np.repeat(np.arange(len(first_idx)), visit_counts)
+        offset = month - first_month[owner]
+
+        width = int(offset.max()) + 1
+        client_offsets = np.unique(owner * width + offset)
+        cohort = first_month[client_offsets // width]
+        cells, cell_counts = np.unique(cohort * width + client_offsets % width, return_counts=True)
+
+        cohort_sizes = dict(zip(*np.unique(first_month, return_counts=True)))
+        raw: dict = {}
+        for cell, count in zip(cells.tolist(), cell_counts.tolist()):
+            month_id, off = divmod(cell, width)
+            label = str(np.datetime64(month_id, "M"))
+            raw.setdefault(label, {})[f"m{off}"] = round(count / int(cohort_sizes[month_id]) * 100)
+        return {label: dict(sorted(offsets.items())) for label, offsets in sorted(raw.items())}
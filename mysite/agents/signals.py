@@ -0,0 +1,24 @@
+"""Сигналы agents.
+
+LandingPage → сброс кэша страниц (services_app.page_cache) по тегу
+лендинга: правка, снятие с публикации или удаление в админке сразу видны
+по /<slug>/. Сброс — сразу и ещё раз после коммита, как у каталога.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agents.models import LandingPage
+from services_app.page_cache import object_tag, purge_page_tags
+
+
+def purge_landing_pages(pks) -> None:
+    tags = [object_tag(LandingPage, pk) for pk in pks]
+    purge_page_tags(*tags)
+    transaction.on_commit(lambda: purge_page_tags(*tags))
+
+
+@receiver(post_save, sender=LandingPage)
+@receiver(post_delete, sender=LandingPage)
+def _landing_page_changed(sender, instance, **kwargs):
+    purge_landing_pages([instance.pk])
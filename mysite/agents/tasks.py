@@ -112,18 +112,27 @@ def collect_rank_snapshots(self):
     Алгоритм:
     1. get_query_stats/get_top_pages(today-7, today) — окно 7 дней т.к. Вебмастер
        имеет задержку 2-3 дня.
-    2. Пишет сырые данные в SeoRankSnapshot (query-level + page-level) — upsert
-       по (week_start=today, page_url, query). Source of truth для SEOLandingAgent.
+    2. Пишет сырые данные в SeoRankSnapshot (query-level + page-level) — пакетный
+       upsert (agents._bulk.bulk_upsert) по (week_start=today, page_url, query).
+       Source of truth для SEOLandingAgent.
     3. Для каждого активного SeoKeywordCluster: fuzzy-matching keywords ↔ queries
-       через pymorphy3 лемматизацию + token-overlap (agents._matching.cluster_match).
-    4. Агрегирует matched queries в SeoClusterSnapshot(cluster, date=today).
+       через pymorphy3 лемматизацию + token-overlap (agents._matching.cluster_match,
+       кандидаты — из инвертированного индекса QueryIndex).
+    4. Агрегирует matched queries в SeoClusterSnapshot(cluster, date=today) —
+       тоже одним пакетным upsert'ом. Оба upsert'а — в одной транзакции:
+       строки собираются заранее, и сбой матчинга или soft_time_limit не
+       оставляет сырые снимки без кластерных.
     5. Цепочка: analyze_rank_changes.delay().
 
     soft_time_limit=90с — убивает задачу если прокси/API зависает,
     чтобы не блокировать worker slot для run_daily_agents в 09:00.
     """
     import datetime
-    from agents._matching import cluster_match, tokens
+    from django.db import transaction
+
+    from agents._bulk import bulk_upsert
+    from agents._matching import QueryIndex
+    from agents._matching import flush_stats as flush_lemma_stats
     from agents.integrations.yandex_webmaster import (
         YandexWebmasterClient, YandexWebmasterError,
     )
@@ -150,64 +159,46 @@ def collect_rank_snapshots(self):
         logger.warning("collect_rank_snapshots: Вебмастер вернул пустые данные")
         return
 
-    # Шаг 2: сырой дамп в SeoRankSnapshot (query-level + page-level)
-    for q in query_stats:
-        if not q.get("query"):
-            continue
-        SeoRankSnapshot.objects.update_or_create(
+    # Шаг 2: строки сырого дампа SeoRankSnapshot (query-level + page-level) —
+    # пакетный upsert по (week_start, page_url, query) вместо update_or_create
+    # на каждую строку; пишется вместе с кластерами в шаге 4.
+    rank_rows = [
+        SeoRankSnapshot(
             week_start=today, page_url="", query=q["query"],
-            defaults={
-                "clicks": q["clicks"], "impressions": q["impressions"],
-                "ctr": q["ctr"], "avg_position": q["avg_position"],
-                "source": "webmaster",
-            },
+            clicks=q["clicks"], impressions=q["impressions"],
+            ctr=q["ctr"], avg_position=q["avg_position"], source="webmaster",
         )
-    for p in page_stats:
-        if not p.get("url"):
-            continue
-        SeoRankSnapshot.objects.update_or_create(
+        for q in query_stats if q.get("query")
+    ] + [
+        SeoRankSnapshot(
             week_start=today, page_url=p["url"], query="",
-            defaults={
-                "clicks": p["clicks"], "impressions": p["impressions"],
-                "ctr": p["ctr"], "avg_position": p["avg_position"],
-                "source": "webmaster",
-            },
+            clicks=p["clicks"], impressions=p["impressions"],
+            ctr=p["ctr"], avg_position=p["avg_position"], source="webmaster",
         )
-    logger.info(
-        "collect_rank_snapshots: raw dump — %d queries, %d pages",
-        len(query_stats), len(page_stats),
-    )
+        for p in page_stats if p.get("url")
+    ]
 
-    # Шаг 3: fuzzy-matching по кластерам через лемматизацию
-    # Предрасчёт токенов запросов — pymorphy3 lemma кэшируется через lru_cache
-    stats_with_tokens = [(tokens(qs["query"]), qs) for qs in query_stats if qs.get("query")]
+    # Шаг 3: fuzzy-matching по кластерам через лемматизацию.
+    # Индекс лемма → запросы строится один раз за прогон; кандидаты для
+    # keyword'а — из posting-листов, а не перебором всех запросов.
+    queries = [qs for qs in query_stats if qs.get("query")]
+    index = QueryIndex(qs["query"] for qs in queries)
 
     clusters = SeoKeywordCluster.objects.filter(is_active=True)
     snapshots_created = 0
+    cluster_rows = []
 
     for cluster in clusters:
-        matched_ids = set()
-        matched = []
-        for kw in (cluster.keywords or []):
-            kw_tokens = tokens(kw)
-            for q_tokens, qs in stats_with_tokens:
-                qid = id(qs)
-                if qid in matched_ids:
-                    continue
-                if cluster_match(kw_tokens, q_tokens):
-                    matched.append(qs)
-                    matched_ids.add(qid)
+        matched = [queries[i] for i in index.match_keywords(cluster.keywords)]
 
         matched_count = len(matched)
         if matched_count == 0:
-            SeoClusterSnapshot.objects.update_or_create(
+            cluster_rows.append(SeoClusterSnapshot(
                 cluster=cluster, date=today,
-                defaults={
-                    "total_clicks": 0, "total_impressions": 0,
-                    "avg_ctr": 0.0, "avg_position": 0.0,
-                    "matched_queries": 0,
-                },
-            )
+                total_clicks=0, total_impressions=0,
+                avg_ctr=0.0, avg_position=0.0,
+                matched_queries=0,
+            ))
             continue
 
         total_clicks = sum(m["clicks"] for m in matched)
@@ -228,25 +219,44 @@ def collect_rank_snapshots(self):
                 m["avg_position"] for m in matched
             ) / matched_count
 
-        SeoClusterSnapshot.objects.update_or_create(
+        cluster_rows.append(SeoClusterSnapshot(
             cluster=cluster,
             date=today,
-            defaults={
-                "total_clicks": total_clicks,
-                "total_impressions": total_impressions,
-                "avg_ctr": round(w_avg_ctr, 4),
-                "avg_position": round(w_avg_position, 2),
-                "matched_queries": matched_count,
-            },
-        )
+            total_clicks=total_clicks,
+            total_impressions=total_impressions,
+            avg_ctr=round(w_avg_ctr, 4),
+            avg_position=round(w_avg_position, 2),
+            matched_queries=matched_count,
+        ))
         snapshots_created += 1
 
+    # Шаг 4: сырые и кластерные снимки — одной транзакцией
+    with transaction.atomic():
+        bulk_upsert(
+            SeoRankSnapshot, rank_rows,
+            unique_fields=SeoRankSnapshot.UPSERT_KEY,
+            update_fields=SeoRankSnapshot.UPSERT_FIELDS,
+        )
+        bulk_upsert(
+            SeoClusterSnapshot, cluster_rows,
+            unique_fields=["cluster", "date"],
+            update_fields=[
+                "total_clicks", "total_impressions", "avg_ctr",
+                "avg_position", "matched_queries",
+            ],
+        )
+    logger.info(
+        "collect_rank_snapshots: raw dump — %d queries, %d pages",
+        len(query_stats), len(page_stats),
+    )
+
     logger.info(
         "collect_rank_snapshots: завершён — %d кластеров, %d с данными",
         clusters.count(), snapshots_created,
     )
+    flush_lemma_stats()
 
-    # Шаг 4: цепочка — анализ просадок
+    # Шаг 5: цепочка — анализ просадок
     analyze_rank_changes.delay()
 
 
@@ -538,6 +548,24 @@ def generate_missing_landings(self):
         )
 
 
+@shared_task(name="agents.tasks.sync_yclients_records", bind=True, max_retries=1)
+def sync_yclients_records(self):
+    """
+    Инкрементальная синхронизация зеркала записей YClients (YClientsRecord).
+
+    Расписание: ежечасно. Первый запуск — бэкфилл, дальше только записи,
+    изменённые после watermark. Читатели — агенты аналитики и
+    collect_retention_metrics (agents.yclients_records.get_records).
+    """
+    from agents import yclients_records
+
+    try:
+        return yclients_records.sync_records()
+    except Exception as exc:
+        logger.warning("sync_yclients_records: ошибка — %s", exc)
+        return None
+
+
 @shared_task(name="agents.tasks.collect_retention_metrics", bind=True, max_retries=1)
 def collect_retention_metrics(self):
     """
@@ -548,10 +576,9 @@ def collect_retention_metrics(self):
     """
     import datetime
     import time as _time
-    from collections import defaultdict
 
-    from agents.agents._revenue import extract_record_revenue
     from agents.models import RetentionSnapshot
+    from agents.retention import VisitFrame
     from agents.telegram import send_retention_report, send_retention_summary
 
     logger.info("collect_retention_metrics: старт")
@@ -560,169 +587,41 @@ def collect_retention_metrics(self):
     period_days = 180
     period_start = today - datetime.timedelta(days=period_days)
 
-    # ── 1. Fetch YClients records (paginated) ────────────────────────
+    # ── 1. YClients records из локального зеркала ────────────────────
+    # max_age=0 — перед расчётом всегда досинхронизируем (инкремент по
+    # changed_after, обычно одна страница вместо 180 дней постранично).
     try:
-        from services_app.yclients_api import get_yclients_api
-        api = get_yclients_api()
+        from agents import yclients_records
+        yclients_records.ensure_fresh(max_age=0)
+        frame = VisitFrame.from_mirror(period_start, today)
     except Exception as exc:
         logger.error("collect_retention_metrics: YClients недоступен: %s", exc)
         from agents.telegram import send_telegram
         send_telegram(f"⚠️ collect_retention_metrics: YClients недоступен\n{exc}")
         return
 
-    all_records = []
-    page = 1
-    max_pages = 20
-    while page <= max_pages:
-        try:
-            batch = api.get_records(
-                start_date=str(period_start),
-                end_date=str(today),
-                count=200,
-                page=page,
-            )
-        except Exception as exc:
-            logger.warning("collect_retention_metrics: page %d error: %s", page, exc)
-            break
-        if not batch:
-            break
-        all_records.extend(batch)
-        if len(batch) < 200:
-            break
-        page += 1
-        _time.sleep(0.5)
-
-    logger.info("collect_retention_metrics: получено %d записей за %d дней", len(all_records), period_days)
-
-    if not all_records:
-        logger.warning("collect_retention_metrics: нет записей — пропускаем")
-        return
+    logger.info("collect_retention_metrics: получено %d записей за %d дней", len(frame), period_days)
 
-    # ── 2. Group by client ───────────────────────────────────────────
-    clients = defaultdict(lambda: {
-        "visits": [],
-        "revenue": 0.0,
-        "services": [],
-    })
-    for rec in all_records:
-        client = rec.get("client") or {}
-        client_key = client.get("id") or client.get("phone")
-        if not client_key:
-            continue
-        visit_date = str(rec.get("date", ""))[:10]
-        if not visit_date or len(visit_date) < 10:
-            continue
-        clients[client_key]["visits"].append(visit_date)
-        clients[client_key]["revenue"] += extract_record_revenue(rec)
-        for svc in rec.get("services") or []:
-            name = svc.get("title") or svc.get("name") or "?"
-            clients[client_key]["services"].append(name)
-
-    # ── 3. Per-client aggregation ────────────────────────────────────
-    total_clients = len(clients)
-    if total_clients == 0:
-        logger.warning("collect_retention_metrics: 0 уникальных клиентов")
+    # ── 2. Метрики (agents.retention — векторно по колонкам) ────────
+    metrics = frame.compute(today, period_days)
+    if metrics is None:
+        logger.warning("collect_retention_metrics: нет записей — пропускаем")
         return
 
-    new_count = 0
-    returning_count = 0
-    ret_30 = 0
-    ret_60 = 0
-    ret_90 = 0
-    churn_count = 0
-    total_visits = 0
-    total_revenue = 0.0
-    churned_services = defaultdict(int)
-    cohort_buckets = defaultdict(lambda: defaultdict(set))
-
-    for key, data in clients.items():
-        dates = sorted(set(data["visits"]))
-        first = datetime.date.fromisoformat(dates[0])
-        last = datetime.date.fromisoformat(dates[-1])
-        visit_count = len(dates)
-        total_visits += visit_count
-        total_revenue += data["revenue"]
-
-        if visit_count == 1:
-            new_count += 1
-        else:
-            returning_count += 1
-
-        # Retention: second visit within N days of first
-        if visit_count >= 2:
-            second = datetime.date.fromisoformat(dates[1])
-            gap = (second - first).days
-            if gap <= 30:
-                ret_30 += 1
-            if gap <= 60:
-                ret_60 += 1
-            if gap <= 90:
-                ret_90 += 1
-
-        # Churn: last visit > 90 days ago
-        if (today - last).days > 90:
-            churn_count += 1
-            for svc_name in set(data["services"]):
-                churned_services[svc_name] += 1
-
-        # Cohort matrix: month of first visit
-        cohort_month = first.strftime("%Y-%m")
-        for d_str in dates:
-            visit_d = datetime.date.fromisoformat(d_str)
-            month_offset = (visit_d.year - first.year) * 12 + (visit_d.month - first.month)
-            cohort_buckets[cohort_month][f"m{month_offset}"].add(key)
-
-    # ── 4. Compute aggregates ────────────────────────────────────────
-    months_in_period = max(period_days / 30.0, 1)
-    avg_frequency = (total_visits / total_clients) / months_in_period
-    avg_check = total_revenue / total_visits if total_visits else 0.0
-    avg_ltv = total_revenue / total_clients if total_clients else 0.0
-    churn_rate = (churn_count / total_clients * 100) if total_clients else 0.0
-    retention_30d = (ret_30 / total_clients * 100) if total_clients else 0.0
-    retention_60d = (ret_60 / total_clients * 100) if total_clients else 0.0
-    retention_90d = (ret_90 / total_clients * 100) if total_clients else 0.0
-
-    top_churned = sorted(churned_services.items(), key=lambda x: -x[1])[:10]
-    top_churned_list = [{"service": s, "count": c} for s, c in top_churned]
-
-    # Cohort matrix: convert sets to counts, normalize to %
-    cohort_data = {}
-    for month, offsets in sorted(cohort_buckets.items()):
-        m0_count = len(offsets.get("m0", set())) or 1
-        cohort_data[month] = {
-            k: round(len(v) / m0_count * 100)
-            for k, v in sorted(offsets.items())
-        }
-
-    # ── 5. Save to DB ────────────────────────────────────────────────
+    # ── 3. Save to DB ────────────────────────────────────────────────
     snapshot, _ = RetentionSnapshot.objects.update_or_create(
         date=today,
-        defaults={
-            "period_days": period_days,
-            "total_clients": total_clients,
-            "new_clients": new_count,
-            "returning_clients": returning_count,
-            "retention_30d": round(retention_30d, 1),
-            "retention_60d": round(retention_60d, 1),
-            "retention_90d": round(retention_90d, 1),
-            "avg_frequency": round(avg_frequency, 2),
-            "avg_check": round(avg_check),
-            "avg_ltv_180d": round(avg_ltv),
-            "churn_count": churn_count,
-            "churn_rate": round(churn_rate, 1),
-            "top_churned_services": top_churned_list,
-            "cohort_data": cohort_data,
-        },
+        defaults=metrics.as_snapshot_defaults(),
     )
 
     elapsed = _time.monotonic() - start
     logger.info(
         "collect_retention_metrics: завершён за %.1fс — "
         "%d клиентов, R30=%.1f%%, churn=%.1f%%",
-        elapsed, total_clients, retention_30d, churn_rate,
+        elapsed, metrics.total_clients, metrics.retention_30d, metrics.churn_rate,
     )
 
-    # ── 6. Telegram ──────────────────────────────────────────────────
+    # ── 4. Telegram ──────────────────────────────────────────────────
     previous = (
         RetentionSnapshot.objects
         .filter(date__lt=today)
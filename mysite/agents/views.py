@@ -10,6 +10,7 @@ from django.utils import timezone
 from django.views.decorators.http import require_GET
 
 from agents.models import AgentTask, LandingPage
+from services_app.page_cache import cache_public_page, object_tag, tag_response
 
 logger = logging.getLogger(__name__)
 
@@ -107,9 +108,36 @@ def agents_health(request):
         "stuck_tasks": stuck_tasks,
         "error_rate_24h": error_rate,
         "payments": payments_info,
+        "yclients_cache": _yclients_cache_health(),
+        "lemma_cache": _lemma_cache_health(),
     })
 
 
+def _yclients_cache_health() -> dict:
+    """Счётчики кэша доступности YClients (hit/stale/miss) — для подбора TTL.
+
+    Недоступный Redis не должен ронять health-эндпоинт агентов.
+    """
+    from services_app.availability_cache import get_stats
+
+    try:
+        return get_stats()
+    except Exception as e:  # noqa: BLE001
+        logger.warning("yclients_cache health failed: %s", e)
+        return {"error": str(e)}
+
+
+def _lemma_cache_health() -> dict:
+    """Счётчики общего кэша лемм (warm/shared/miss), сброшенные воркерами."""
+    from agents._matching import get_shared_stats
+
+    try:
+        return get_shared_stats()
+    except Exception as e:  # noqa: BLE001
+        logger.warning("lemma_cache health failed: %s", e)
+        return {"error": str(e)}
+
+
 def _payments_health(now, day_ago) -> dict:
     """Статистика оплат за последние 24 часа.
 
@@ -121,7 +149,8 @@ def _payments_health(now, day_ago) -> dict:
     - canceled_24h: платёж отменён
     - online_payment_enabled: текущее состояние feature flag
     """
-    from services_app.models import Order, SiteSettings
+    from services_app.models import Order
+    from services_app.site_settings import get_site_settings
 
     service_orders_24h = Order.objects.filter(
         order_type="service", created_at__gte=day_ago,
@@ -147,7 +176,7 @@ def _payments_health(now, day_ago) -> dict:
         paid_at__gte=day_ago,
     ).count()
 
-    settings_row = SiteSettings.objects.first()
+    settings_row = get_site_settings()
     flag_enabled = bool(settings_row and settings_row.online_payment_enabled)
 
     return {
@@ -160,6 +189,7 @@ def _payments_health(now, day_ago) -> dict:
     }
 
 
+@cache_public_page
 def landing_page_view(request, slug: str):
     """
     Отдаёт опубликованную посадочную страницу по slug.
@@ -168,7 +198,7 @@ def landing_page_view(request, slug: str):
     - страница не найдена
     - страница существует но статус не 'published' (черновик, модерация)
 
-    Логирует каждый просмотр для мониторинга.
+    Логирует каждый рендер (ответы из кэша страниц сюда не доходят).
     """
     landing = get_object_or_404(
         LandingPage,
@@ -187,4 +217,5 @@ def landing_page_view(request, slug: str):
         "blocks":  blocks,
         "faq":     blocks.get("faq", []),
     }
-    return render(request, "agents/landing_page.html", context)
+    response = render(request, "agents/landing_page.html", context)
+    return tag_response(response, [object_tag(LandingPage, landing.pk)])
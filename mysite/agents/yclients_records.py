@@ -0,0 +1,248 @@
+"""Инкрементальное зеркало записей YClients (модель YClientsRecord).
+
+Раньше каждый потребитель записей — collect_retention_metrics (180 дней,
+до 20 страниц с паузой 0.5s), AnalyticsAgent, AnalyticsBudgetAgent,
+OfferPackagesAgent — заново выкачивал /records за свой период. Одни и те
+же визиты скачивались по несколько раз в день.
+
+Теперь:
+
+- sync_records() — первый запуск выкачивает YCLIENTS_RECORDS_BACKFILL_DAYS
+  назад (и YCLIENTS_RECORDS_FUTURE_DAYS вперёд — будущие записи тоже
+  меняются); дальше запрашивает только changed_after=watermark, где
+  watermark = max(changed_at) в зеркале минус WATERMARK_OVERLAP;
+- upsert по record_id (agents._bulk.bulk_upsert) — повторная
+  синхронизация идемпотентна, удалённые в YClients записи получают
+  deleted=True и пропадают из выборок;
+- iter_records(start, end) / get_records(start, end) — то же, что
+  YClientsAPI.get_records, но из БД и за весь период; если зеркало не
+  синхронизировалось дольше YCLIENTS_RECORDS_MAX_AGE — сначала
+  досинхронизирует. Возвращает исходные dict'ы YClients (raw),
+  поэтому агрегации у потребителей не меняются.
+
+Выгрузка из YClients — YClientsAPI.iter_records (поток страниц с
+prefetch и rate budget), запись в БД — пачками по UPSERT_CHUNK.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = 200  # предохранитель: 200 × 200 = 40k записей за прогон
+UPSERT_CHUNK = 500
+# Перекрытие окна changed_after: часы YClients и наши могут расходиться,
+# повторный upsert последних минут дешевле пропущенной правки.
+WATERMARK_OVERLAP = datetime.timedelta(minutes=10)
+
+SYNCED_AT_KEY = "yclients:records_mirror:synced_at"
+
+_UPDATE_FIELDS = [
+    "date", "datetime", "client_key", "client_id", "client_phone",
+    "staff_id", "staff_name", "service_id", "service_ids", "revenue",
+    "status_id", "attendance", "deleted", "changed_at", "raw", "synced_at",
+]
+
+
+def _backfill_days() -> int:
+    return int(getattr(settings, "YCLIENTS_RECORDS_BACKFILL_DAYS", 365))
+
+
+def _future_days() -> int:
+    return int(getattr(settings, "YCLIENTS_RECORDS_FUTURE_DAYS", 60))
+
+
+def _max_age() -> int:
+    return int(getattr(settings, "YCLIENTS_RECORDS_MAX_AGE", 3600))
+
+
+# ── Разбор записи ─────────────────────────────────────────────────────
+
+def _parse_dt(value) -> datetime.datetime | None:
+    if not value:
+        return None
+    try:
+        dt = parse_datetime(str(value).replace(" ", "T", 1))
+    except ValueError:
+        return None
+    if dt is not None and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _int_or_none(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def record_to_fields(rec: dict) -> dict | None:
+    """Поля YClientsRecord из записи /records. None — запись без id/даты."""
+    from agents.agents._revenue import extract_record_revenue
+
+    record_id = _int_or_none(rec.get("id"))
+    visit_date = str(rec.get("date") or "")[:10]
+    if record_id is None or len(visit_date) < 10:
+        return None
+    try:
+        date = datetime.date.fromisoformat(visit_date)
+    except ValueError:
+        return None
+
+    client = rec.get("client") or {}
+    staff = rec.get("staff") or {}
+    service_ids = [
+        sid for sid in (_int_or_none(s.get("id")) for s in rec.get("services") or [])
+        if sid is not None
+    ]
+    return {
+        "record_id": record_id,
+        "date": date,
+        "datetime": _parse_dt(rec.get("datetime")),
+        # Тот же ключ, что в collect_retention_metrics: id, иначе телефон
+        "client_key": str(client.get("id") or client.get("phone") or "")[:64],
+        "client_id": _int_or_none(client.get("id")),
+        "client_phone": str(client.get("phone") or "")[:32],
+        "staff_id": _int_or_none(staff.get("id") or rec.get("staff_id")),
+        "staff_name": str(staff.get("name") or "")[:200],
+        "service_id": service_ids[0] if service_ids else None,
+        "service_ids": service_ids,
+        "revenue": extract_record_revenue(rec),
+        "status_id": _int_or_none((rec.get("status") or {}).get("id")) or 0,
+        "attendance": _int_or_none(rec.get("attendance", rec.get("visit_attendance"))) or 0,
+        "deleted": bool(rec.get("deleted")),
+        "changed_at": _parse_dt(rec.get("last_change_date")),
+        "raw": rec,
+    }
+
+
+def upsert_records(records: list[dict]) -> int:
+    """Вставить/обновить записи по record_id. Возвращает число записей."""
+    from agents._bulk import bulk_upsert
+    from agents.models import YClientsRecord
+
+    # Дубли внутри пачки (запись попала на две страницы) схлопывает
+    # bulk_upsert — побеждает последняя.
+    rows = (record_to_fields(rec) for rec in records)
+    return bulk_upsert(
+        YClientsRecord,
+        [YClientsRecord(**f) for f in rows if f is not None],
+        unique_fields=["record_id"],
+        update_fields=_UPDATE_FIELDS,
+    )
+
+
+# ── Синхронизация ─────────────────────────────────────────────────────
+
+def watermark() -> datetime.datetime | None:
+    """max(changed_at) в зеркале — граница следующей инкрементальной выгрузки."""
+    from agents.models import YClientsRecord
+
+    return YClientsRecord.objects.aggregate(m=Max("changed_at"))["m"]
+
+
+def sync_records(api=None) -> dict:
+    """Досинхронизировать зеркало. Возвращает {"mode", "fetched", "upserted"}.
+
+    Ошибки получения клиента YClients (нет токенов) пробрасываются —
+    вызывающий решает, критично ли это.
+    """
+    from agents.models import YClientsRecord
+
+    if api is None:
+        from services_app.yclients_api import get_yclients_api
+        api = get_yclients_api()
+
+    today = datetime.date.today()
+    params = {
+        "start_date": str(today - datetime.timedelta(days=_backfill_days())),
+        "end_date": str(today + datetime.timedelta(days=_future_days())),
+    }
+    mark = watermark()
+    if mark is not None:
+        mode = "incremental"
+        params["changed_after"] = timezone.localtime(mark - WATERMARK_OVERLAP).isoformat()
+    elif YClientsRecord.objects.exists():
+        # Записи без last_change_date — инкремент не построить, перезаливаем окно
+        mode = "refresh"
+    else:
+        mode = "backfill"
+
+    # Поток страниц с prefetch; в память — не больше UPSERT_CHUNK записей
+    fetched = upserted = 0
+    chunk: list[dict] = []
+    for rec in api.iter_records(max_pages=MAX_PAGES, **params):
+        fetched += 1
+        chunk.append(rec)
+        if len(chunk) >= UPSERT_CHUNK:
+            upserted += upsert_records(chunk)
+            chunk = []
+    upserted += upsert_records(chunk)
+
+    cache.set(SYNCED_AT_KEY, time.time(), None)
+    logger.info(
+        "yclients_records: %s — получено %d, записано %d",
+        mode, fetched, upserted,
+    )
+    return {"mode": mode, "fetched": fetched, "upserted": upserted}
+
+
+def last_synced_age() -> float | None:
+    """Секунд с последней синхронизации или None, если её не было."""
+    synced_at = cache.get(SYNCED_AT_KEY)
+    return None if synced_at is None else time.time() - synced_at
+
+
+# ── Чтение ────────────────────────────────────────────────────────────
+
+def ensure_fresh(max_age: int | None = None) -> None:
+    """Синхронизировать, если зеркало старше max_age секунд.
+
+    Сбой синхронизации при непустом зеркале — warning и работа на
+    слегка устаревших данных; при пустом — исключение наверх.
+    """
+    from agents.models import YClientsRecord
+
+    age = last_synced_age()
+    if age is not None and age <= (max_age if max_age is not None else _max_age()):
+        return
+    try:
+        sync_records()
+    except Exception as exc:
+        if not YClientsRecord.objects.exists():
+            raise
+        logger.warning("yclients_records: синхронизация не удалась, читаем зеркало: %s", exc)
+
+
+def iter_records(start_date, end_date, *, max_age: int | None = None):
+    """Записи за [start_date, end_date] (даты или "YYYY-MM-DD") из зеркала.
+
+    Замена YClientsAPI.get_records для аналитики: те же dict'ы, без
+    удалённых, сразу за весь период. Отдаёт итератор по курсору БД —
+    агрегации идут за O(1) памяти. Синхронизация (если нужна) —
+    сразу при вызове, поэтому ошибки YClients ловит вызывающий try.
+    """
+    from agents.models import YClientsRecord
+
+    ensure_fresh(max_age)
+    return (
+        YClientsRecord.objects
+        .filter(date__range=(str(start_date)[:10], str(end_date)[:10]), deleted=False)
+        .order_by("date", "datetime", "record_id")
+        .values_list("raw", flat=True)
+        .iterator(chunk_size=2000)
+    )
+
+
+def get_records(start_date, end_date, *, max_age: int | None = None) -> list[dict]:
+    """То же, что iter_records, но списком."""
+    return list(iter_records(start_date, end_date, max_age=max_age))
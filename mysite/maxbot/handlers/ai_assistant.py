@@ -5,6 +5,9 @@
 2. Любой text-message без активного booking-state (вытесняет старый fallback)
 
 Pipeline:
+0. intent_classifier (TF-IDF, ~1ms): в режиме on уверенные «цены»/«адрес»/
+   «запись»/дословный вопрос FAQ → меню или текст HelpArticle без OpenAI;
+   в shadow — только предсказание + сэмпл для оценки precision.
 1. ensure_started() persistent MCP-клиент (T-06a)
 2. chat_with_tools (T-06b) с system prompt из texts.AI_SYSTEM_PROMPT
 3. Если LLM вернул LLM_GIVEUP_MESSAGE → создаём BotInquiry (T-02) +
@@ -12,6 +15,11 @@ Pipeline:
    ответит, нажмёт action «Отправить» (T-09 — реальный push-back в MAX).
 4. Иначе — отправляем ответ модели + главное меню.
 
+Stream-режим (MAXBOT_STREAMING_ENABLED): ответ chat_rag_stream показывается
+по мере генерации — первая законченная фраза уходит сразу, дальше сообщение
+дописывается throttled edit'ами (menu_state.StreamingMenuReply). Начало,
+похожее на giveup, клиенту не показываем — копим до конца и идём в п.3.
+
 Зачем НЕ trim до booking-state-фильтра: ai_assistant ловит "всё остальное" —
 если booking handlers не сработали (нет matching state), ai_assistant
 обрабатывает. Это явно ставит ai_assistant_router ПЕРЕД fallback_router в
@@ -20,20 +28,27 @@ get_routers().
 from __future__ import annotations
 
 import logging
+import re
 
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from maxapi import F, Router
 from maxapi.context.context import MemoryContext
 from maxapi.enums.sender_action import SenderAction
 from maxapi.types import MessageCallback, MessageCreated
 
-from maxbot import keyboards, texts
+from maxbot import intent_classifier, keyboards, texts
+from maxbot.handlers.contacts import send_contacts
+from maxbot.handlers.faq import send_faq_list
+from maxbot.handlers.services import send_categories
 from maxbot.intents import detect_intent
-from maxbot.llm import LLM_GIVEUP_MESSAGE, chat_rag, is_giveup
+from maxbot.llm import LLM_GIVEUP_MESSAGE, chat_rag, chat_rag_stream, is_giveup
 from maxbot.mcp_client import MaxbotMCPClient
-from maxbot.menu_state import send_with_main_menu
+from maxbot.menu_state import StreamingMenuReply, send_with_main_menu
 from maxbot.personalization import get_or_create_bot_user
+from maxbot.question_tracker import record_question
 from maxbot.response_cache import get_cached_answer, set_cached_answer
+from maxbot.semantic_cache import SemanticCache
 from maxbot.states import AskStates
 from notifications import send_notification_telegram
 from services_app.models import BotInquiry
@@ -42,6 +57,11 @@ from services_app.models import BotInquiry
 logger = logging.getLogger("maxbot.ai")
 router = Router()
 
+# Первый кусок stream'а отправляем, когда закончилась фраза (или набралось
+# FIRST_CHUNK_MAX_CHARS без точки) — раньше клиент увидит обрывок слова.
+_SENTENCE_END_RE = re.compile(r"[.!?…](\s|$)|\n")
+FIRST_CHUNK_MAX_CHARS = 120
+
 
 # ─── Кнопка «Задать вопрос» — переход в state awaiting_question ────────────
 
@@ -84,25 +104,39 @@ async def on_free_text(event: MessageCreated, context: MemoryContext) -> None:
     # кнопкой, а тут уже ответили)
     await context.clear()
 
-    # Получаем ответ через LLM + MCP
-    sender = event.message.sender
-    answer = await _get_ai_answer(user_text, sender)
-
     # bot_user нужен для menu_state (плавающее меню — Вариант B)
+    sender = event.message.sender
     bot_user, _ = await get_or_create_bot_user(sender.user_id, sender.full_name)
 
+    prediction = await intent_classifier.predict(user_text)
+    if intent_classifier.should_route(prediction):
+        await _route_intent(event.bot, chat_id, bot_user, prediction)
+        return
+
+    # Получаем ответ через LLM + MCP (в stream-режиме он уже частично у клиента)
+    reply = None
+    if settings.MAXBOT_STREAMING_ENABLED:
+        reply = StreamingMenuReply(bot=event.bot, chat_id=chat_id, bot_user=bot_user)
+    answer = await _get_ai_answer(user_text, sender, reply=reply)
+    await intent_classifier.record_shadow(user_text, prediction, answer)
+
     if is_giveup(answer):
         # LLM не справился → BotInquiry + главное меню
         await _create_bot_inquiry(
             user_id=sender.user_id, full_name=sender.full_name,
             chat_id=chat_id, question=user_text,
         )
+        if reply is not None and reply.sent:
+            await reply.finish(texts.AI_FORWARDED_TO_MANAGER)
+            return
         await send_with_main_menu(
             bot=event.bot, chat_id=chat_id,
             text=texts.AI_FORWARDED_TO_MANAGER, bot_user=bot_user,
         )
         return
 
+    if reply is not None and reply.sent:
+        return  # финальный текст уже дописан в stream-сообщение
     await send_with_main_menu(
         bot=event.bot, chat_id=chat_id, text=answer, bot_user=bot_user,
     )
@@ -111,15 +145,20 @@ async def on_free_text(event: MessageCreated, context: MemoryContext) -> None:
 # ─── Helpers ────────────────────────────────────────────────────────────────
 
 
-async def _get_ai_answer(user_text: str, sender) -> str:
+async def _get_ai_answer(user_text: str, sender, reply: StreamingMenuReply | None = None) -> str:
     """RAG-as-context (1 LLM call после search_faq, без tool-use loop).
 
     Быстрее chat_with_tools на ~30%. Если top FAQ-similarity < threshold —
     возвращаем GIVEUP без вызова LLM (экономия ещё ~2s).
 
     Перед запуском пайплайна — проверка response cache (24ч TTL): повторные
-    «как записаться?» отдаются мгновенно без OpenAI/MCP. Кэшируем только
-    успешные ответы (LLM_GIVEUP_MESSAGE — нет, чтобы retry имел шанс).
+    «как записаться?» отдаются мгновенно без OpenAI/MCP. Затем семантический
+    кэш: перефраз уже отвеченного вопроса — один эмбеддинг вместо chat_rag.
+    Кэшируем только успешные ответы (LLM_GIVEUP_MESSAGE — нет, чтобы retry
+    имел шанс).
+
+    reply — stream-режим: ответ LLM по ходу генерации пишется в reply
+    (ответы из кэшей мгновенные, их handler отправляет сам как раньше).
     """
     import time
     started = time.perf_counter()
@@ -138,20 +177,36 @@ async def _get_ai_answer(user_text: str, sender) -> str:
         elapsed = time.perf_counter() - started
         logger.info("ai_assistant: CACHE HIT %.3fs user_id=%s text=%r",
                     elapsed, sender.user_id, user_text[:60])
+        await record_question(user_text)
         return cached
 
+    semantic = SemanticCache.instance()
+    lookup = await semantic.lookup(user_text)
+    if lookup.answer is not None:
+        elapsed = time.perf_counter() - started
+        logger.info("ai_assistant: SEMANTIC HIT %.3fs score=%.3f user_id=%s text=%r ~ %r",
+                    elapsed, lookup.score, sender.user_id, user_text[:60], lookup.matched_question[:60])
+        # Перефраз засчитываем каноническому вопросу — его и прогреваем
+        await record_question(lookup.matched_question)
+        return lookup.answer
+
+    await record_question(user_text)
     try:
         mcp_client = MaxbotMCPClient.instance()
-        answer = await chat_rag(
-            user_text=user_text,
-            system_prompt=texts.AI_SYSTEM_PROMPT,
-            mcp_client=mcp_client,
-        )
+        if reply is not None:
+            answer = await _stream_chat_rag(user_text, mcp_client, reply)
+        else:
+            answer = await chat_rag(
+                user_text=user_text,
+                system_prompt=texts.AI_SYSTEM_PROMPT,
+                mcp_client=mcp_client,
+            )
         elapsed = time.perf_counter() - started
         logger.info("ai_assistant: %.2fs user_id=%s text=%r answer_len=%d",
                     elapsed, sender.user_id, user_text[:60], len(answer))
         if not is_giveup(answer):
             await set_cached_answer(user_text, answer)
+            await semantic.store(user_text, answer, lookup.vector)
         return answer
     except Exception:  # noqa: BLE001
         elapsed = time.perf_counter() - started
@@ -160,6 +215,53 @@ async def _get_ai_answer(user_text: str, sender) -> str:
         return LLM_GIVEUP_MESSAGE
 
 
+_MENU_ROUTES = {
+    intent_classifier.MENU_SERVICES: send_categories,
+    intent_classifier.MENU_BOOK: send_categories,
+    intent_classifier.MENU_CONTACTS: send_contacts,
+    intent_classifier.MENU_FAQ: send_faq_list,
+}
+
+
+async def _route_intent(bot, chat_id: int, bot_user, prediction) -> None:
+    """Уверенный intent: текст HelpArticle + главное меню или нужный раздел меню."""
+    logger.info("ai_assistant: INTENT ROUTE %s conf=%.3f user_id=%s",
+                prediction.label, prediction.confidence, bot_user.max_user_id)
+    if prediction.is_faq and prediction.answer:
+        await send_with_main_menu(bot=bot, chat_id=chat_id, text=prediction.answer, bot_user=bot_user)
+        return
+    await _MENU_ROUTES[prediction.label](bot, chat_id)
+
+
+async def _stream_chat_rag(user_text: str, mcp_client: MaxbotMCPClient, reply: StreamingMenuReply) -> str:
+    """chat_rag_stream → reply: первая фраза сразу, дальше throttled edit'ы.
+
+    Возвращает полный ответ. Giveup-начало не показываем: handler заменит
+    его на AI_FORWARDED_TO_MANAGER. Если LLM свернул в giveup уже после
+    первой фразы — handler перепишет сообщение (reply.finish).
+    """
+    answer = ""
+    held = False
+    async for delta in chat_rag_stream(
+        user_text=user_text,
+        system_prompt=texts.AI_SYSTEM_PROMPT,
+        mcp_client=mcp_client,
+    ):
+        answer += delta
+        if held:
+            continue
+        if not reply.sent:
+            if not _SENTENCE_END_RE.search(answer) and len(answer) < FIRST_CHUNK_MAX_CHARS:
+                continue
+            if is_giveup(answer):
+                held = True
+                continue
+        await reply.update(answer)
+    if reply.sent and not is_giveup(answer):
+        await reply.finish(answer)
+    return answer
+
+
 async def _create_bot_inquiry(*, user_id: int, full_name: str, chat_id: int, question: str) -> None:
     """Создаём BotInquiry для менеджера + Telegram-алерт."""
     bot_user, _ = await get_or_create_bot_user(user_id, full_name)
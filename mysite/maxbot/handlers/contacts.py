@@ -19,6 +19,7 @@ from maxapi.utils.inline_keyboard import InlineKeyboardBuilder
 
 from maxbot import keyboards
 from services_app.models import SiteSettings
+from services_app.site_settings import get_site_settings
 
 
 router = Router()
@@ -26,7 +27,7 @@ router = Router()
 
 @sync_to_async
 def _read_site_settings() -> SiteSettings | None:
-    return SiteSettings.objects.first()
+    return get_site_settings()
 
 
 def _format_text(s: SiteSettings | None) -> str:
@@ -70,8 +71,13 @@ async def on_show_contacts(callback: MessageCallback, context: MemoryContext) ->
     chat_id = callback.message.recipient.chat_id if callback.message else None
     if chat_id is None:
         return
+    await send_contacts(callback.bot, chat_id)
+
+
+async def send_contacts(bot, chat_id: int) -> None:
+    """Карточка контактов — и по кнопке, и по тексту «адрес» (intent_classifier)."""
     settings = await _read_site_settings()
-    await callback.bot.send_message(
+    await bot.send_message(
         chat_id=chat_id,
         text=_format_text(settings),
         attachments=[_build_keyboard(settings)],
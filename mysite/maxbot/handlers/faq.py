@@ -37,15 +37,20 @@ async def on_show_faq(callback: MessageCallback, context: MemoryContext) -> None
     chat_id = callback.message.recipient.chat_id if callback.message else None
     if chat_id is None:
         return
+    await send_faq_list(callback.bot, chat_id)
+
+
+async def send_faq_list(bot, chat_id: int) -> None:
+    """Список вопросов — и по кнопке, и по тексту «частые вопросы» (intent_classifier)."""
     articles = await _list_active_articles()
     if articles:
-        await callback.bot.send_message(
+        await bot.send_message(
             chat_id=chat_id,
             text="Выберите вопрос — отвечу сразу:",
             attachments=[keyboards.faq_keyboard(articles)],
         )
     else:
-        await callback.bot.send_message(
+        await bot.send_message(
             chat_id=chat_id,
             text="Раздел вопросов пока пуст. Если что — звоните по телефону из «Контактов».",
             attachments=[keyboards.back_to_menu_keyboard()],
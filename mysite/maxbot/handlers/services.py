@@ -70,16 +70,20 @@ async def on_show_categories(callback: MessageCallback, context: MemoryContext)
     chat_id = callback.message.recipient.chat_id if callback.message else None
     if chat_id is None:
         return
+    await send_categories(callback.bot, chat_id)
 
+
+async def send_categories(bot, chat_id: int) -> None:
+    """Список категорий — и по кнопке, и по тексту «цены»/«запись» (intent_classifier)."""
     cats = await _list_active_categories()
     if cats:
-        await callback.bot.send_message(
+        await bot.send_message(
             chat_id=chat_id,
             text="Выберите категорию услуг:",
             attachments=[keyboards.categories_keyboard(cats)],
         )
     else:
-        await callback.bot.send_message(
+        await bot.send_message(
             chat_id=chat_id,
             text="Сейчас услуги не настроены. Позвоните по телефону из «Контактов».",
             attachments=[keyboards.back_to_menu_keyboard()],
@@ -0,0 +1,264 @@
+"""Локальный классификатор намерений: char n-gram TF-IDF перед RAG/LLM.
+
+`maxbot.intents.detect_intent` ловит только phatic-фразы. Навигационные
+сообщения — «цены», «адрес», «запись» — и дословные вопросы из FAQ шли через
+эмбеддинги + LLM (~2-6s и деньги OpenAI), хотя ответ на них — готовый пункт
+меню или текст HelpArticle.
+
+Модель — TF-IDF по символьным n-граммам (N_GRAMS, внутри слов с пробелами
+по краям, как char_wb), обучающие примеры:
+- вопросы активных HelpArticle → intent `faq:<id>`, ответ — article.answer;
+- MENU_EXAMPLES → `menu:services` / `menu:book` / `menu:contacts` / `menu:faq`.
+Уверенность intent'а — максимальный косинус запроса к его примерам.
+Маршрутизируем, только если лучший ≥ MAXBOT_INTENT_CLASSIFIER_THRESHOLD и
+отрыв от второго intent'а ≥ MIN_MARGIN. Символьные n-граммы терпимы к
+опечаткам и окончаниям («записатся», «цену»), а опираются на словарь FAQ —
+лишних зависимостей (sklearn) не нужно: пара сотен примеров, инвертированный
+индекс, ~1ms на сообщение.
+
+Режим — MAXBOT_INTENT_CLASSIFIER_MODE:
+- off    — не вызывается;
+- shadow — предсказание считается, но ответ идёт обычным путём; пара
+  (предсказание, фактический ответ) копится в Django cache (SHADOW_KEY) —
+  по ней в admin оцениваем precision до включения;
+- on     — уверенные предсказания обходят OpenAI целиком.
+
+Модель строится лениво и пересобирается раз в MODEL_TTL сек (правки FAQ).
+Модуль без maxapi — `shadow_report` читает Django admin.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from services_app.models import HelpArticle
+
+
+logger = logging.getLogger("maxbot.intent")
+
+MODE_OFF = "off"
+MODE_SHADOW = "shadow"
+MODE_ON = "on"
+
+N_GRAMS = (2, 3, 4)
+MIN_MARGIN = 0.1
+MODEL_TTL = 300
+
+SHADOW_KEY = "maxbot:intent:shadow"
+SHADOW_SAMPLES = 200
+SHADOW_TTL = 30 * 24 * 60 * 60
+
+FAQ_PREFIX = "faq:"
+MENU_SERVICES = "menu:services"
+MENU_BOOK = "menu:book"
+MENU_CONTACTS = "menu:contacts"
+MENU_FAQ = "menu:faq"
+
+MENU_EXAMPLES: dict[str, list[str]] = {
+    MENU_SERVICES: [
+        "цены", "цена", "прайс", "прайс лист", "стоимость", "расценки",
+        "услуги", "список услуг", "какие услуги", "каталог услуг",
+    ],
+    MENU_BOOK: [
+        "запись", "записаться", "хочу записаться", "записаться на массаж",
+        "онлайн запись", "забронировать", "бронь",
+    ],
+    MENU_CONTACTS: [
+        "адрес", "ваш адрес", "контакты", "телефон", "номер телефона",
+        "где вы находитесь", "как добраться", "как проехать",
+    ],
+    MENU_FAQ: [
+        "вопросы", "частые вопросы", "faq", "вопрос ответ",
+    ],
+}
+
+_TOKEN_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().replace("ё", "е")
+    return " ".join(_TOKEN_RE.sub(" ", text).split())
+
+
+def _ngrams(text: str) -> Counter:
+    grams: Counter = Counter()
+    for word in _normalize(text).split():
+        padded = f" {word} "
+        for n in N_GRAMS:
+            for i in range(len(padded) - n + 1):
+                grams[padded[i:i + n]] += 1
+    return grams
+
+
+@dataclass
+class IntentPrediction:
+    """Результат классификации: лучший intent + уверенность по всем intent'ам."""
+
+    label: str | None
+    confidence: float
+    scores: dict[str, float] = field(default_factory=dict)
+    answer: str | None = None  # для faq:<id> — текст HelpArticle
+    confident: bool = False
+
+    @property
+    def is_faq(self) -> bool:
+        return bool(self.label and self.label.startswith(FAQ_PREFIX))
+
+
+class IntentClassifier:
+    """TF-IDF по char n-граммам + косинус к примерам (инвертированный индекс)."""
+
+    def __init__(self, examples: list[tuple[str, str]], answers: dict[str, str] | None = None):
+        self._labels: list[str] = []
+        self._answers = dict(answers or {})
+        docs = []
+        for label, text in examples:
+            grams = _ngrams(text)
+            if grams:
+                self._labels.append(label)
+                docs.append(grams)
+
+        df: Counter = Counter()
+        for grams in docs:
+            df.update(grams.keys())
+        total = len(docs)
+        self._idf = {g: math.log((1 + total) / (1 + d)) + 1.0 for g, d in df.items()}
+
+        self._postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for n, grams in enumerate(docs):
+            for gram, weight in self._weigh(grams).items():
+                self._postings[gram].append((n, weight))
+
+    def _weigh(self, grams: Counter) -> dict[str, float]:
+        """tf-idf с L2-нормировкой; n-граммы вне словаря отбрасываем."""
+        vector = {g: c * self._idf[g] for g, c in grams.items() if g in self._idf}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {g: w / norm for g, w in vector.items()} if norm else {}
+
+    @property
+    def size(self) -> int:
+        return len(self._labels)
+
+    def classify(self, text: str, threshold: float) -> IntentPrediction:
+        sims: dict[int, float] = defaultdict(float)
+        for gram, weight in self._weigh(_ngrams(text)).items():
+            for n, doc_weight in self._postings.get(gram, ()):
+                sims[n] += weight * doc_weight
+
+        scores: dict[str, float] = {}
+        for n, sim in sims.items():
+            label = self._labels[n]
+            scores[label] = max(scores.get(label, 0.0), sim)
+        if not scores:
+            return IntentPrediction(label=None, confidence=0.0)
+
+        ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+        label, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return IntentPrediction(
+            label=label,
+            confidence=round(best, 3),
+            scores={lbl: round(s, 3) for lbl, s in ranked[:5]},
+            answer=self._answers.get(label),
+            confident=best >= threshold and best - runner_up >= MIN_MARGIN,
+        )
+
+
+def build_classifier() -> IntentClassifier:
+    """Примеры из MENU_EXAMPLES + вопросы активных HelpArticle (синхронно, БД)."""
+    examples = [(label, text) for label, phrases in MENU_EXAMPLES.items() for text in phrases]
+    answers = {}
+    for article in HelpArticle.objects.active().only("id", "question", "answer"):
+        label = f"{FAQ_PREFIX}{article.id}"
+        examples.append((label, article.question))
+        answers[label] = article.answer
+    return IntentClassifier(examples, answers)
+
+
+_model: IntentClassifier | None = None
+_built_at = 0.0
+
+
+def reset_for_tests() -> None:
+    """ТОЛЬКО для тестов — сбросить построенную модель."""
+    global _model, _built_at
+    _model, _built_at = None, 0.0
+
+
+async def _get_model() -> IntentClassifier:
+    global _model, _built_at
+    if _model is None or time.monotonic() - _built_at > MODEL_TTL:
+        _model = await sync_to_async(build_classifier)()
+        _built_at = time.monotonic()
+        logger.info("intent classifier built: %d examples", _model.size)
+    return _model
+
+
+async def predict(text: str) -> IntentPrediction | None:
+    """Предсказание или None (режим off / сбой сборки модели — идём обычным путём)."""
+    if settings.MAXBOT_INTENT_CLASSIFIER_MODE == MODE_OFF:
+        return None
+    try:
+        model = await _get_model()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("intent classifier unavailable: %s", exc)
+        return None
+    prediction = model.classify(text, settings.MAXBOT_INTENT_CLASSIFIER_THRESHOLD)
+    logger.info("intent %s conf=%.3f confident=%s text=%r",
+                prediction.label, prediction.confidence, prediction.confident, text[:60])
+    return prediction
+
+
+def should_route(prediction: IntentPrediction | None) -> bool:
+    """Обходить ли RAG/LLM: режим on и уверенное предсказание."""
+    return (
+        prediction is not None
+        and prediction.confident
+        and settings.MAXBOT_INTENT_CLASSIFIER_MODE == MODE_ON
+    )
+
+
+def _record_shadow_sync(text: str, prediction: IntentPrediction, answer: str) -> None:
+    samples = cache.get(SHADOW_KEY) or []
+    samples.append({
+        "at": timezone.now().isoformat(),
+        "text": text[:200],
+        "label": prediction.label,
+        "confidence": prediction.confidence,
+        "would_route": prediction.confident,
+        "answer": answer[:200],
+    })
+    cache.set(SHADOW_KEY, samples[-SHADOW_SAMPLES:], SHADOW_TTL)
+
+
+async def record_shadow(text: str, prediction: IntentPrediction | None, answer: str) -> None:
+    """Shadow-режим: запомнить предсказание рядом с фактическим ответом. Best-effort."""
+    if prediction is None or settings.MAXBOT_INTENT_CLASSIFIER_MODE != MODE_SHADOW:
+        return
+    try:
+        await sync_to_async(_record_shadow_sync)(text, prediction, answer)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("intent shadow sample not saved: %s", exc)
+
+
+def shadow_report() -> dict:
+    """Для admin: последние shadow-сэмплы и сколько бы ушло мимо LLM по intent'ам."""
+    samples = cache.get(SHADOW_KEY) or []
+    routed = Counter(s["label"] for s in samples if s["would_route"])
+    return {
+        "mode": settings.MAXBOT_INTENT_CLASSIFIER_MODE,
+        "threshold": settings.MAXBOT_INTENT_CLASSIFIER_THRESHOLD,
+        "total": len(samples),
+        "would_route": sum(routed.values()),
+        "by_label": routed.most_common(),
+        "samples": list(reversed(samples)),
+    }
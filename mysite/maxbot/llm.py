@@ -6,14 +6,20 @@
 - `mcp_tools_to_openai_schema(mcp_tools)` — конвертер MCP tool definitions
   → OpenAI tools schema (оба используют JSON Schema, ~10 строк glue)
 - `chat_with_tools(...)` — главный loop: chat.completions.create с tools,
-  если tool_calls → выполнить через MCP-клиент, повторить. Защита от
-  бесконечной петли через max_iterations.
+  если tool_calls → выполнить через MCP-клиент (все вызовы итерации
+  параллельно, не больше MAX_PARALLEL_TOOL_CALLS разом), повторить. Защита
+  от бесконечной петли через max_iterations.
+- `chat_rag(...)` / `chat_rag_stream(...)` — search_faq → context → один
+  LLM call; stream-версия отдаёт текст кусками (stream=True), чтобы
+  handler показал первую фразу до конца генерации.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any
+import time
+from typing import Any, AsyncIterator
 
 from django.conf import settings
 from openai import AsyncOpenAI
@@ -29,6 +35,10 @@ DEFAULT_MODEL = "gpt-4o-mini"
 # Защита от бесконечного цикла tool-use
 MAX_TOOL_ITERATIONS = 5
 
+# Сколько tool_calls одной итерации выполнять одновременно (пул MCP-сессий
+# всё равно ограничен MAXBOT_MCP_POOL_SIZE — больше нет смысла)
+MAX_PARALLEL_TOOL_CALLS = 4
+
 # Сообщение клиенту когда модель не справилась за лимит / RAG-score < threshold.
 # Каноническая форма — её мы возвращаем сами. Но LLM также может произнести
 # вариант фразы из system_prompt («Не знаю, передам менеджеру») — `is_giveup`
@@ -107,13 +117,21 @@ async def chat_with_tools(
     mcp_client: MaxbotMCPClient,
     model: str = DEFAULT_MODEL,
     max_iterations: int = MAX_TOOL_ITERATIONS,
+    max_parallel_tools: int = MAX_PARALLEL_TOOL_CALLS,
     openai_client: AsyncOpenAI | None = None,
+    timings: list[dict] | None = None,
 ) -> str:
     """Tool-use loop: LLM может вызывать MCP-tools для ответа на запрос.
 
     `messages` стартовый список (system + user). Loop модифицирует копию.
     Возвращает финальный текст для клиента.
 
+    Несколько tool_calls в одном ответе модели независимы — выполняются
+    параллельно (gather + semaphore на max_parallel_tools), tool-сообщения
+    кладутся в порядке tool_calls. Сбой одного вызова — {"error": ...} в его
+    сообщении, остальные не страдают. timings (если передан) — по dict'у на
+    итерацию: {iteration, llm_ms, tools, tools_ms}.
+
     При превышении max_iterations — возвращает LLM_GIVEUP_MESSAGE (caller
     должен создать BotInquiry для менеджера).
     """
@@ -121,15 +139,19 @@ async def chat_with_tools(
     tools_schema = mcp_tools_to_openai_schema(mcp_client.list_tools())
     client = openai_client or get_async_openai_client()
     msgs = list(messages)
+    semaphore = asyncio.Semaphore(max(1, max_parallel_tools))
 
     for iteration in range(max_iterations):
+        started = time.perf_counter()
         resp = await client.chat.completions.create(
             model=model,
             messages=msgs,
             tools=tools_schema,
         )
+        llm_ms = (time.perf_counter() - started) * 1000
         msg = resp.choices[0].message
         if not msg.tool_calls:
+            _record_iteration(timings, iteration, llm_ms, 0, 0.0)
             # Финальный ответ
             return msg.content or ""
 
@@ -147,50 +169,64 @@ async def chat_with_tools(
             ],
         })
 
-        # Выполняем каждый tool через MCP, ответ кладём в messages
-        for tc in msg.tool_calls:
-            try:
-                args = json.loads(tc.function.arguments) if tc.function.arguments else {}
-            except json.JSONDecodeError:
-                args = {}
-            try:
-                result = await mcp_client.call_tool(tc.function.name, args)
-                content = result.content[0].text if result.content else ""
-            except Exception as exc:  # noqa: BLE001
-                logger.exception("MCP tool %s failed", tc.function.name)
-                content = json.dumps({"error": str(exc)})
+        # Все tool'ы итерации — параллельно через MCP; gather сохраняет порядок
+        tools_started = time.perf_counter()
+        contents = await asyncio.gather(
+            *(_run_tool_call(tc, mcp_client, semaphore) for tc in msg.tool_calls)
+        )
+        tools_ms = (time.perf_counter() - tools_started) * 1000
+        for tc, content in zip(msg.tool_calls, contents):
             msgs.append({
                 "role": "tool",
                 "tool_call_id": tc.id,
                 "content": content,
             })
+        _record_iteration(timings, iteration, llm_ms, len(msg.tool_calls), tools_ms)
 
     logger.warning("chat_with_tools: hit max_iterations=%d, giving up", max_iterations)
     return LLM_GIVEUP_MESSAGE
 
 
-async def chat_rag(
+async def _run_tool_call(tc: Any, mcp_client: MaxbotMCPClient, semaphore: asyncio.Semaphore) -> str:
+    """Один tool_call через MCP → content tool-сообщения. Не бросает."""
+    try:
+        args = json.loads(tc.function.arguments) if tc.function.arguments else {}
+    except json.JSONDecodeError:
+        args = {}
+    try:
+        async with semaphore:
+            result = await mcp_client.call_tool(tc.function.name, args)
+        return result.content[0].text if result.content else ""
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("MCP tool %s failed", tc.function.name)
+        return json.dumps({"error": str(exc)})
+
+
+def _record_iteration(
+    timings: list[dict] | None, iteration: int, llm_ms: float, tools: int, tools_ms: float,
+) -> None:
+    logger.info(
+        "chat_with_tools iteration %d: llm %.0fms, %d tool(s) %.0fms",
+        iteration, llm_ms, tools, tools_ms,
+    )
+    if timings is not None:
+        timings.append({
+            "iteration": iteration,
+            "llm_ms": round(llm_ms, 1),
+            "tools": tools,
+            "tools_ms": round(tools_ms, 1),
+        })
+
+
+async def _rag_messages(
     *,
     user_text: str,
     system_prompt: str,
     mcp_client: MaxbotMCPClient,
-    model: str = DEFAULT_MODEL,
-    openai_client: AsyncOpenAI | None = None,
-    min_score: float = RAG_MIN_SCORE,
-    top_k: int = RAG_TOP_K,
-) -> str:
-    """RAG-as-context: search_faq → context в system → 1 LLM call (без tools).
-
-    Быстрее chat_with_tools на ~30% (3 OpenAI calls → 2). На low-score
-    (top-1 < min_score) НЕ возвращаем early giveup, а зовём LLM с пустым
-    FAQ-context — пусть LLM по правилам system_prompt'а решит: вежливо
-    редиректнуть на off-topic ИЛИ честно сказать «передам менеджеру».
-    Раньше early-giveup обижал клиентов на «привет/спасибо» (теперь это
-    intent-router'ом перехватывается ДО chat_rag).
-
-    На технические fail (search_faq exception) — всё ещё giveup, иначе
-    LLM может галлюцинировать без FAQ-context.
-    """
+    min_score: float,
+    top_k: int,
+) -> list[dict] | None:
+    """search_faq → messages для LLM (system + FAQ-context, user). None — search_faq упал."""
     await mcp_client.ensure_started()
 
     # 1. Прямой вызов search_faq (минуя LLM-роутер)
@@ -212,7 +248,7 @@ async def chat_rag(
                 faq_items = []
     except Exception:  # noqa: BLE001
         logger.exception("chat_rag: search_faq failed")
-        return LLM_GIVEUP_MESSAGE
+        return None
 
     # Low-score / empty FAQ — НЕ giveup, а пустой context для LLM.
     # Он по правилам 2-3 system_prompt'а: либо вежливо редиректит на услуги
@@ -238,14 +274,79 @@ async def chat_rag(
             "Если это так, вежливо верни клиента к услугам (правило 2-3 выше). "
             "Если вопрос явно про салон, но ответа нет — следуй правилу 4."
         )
+    return [
+        {"role": "system", "content": system_prompt + "\n\n" + context},
+        {"role": "user", "content": user_text},
+    ]
+
+
+async def chat_rag(
+    *,
+    user_text: str,
+    system_prompt: str,
+    mcp_client: MaxbotMCPClient,
+    model: str = DEFAULT_MODEL,
+    openai_client: AsyncOpenAI | None = None,
+    min_score: float = RAG_MIN_SCORE,
+    top_k: int = RAG_TOP_K,
+) -> str:
+    """RAG-as-context: search_faq → context в system → 1 LLM call (без tools).
+
+    Быстрее chat_with_tools на ~30% (3 OpenAI calls → 2). На low-score
+    (top-1 < min_score) НЕ возвращаем early giveup, а зовём LLM с пустым
+    FAQ-context — пусть LLM по правилам system_prompt'а решит: вежливо
+    редиректнуть на off-topic ИЛИ честно сказать «передам менеджеру».
+    Раньше early-giveup обижал клиентов на «привет/спасибо» (теперь это
+    intent-router'ом перехватывается ДО chat_rag).
+
+    На технические fail (search_faq exception) — всё ещё giveup, иначе
+    LLM может галлюцинировать без FAQ-context.
+    """
+    messages = await _rag_messages(
+        user_text=user_text, system_prompt=system_prompt, mcp_client=mcp_client,
+        min_score=min_score, top_k=top_k,
+    )
+    if messages is None:
+        return LLM_GIVEUP_MESSAGE
 
     # 3. Один LLM call без tools
     client = openai_client or get_async_openai_client()
-    resp = await client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt + "\n\n" + context},
-            {"role": "user", "content": user_text},
-        ],
-    )
+    resp = await client.chat.completions.create(model=model, messages=messages)
     return resp.choices[0].message.content or LLM_GIVEUP_MESSAGE
+
+
+async def chat_rag_stream(
+    *,
+    user_text: str,
+    system_prompt: str,
+    mcp_client: MaxbotMCPClient,
+    model: str = DEFAULT_MODEL,
+    openai_client: AsyncOpenAI | None = None,
+    min_score: float = RAG_MIN_SCORE,
+    top_k: int = RAG_TOP_K,
+) -> AsyncIterator[str]:
+    """chat_rag со stream=True: отдаёт куски текста по мере генерации.
+
+    Склеенные куски == ответ chat_rag. search_faq упал или модель ничего
+    не сказала — один кусок LLM_GIVEUP_MESSAGE.
+    """
+    messages = await _rag_messages(
+        user_text=user_text, system_prompt=system_prompt, mcp_client=mcp_client,
+        min_score=min_score, top_k=top_k,
+    )
+    if messages is None:
+        yield LLM_GIVEUP_MESSAGE
+        return
+
+    client = openai_client or get_async_openai_client()
+    stream = await client.chat.completions.create(model=model, messages=messages, stream=True)
+    produced = False
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            produced = True
+            yield delta
+    if not produced:
+        yield LLM_GIVEUP_MESSAGE
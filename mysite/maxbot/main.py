@@ -69,12 +69,17 @@ async def run() -> None:
 
     # Прогрев response cache — фоновая задача, не блокирует webhook listener.
     # Первый клиент после рестарта по «как записаться?» получает мгновенный
-    # ответ если warmup успел (~30-60s на 10 вопросов через прокси).
+    # ответ если warmup успел (топ-вопросы — за секунды, пул + RPS-лимит).
+    # Дальше тот же цикл раз в MAXBOT_HOT_QUESTIONS_INTERVAL догревает топ
+    # частых вопросов (question_tracker) — кэш идёт за реальным спросом.
     if mcp_ready:
-        from maxbot.warmup import warmup_response_cache
+        from maxbot.warmup import run_hot_questions_loop
         asyncio.create_task(
-            warmup_response_cache(mcp_client=MaxbotMCPClient.instance())
+            run_hot_questions_loop(mcp_client=MaxbotMCPClient.instance())
         )
+        # Ping сессий пула MCP (упавшие перезапускаются) + гистограммы
+        # латентности tool'ов в Django cache для admin.
+        asyncio.create_task(MaxbotMCPClient.instance().run_health_checks())
 
     if cfg.mode == "polling":
         logger.info("Mode: long-polling")
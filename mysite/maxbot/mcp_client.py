@@ -1,19 +1,30 @@
-"""Persistent MCP-клиент для maxbot.
+"""Persistent MCP-клиент для maxbot: небольшой пул stdio-сессий.
 
-Один subprocess `formulatela_mcp` живёт всё время работы maxbot-процесса.
-Это критично для производительности: spawn нового subprocess'а каждый раз
-~500ms (см. docs/plans/maxbot-phase2-research-T01.md §1.2).
+Каждая сессия — свой subprocess `formulatela_mcp`, живущий всё время работы
+maxbot-процесса: spawn нового subprocess'а на вызов ~500ms (см.
+docs/plans/maxbot-phase2-research-T01.md §1.2). FastMCP сейчас только stdio,
+а search_faq в subprocess'е синхронный — один subprocess обслуживает вызовы
+по очереди. Пул из MAXBOT_MCP_POOL_SIZE сессий снимает эту очередь:
+
+- ensure_started поднимает первую сессию; следующие — фоном, когда вызову
+  досталась уже занятая сессия (пул растёт по спросу, в простое — один процесс);
+- вызов уходит в наименее загруженную живую сессию, при равенстве —
+  round-robin;
+- каждый вызов ограничен MAXBOT_MCP_CALL_TIMEOUT (asyncio.wait_for);
+- транспортный сбой (subprocess умер, pipe закрыт) — сессия перезапускается,
+  вызов повторяется один раз (все tool'ы read-only). McpError — ответ
+  сервера, не сбой транспорта: отдаём caller'у как есть;
+- таймаут — сессию проверяем ping'ом фоном, не отвечает — перезапуск;
+- `run_health_checks` — фоновый цикл: раз в MAXBOT_MCP_HEALTH_INTERVAL сек
+  ping каждой сессии + снимок `stats()` (гистограммы латентности по tool'ам)
+  в Django cache для admin.
 
 Жизненный цикл:
 1. `build_dispatcher()` создаёт `MaxbotMCPClient` singleton
 2. При первом `await client.ensure_started()` — spawn subprocess + initialize
    ClientSession + list_tools кэширует
 3. handlers вызывают `await client.call_tool(name, args)` многократно
-4. При shutdown maxbot — `await client.close()` (закрывает session+subprocess)
-
-Singleton — потому что в FastMCP сейчас только stdio (один subprocess на
-коннект), и держать N сессий = N subprocess'ов = бессмысленно. При
-переходе на streamable-http (Фаза 2.5) можно расширить.
+4. При shutdown maxbot — `await client.close()` (закрывает все сессии)
 """
 from __future__ import annotations
 
@@ -21,27 +32,158 @@ import asyncio
 import logging
 import os
 import sys
-from contextlib import AsyncExitStack
+import time
 from pathlib import Path
 from typing import Any
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from mcp import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.shared.exceptions import McpError
 
 
 logger = logging.getLogger("maxbot.mcp_client")
 
+# Верхние границы корзин гистограммы латентности, мс (+ последняя «> 10000»)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class _ToolLatency:
+    """Гистограмма латентности одного tool'а: фиксированные корзины + счётчики."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for n, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[n] += 1
+                return
+        self.buckets[-1] += 1
+
+    def as_dict(self) -> dict:
+        labels = [f"<={b}" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class _PoolSession:
+    """Одна stdio-сессия пула: свой subprocess и своя задача-владелец.
+
+    stdio_client/ClientSession — anyio cancel scope'ы: выходить из них можно
+    только в той задаче, что в них входила. Сессии стартуют и из фоновых
+    задач (_grow, _check), а закрываются из close() — поэтому контекст
+    держит одна долгоживущая задача `_run`: входит, ждёт `_stop` и выходит
+    сама. start/close/restart только сигналят ей.
+    """
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.session: ClientSession | None = None
+        self.tools: list[Any] | None = None
+        self.inflight = 0
+        self.restarts = 0
+        self.starting = False
+        self.lock = asyncio.Lock()
+        self._owner: asyncio.Task | None = None
+        self._stop: asyncio.Event | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None
+
+    async def start(self, params: StdioServerParameters) -> None:
+        """Spawn subprocess + initialize + list_tools в задаче-владельце. Под self.lock."""
+        logger.info("Starting MCP subprocess #%d: %s %s",
+                    self.index, params.command, " ".join(params.args))
+        if self.tools is not None:
+            self.restarts += 1
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._owner = asyncio.create_task(self._run(params, self._stop, ready))
+        try:
+            await ready
+        except BaseException:
+            # Не поднялась или старт отменён (close() снял _grow) — владелец выходит сам
+            self._owner.cancel()
+            await self.close()
+            raise
+
+    async def _run(self, params: StdioServerParameters, stop: asyncio.Event,
+                   ready: asyncio.Future) -> None:
+        """Задача-владелец: вход в stdio-контекст, ожидание stop, выход — всё здесь."""
+        try:
+            async with stdio_client(params) as (read, write), \
+                    ClientSession(read, write) as session:
+                await session.initialize()
+                tools_resp = await session.list_tools()
+                self.tools = list(tools_resp.tools)
+                logger.info("MCP subprocess #%d ready, tools: %s",
+                            self.index, [t.name for t in self.tools])
+                self.session = session
+                if not ready.done():
+                    ready.set_result(None)
+                await stop.wait()
+        except asyncio.CancelledError:
+            if not ready.done():
+                ready.cancel()
+            raise
+        except Exception as exc:  # noqa: BLE001 — отдаём start() или в лог
+            if not ready.done():
+                ready.set_exception(exc)
+            else:
+                logger.warning("MCP #%d session ended with exception: %r", self.index, exc)
+        finally:
+            if self._stop is stop:
+                self.session = None
+
+    async def close(self) -> None:
+        owner, self._owner, self.session = self._owner, None, None
+        if owner is None:
+            return
+        self._stop.set()
+        try:
+            await owner
+        except asyncio.CancelledError:
+            if not owner.cancelled():
+                raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("MCP #%d close exception (ignored): %r", self.index, exc)
+
 
 class MaxbotMCPClient:
-    """Singleton-клиент для persistent stdio-сессии с formulatela_mcp."""
+    """Singleton-клиент: пул persistent stdio-сессий с formulatela_mcp."""
 
     _instance: "MaxbotMCPClient | None" = None
 
-    def __init__(self) -> None:
-        self._session: ClientSession | None = None
-        self._stack: AsyncExitStack | None = None
+    def __init__(
+        self,
+        pool_size: int | None = None,
+        call_timeout: float | None = None,
+    ) -> None:
+        size = settings.MAXBOT_MCP_POOL_SIZE if pool_size is None else pool_size
+        self._slots = [_PoolSession(n) for n in range(max(1, size))]
+        self._call_timeout = settings.MAXBOT_MCP_CALL_TIMEOUT if call_timeout is None else call_timeout
         self._lock = asyncio.Lock()
+        self._cursor = 0
         self._tools_cache: list[Any] | None = None
+        self._latency: dict[str, _ToolLatency] = {}
+        self._background: set[asyncio.Task] = set()
 
     @classmethod
     def instance(cls) -> "MaxbotMCPClient":
@@ -56,33 +198,22 @@ class MaxbotMCPClient:
         cls._instance = None
 
     async def ensure_started(self) -> None:
-        """Идемпотентный старт. Безопасно вызывать на каждый handler-call."""
-        if self._session is not None:
+        """Идемпотентный старт первой сессии. Безопасно вызывать на каждый handler-call."""
+        if self._alive():
             return
         async with self._lock:
-            if self._session is not None:  # double-check после lock
+            if self._alive():  # double-check после lock
                 return
-            await self._start()
-
-    async def _start(self) -> None:
-        """Spawn MCP subprocess + initialize session. Под lock."""
-        params = self._build_server_params()
-        logger.info("Starting MCP subprocess: %s %s", params.command, " ".join(params.args))
+            await self._start(self._slots[0])
 
-        stack = AsyncExitStack()
-        try:
-            read, write = await stack.enter_async_context(stdio_client(params))
-            session = await stack.enter_async_context(ClientSession(read, write))
-            await session.initialize()
-            tools_resp = await session.list_tools()
-            self._tools_cache = list(tools_resp.tools)
-            logger.info("MCP subprocess ready, tools: %s",
-                        [t.name for t in self._tools_cache])
-            self._session = session
-            self._stack = stack
-        except Exception:
-            await stack.aclose()
-            raise
+    async def _start(self, slot: _PoolSession) -> None:
+        """Старт одной сессии пула. Под slot.lock."""
+        async with slot.lock:
+            if slot.alive:
+                return
+            await slot.start(self._build_server_params())
+            if self._tools_cache is None:
+                self._tools_cache = slot.tools
 
     def _build_server_params(self) -> StdioServerParameters:
         """Параметры spawn'а MCP subprocess.
@@ -116,28 +247,160 @@ class MaxbotMCPClient:
             raise RuntimeError("MaxbotMCPClient.ensure_started() ещё не вызван")
         return self._tools_cache
 
-    async def call_tool(self, name: str, args: dict) -> Any:
+    async def call_tool(self, name: str, args: dict, timeout: float | None = None) -> Any:
         """Вызвать MCP-tool. Возвращает CallToolResult.
 
         НЕ парсит content — caller сам делает json.loads(result.content[0].text)
         для tool'ов которые возвращают JSON.
+
+        timeout=None — MAXBOT_MCP_CALL_TIMEOUT; по истечении asyncio.TimeoutError.
         """
         await self.ensure_started()
-        assert self._session is not None
-        return await self._session.call_tool(name, args)
+        timeout = self._call_timeout if timeout is None else timeout
+        latency = self._latency.setdefault(name, _ToolLatency())
+        started = time.perf_counter()
+        try:
+            try:
+                return await self._call_once(self._pick(), name, args, timeout)
+            except (McpError, asyncio.TimeoutError):
+                raise
+            except Exception as exc:  # noqa: BLE001 — транспорт: перезапуск + повтор
+                logger.warning("MCP call %s failed (%r), respawning session", name, exc)
+                slot = await self._respawn_any()
+                return await self._call_once(slot, name, args, timeout)
+        except asyncio.TimeoutError:
+            latency.timeouts += 1
+            raise
+        except Exception:
+            latency.errors += 1
+            raise
+        finally:
+            latency.observe((time.perf_counter() - started) * 1000)
 
-    async def close(self) -> None:
-        """Graceful shutdown — закрывает session + terminate subprocess."""
-        if self._stack is None:
-            return
-        async with self._lock:
-            if self._stack is None:
+    async def _call_once(self, slot: _PoolSession, name: str, args: dict, timeout: float) -> Any:
+        session = slot.session
+        if session is None:
+            raise RuntimeError(f"MCP session #{slot.index} is not running")
+        if slot.inflight:
+            self._maybe_grow()
+        slot.inflight += 1
+        try:
+            return await asyncio.wait_for(session.call_tool(name, args), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("MCP call %s timed out after %.1fs on session #%d",
+                           name, timeout, slot.index)
+            self._spawn(self._check(slot))
+            raise
+        except McpError:
+            raise
+        except Exception:
+            if slot.session is session:
+                await slot.close()
+            raise
+        finally:
+            slot.inflight -= 1
+
+    def _alive(self) -> list[_PoolSession]:
+        return [s for s in self._slots if s.alive]
+
+    def _pick(self) -> _PoolSession:
+        """Наименее загруженная живая сессия; при равенстве — round-robin."""
+        alive = self._alive()
+        if not alive:
+            raise RuntimeError("Нет живых MCP-сессий")
+        self._cursor = (self._cursor + 1) % len(alive)
+        ordered = alive[self._cursor:] + alive[:self._cursor]
+        return min(ordered, key=lambda s: s.inflight)
+
+    def _maybe_grow(self) -> None:
+        """Вызов встаёт в очередь к занятой сессии — фоном поднять ещё одну (до размера пула)."""
+        for slot in self._slots:
+            if not slot.alive and not slot.starting:
+                slot.starting = True
+                self._spawn(self._grow(slot))
+                return
+
+    async def _grow(self, slot: _PoolSession) -> None:
+        try:
+            await self._start(slot)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("MCP session #%d spawn failed: %s", slot.index, exc)
+        finally:
+            slot.starting = False
+
+    async def _respawn_any(self) -> _PoolSession:
+        """Живая сессия для повтора: есть — берём, нет — перезапускаем первую."""
+        if self._alive():
+            return self._pick()
+        slot = self._slots[0]
+        await self._start(slot)
+        return slot
+
+    async def _restart(self, slot: _PoolSession, failed: ClientSession | None = None) -> None:
+        """Перезапуск сессии. failed — уже кто-то перезапустил её, ничего не делаем."""
+        async with slot.lock:
+            if failed is not None and slot.session is not failed:
                 return
+            await slot.close()
+            await slot.start(self._build_server_params())
+
+    async def _check(self, slot: _PoolSession) -> bool:
+        """Ping сессии; не ответила за MAXBOT_MCP_CALL_TIMEOUT — перезапуск."""
+        session = slot.session
+        if session is None:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), self._call_timeout)
+            return True
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("MCP session #%d failed ping (%r), respawning", slot.index, exc)
+        try:
+            await self._restart(slot, failed=session)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("MCP session #%d respawn failed: %s", slot.index, exc)
+        return False
+
+    async def health_check(self) -> dict[int, bool]:
+        """Ping всех живых сессий (упавшие перезапускаются). {index: ответила}."""
+        slots = self._alive()
+        results = await asyncio.gather(*(self._check(s) for s in slots))
+        return {s.index: ok for s, ok in zip(slots, results)}
+
+    async def run_health_checks(self) -> None:
+        """Фоновый цикл процесса бота: health_check + снимок stats() в cache."""
+        from django.core.cache import cache
+
+        from maxbot.question_tracker import METRICS_TTL, MCP_STATS_KEY
+
+        while True:
+            await asyncio.sleep(settings.MAXBOT_MCP_HEALTH_INTERVAL)
             try:
-                await self._stack.aclose()
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("MCP close exception (ignored): %r", exc)
-            finally:
-                self._session = None
-                self._stack = None
-                self._tools_cache = None
+                await self.health_check()
+                await sync_to_async(cache.set)(MCP_STATS_KEY, self.stats(), METRICS_TTL)
+            except Exception:  # noqa: BLE001
+                logger.exception("MCP health check crashed")
+
+    def stats(self) -> dict:
+        """Состояние пула и гистограммы латентности по tool'ам."""
+        return {
+            "pool": [
+                {"index": s.index, "alive": s.alive, "inflight": s.inflight, "restarts": s.restarts}
+                for s in self._slots
+            ],
+            "tools": {name: h.as_dict() for name, h in sorted(self._latency.items())},
+        }
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def close(self) -> None:
+        """Graceful shutdown — закрывает все сессии + terminate subprocess'ов."""
+        for task in list(self._background):
+            task.cancel()
+        async with self._lock:
+            for slot in self._slots:
+                async with slot.lock:
+                    await slot.close()
+            self._tools_cache = None
@@ -24,11 +24,17 @@ Race conditions: при concurrent сообщениях от одного user'
 
 НЕ для контекстных клавиатур (categories/services/faq/booking-confirm) —
 они быстро сменяются и tracking их через state — overkill.
+
+`StreamingMenuReply` — тот же ответ с меню, но текст приходит кусками
+(stream LLM): первый кусок уходит через send_with_main_menu, дальше
+edit_message не чаще раза в MIN_EDIT_INTERVAL сек, финальный текст
+сохраняется в state (иначе снятие меню потом откатит текст к первой фразе).
 """
 from __future__ import annotations
 
 import asyncio
 import logging
+import time
 
 from asgiref.sync import sync_to_async
 from django.db import transaction
@@ -42,6 +48,9 @@ logger = logging.getLogger("maxbot.menu")
 CTX_LAST_MENU_MID = "last_main_menu_msg_id"
 CTX_LAST_MENU_TEXT = "last_main_menu_msg_text"
 
+# MAX API режет частые edit'ы одного сообщения — не чаще раза в секунду
+MIN_EDIT_INTERVAL = 1.0
+
 
 async def _edit_prev_safe(bot, prev_mid: str | None, prev_text: str | None) -> None:
     """Best-effort снятие меню с prev. Exception поглощаем (msg удалён/old/etc)."""
@@ -74,7 +83,7 @@ async def send_with_main_menu(
     text: str,
     bot_user: BotUser,
     extra_attachments: list | None = None,
-) -> None:
+) -> str | None:
     """Отправить сообщение с главным меню, сняв меню с предыдущего бот-ответа.
 
     Шаги (порядок важен для UX — минимизирует «моргание»):
@@ -84,6 +93,8 @@ async def send_with_main_menu(
 
     extra_attachments: например welcome-картинка для нового user'а — пойдёт
     ПЕРЕД меню (отображается над клавиатурой). Если None — только меню.
+
+    Возвращает mid нового сообщения (None — SDK его не вернул).
     """
     prev_mid = bot_user.context.get(CTX_LAST_MENU_MID) if bot_user.context else None
     prev_text = bot_user.context.get(CTX_LAST_MENU_TEXT) if bot_user.context else None
@@ -103,7 +114,7 @@ async def send_with_main_menu(
     if new_mid is None:
         logger.warning("send_message returned without mid; menu state not updated "
                        "(prev menu remains, will be cleaned next turn)")
-        return
+        return None
 
     # 2. Параллельно: edit_prev + save_state. Edit идёт ВЫШЕ в чате (вне
     # фокуса), save_state — DB запись. Оба независимые ~100ms — gather
@@ -118,6 +129,79 @@ async def send_with_main_menu(
         bot_user.context = {}
     bot_user.context[CTX_LAST_MENU_MID] = new_mid
     bot_user.context[CTX_LAST_MENU_TEXT] = text
+    return new_mid
+
+
+class StreamingMenuReply:
+    """Ответ с главным меню, который дописывается по мере генерации.
+
+    update(text) — полный текст на данный момент: первый вызов отправляет
+    сообщение, следующие редактируют его с троттлингом. finish(text) —
+    финальный edit (без троттлинга) + state. Если финальный edit не прошёл —
+    шлём текст новым сообщением, чтобы клиент не остался с обрубком.
+    """
+
+    def __init__(self, *, bot, chat_id: int, bot_user: BotUser,
+                 min_edit_interval: float = MIN_EDIT_INTERVAL, clock=time.monotonic):
+        self._bot = bot
+        self._chat_id = chat_id
+        self._bot_user = bot_user
+        self._min_edit_interval = min_edit_interval
+        self._clock = clock
+        self._sent = False
+        self._mid: str | None = None
+        self._shown = ""
+        self._last_edit = 0.0
+
+    @property
+    def sent(self) -> bool:
+        return self._sent
+
+    async def update(self, text: str) -> None:
+        if not self._sent:
+            self._mid = await send_with_main_menu(
+                bot=self._bot, chat_id=self._chat_id, text=text, bot_user=self._bot_user,
+            )
+            self._sent = True
+            self._shown, self._last_edit = text, self._clock()
+            return
+        if self._mid is None or text == self._shown:
+            return  # без mid редактировать нечего — финал уйдёт новым сообщением
+        if self._clock() - self._last_edit < self._min_edit_interval:
+            return
+        try:
+            await self._edit(text)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("edit_message(stream) failed: %s", exc)
+
+    async def finish(self, text: str) -> None:
+        if not self._sent:
+            await send_with_main_menu(
+                bot=self._bot, chat_id=self._chat_id, text=text, bot_user=self._bot_user,
+            )
+            return
+        if text != self._shown:
+            try:
+                if self._mid is None:
+                    raise RuntimeError("no mid to edit")
+                await self._edit(text)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("edit_message(stream final) failed, sending anew: %s", exc)
+                await send_with_main_menu(
+                    bot=self._bot, chat_id=self._chat_id, text=text, bot_user=self._bot_user,
+                )
+                return
+        if self._mid is not None:
+            await _save_menu_state(self._bot_user.id, self._mid, text)
+            self._bot_user.context[CTX_LAST_MENU_TEXT] = text
+
+    async def _edit(self, text: str) -> None:
+        await self._bot.edit_message(
+            message_id=self._mid,
+            text=text,
+            attachments=[keyboards.main_menu_keyboard()],
+        )
+        self._shown, self._last_edit = text, self._clock()
 
 
 def _extract_message_id(sent) -> str | None:
@@ -1,18 +1,32 @@
-"""Список самых частых вопросов для прогрева response cache при старте бота.
+"""Самые частые вопросы для прогрева response cache при старте бота.
 
 Используется в `maxbot.warmup.warmup_response_cache` — каждый запуск процесса
-прогоняем эти вопросы через chat_rag и кладём ответы в кэш. Первый клиент
+прогоняем топ вопросов через chat_rag и кладём ответы в кэш. Первый клиент
 после деплоя/рестарта получает hot ответ за ~50ms вместо ~6.7s.
 
-Подбор: интенты которые будут чаще всего у клиента массажного салона —
-запись/цены/место/время. Не больше 10 — иначе warmup тянется > 1 минуты.
-
-V1 — hardcoded. V2 — учиться на реальном трафике (новая модель QueryLog
-или агрегация по BotInquiry.question с нормализацией). См. backlog
-`project_maxbot_phase2_backlog.md`.
+Порядок — по реальному трафику (`ranked_questions`):
+- затухающие частоты вопросов AI-пути (maxbot.question_tracker, Redis ZSET);
+- BotInquiry за последние INQUIRY_WINDOW_DAYS дней (нормализованный вопрос) —
+  история, которая переживает сброс Redis.
+Вопросы, встреченные < MIN_OBSERVED раз, не берём — разовые личные вопросы
+прогревать незачем. POPULAR_QUESTIONS — базовый список: он добирает топ
+на свежей установке и при равных счётчиках сохраняет свой порядок.
 """
 from __future__ import annotations
 
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from maxbot.question_tracker import top_questions
+from maxbot.response_cache import MIN_QUESTION_LEN, normalize_question
+from services_app.models import BotInquiry
+
+
+logger = logging.getLogger("maxbot.warmup")
 
 POPULAR_QUESTIONS: list[str] = [
     "как записаться",
@@ -26,3 +40,40 @@ POPULAR_QUESTIONS: list[str] = [
     "есть ли подарочный сертификат",
     "как оплатить",
 ]
+
+INQUIRY_WINDOW_DAYS = 30
+MIN_OBSERVED = 2
+TRACKED_CANDIDATES = 200
+
+
+def observed_counts() -> Counter:
+    """Частоты нормализованных вопросов: трекер AI-пути + BotInquiry за окно."""
+    counts = Counter(dict(top_questions(TRACKED_CANDIDATES)))
+    since = timezone.now() - timedelta(days=INQUIRY_WINDOW_DAYS)
+    questions = BotInquiry.objects.filter(asked_at__gte=since).values_list("question", flat=True)
+    for question in questions.iterator():
+        norm = normalize_question(question)
+        if len(norm) >= MIN_QUESTION_LEN:
+            counts[norm] += 1
+    return counts
+
+
+def rank_questions(baseline: list[str], counts: Counter, limit: int) -> list[str]:
+    """Топ-limit вопросов: по убыванию частоты, при равенстве — порядок baseline."""
+    position = {q: n for n, q in enumerate(baseline)}
+    candidates = set(baseline) | {q for q, c in counts.items() if c >= MIN_OBSERVED}
+    ranked = sorted(
+        candidates,
+        key=lambda q: (-counts.get(q, 0), position.get(q, len(baseline)), q),
+    )
+    return ranked[:limit]
+
+
+async def ranked_questions(baseline: list[str], limit: int) -> list[str]:
+    """rank_questions по живой статистике. Сбой БД/кэша — baseline как есть."""
+    try:
+        counts = await sync_to_async(observed_counts)()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("ranked_questions: статистика недоступна, берём baseline: %s", exc)
+        return list(baseline)[:limit]
+    return rank_questions(baseline, counts, limit)
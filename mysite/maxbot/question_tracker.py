@@ -0,0 +1,166 @@
+"""Частоты вопросов AI-помощника: Redis sorted set с затуханием.
+
+Каждый вопрос, дошедший до AI-пути (после intent-роутера), — ZINCRBY 1
+по нормализованному тексту; попадание в семантический кэш засчитывается
+каноническому вопросу из кэша, чтобы перефразы не распыляли счёт.
+
+Затухание — без пересчёта на каждом инкременте: периодическая задача
+(`maxbot.warmup.promote_hot_questions`) умножает все score на
+0.5 ** (прошло / QUESTION_FREQ_HALF_LIFE) одним ZUNIONSTORE с WEIGHTS,
+выкидывает хвост ниже MIN_SCORE и обрезает множество до MAX_TRACKED.
+
+Не Redis (LocMem в тестах/dev) — то же самое на dict в Django cache
+(read-modify-write, единичные инкременты под гонкой теряются).
+Модуль без maxapi — его читает и Django admin (метрики).
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+
+from maxbot.response_cache import MIN_QUESTION_LEN, normalize_question
+
+
+logger = logging.getLogger("maxbot.warmup")
+
+FREQ_KEY = "maxbot:ai:question_freq"
+DECAYED_AT_KEY = "maxbot:ai:question_freq:decayed_at"
+WARM_SET_KEY = "maxbot:warmup:hot_set"
+WARMUP_STATS_KEY = "maxbot:warmup:last"
+MCP_STATS_KEY = "maxbot:mcp:stats"
+METRICS_TTL = 7 * 24 * 60 * 60
+MIN_SCORE = 0.05
+MAX_TRACKED = 1000
+
+
+class _RedisZSet:
+    def __init__(self, client, key: str):
+        self._client = client
+        self._key = key
+
+    def incr(self, member: str, amount: float = 1.0) -> None:
+        self._client.zincrby(self._key, amount, member)
+
+    def top(self, k: int) -> list[tuple[str, float]]:
+        rows = self._client.zrevrange(self._key, 0, k - 1, withscores=True)
+        return [(m.decode() if isinstance(m, bytes) else m, float(s)) for m, s in rows]
+
+    def decay(self, factor: float) -> None:
+        pipe = self._client.pipeline()
+        pipe.zunionstore(self._key, {self._key: factor})
+        pipe.zremrangebyscore(self._key, "-inf", f"({MIN_SCORE}")
+        pipe.zremrangebyrank(self._key, 0, -MAX_TRACKED - 1)
+        pipe.execute()
+
+    def size(self) -> int:
+        return int(self._client.zcard(self._key))
+
+
+class _CacheZSet:
+    def __init__(self, key: str):
+        self._key = key
+
+    def _load(self) -> dict[str, float]:
+        return cache.get(self._key) or {}
+
+    def _save(self, scores: dict[str, float]) -> None:
+        cache.set(self._key, scores, None)
+
+    def incr(self, member: str, amount: float = 1.0) -> None:
+        scores = self._load()
+        scores[member] = scores.get(member, 0.0) + amount
+        self._save(scores)
+
+    def top(self, k: int) -> list[tuple[str, float]]:
+        return sorted(self._load().items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+
+    def decay(self, factor: float) -> None:
+        scores = {m: s * factor for m, s in self._load().items() if s * factor >= MIN_SCORE}
+        self._save(dict(sorted(scores.items(), key=lambda kv: -kv[1])[:MAX_TRACKED]))
+
+    def size(self) -> int:
+        return len(self._load())
+
+
+_redis_client = None
+
+
+def _redis():
+    """redis-py клиент к первому (write) LOCATION кэша default, один на процесс.
+
+    Django RedisCache не отдаёт клиент публично (cache._cache — внутреннее),
+    а ZINCRBY/ZUNIONSTORE через cache API не выразить.
+    """
+    global _redis_client
+    if _redis_client is None:
+        import redis
+
+        location = settings.CACHES["default"]["LOCATION"]
+        if isinstance(location, str):
+            location = location.split(",")
+        _redis_client = redis.Redis.from_url(location[0])
+    return _redis_client
+
+
+def _zset():
+    if isinstance(cache, RedisCache):
+        return _RedisZSet(_redis(), cache.make_key(FREQ_KEY))
+    return _CacheZSet(FREQ_KEY)
+
+
+def _record_sync(question: str) -> None:
+    norm = normalize_question(question)
+    if len(norm) >= MIN_QUESTION_LEN:
+        _zset().incr(norm)
+
+
+async def record_question(question: str) -> None:
+    """+1 к частоте вопроса. Best-effort: сбой Redis не мешает ответу клиенту."""
+    try:
+        await sync_to_async(_record_sync)(question)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("record_question failed: %s", exc)
+
+
+def top_questions(k: int) -> list[tuple[str, float]]:
+    """Топ-k (нормализованный вопрос, затухший score) по убыванию."""
+    return _zset().top(k)
+
+
+def decay(now: float | None = None) -> float:
+    """Применить затухание за время с прошлого вызова. Возвращает множитель."""
+    now = time.time() if now is None else now
+    last = cache.get(DECAYED_AT_KEY)
+    cache.set(DECAYED_AT_KEY, now, None)
+    if last is None or now <= last:
+        return 1.0
+    factor = 0.5 ** ((now - last) / settings.MAXBOT_QUESTION_FREQ_HALF_LIFE)
+    _zset().decay(factor)
+    return factor
+
+
+def save_warm_set(questions: list[str]) -> None:
+    cache.set(WARM_SET_KEY, {"questions": list(questions), "promoted_at": time.time()}, METRICS_TTL)
+
+
+def metrics(k: int = 50) -> dict:
+    """Для admin: топ частот, warm set, итоги последнего прогрева и пул MCP."""
+    warm = cache.get(WARM_SET_KEY) or {}
+    warm_questions = set(warm.get("questions", []))
+    zset = _zset()
+    return {
+        "tracked": zset.size(),
+        "top": [
+            {"question": q, "score": round(s, 2), "warm": q in warm_questions}
+            for q, s in zset.top(k)
+        ],
+        "warm_set": warm.get("questions", []),
+        "promoted_at": warm.get("promoted_at"),
+        "last_warmup": cache.get(WARMUP_STATS_KEY),
+        "mcp": cache.get(MCP_STATS_KEY),
+    }
@@ -0,0 +1,254 @@
+"""Семантический кэш AI-ответов: перефразы популярных вопросов — мгновенно.
+
+`response_cache` попадает только при дословном совпадении нормализованного
+вопроса: «как к вам записаться» и «как записаться онлайн» каждый раз
+платят ~6.7s chat_rag. Здесь храним пары (эмбеддинг вопроса → ответ) и
+отдаём ответ, если косинусная близость нового вопроса к отвеченному
+≥ порога. Цена попадания — один запрос эмбеддинга (~0.3s) вместо
+search_faq + chat.completions.
+
+Устройство:
+- in-process (бот — один процесс): OrderedDict как LRU + матрица
+  нормированных векторов, поиск — одно матричное умножение;
+- TTL на запись, вытеснение самой давно использованной сверх max_entries;
+- инвалидация: services_app.signals ведёт поколение HelpArticle в Django
+  cache, перед каждым поиском сверяем его и при смене сбрасываем всё;
+- метрики: hits / near_misses (близость в NEAR_MISS_MARGIN ниже порога —
+  кандидаты на подстройку порога, логируются с обоими вопросами) /
+  misses / errors / invalidations — `SemanticCache.instance().stats()`.
+
+Что НЕ кэшируем — как в response_cache: giveup-ответы и слишком короткие
+вопросы. Без OPENAI_API_KEY или при MAXBOT_SEMANTIC_CACHE_ENABLED=0
+кэш выключен и lookup всегда промах без сетевых вызовов.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from maxbot.response_cache import MIN_QUESTION_LEN, normalize_question
+
+
+logger = logging.getLogger("maxbot.semantic_cache")
+
+DEFAULT_THRESHOLD = 0.92
+NEAR_MISS_MARGIN = 0.05
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+Embedder = Callable[[str], Awaitable[np.ndarray]]
+
+
+@dataclass
+class _Entry:
+    question: str
+    answer: str
+    vector: np.ndarray
+    expires_at: float
+
+
+@dataclass(frozen=True)
+class SemanticLookup:
+    """Результат поиска. vector переиспользуется в store() — без второго эмбеддинга."""
+    answer: str | None
+    score: float = 0.0
+    matched_question: str = ""
+    vector: np.ndarray | None = None
+
+
+def _current_generation() -> int:
+    from services_app.signals import help_articles_generation
+    return help_articles_generation()
+
+
+def _openai_embedder(model: str) -> Embedder:
+    """Эмбеддинг через AsyncOpenAI (прокси — как у chat_rag). Клиент один на кэш."""
+    client = None
+
+    async def embed(text: str) -> np.ndarray:
+        nonlocal client
+        if client is None:
+            from maxbot.llm import get_async_openai_client
+            client = get_async_openai_client()
+        resp = await client.embeddings.create(model=model, input=text)
+        return np.asarray(resp.data[0].embedding, dtype=np.float32)
+
+    return embed
+
+
+class SemanticCache:
+    """LRU-кэш (вопрос → ответ) с поиском по косинусной близости эмбеддингов."""
+
+    _instance: "SemanticCache | None" = None
+
+    def __init__(
+        self,
+        *,
+        embed: Embedder | None,
+        threshold: float = DEFAULT_THRESHOLD,
+        near_miss_margin: float = NEAR_MISS_MARGIN,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._embed = embed
+        self.threshold = threshold
+        self.near_miss_margin = near_miss_margin
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._matrix: np.ndarray | None = None  # строки в порядке self._entries
+        self._generation: int | None = None
+        self._stats = {"hits": 0, "near_misses": 0, "misses": 0, "errors": 0, "invalidations": 0}
+
+    @classmethod
+    def instance(cls) -> "SemanticCache":
+        """Singleton из настроек MAXBOT_SEMANTIC_CACHE_*."""
+        if cls._instance is None:
+            enabled = (
+                getattr(settings, "MAXBOT_SEMANTIC_CACHE_ENABLED", True)
+                and bool(getattr(settings, "OPENAI_API_KEY", ""))
+            )
+            model = getattr(settings, "MAXBOT_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+            cls._instance = cls(
+                embed=_openai_embedder(model) if enabled else None,
+                threshold=getattr(settings, "MAXBOT_SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD),
+                max_entries=getattr(settings, "MAXBOT_SEMANTIC_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+                ttl=getattr(settings, "MAXBOT_SEMANTIC_CACHE_TTL", DEFAULT_TTL_SECONDS),
+            )
+        return cls._instance
+
+    @classmethod
+    def reset_for_tests(cls) -> None:
+        """ТОЛЬКО для тестов — сбросить singleton между ними."""
+        cls._instance = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._embed is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── Публичный API ─────────────────────────────────────────────────
+
+    async def lookup(self, question: str) -> SemanticLookup:
+        """Ответ на самый близкий отвеченный вопрос, если близость ≥ threshold."""
+        norm = normalize_question(question)
+        if not self.enabled or len(norm) < MIN_QUESTION_LEN:
+            return SemanticLookup(answer=None)
+
+        await self._sync_generation()
+        try:
+            vector = self._normalize(await self._embed(norm))
+        except Exception as exc:  # noqa: BLE001
+            self._stats["errors"] += 1
+            logger.warning("semantic cache: embedding failed: %s", exc)
+            return SemanticLookup(answer=None)
+
+        self._drop_expired()
+        if not self._entries:
+            self._stats["misses"] += 1
+            return SemanticLookup(answer=None, vector=vector)
+
+        matrix = self._get_matrix()
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        key = list(self._entries)[best]
+        entry = self._entries[key]
+
+        if score >= self.threshold:
+            self._entries.move_to_end(key)
+            self._matrix = None
+            self._stats["hits"] += 1
+            return SemanticLookup(entry.answer, score, entry.question, vector)
+
+        if score >= self.threshold - self.near_miss_margin:
+            self._stats["near_misses"] += 1
+            logger.info("semantic cache NEAR MISS %.3f: %r ~ %r", score, norm[:60], entry.question[:60])
+        else:
+            self._stats["misses"] += 1
+        return SemanticLookup(answer=None, score=score, matched_question=entry.question, vector=vector)
+
+    async def store(self, question: str, answer: str, vector: np.ndarray | None = None) -> None:
+        """Запомнить ответ. vector — из lookup(), иначе считаем эмбеддинг заново."""
+        norm = normalize_question(question)
+        if not self.enabled or len(norm) < MIN_QUESTION_LEN:
+            return
+        if vector is None:
+            try:
+                vector = self._normalize(await self._embed(norm))
+            except Exception as exc:  # noqa: BLE001
+                self._stats["errors"] += 1
+                logger.warning("semantic cache: embedding failed: %s", exc)
+                return
+
+        self._entries[norm] = _Entry(norm, answer, vector, self._clock() + self.ttl)
+        self._entries.move_to_end(norm)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._matrix = None
+
+    def cached_vector(self, question: str) -> np.ndarray | None:
+        """Вектор живой записи вопроса (None — нет записи): для store() без эмбеддинга."""
+        entry = self._entries.get(normalize_question(question))
+        if entry is None or entry.expires_at <= self._clock():
+            return None
+        return entry.vector
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._matrix = None
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["near_misses"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    # ── Внутреннее ────────────────────────────────────────────────────
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _get_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack([e.vector for e in self._entries.values()])
+        return self._matrix
+
+    def _drop_expired(self) -> None:
+        now = self._clock()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    async def _sync_generation(self) -> None:
+        """Сбросить кэш, если HelpArticle менялись (поколение в Django cache)."""
+        try:
+            generation = await sync_to_async(_current_generation)()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("semantic cache: generation check failed: %s", exc)
+            return
+        if self._generation is not None and generation != self._generation:
+            if self._entries:
+                self._stats["invalidations"] += 1
+                logger.info("semantic cache: HelpArticle changed, dropping %d entries", len(self._entries))
+            self.clear()
+        self._generation = generation
@@ -2,9 +2,21 @@
 
 После `python -m maxbot.main` (systemd restart / deploy) Redis-кэш с
 ответами AI-помощника может быть холодным. Эта функция фоном прогоняет
-~10 hot-вопросов через `chat_rag` и кладёт ответы в `response_cache`,
-чтобы первый клиент по «как записаться?» получил мгновенный ответ
-вместо ~6.7s OpenAI/MCP round-trip.
+топ вопросов (popular_questions.ranked_questions — по реальному трафику)
+через `chat_rag` и кладёт ответы в `response_cache` и `semantic_cache`
+(тот in-process и после рестарта пуст всегда), чтобы первый клиент по
+«как записаться?» получил мгновенный ответ вместо ~6.7s OpenAI/MCP
+round-trip.
+
+Вопросы идут через пул из MAXBOT_WARMUP_CONCURRENCY воркеров, старты
+chat_rag ограничены MAXBOT_WARMUP_RPS в секунду (бюджет OpenAI). Порядок
+стартов — по частоте: самые ходовые вопросы горячие первыми. Метрики
+time-to-warm — в лог и в Django cache (WARMUP_STATS_KEY).
+
+`run_hot_questions_loop` — фоновый цикл процесса бота: сразу после старта
+и далее раз в MAXBOT_HOT_QUESTIONS_INTERVAL сек `promote_hot_questions`
+применяет затухание к частотам (question_tracker), фиксирует топ как warm
+set и догревает в response_cache то, чего там нет (истёк TTL, новый хит).
 
 Запускается из `maxbot.main` через `asyncio.create_task` — не блокирует
 старт webhook listener'а.
@@ -15,63 +27,171 @@ import asyncio
 import logging
 import time
 
-from maxbot import texts
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from maxbot import question_tracker, texts
 from maxbot.llm import chat_rag, is_giveup
 from maxbot.mcp_client import MaxbotMCPClient
-from maxbot.popular_questions import POPULAR_QUESTIONS
+from maxbot.popular_questions import POPULAR_QUESTIONS, ranked_questions
+from maxbot.question_tracker import WARMUP_STATS_KEY
 from maxbot.response_cache import get_cached_answer, set_cached_answer
+from maxbot.semantic_cache import SemanticCache
 
 
 logger = logging.getLogger("maxbot.warmup")
 
+WARMUP_STATS_TTL = question_tracker.METRICS_TTL
+
+
+class _RateLimiter:
+    """Не чаще rps стартов в секунду, в порядке очереди (asyncio.Lock — FIFO)."""
+
+    def __init__(self, rps: float):
+        self._interval = 1.0 / rps if rps > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._interval
+            if delay > 0:
+                await asyncio.sleep(delay)
+
 
 async def warmup_response_cache(
     *,
     mcp_client: MaxbotMCPClient,
+    questions: list[str] | None = None,
+    concurrency: int | None = None,
+    rps: float | None = None,
 ) -> dict[str, int]:
-    """Прогревает cache для POPULAR_QUESTIONS. Возвращает {cached, skipped, failed}.
+    """Прогревает cache для топ-вопросов. Возвращает {cached, skipped, failed}.
 
     - skipped: уже был в cache (Redis выжил рестарт или прошлый warmup)
     - cached: chat_rag успешно отдал ответ ≠ GIVEUP, положили в cache
     - failed: exception в chat_rag ИЛИ ответ == GIVEUP (не кэшируем)
 
+    questions=None — ranked_questions(POPULAR_QUESTIONS, MAXBOT_WARMUP_TOP_N).
     Best-effort: exception на одном вопросе НЕ ломает прогрев остальных.
     """
-    cached = skipped = failed = 0
     started = time.perf_counter()
-
-    for q in POPULAR_QUESTIONS:
-        if await get_cached_answer(q) is not None:
-            skipped += 1
-            logger.debug("warmup skip (already cached): %r", q)
-            continue
-
+    if questions is None:
+        questions = await ranked_questions(POPULAR_QUESTIONS, settings.MAXBOT_WARMUP_TOP_N)
+    concurrency = max(1, concurrency or settings.MAXBOT_WARMUP_CONCURRENCY)
+    limiter = _RateLimiter(settings.MAXBOT_WARMUP_RPS if rps is None else rps)
+
+    # Цикл promote_hot_questions гоняет почти тот же топ каждые N минут:
+    # вопросы, уже лежащие в семантическом кэше, не эмбеддим заново.
+    semantic = SemanticCache.instance()
+    vectors = {q: semantic.cached_vector(q) for q in questions}
+    new_questions = [q for q in questions if vectors[q] is None]
+
+    # Эмбеддинги новых вопросов — одним batch-вызовом в MCP заранее: их
+    # search_faq внутри chat_rag (и в живых диалогах) берут вектор из кэша.
+    if new_questions:
         try:
-            answer = await chat_rag(
-                user_text=q,
-                system_prompt=texts.AI_SYSTEM_PROMPT,
-                mcp_client=mcp_client,
-            )
+            await mcp_client.call_tool("embed_queries", {"queries": new_questions})
         except Exception as exc:  # noqa: BLE001
-            failed += 1
-            logger.warning("warmup failed on %r: %s", q, exc)
+            logger.warning("warmup embed_queries failed: %s", exc)
+
+    # Сначала отсеиваем уже закэшированное — в пул уходит только работа для LLM.
+    pending: list[str] = []
+    skipped = 0
+    for q in questions:
+        existing = await get_cached_answer(q)
+        if existing is None:
+            pending.append(q)
             continue
+        # Семантический кэш in-process — после рестарта он пуст
+        if vectors[q] is None:
+            await semantic.store(q, existing)
+        skipped += 1
+        logger.debug("warmup skip (already cached): %r", q)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    warmed_at: list[float] = []
+    latencies: list[float] = []
+
+    async def _warm(q: str) -> bool:
+        async with semaphore:
+            await limiter.wait()
+            call_started = time.perf_counter()
+            try:
+                answer = await chat_rag(
+                    user_text=q,
+                    system_prompt=texts.AI_SYSTEM_PROMPT,
+                    mcp_client=mcp_client,
+                )
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("warmup failed on %r: %s", q, exc)
+                return False
+            latencies.append(time.perf_counter() - call_started)
 
         if is_giveup(answer):
-            failed += 1
             logger.debug("warmup giveup (not cached): %r", q)
-            continue
-
+            return False
         await set_cached_answer(q, answer)
-        cached += 1
+        await semantic.store(q, answer, vectors[q])
+        warmed_at.append(time.perf_counter() - started)
         logger.info("warmup cached: %r", q)
+        return True
 
-        # Не DDoS'им OpenAI — даём прокси/rate-limit'у вздохнуть. Минимум.
-        await asyncio.sleep(0.1)
+    results = await asyncio.gather(*(_warm(q) for q in pending))
+    cached = sum(results)
+    failed = len(results) - cached
 
     elapsed = time.perf_counter() - started
+    stats = {
+        "finished_at": timezone.now().isoformat(),
+        "questions": len(questions),
+        "cached": cached,
+        "skipped": skipped,
+        "failed": failed,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "time_to_first_s": round(min(warmed_at), 3) if warmed_at else None,
+        "time_to_warm_s": round(max(warmed_at), 3) if warmed_at else None,
+        "latency_max_s": round(max(latencies), 3) if latencies else None,
+    }
+    try:
+        await sync_to_async(cache.set)(WARMUP_STATS_KEY, stats, WARMUP_STATS_TTL)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("warmup stats not saved: %s", exc)
     logger.info(
-        "warmup done in %.1fs: cached=%d skipped=%d failed=%d (total=%d)",
-        elapsed, cached, skipped, failed, len(POPULAR_QUESTIONS),
+        "warmup done in %.1fs: cached=%d skipped=%d failed=%d (total=%d) "
+        "first_hot=%ss all_hot=%ss concurrency=%d",
+        elapsed, cached, skipped, failed, len(questions),
+        stats["time_to_first_s"], stats["time_to_warm_s"], concurrency,
     )
     return {"cached": cached, "skipped": skipped, "failed": failed}
+
+
+async def promote_hot_questions(*, mcp_client: MaxbotMCPClient) -> dict[str, int]:
+    """Затухание частот → топ MAXBOT_WARMUP_TOP_N в warm set → прогрев недостающего."""
+    try:
+        await sync_to_async(question_tracker.decay)()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("question_tracker.decay failed: %s", exc)
+    questions = await ranked_questions(POPULAR_QUESTIONS, settings.MAXBOT_WARMUP_TOP_N)
+    try:
+        await sync_to_async(question_tracker.save_warm_set)(questions)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("warm set not saved: %s", exc)
+    return await warmup_response_cache(mcp_client=mcp_client, questions=questions)
+
+
+async def run_hot_questions_loop(*, mcp_client: MaxbotMCPClient) -> None:
+    """Фоновый цикл: promote_hot_questions сразу и каждые MAXBOT_HOT_QUESTIONS_INTERVAL сек."""
+    while True:
+        try:
+            await promote_hot_questions(mcp_client=mcp_client)
+        except Exception:  # noqa: BLE001
+            logger.exception("promote_hot_questions crashed")
+        await asyncio.sleep(settings.MAXBOT_HOT_QUESTIONS_INTERVAL)
@@ -138,6 +138,34 @@ MAXBOT_WELCOME_IMAGE_PATH = os.getenv(
     "MAXBOT_WELCOME_IMAGE_PATH",
     str(BASE_DIR / "static" / "images" / "massaj-big.jpg"),
 )
+# Семантический кэш AI-ответов (maxbot.semantic_cache): перефразированный
+# вопрос с косинусной близостью ≥ THRESHOLD к уже отвеченному получает
+# готовый ответ без chat_rag. Без OPENAI_API_KEY выключен.
+MAXBOT_SEMANTIC_CACHE_ENABLED = os.getenv("MAXBOT_SEMANTIC_CACHE_ENABLED", "1") == "1"
+MAXBOT_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("MAXBOT_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+MAXBOT_SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("MAXBOT_SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+MAXBOT_SEMANTIC_CACHE_TTL = int(os.getenv("MAXBOT_SEMANTIC_CACHE_TTL", str(24 * 60 * 60)))
+MAXBOT_EMBEDDING_MODEL = os.getenv("MAXBOT_EMBEDDING_MODEL", "text-embedding-3-small")
+# Ответ AI-помощника по мере генерации (stream + edit_message сообщения)
+MAXBOT_STREAMING_ENABLED = os.getenv("MAXBOT_STREAMING_ENABLED", "1") == "1"
+# Прогрев кэша ответов при старте бота (maxbot/warmup.py): сколько топ-вопросов,
+# параллельных chat_rag и стартов chat_rag в секунду (бюджет OpenAI)
+MAXBOT_WARMUP_TOP_N = int(os.getenv("MAXBOT_WARMUP_TOP_N", "20"))
+MAXBOT_WARMUP_CONCURRENCY = int(os.getenv("MAXBOT_WARMUP_CONCURRENCY", "4"))
+MAXBOT_WARMUP_RPS = float(os.getenv("MAXBOT_WARMUP_RPS", "2"))
+# Частоты вопросов (maxbot/question_tracker.py): период полураспада счёта и
+# как часто бот переносит топ в warm set и догревает кэш (сек)
+MAXBOT_QUESTION_FREQ_HALF_LIFE = int(os.getenv("MAXBOT_QUESTION_FREQ_HALF_LIFE", str(7 * 24 * 60 * 60)))
+MAXBOT_HOT_QUESTIONS_INTERVAL = int(os.getenv("MAXBOT_HOT_QUESTIONS_INTERVAL", "900"))
+# Локальный классификатор намерений перед RAG (maxbot/intent_classifier.py):
+# off / shadow (только замер) / on (уверенные «цены», «адрес», вопросы FAQ — без OpenAI)
+MAXBOT_INTENT_CLASSIFIER_MODE = os.getenv("MAXBOT_INTENT_CLASSIFIER_MODE", "shadow")
+MAXBOT_INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("MAXBOT_INTENT_CLASSIFIER_THRESHOLD", "0.75"))
+# Пул MCP-сессий (maxbot/mcp_client.py): сколько subprocess'ов максимум,
+# таймаут одного call_tool и период ping-проверки сессий (сек)
+MAXBOT_MCP_POOL_SIZE = int(os.getenv("MAXBOT_MCP_POOL_SIZE", "2"))
+MAXBOT_MCP_CALL_TIMEOUT = float(os.getenv("MAXBOT_MCP_CALL_TIMEOUT", "15"))
+MAXBOT_MCP_HEALTH_INTERVAL = int(os.getenv("MAXBOT_MCP_HEALTH_INTERVAL", "60"))
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -159,6 +187,37 @@ LOGGING = {
 YCLIENTS_PARTNER_TOKEN = os.getenv("YCLIENTS_PARTNER_TOKEN", "")
 YCLIENTS_USER_TOKEN = os.getenv("YCLIENTS_USER_TOKEN", "")
 YCLIENTS_COMPANY_ID = os.getenv("YCLIENTS_COMPANY_ID", "")
+# Кэш доступности (services_app/availability_cache.py). TTL в секундах:
+# fresh — отдаём без запроса к YClients; ещё STALE секунд — отдаём stale
+# и обновляем в фоне. После записи кэш мастера сбрасывается сразу.
+YCLIENTS_AVAILABILITY_TIMES_TTL = int(os.getenv("YCLIENTS_AVAILABILITY_TIMES_TTL", "60"))
+YCLIENTS_AVAILABILITY_DATES_TTL = int(os.getenv("YCLIENTS_AVAILABILITY_DATES_TTL", "300"))
+YCLIENTS_AVAILABILITY_STALE_TTL = int(os.getenv("YCLIENTS_AVAILABILITY_STALE_TTL", "300"))
+# Индекс услуга → мастера (services_app/staff_index.py) строится beat-задачей
+# refresh_staff_index каждые 15 минут. Если индекс старше MAX_AGE секунд
+# (beat/worker лежит) — api_get_staff идёт живым путём через YClients.
+YCLIENTS_STAFF_INDEX_MAX_AGE = int(os.getenv("YCLIENTS_STAFF_INDEX_MAX_AGE", "3600"))
+# Снимок каталога публичных страниц (services_app/catalog.py): правки из
+# админки сбрасывают его сигналами сразу; TTL — страховка для правок мимо
+# сигналов (QuerySet.update, bulk_create), сек
+CATALOG_SNAPSHOT_TTL = int(os.getenv("CATALOG_SNAPSHOT_TTL", "3600"))
+# Кэш HTML публичных страниц (services_app/page_cache.py): услуги, категории,
+# мастера, комплексы, SEO-лендинги. Сигналы сбрасывают страницы по тегам
+# объектов; TTL — страховка для правок мимо сигналов, сек
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") == "1"
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "86400"))
+# Правка HelpArticle → Celery-таска инкрементального reindex FAQ-индекса MCP
+HELP_ARTICLES_AUTO_REINDEX = os.getenv("HELP_ARTICLES_AUTO_REINDEX", "0") == "1"
+HELP_ARTICLES_REINDEX_DELAY = int(os.getenv("HELP_ARTICLES_REINDEX_DELAY", "10"))
+# Зеркало записей YClients (agents.yclients_records): глубина бэкфилла назад /
+# вперёд в днях и макс. возраст синхронизации, после которого читатель
+# сначала досинхронизирует (ежечасная beat-задача sync_yclients_records).
+YCLIENTS_RECORDS_BACKFILL_DAYS = int(os.getenv("YCLIENTS_RECORDS_BACKFILL_DAYS", "365"))
+YCLIENTS_RECORDS_FUTURE_DAYS = int(os.getenv("YCLIENTS_RECORDS_FUTURE_DAYS", "60"))
+YCLIENTS_RECORDS_MAX_AGE = int(os.getenv("YCLIENTS_RECORDS_MAX_AGE", "3600"))
+# Rate budget постраничной выгрузки /records (YClientsAPI.iter_records):
+# не чаще одного запроса в N секунд.
+YCLIENTS_RECORDS_PAGE_INTERVAL = float(os.getenv("YCLIENTS_RECORDS_PAGE_INTERVAL", "0.5"))
 
 # === YooKassa API Configuration ===
 # Онлайн-оплата услуг. Кнопка «Оплатить онлайн» показывается клиентам
@@ -238,6 +297,7 @@ CELERY_TASK_QUEUES = (Queue("formula_tela"),)
 CELERY_TASK_ROUTES = {
     "agents.tasks.*": {"queue": "formula_tela"},
     "payments.tasks.*": {"queue": "formula_tela"},
+    "services_app.tasks.*": {"queue": "formula_tela"},
 }
 CELERY_BEAT_SCHEDULE = {
     "daily-agents-12pm-msk": {
@@ -270,6 +330,18 @@ CELERY_BEAT_SCHEDULE = {
         "task": "agents.tasks.run_landing_qc",
         "schedule": crontab(hour=9, minute=0),
     },
+    "sync-yclients-records-hourly": {
+        "task": "agents.tasks.sync_yclients_records",
+        "schedule": crontab(minute=5),
+    },
+    "refresh-yclients-staff-index-15min": {
+        "task": "services_app.tasks.refresh_staff_index",
+        "schedule": crontab(minute="*/15"),
+    },
+    "nightly-bundle-totals-0330-msk": {
+        "task": "services_app.tasks.recompute_bundle_totals",
+        "schedule": crontab(hour=3, minute=30),
+    },
 }
 
 # === Email (SMTP) ===
@@ -75,9 +75,9 @@ def get_notification_recipients() -> list[str]:
     services_app на уровне импорта модуля — это бы создало circular dep при
     load-order apps.
     """
-    from services_app.models import SiteSettings
+    from services_app.site_settings import get_site_settings
 
-    site = SiteSettings.objects.first()
+    site = get_site_settings()
     if site:
         recipients = site.get_notification_emails()
         if recipients:
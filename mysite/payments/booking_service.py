@@ -15,6 +15,7 @@ import re
 from django.utils import timezone
 
 from payments.exceptions import BookingClientError, BookingValidationError
+from services_app.availability_cache import invalidate_staff
 from services_app.models import Order
 from services_app.yclients_api import YClientsAPI, YClientsAPIError, get_yclients_api
 
@@ -110,9 +111,15 @@ class YClientsBookingService:
                 f"YClients returned empty record_id for order {order.number}"
             )
 
+        # Сначала record_id в заказ: запись в YClients уже есть, повтор не
+        # должен бронировать слот второй раз.
         order.yclients_record_id = record_id
         order.yclients_record_hash = record_hash
         order.save(update_fields=["yclients_record_id", "yclients_record_hash", "updated_at"])
+
+        # Запись могла пройти через кастомный api (не YClientsAPI.create_booking,
+        # который сам инвалидирует) — сбрасываем доступность мастера явно.
+        invalidate_staff(order.staff_id)
         logger.info(
             "YClientsBookingService: order=%s → record_id=%s",
             order.number, record_id,
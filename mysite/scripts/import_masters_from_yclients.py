@@ -15,7 +15,7 @@
 import os
 import sys
 import django
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Настройка Django
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'mysite'))
@@ -121,13 +121,16 @@ def map_yclients_to_django(yclients_staff: Dict) -> Dict:
     return django_data
 
 
-def sync_master_to_django(staff_data: Dict, dry_run: bool = False) -> Tuple[str, Master]:
+def sync_master_to_django(staff_data: Dict, dry_run: bool = False,
+                          existing: Optional[Dict[int, Master]] = None) -> Tuple[str, Master]:
     """
     Синхронизировать мастера в Django БД
     
     Args:
         staff_data: Данные из YClients
         dry_run: Если True, не сохраняет изменения
+        existing: {id: Master} уже загруженных мастеров (Master.objects.in_bulk) —
+            без запроса к БД на каждого мастера
     
     Returns:
         Tuple[str, Master]: ('created'|'updated'|'unchanged', master_instance)
@@ -140,7 +143,12 @@ def sync_master_to_django(staff_data: Dict, dry_run: bool = False) -> Tuple[str,
     
     # Проверяем существует ли мастер
     try:
-        master = Master.objects.get(id=staff_id)
+        if existing is None:
+            master = Master.objects.get(id=staff_id)
+        elif staff_id in existing:
+            master = existing[staff_id]
+        else:
+            raise Master.DoesNotExist
         
         # Проверяем изменились ли данные
         changed = False
@@ -224,6 +232,9 @@ def import_masters(dry_run: bool = False) -> Dict:
     unchanged_list = []
     errors_list = []
     
+    # Все уже известные мастера — одним запросом, а не get() на каждого
+    existing = Master.objects.in_bulk([s.get('id') for s in yclients_masters if s.get('id')])
+    
     # Обрабатываем каждого мастера
     for idx, staff_data in enumerate(yclients_masters, 1):
         staff_id = staff_data.get('id')
@@ -232,7 +243,7 @@ def import_masters(dry_run: bool = False) -> Dict:
         print(f"\n{idx}/{len(yclients_masters)} | {staff_name} (ID: {staff_id})")
         
         try:
-            status, master, changes = sync_master_to_django(staff_data, dry_run)
+            status, master, changes = sync_master_to_django(staff_data, dry_run, existing)
             
             if status == 'created':
                 stats['created'] += 1
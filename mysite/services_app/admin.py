@@ -390,15 +390,17 @@ class BundleItemInline(admin.TabularInline):
 
 @admin.register(Bundle)
 class BundleAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "slug", "is_active", "is_popular", "is_certificate", "order")
+    list_display = ("id", "name", "slug", "computed_price", "computed_min_duration",
+                    "is_active", "is_popular", "is_certificate", "order")
     list_editable = ("is_active", "is_popular", "is_certificate", "order")
+    readonly_fields = ("computed_price", "computed_min_duration")
     list_filter = ("is_active", "is_popular", "is_certificate")
     search_fields = ("name", "description", "slug", "seo_title")
     prepopulated_fields = {"slug": ("name",)}
     inlines = [BundleItemInline]
     fieldsets = (
         (None, {"fields": ("name", "description", "image", "image_mobile")}),
-        ("Цена", {"fields": ("fixed_price",)}),
+        ("Цена", {"fields": ("fixed_price", "computed_price", "computed_min_duration")}),
         ("SEO", {
             "fields": ("slug", "seo_h1", "seo_title", "seo_description", "subtitle"),
             "description": "URL вида /kompleks/<slug>/. slug автозаполняется из названия.",
@@ -588,6 +590,29 @@ class BotInquiryAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False  # Создаются только из бота
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom = [
+            path("hot-questions/", self.admin_site.admin_view(self.hot_questions_view),
+                 name="botinquiry_hot_questions"),
+        ]
+        return custom + urls
+
+    def hot_questions_view(self, request):
+        """Частые вопросы AI-помощника (question_tracker), warm set, итоги прогрева
+        и shadow-замер классификатора намерений."""
+        from django.shortcuts import render
+        from maxbot.intent_classifier import shadow_report
+        from maxbot.question_tracker import metrics
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Частые вопросы AI-помощника",
+            "metrics": metrics(),
+            "intents": shadow_report(),
+        }
+        return render(request, "admin/services_app/botinquiry/hot_questions.html", context)
+
     def question_preview(self, obj):
         return obj.question[:80] + ("…" if len(obj.question) > 80 else "")
     question_preview.short_description = "Вопрос"
@@ -0,0 +1,233 @@
+"""Локальный кэш доступности YClients: book_times / book_dates.
+
+Каждый клик клиента по дате в визарде записи — это round-trip в YClients
+(150–600ms) и расход rate-limit'а. Слоты меняются редко (новая запись,
+правка расписания), поэтому держим ответы в Django cache (Redis на проде)
+с коротким TTL и stale-while-revalidate:
+
+- fresh (< FRESH_TTL)  — отдаём из кэша, YClients не трогаем;
+- stale (< FRESH_TTL + STALE_TTL) — отдаём из кэша и в фоне обновляем
+  (single-flight через cache.add-lock, чтобы 10 кликов не дали 10 запросов);
+- нет записи — идём в YClients синхронно.
+
+Инвалидация «push-style»: YClientsAPI.create_booking и
+YClientsBookingService.create_record после успешной записи бампают
+generation-счётчик мастера → все ключи этого мастера (все даты и наборы
+услуг) становятся недостижимыми мгновенно, без scan/delete по шаблону.
+
+Счётчики hit/miss/stale/refresh/invalidate — в том же cache, видны
+в /api/agents/health/ (секция yclients_cache) для подбора TTL.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "yclients:avail:"
+# Lock на фоновое обновление: пока один воркер освежает ключ,
+# остальные продолжают отдавать stale.
+REFRESH_LOCK_TTL = 30
+
+STAT_NAMES = ("hit", "stale", "miss", "refresh", "refresh_error", "invalidate")
+
+
+def _times_fresh_ttl() -> int:
+    return int(getattr(settings, "YCLIENTS_AVAILABILITY_TIMES_TTL", 60))
+
+
+def _dates_fresh_ttl() -> int:
+    return int(getattr(settings, "YCLIENTS_AVAILABILITY_DATES_TTL", 300))
+
+
+def _stale_ttl() -> int:
+    return int(getattr(settings, "YCLIENTS_AVAILABILITY_STALE_TTL", 300))
+
+
+# ── Счётчики ──────────────────────────────────────────────────────────
+
+def _stat_key(name: str) -> str:
+    return f"{CACHE_KEY_PREFIX}stats:{name}"
+
+
+def _bump(name: str) -> None:
+    """Атомарный +1 в cache. Ошибки кэша не должны ломать бронирование."""
+    key = _stat_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключа ещё нет — add, чтобы не затереть параллельный incr
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+    except Exception as e:  # noqa: BLE001
+        logger.debug("availability_cache stat %s failed: %s", name, e)
+
+
+def get_stats() -> dict:
+    """Счётчики + hit_ratio (hit+stale от всех обращений)."""
+    raw = cache.get_many([_stat_key(n) for n in STAT_NAMES])
+    stats = {n: int(raw.get(_stat_key(n)) or 0) for n in STAT_NAMES}
+    served = stats["hit"] + stats["stale"]
+    total = served + stats["miss"]
+    stats["hit_ratio"] = round(served / total, 3) if total else 0.0
+    stats["ttl"] = {
+        "times": _times_fresh_ttl(),
+        "dates": _dates_fresh_ttl(),
+        "stale": _stale_ttl(),
+    }
+    return stats
+
+
+def reset_stats() -> None:
+    cache.delete_many([_stat_key(n) for n in STAT_NAMES])
+
+
+# ── Generation-счётчики (инвалидация) ─────────────────────────────────
+
+def _gen_key(staff_id) -> str:
+    return f"{CACHE_KEY_PREFIX}gen:{staff_id if staff_id else 'all'}"
+
+
+def _generation(staff_id) -> int:
+    return int(cache.get(_gen_key(staff_id)) or 0)
+
+
+def invalidate_staff(staff_id=None) -> None:
+    """Сбросить всю доступность мастера (и company-wide book_dates).
+
+    staff_id=None — сбросить только company-wide ключи (book_dates без
+    мастера). Company-wide бампается всегда: запись к любому мастеру
+    меняет общий список дат.
+
+    Best-effort: зовётся уже после того, как YClients создал запись, — ошибка
+    кэша (Redis лежит) не должна сорвать сохранение record_id у заказа.
+    Худшее последствие — до fresh TTL показываем уже занятый слот.
+    """
+    try:
+        for sid in {staff_id, None}:
+            key = _gen_key(sid)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Ключа нет → текущая generation 0; ставим 1
+                if not cache.add(key, 1, None):
+                    cache.incr(key)
+        _bump("invalidate")
+    except Exception as exc:  # noqa: BLE001 — запись в YClients уже создана
+        logger.warning("availability_cache: invalidate staff=%s не удался: %s", staff_id, exc)
+        return
+    logger.info("availability_cache: invalidated staff=%s", staff_id)
+
+
+# ── Ядро stale-while-revalidate ───────────────────────────────────────
+
+def _entry_key(kind: str, staff_id, *parts) -> str:
+    raw = "|".join(str(p) for p in parts)
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{kind}:{staff_id or 'all'}:{_generation(staff_id)}:{digest}"
+
+
+def _store(key: str, value, fresh_ttl: int) -> None:
+    cache.set(
+        key,
+        {"value": value, "fresh_until": time.time() + fresh_ttl},
+        fresh_ttl + _stale_ttl(),
+    )
+
+
+def _refresh_in_background(key: str, loader, fresh_ttl: int) -> None:
+    """Обновить stale-ключ в фоне. Один refresh на ключ (cache.add-lock)."""
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, REFRESH_LOCK_TTL):
+        return
+
+    def _run():
+        try:
+            value = loader()
+            if value is not None:
+                _store(key, value, fresh_ttl)
+            _bump("refresh")
+        except Exception as e:  # noqa: BLE001
+            _bump("refresh_error")
+            logger.warning("availability_cache: refresh %s failed: %s", key[-16:], e)
+        finally:
+            cache.delete(lock_key)
+
+    _spawn(_run)
+
+
+def _spawn(fn) -> None:
+    """Вынесено отдельно — тесты подменяют на синхронный вызов."""
+    threading.Thread(target=fn, daemon=True, name="yclients-avail-refresh").start()
+
+
+def _cached(key: str, loader, fresh_ttl: int):
+    entry = cache.get(key)
+    if entry is not None:
+        if entry["fresh_until"] > time.time():
+            _bump("hit")
+        else:
+            _bump("stale")
+            _refresh_in_background(key, loader, fresh_ttl)
+        return entry["value"]
+
+    _bump("miss")
+    value = loader()
+    if value is not None:
+        _store(key, value, fresh_ttl)
+    return value
+
+
+# ── Публичный API ─────────────────────────────────────────────────────
+
+def _normalize_service_ids(service_ids) -> list:
+    return sorted({str(s) for s in (service_ids or []) if s})
+
+
+def get_book_times(api, staff_id, date: str, service_ids=None) -> dict:
+    """Ответ /book_times/{company}/{staff}/{date} (полный dict с seance_length).
+
+    Кэшируется только success=true — ошибку YClients отдаём как есть,
+    чтобы следующий клик сразу повторил запрос. YClientsAPIError
+    пробрасывается наверх (view превращает её в warning).
+    """
+    ids = _normalize_service_ids(service_ids)
+    key = _entry_key("times", staff_id, api.company_id, staff_id, date, ",".join(ids))
+    endpoint = f"/book_times/{api.company_id}/{staff_id}/{date}"
+    params = {"service_ids": ids} if ids else {}
+    failed = {}
+
+    def loader():
+        response = api._request("GET", endpoint, params=params)
+        if not response.get("success", False):
+            failed["response"] = response
+            return None
+        return response
+
+    result = _cached(key, loader, _times_fresh_ttl())
+    return result if result is not None else failed.get("response", {})
+
+
+def get_book_dates(api, staff_id=None, service_ids=None) -> list:
+    """Список дат из api.get_book_dates с кэшем.
+
+    Пустой список не кэшируем: get_book_dates глотает ошибки YClients
+    и возвращает [] — закэшировать сбой на минуты хуже, чем лишний запрос.
+    """
+    ids = _normalize_service_ids(service_ids)
+    key = _entry_key("dates", staff_id, api.company_id, staff_id, ",".join(ids))
+
+    def loader():
+        dates = api.get_book_dates(
+            staff_id=staff_id,
+            service_ids=[int(s) for s in ids] if ids else None,
+        )
+        return dates or None
+
+    return _cached(key, loader, _dates_fresh_ttl()) or []
@@ -0,0 +1,132 @@
+"""Денормализованные цена и длительность комплексов (Bundle.computed_*).
+
+Bundle.compute_min_totals() на каждый вызов заново выбирал
+items.select_related("option"), а список и страница комплекса звали его
+для каждого комплекса — N лишних запросов и Decimal-циклы в Python на
+рендер. Теперь сумма цен вариантов и минимальная длительность (с учётом
+параллельных групп) лежат в индексированных Bundle.computed_price /
+computed_min_duration: показывать и сортировать по цене — чистый SQL.
+
+Пересчёт:
+- services_app.signals: save/delete BundleItem или ServiceOption, входящего
+  в комплексы → `schedule_bundle_totals(ids)`; пачка правок в одной
+  транзакции (импорт прайса) пересчитывается одним проходом после коммита;
+- Celery-таска recompute_bundle_totals (beat, ночью) — страховка для правок
+  мимо сигналов (QuerySet.update, SQL руками);
+- `manage.py recompute_bundle_totals [--verify]` — backfill и сверка.
+
+Изменённые комплексы сразу сбрасывают снимок каталога и кэш страниц.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def min_totals(items) -> tuple[Decimal, int]:
+    """Цена и минимальная длительность комплекса по его BundleItem (option уже загружен).
+
+    Внутри `parallel_group` процедуры идут одновременно — длительность
+    группы = максимум, цены складываются. Между группами длительности
+    суммируются, плюс `gap_after_min` каждого элемента.
+    """
+    items = list(items)
+    if not items:
+        return Decimal("0.00"), 0
+
+    groups: dict[int, list] = defaultdict(list)
+    gaps_total = 0
+    for it in items:
+        groups[it.parallel_group].append(it)
+        gaps_total += int(it.gap_after_min or 0)
+
+    total_price = Decimal("0.00")
+    total_duration = 0
+    for group_items in groups.values():
+        group_max_duration = 0
+        for it in group_items:
+            opt = it.option
+            if not opt:
+                continue
+            if opt.price is not None:
+                total_price += Decimal(opt.price)
+            group_max_duration = max(group_max_duration, int(opt.duration_min or 0))
+        total_duration += group_max_duration
+
+    total_duration += gaps_total
+    return total_price, total_duration
+
+
+def _actual_totals(bundle_ids=None) -> dict[int, tuple[Decimal, int]]:
+    """bundle_id → (цена, длительность) из BundleItem — один запрос на все комплексы."""
+    from services_app.models import Bundle, BundleItem
+
+    bundles = Bundle.objects.all()
+    if bundle_ids is not None:
+        bundles = bundles.filter(pk__in=list(bundle_ids))
+    by_bundle = {pk: [] for pk in bundles.values_list("pk", flat=True)}
+    items = BundleItem.objects.filter(bundle_id__in=list(by_bundle)).select_related("option")
+    for it in items:
+        by_bundle[it.bundle_id].append(it)
+    return {pk: min_totals(items) for pk, items in by_bundle.items()}
+
+
+def stale_bundle_totals(bundle_ids=None) -> list[tuple]:
+    """Комплексы, где сохранённые значения разошлись с BundleItem: (bundle, (цена, длит.))."""
+    from services_app.models import Bundle
+
+    actual = _actual_totals(bundle_ids)
+    stale = []
+    for bundle in Bundle.objects.filter(pk__in=list(actual)).order_by("pk"):
+        totals = actual[bundle.pk]
+        if (bundle.computed_price, bundle.computed_min_duration) != totals:
+            stale.append((bundle, totals))
+    return stale
+
+
+def recompute_bundle_totals(bundle_ids=None) -> int:
+    """Пересчитать computed_* (все комплексы или bundle_ids); вернуть число изменённых."""
+    from services_app.catalog import bump_catalog_generation
+    from services_app.models import Bundle
+    from services_app.page_cache import model_tag, object_tag, purge_page_tags
+
+    stale = stale_bundle_totals(bundle_ids)
+    if not stale:
+        return 0
+    for bundle, (price, duration) in stale:
+        bundle.computed_price = price
+        bundle.computed_min_duration = duration
+    # bulk_update, не save(): без updated_at и сигналов Bundle
+    Bundle.objects.bulk_update([b for b, _ in stale], ["computed_price", "computed_min_duration"])
+    bump_catalog_generation()
+    purge_page_tags(model_tag(Bundle), *(object_tag(Bundle, b.pk) for b, _ in stale))
+    logger.info("bundle_totals: пересчитано %d комплексов", len(stale))
+    return len(stale)
+
+
+_pending = threading.local()
+
+
+def _flush() -> None:
+    ids = getattr(_pending, "ids", None)
+    if not ids:
+        return  # уже пересчитано первым колбэком этой транзакции
+    _pending.ids = set()
+    recompute_bundle_totals(ids)
+
+
+def schedule_bundle_totals(bundle_ids) -> None:
+    """Пересчитать комплексы после коммита; id со всей транзакции — одним проходом."""
+    bundle_ids = {pk for pk in bundle_ids if pk is not None}
+    if not bundle_ids:
+        return
+    if not hasattr(_pending, "ids"):
+        _pending.ids = set()
+    _pending.ids |= bundle_ids
+    transaction.on_commit(_flush)
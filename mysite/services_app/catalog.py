@@ -0,0 +1,269 @@
+"""Снимок каталога для публичных страниц сайта.
+
+Главная, «Услуги», «Мастера», «Комплексы», «Сертификаты» и страницы
+категорий на каждый запрос заново собирали из БД один и тот же граф:
+Service → ServiceOption, ServiceCategory, Master, Bundle/BundleItem,
+Promotion (+ отзывы и FAQ главной). Меняется он только из админки, а при
+всплеске трафика с рекламы страницы упирались в round-trip'ы к Postgres.
+
+`get_catalog()` отдаёт `CatalogSnapshot` — все выборки этих страниц, уже
+вычисленные (списки моделей с заполненными prefetch-кэшами), так что
+шаблоны рендерятся без запросов. Снимок строится один раз на поколение:
+
+- поколение — токен в Django cache (CATALOG_GENERATION_KEY). Сигналы
+  services_app.signals меняют его на любой save/delete/m2m каталожных
+  моделей — сразу и ещё раз после коммита (иначе параллельный запрос мог
+  собрать снимок из данных до коммита под уже новым токеном);
+- токен, а не счётчик: после cache.clear() счётчик начал бы с нуля и
+  совпал со старым снимком в памяти процесса;
+- снимок лежит в памяти процесса (сверка токена — один cache.get на
+  запрос) и в Django cache (Redis на проде, pickle) — воркеры не строят
+  его каждый сам;
+- CATALOG_SNAPSHOT_TTL — страховка для правок мимо сигналов
+  (QuerySet.update, bulk_create, SQL руками): токен истекает — снимок
+  пересобирается.
+
+Ошибки кэша не ломают страницы: снимок строится напрямую из БД.
+"""
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+
+logger = logging.getLogger(__name__)
+
+CATALOG_GENERATION_KEY = "services:catalog:generation"
+SNAPSHOT_KEY_PREFIX = "services:catalog:snapshot:"
+
+
+def _snapshot_ttl() -> int:
+    return int(getattr(settings, "CATALOG_SNAPSHOT_TTL", 3600))
+
+
+@dataclass
+class CatalogSnapshot:
+    """Готовые к рендеру выборки публичных страниц (см. build_snapshot)."""
+
+    generation: str
+    built_at: float
+    # Главная
+    top_items: list = field(default_factory=list)
+    home_categories: list = field(default_factory=list)
+    home_masters: list = field(default_factory=list)
+    home_promotions: list = field(default_factory=list)
+    promo_booking: dict = field(default_factory=dict)
+    reviews: list = field(default_factory=list)
+    faq: list = field(default_factory=list)
+    # «Услуги» и «другие категории» на странице категории
+    categories: list = field(default_factory=list)
+    promotions: list = field(default_factory=list)
+    # Страницы категорий: id → услуги категории, slug → id
+    category_services: dict = field(default_factory=dict)
+    category_slugs: dict = field(default_factory=dict)
+    # «Мастера», «Комплексы», «Сертификаты»
+    masters: list = field(default_factory=list)
+    bundles: list = field(default_factory=list)
+    complex_services: list = field(default_factory=list)
+    certificate_services: list = field(default_factory=list)
+    certificate_categories: list = field(default_factory=list)
+    certificate_bundles: list = field(default_factory=list)
+
+    def category(self, *, pk: int | None = None, slug: str | None = None):
+        """Активная категория по id или slug (None — нет такой)."""
+        if slug is not None:
+            pk = self.category_slugs.get(slug)
+        for cat in self.categories:
+            if cat.pk == pk:
+                return cat
+        return None
+
+
+def _promo_booking(promos: list) -> dict:
+    """Для кнопки «Записаться» на промо-баннере: pinned-option + fixed цена
+    со скидкой (YClients API требует yclients_service_id, поэтому
+    предпочитаем options с ним)."""
+    booking = {
+        "promo_booking_svc_id": None,
+        "promo_booking_svc_name": "",
+        "promo_booking_option_id": None,
+        "promo_booking_price": None,
+    }
+    if not promos:
+        return booking
+    first_promo = promos[0]
+    options = list(first_promo.options.all())
+    first_opt = next((o for o in options if o.yclients_service_id is not None), None)
+    first_opt = first_opt or (options[0] if options else None)
+    if first_opt and first_opt.service_id:
+        pct = int(first_promo.discount_percent or 0)
+        price = first_opt.price or 0
+        if pct > 0:
+            price = price * (100 - pct) / 100
+        booking.update({
+            "promo_booking_svc_id": first_opt.service_id,
+            "promo_booking_svc_name": first_promo.title or first_opt.service.name,
+            "promo_booking_option_id": first_opt.id,
+            "promo_booking_price": int(price),
+        })
+    return booking
+
+
+def build_snapshot(generation: str) -> CatalogSnapshot:
+    """Все выборки страниц каталога — те же querysets, что были во views."""
+    from services_app.models import (
+        FAQ,
+        Bundle,
+        BundleItem,
+        Master,
+        Promotion,
+        Review,
+        Service,
+        ServiceCategory,
+        ServiceOption,
+    )
+
+    snap = CatalogSnapshot(generation=generation, built_at=time.time())
+
+    # ── Главная ──
+    popular = Service.objects.active().popular().with_options().with_category()[:6]
+    snap.top_items = [{"service": svc, "options": list(svc.options.all())} for svc in popular]
+    snap.home_categories = list(
+        ServiceCategory.objects.with_active_services().order_by("order", "name")[:8]
+    )
+    snap.home_masters = list(Master.objects.active().with_services().order_by("name")[:4])
+    promos = list(Promotion.objects.active().prefetch_related("options__service"))
+    snap.home_promotions = promos[:3]
+    snap.promotions = promos[:1]
+    snap.promo_booking = _promo_booking(snap.home_promotions)
+    snap.reviews = list(Review.objects.active()[:3])
+    snap.faq = list(FAQ.objects.filter(is_active=True).order_by("order", "id")[:6])
+
+    # ── «Услуги» и страницы категорий ──
+    snap.categories = list(
+        ServiceCategory.objects.active().prefetch_related("services").order_by("order", "name")
+    )
+    snap.category_slugs = {c.slug: c.pk for c in snap.categories if c.slug}
+    snap.category_services = {c.pk: [] for c in snap.categories}
+    category_services = (
+        Service.objects.active()
+        .filter(category_id__in=list(snap.category_services))
+        .prefetch_related("options")
+    )
+    for svc in category_services:
+        snap.category_services[svc.category_id].append(svc)
+
+    # ── «Мастера» ──
+    active_services = Service.objects.active().order_by("order", "name")
+    snap.masters = list(
+        Master.objects.active()
+        .prefetch_related(Prefetch("services", queryset=active_services))
+        .annotate(svc_count=Count("services", filter=Q(services__is_active=True), distinct=True))
+        .order_by("order", "name")
+    )
+
+    # ── «Комплексы» ──
+    items_qs = (BundleItem.objects
+                .select_related("bundle", "option", "option__service")
+                .prefetch_related(Prefetch("option__service", queryset=Service.objects.with_options()))
+                .order_by("order"))
+    bundles_qs = (Bundle.objects.active()
+                  .prefetch_related(Prefetch("items", queryset=items_qs))
+                  .order_by("order", "id"))
+    for b in bundles_qs:
+        snap.bundles.append({
+            "bundle": b,
+            "items": list(b.items.all()),
+            "min_price": b.computed_price,
+            "min_duration": b.computed_min_duration,
+            "price": b.fixed_price,
+        })
+    # Лечебные комплексы — услуги с "комплекс" в названии, свой порядок вариантов.
+    complex_opt_qs = ServiceOption.objects.active().order_by("order", "units", "duration_min")
+    snap.complex_services = list(
+        Service.objects.active()
+        .filter(name__icontains="комплекс")
+        .prefetch_related(Prefetch("options", queryset=complex_opt_qs))
+        .order_by("name")
+    )
+
+    # ── «Сертификаты» ──
+    active_options = ServiceOption.objects.filter(is_active=True).order_by("price")
+    snap.certificate_services = list(
+        Service.objects.active()
+        .select_related("category")
+        .prefetch_related(Prefetch("options", queryset=active_options))
+        .order_by("category__order", "order", "name")
+    )
+    snap.certificate_categories = list(
+        ServiceCategory.objects.active()
+        .annotate(svc_count=Count("services", filter=Q(services__is_active=True)))
+        .filter(svc_count__gt=0)
+        .order_by("order", "name")
+    )
+    snap.certificate_bundles = list(
+        Bundle.objects.filter(is_active=True, is_certificate=True)
+        .prefetch_related("items__option__service")
+        .order_by("order")
+    )
+    return snap
+
+
+# ── Поколение и доступ ────────────────────────────────────────────────
+
+def catalog_generation() -> str:
+    """Текущий токен поколения каталога (создаётся, если его нет/истёк)."""
+    generation = cache.get(CATALOG_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(CATALOG_GENERATION_KEY, generation, _snapshot_ttl()):
+            generation = cache.get(CATALOG_GENERATION_KEY) or generation
+    return generation
+
+
+def bump_catalog_generation() -> None:
+    """Новое поколение: все снимки (в памяти процессов и в cache) устарели."""
+    try:
+        cache.set(CATALOG_GENERATION_KEY, uuid.uuid4().hex, _snapshot_ttl())
+    except Exception as exc:  # noqa: BLE001 — правка в админке важнее
+        logger.warning("bump_catalog_generation: cache недоступен: %s", exc)
+
+
+_local: CatalogSnapshot | None = None
+
+
+def get_catalog() -> CatalogSnapshot:
+    """Снимок текущего поколения: память процесса → Django cache → сборка из БД."""
+    global _local
+    try:
+        generation = catalog_generation()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("catalog: cache недоступен, собираем снимок из БД: %s", exc)
+        return build_snapshot(uuid.uuid4().hex)
+
+    snap = _local
+    if snap is not None and snap.generation == generation:
+        return snap
+
+    key = SNAPSHOT_KEY_PREFIX + generation
+    try:
+        snap = cache.get(key)
+    except Exception as exc:  # noqa: BLE001 — битый pickle после деплоя и т.п.
+        logger.warning("catalog: снимок %s не прочитан: %s", generation, exc)
+        snap = None
+    if snap is None:
+        started = time.perf_counter()
+        snap = build_snapshot(generation)
+        logger.info("catalog: снимок %s собран за %.0fms",
+                    generation, (time.perf_counter() - started) * 1000)
+        try:
+            cache.set(key, snap, _snapshot_ttl())
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("catalog: снимок %s не сохранён: %s", generation, exc)
+    _local = snap
+    return snap
@@ -0,0 +1,41 @@
+"""
+Management command: recompute_bundle_totals
+Backfill и сверка денормализованных Bundle.computed_price / computed_min_duration
+(services_app.bundle_totals) с составом комплексов.
+
+Использование:
+    python manage.py recompute_bundle_totals            # пересчитать расхождения
+    python manage.py recompute_bundle_totals --verify   # только сверить (exit 1 при расхождениях)
+    python manage.py recompute_bundle_totals --bundle 3 --bundle 7
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from services_app.bundle_totals import recompute_bundle_totals, stale_bundle_totals
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает/сверяет computed_price и computed_min_duration комплексов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true",
+                            help="Только сверить, ничего не сохранять")
+        parser.add_argument("--bundle", type=int, action="append", default=None,
+                            help="ID комплекса (можно несколько раз)")
+
+    def handle(self, *args, **options):
+        bundle_ids = options["bundle"]
+        stale = stale_bundle_totals(bundle_ids)
+        for bundle, (price, duration) in stale:
+            self.stdout.write(
+                f"[{bundle.pk}] {bundle}: {bundle.computed_price} ₽ / {bundle.computed_min_duration} мин"
+                f" → {price} ₽ / {duration} мин"
+            )
+
+        if options["verify"]:
+            if stale:
+                raise CommandError(f"Расхождений: {len(stale)}")
+            self.stdout.write(self.style.SUCCESS("Все комплексы сходятся"))
+            return
+
+        updated = recompute_bundle_totals(bundle_ids) if stale else 0
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано комплексов: {updated}"))
@@ -8,7 +8,10 @@
 Все методы возвращают QuerySet → чейнинг безопасен.
 """
 from django.db import models
-from django.db.models import Prefetch
+from django.db.models import Min, OuterRef, Prefetch, Q, Subquery
+
+# Вариант можно записать онлайн: активен и привязан к услуге YClients.
+BOOKABLE_OPTION = Q(is_active=True, yclients_service_id__isnull=False) & ~Q(yclients_service_id="")
 
 
 class ServiceQuerySet(models.QuerySet):
@@ -32,6 +35,15 @@ class ServiceQuerySet(models.QuerySet):
     def with_slug(self):
         return self.filter(slug__isnull=False).exclude(slug="")
 
+    def with_min_bookable_price(self):
+        """annotate min_price — минимальная цена среди bookable-вариантов (None, если их нет)."""
+        from services_app.models import ServiceOption
+        min_price = (
+            ServiceOption.objects.bookable().filter(service=OuterRef("pk"))
+            .order_by().values("service").annotate(m=Min("price")).values("m")
+        )
+        return self.annotate(min_price=Subquery(min_price))
+
     def ordered(self):
         # Service.Meta.ordering закомментирован — сортируем явно.
         return self.order_by("order", "name")
@@ -41,6 +53,9 @@ class ServiceOptionQuerySet(models.QuerySet):
     def active(self):
         return self.filter(is_active=True)
 
+    def bookable(self):
+        return self.filter(BOOKABLE_OPTION)
+
     def ordered(self):
         return self.order_by("order", "duration_min", "unit_type", "units")
 
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:38
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_totals(apps, schema_editor):
+    """computed_* для уже существующих комплексов.
+
+    Расчёт повторяет services_app.bundle_totals.min_totals на момент этой
+    миграции — живой модуль не импортируем, он может измениться. Дальше
+    значения пересчитывают сигналы; сверка/повтор — recompute_bundle_totals --verify.
+    """
+    Bundle = apps.get_model("services_app", "Bundle")
+    BundleItem = apps.get_model("services_app", "BundleItem")
+
+    # bundle_id → parallel_group → [цены, макс. длительность]; паузы — отдельно
+    groups = defaultdict(lambda: defaultdict(lambda: [Decimal("0.00"), 0]))
+    gaps = defaultdict(int)
+    rows = BundleItem.objects.values_list(
+        "bundle_id", "parallel_group", "gap_after_min", "option__price", "option__duration_min",
+    )
+    for bundle_id, group, gap, price, duration in rows:
+        totals = groups[bundle_id][group]
+        if price is not None:
+            totals[0] += Decimal(price)
+        totals[1] = max(totals[1], int(duration or 0))
+        gaps[bundle_id] += int(gap or 0)
+
+    for bundle_id, by_group in groups.items():
+        Bundle.objects.filter(pk=bundle_id).update(
+            computed_price=sum((p for p, _ in by_group.values()), Decimal("0.00")),
+            computed_min_duration=sum(d for _, d in by_group.values()) + gaps[bundle_id],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services_app', '0058_botinquiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bundle',
+            name='computed_min_duration',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, help_text='С учётом параллельных групп и пауз. Пересчитывается автоматически.', verbose_name='Длительность по составу, мин'),
+        ),
+        migrations.AddField(
+            model_name='bundle',
+            name='computed_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Сумма цен вариантов. Пересчитывается автоматически.', max_digits=10, verbose_name='Цена по составу'),
+        ),
+        migrations.RunPython(backfill_totals, reverse_code=migrations.RunPython.noop),
+    ]
@@ -14,6 +14,7 @@ from .managers import (
     ServiceQuerySet,
 )
 from .validators import validate_image_upload, validate_video_upload
+from .bundle_totals import min_totals
 
 
 CERTIFICATE_THEME_CHOICES = [
@@ -829,6 +830,18 @@ class Bundle(models.Model):
         verbose_name="Тема сертификата",
     )
 
+    # Денормализация compute_min_totals() — services_app.bundle_totals
+    computed_price = models.DecimalField(
+        max_digits=10, decimal_places=2, default=Decimal("0.00"), db_index=True, editable=False,
+        verbose_name="Цена по составу",
+        help_text="Сумма цен вариантов. Пересчитывается автоматически.",
+    )
+    computed_min_duration = models.PositiveIntegerField(
+        default=0, db_index=True, editable=False,
+        verbose_name="Длительность по составу, мин",
+        help_text="С учётом параллельных групп и пауз. Пересчитывается автоматически.",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True, null=True, verbose_name="Создан")
     updated_at = models.DateTimeField(auto_now=True, null=True, verbose_name="Обновлён")
 
@@ -866,56 +879,37 @@ class Bundle(models.Model):
         """
         if self.fixed_price is not None:
             return self.fixed_price
-        items = self.items.select_related("option").all()
         total = Decimal("0.00")
-        for it in items:
+        for it in self._items_with_options():
             if it.option and it.option.price is not None:
                 total += Decimal(it.option.price) * it.quantity
         return max(Decimal("0.00"), total)
 
     def total_duration_min(self) -> int:
         """Сумма длительностей всех элементов комплекса (простая сумма)."""
-        items = self.items.select_related("option").all()
+        items = self._items_with_options()
         return sum((it.option.duration_min if it.option else 0) * it.quantity for it in items)
 
     def compute_min_totals(self) -> tuple[Decimal, int]:
         """Цена и минимальная длительность с учётом параллельных групп.
 
-        Элементы группируются по `BundleItem.parallel_group`: внутри одной
-        группы процедуры идут одновременно — длительность берётся как
-        максимум в группе, цены складываются. Между группами длительности
-        суммируются, плюс `gap_after_min` каждого элемента.
+        Живой расчёт из BundleItem (см. services_app.bundle_totals.min_totals).
+        Страницы показывают денормализованные `computed_price` /
+        `computed_min_duration` — их пересчитывают сигналы и
+        `manage.py recompute_bundle_totals`.
+        """
+        return min_totals(self._items_with_options())
+
+    def _items_with_options(self):
+        """BundleItem с option: из prefetch (снимок каталога) или одним запросом.
 
-        Используется на детальной странице/списке комплексов, когда нужно
-        показать клиенту, сколько он проведёт в салоне.
+        `.select_related()` поверх prefetch строит новый queryset и мимо
+        кэша ходит в БД — на списке комплексов это запрос на каждый.
         """
-        from collections import defaultdict
-
-        items = list(self.items.select_related("option").all())
-        if not items:
-            return Decimal("0.00"), 0
-
-        groups: dict[int, list] = defaultdict(list)
-        gaps_total = 0
-        for it in items:
-            groups[it.parallel_group].append(it)
-            gaps_total += int(it.gap_after_min or 0)
-
-        total_price = Decimal("0.00")
-        total_duration = 0
-        for group_items in groups.values():
-            group_max_duration = 0
-            for it in group_items:
-                opt = it.option
-                if not opt:
-                    continue
-                if opt.price is not None:
-                    total_price += Decimal(opt.price)
-                group_max_duration = max(group_max_duration, int(opt.duration_min or 0))
-            total_duration += group_max_duration
-
-        total_duration += gaps_total
-        return total_price, total_duration
+        if "items" in getattr(self, "_prefetched_objects_cache", {}):
+            return self.items.all()
+        return self.items.select_related("option")
+
 
 class BundleItem(models.Model):
     bundle = models.ForeignKey(Bundle, on_delete=models.CASCADE, related_name="items")
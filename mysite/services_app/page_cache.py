@@ -0,0 +1,196 @@
+"""Кэш готовых HTML-ответов публичных страниц с тегами (surrogate keys).
+
+Страницы услуг, категорий, мастеров, комплексов и SEO-лендинги для
+анонимов почти статичны, а всплески обхода Яндекса каждый раз проходили
+Django → ORM → шаблоны. `@cache_public_page` отдаёт сохранённый ответ:
+
+- ключ — URL (схема, хост, путь, query без utm_*/yclid/…): вёрстка
+  страниц от другого не зависит;
+- view помечает ответ тегами объектов, из которых он собран
+  (`tag_response(response, [object_tag(Service, 1), ...])`), и тегами
+  моделей для списков «другие …» (`model_tag(Master)`); без тегов ответ
+  не кэшируется. Тег SITE_SETTINGS_TAG добавляется ко всем —
+  шапка/подвал читают SiteSettings;
+- у каждого тега токен в Django cache (как поколения каталога и
+  SiteSettings); запись хранит токены на момент рендера. services_app.signals
+  и agents.signals меняют токены на save/delete (`purge_page_tags`) — сразу
+  и ещё раз после коммита. Несовпадение токена — промах, страница
+  рендерится заново;
+- CSRF: токен формы ({% csrf_token %}) в запись не попадает — хранится
+  пустой value, и на каждый HIT подставляется токен текущего посетителя.
+  get_token() зовётся на любом ответе декоратора, так что cookie csrftoken
+  ставится и тем, чей первый заход — страница из кэша (bundle_modal.js
+  читает его для POST /api/bundle/request/);
+- ETag (слабый, md5 тела без токена) и Last-Modified (время рендера):
+  If-None-Match / If-Modified-Since отвечаются 304 прямо из записи, без
+  вызова view;
+- не кэшируются: не-GET/HEAD, запросы с сессией или flash-сообщениями
+  (залогиненные, админы), ответы не 200 и ответы с cookie, кроме csrftoken.
+
+PAGE_CACHE_ENABLED=0 выключает кэш, PAGE_CACHE_TTL — страховка для правок
+мимо сигналов (QuerySet.update, SQL руками). Ошибки кэша страницы не ломают.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import logging
+import re
+import time
+import uuid
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+logger = logging.getLogger(__name__)
+
+PAGE_KEY_PREFIX = "pagecache:page:"
+TAG_KEY_PREFIX = "pagecache:tag:"
+SITE_SETTINGS_TAG = "site_settings"
+
+# value скрытого поля {% csrf_token %} — персональный, в запись не сохраняем
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+# Метки рекламы/аналитики — шаблоны их не читают, в ключ не входят.
+TRACKING_PARAMS = ("yclid", "gclid", "fbclid", "_openstat")
+
+
+def _enabled() -> bool:
+    return bool(getattr(settings, "PAGE_CACHE_ENABLED", True))
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "PAGE_CACHE_TTL", 86400))
+
+
+def object_tag(model, pk) -> str:
+    """Тег объекта: "services_app.service:12"."""
+    return f"{model._meta.label_lower}:{pk}"
+
+
+def model_tag(model) -> str:
+    """Тег списка объектов модели ("другие мастера", "другие категории"): любая правка модели."""
+    return model._meta.label_lower
+
+
+def tag_response(response, tags):
+    """Пометить ответ тегами объектов, из которых собрана страница."""
+    response.page_cache_tags = set(tags)
+    return response
+
+
+def purge_page_tags(*tags: str) -> None:
+    """Новые токены тегов: все страницы с этими тегами — промах при следующем запросе."""
+    if not tags:
+        return
+    try:
+        cache.set_many({TAG_KEY_PREFIX + t: uuid.uuid4().hex for t in tags}, None)
+    except Exception as exc:  # noqa: BLE001 — правка в админке важнее
+        logger.warning("purge_page_tags %s: cache недоступен: %s", tags, exc)
+
+
+def _tag_tokens(tags) -> dict[str, str]:
+    """Текущие токены тегов; отсутствующие создаются."""
+    found = cache.get_many([TAG_KEY_PREFIX + t for t in tags])
+    tokens = {}
+    for tag in tags:
+        token = found.get(TAG_KEY_PREFIX + tag)
+        if token is None:
+            token = uuid.uuid4().hex
+            if not cache.add(TAG_KEY_PREFIX + tag, token, None):
+                token = cache.get(TAG_KEY_PREFIX + tag) or token
+        tokens[tag] = token
+    return tokens
+
+
+def _is_fresh(entry: dict) -> bool:
+    tags = entry["tags"]
+    found = cache.get_many([TAG_KEY_PREFIX + t for t in tags])
+    return all(found.get(TAG_KEY_PREFIX + t) == token for t, token in tags.items())
+
+
+def page_key(request) -> str:
+    query = [
+        (k, v) for k, v in parse_qsl(request.META.get("QUERY_STRING", ""), keep_blank_values=True)
+        if not k.startswith("utm_") and k not in TRACKING_PARAMS
+    ]
+    raw = "|".join((request.scheme, request.get_host(), request.path, urlencode(sorted(query))))
+    return PAGE_KEY_PREFIX + hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _bypass(request) -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return True
+    cookies = request.COOKIES
+    return settings.SESSION_COOKIE_NAME in cookies or "messages" in cookies
+
+
+def _cacheable(response) -> bool:
+    if response.status_code != 200 or response.streaming:
+        return False
+    if not getattr(response, "page_cache_tags", None):
+        return False
+    return all(name == settings.CSRF_COOKIE_NAME for name in response.cookies)
+
+
+def _finalize(request, response, etag: str, last_modified: float, state: str):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["X-Page-Cache"] = state
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified), response=response,
+    )
+
+
+def cache_public_page(view):
+    """Декоратор view публичной страницы: ответ из кэша по URL, пока теги свежие."""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        # Cookie csrftoken — в том числе на HIT, где шаблон не рендерится
+        token = get_token(request)
+        if not _enabled() or _bypass(request):
+            return view(request, *args, **kwargs)
+
+        key = page_key(request)
+        try:
+            entry = cache.get(key)
+            if entry is not None and not _is_fresh(entry):
+                entry = None
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("page_cache: чтение %s не удалось: %s", request.path, exc)
+            return view(request, *args, **kwargs)
+
+        if entry is not None:
+            # Без рендера: 304 или тело из записи с токеном этого посетителя
+            content = CSRF_INPUT_RE.sub(rb"\g<1>" + token.encode() + rb"\g<2>", entry["content"])
+            response = HttpResponse(content, content_type=entry["content_type"])
+            return _finalize(request, response, entry["etag"], entry["last_modified"], "HIT")
+
+        response = view(request, *args, **kwargs)
+        if not _cacheable(response):
+            return response
+
+        tags = response.page_cache_tags | {SITE_SETTINGS_TAG}
+        content = CSRF_INPUT_RE.sub(rb"\g<1>\g<2>", response.content)
+        etag = 'W/"%s"' % hashlib.md5(content).hexdigest()
+        last_modified = time.time()
+        try:
+            cache.set(key, {
+                "tags": _tag_tokens(sorted(tags)),
+                "content": content,
+                "content_type": response["Content-Type"],
+                "etag": etag,
+                "last_modified": last_modified,
+            }, _ttl())
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("page_cache: запись %s не удалась: %s", request.path, exc)
+        return _finalize(request, response, etag, last_modified, "MISS")
+
+    return wrapper
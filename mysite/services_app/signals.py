@@ -0,0 +1,209 @@
+"""Сигналы services_app.
+
+HelpArticle → счётчик поколения FAQ в Django cache (Redis на проде).
+Процессы, которые держат производные от FAQ данные у себя в памяти
+(семантический кэш ответов MAX-бота), сверяют поколение и сбрасываются,
+когда статью правят в админке.
+
+Каталог (услуги, варианты, категории, мастера, комплексы, акции, отзывы,
+FAQ) → поколение снимка публичных страниц (services_app.catalog): любой
+save/delete/m2m — новый токен сразу и ещё раз после коммита.
+
+SiteSettings → поколение кэша синглтона (services_app.site_settings): все
+gunicorn-воркеры перечитают строку при следующем обращении.
+
+Те же правки (+ блоки и медиа услуг) → сброс кэша страниц
+(services_app.page_cache) по тегам: `_page_tags` знает, какие страницы
+показывают объект — услуга видна на своей странице, у категории, у мастеров,
+в комплексах и в «связанных» других услуг.
+
+BundleItem и варианты, входящие в комплексы → пересчёт Bundle.computed_*
+(services_app.bundle_totals) после коммита, одним проходом на транзакцию.
+
+Если HELP_ARTICLES_AUTO_REINDEX — после коммита ставится Celery-таска
+инкрементального reindex FAQ-индекса MCP (services_app.tasks). Пачка правок
+(импорт, сортировка в админке) схлопывается в одну таску через флаг в cache.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from services_app.bundle_totals import schedule_bundle_totals
+from services_app.catalog import bump_catalog_generation
+from services_app.page_cache import SITE_SETTINGS_TAG, model_tag, object_tag, purge_page_tags
+from services_app.site_settings import bump_site_settings_generation
+from services_app.models import (
+    FAQ,
+    Bundle,
+    BundleItem,
+    HelpArticle,
+    Master,
+    Promotion,
+    Review,
+    Service,
+    ServiceBlock,
+    ServiceCategory,
+    ServiceMedia,
+    ServiceOption,
+    SiteSettings,
+)
+
+logger = logging.getLogger(__name__)
+
+HELP_ARTICLES_GENERATION_KEY = "services:help_articles:generation"
+HELP_ARTICLES_REINDEX_PENDING_KEY = "services:help_articles:reindex_pending"
+
+
+def help_articles_generation() -> int:
+    """Текущее поколение FAQ (0 — ещё ни разу не менялись)."""
+    return cache.get(HELP_ARTICLES_GENERATION_KEY) or 0
+
+
+def bump_help_articles_generation() -> None:
+    try:
+        try:
+            cache.incr(HELP_ARTICLES_GENERATION_KEY)
+        except ValueError:
+            cache.set(HELP_ARTICLES_GENERATION_KEY, 1, None)
+    except Exception as exc:  # noqa: BLE001 — правка в админке важнее
+        logger.warning("bump_help_articles_generation: cache недоступен: %s", exc)
+
+
+def schedule_help_articles_reindex() -> None:
+    """Поставить reindex FAQ через HELP_ARTICLES_REINDEX_DELAY сек, если ещё не стоит."""
+    delay = settings.HELP_ARTICLES_REINDEX_DELAY
+    # Флаг живёт дольше задержки: если воркер лежит, не копим дубли таски.
+    try:
+        if not cache.add(HELP_ARTICLES_REINDEX_PENDING_KEY, 1, delay + 300):
+            return
+    except Exception as exc:  # noqa: BLE001 — cache недоступен: правка статьи важнее
+        logger.warning("schedule_help_articles_reindex: cache недоступен: %s", exc)
+        return
+    from services_app.tasks import reindex_help_articles
+
+    try:
+        reindex_help_articles.apply_async(countdown=delay)
+    except Exception as exc:  # noqa: BLE001 — брокер недоступен: правка статьи важнее
+        cache.delete(HELP_ARTICLES_REINDEX_PENDING_KEY)
+        logger.warning("schedule_help_articles_reindex: не удалось поставить таску: %s", exc)
+
+
+@receiver(post_save, sender=HelpArticle)
+@receiver(post_delete, sender=HelpArticle)
+def _help_article_changed(sender, **kwargs):
+    bump_help_articles_generation()
+    if settings.HELP_ARTICLES_AUTO_REINDEX:
+        transaction.on_commit(schedule_help_articles_reindex)
+
+
+
+CATALOG_MODELS = (Service, ServiceOption, ServiceCategory, Master, Bundle, BundleItem, Promotion, Review, FAQ)
+
+
+def _service_page_tags(service_ids) -> list[str]:
+    """Страницы, где видны услуги: свои, «связанные» у других услуг, мастера, комплексы."""
+    service_ids = list(service_ids)
+    related = Service.related_services.through.objects.filter(to_service_id__in=service_ids)
+    masters = Master.services.through.objects.filter(service_id__in=service_ids)
+    bundle_ids = set(
+        BundleItem.objects.filter(option__service_id__in=service_ids).values_list("bundle_id", flat=True)
+    )
+    tags = [object_tag(Service, pk) for pk in service_ids]
+    tags += [object_tag(Service, pk) for pk in related.values_list("from_service_id", flat=True)]
+    tags += [object_tag(Master, pk) for pk in masters.values_list("master_id", flat=True)]
+    tags += [object_tag(Bundle, pk) for pk in bundle_ids]
+    if bundle_ids:
+        tags.append(model_tag(Bundle))  # цена в «других комплексах»
+    return tags
+
+
+def _page_tags(instance) -> list[str]:
+    if isinstance(instance, Service):
+        tags = _service_page_tags([instance.pk])
+        if instance.category_id:
+            tags.append(object_tag(ServiceCategory, instance.category_id))
+        return tags
+    if isinstance(instance, (ServiceOption, ServiceBlock, ServiceMedia)):
+        return _service_page_tags([instance.service_id])
+    if isinstance(instance, (ServiceCategory, Master, Bundle)):
+        return [object_tag(type(instance), instance.pk), model_tag(type(instance))]
+    if isinstance(instance, BundleItem):
+        return [object_tag(Bundle, instance.bundle_id), model_tag(Bundle)]
+    return []
+
+
+def _purge_pages(tags) -> None:
+    if not tags:
+        return
+    tags = sorted(set(tags))
+    purge_page_tags(*tags)
+    transaction.on_commit(lambda: purge_page_tags(*tags))
+
+
+def _catalog_changed(sender, instance=None, **kwargs):
+    bump_catalog_generation()
+    # Повтор после коммита: снимок, собранный параллельным запросом между
+    # сигналом и коммитом (ещё из старых данных), не должен пережить правку.
+    transaction.on_commit(bump_catalog_generation)
+    if instance is not None and "action" not in kwargs:
+        _purge_pages(_page_tags(instance))
+
+
+def _master_services_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if reverse:  # service.masters.add(...): instance — Service, pk_set — мастера
+        tags = [object_tag(Service, instance.pk)] + [object_tag(Master, pk) for pk in pk_set or ()]
+    else:
+        tags = [object_tag(Master, instance.pk)]
+    _purge_pages(tags)
+
+
+def _related_services_changed(sender, instance, action, pk_set, **kwargs):
+    # Страница, у которой правят «связанные», и сами связанные услуги —
+    # их теги стоят на страницах, где они показаны (для clear pk_set = None).
+    if action.startswith("post_"):
+        _purge_pages([object_tag(Service, pk) for pk in {instance.pk, *(pk_set or ())}])
+
+
+def _service_content_changed(sender, instance, **kwargs):
+    _purge_pages(_page_tags(instance))
+
+
+for _model in CATALOG_MODELS:
+    post_save.connect(_catalog_changed, sender=_model, dispatch_uid=f"catalog_save_{_model.__name__}")
+    post_delete.connect(_catalog_changed, sender=_model, dispatch_uid=f"catalog_delete_{_model.__name__}")
+for _through in (Master.services.through, Promotion.options.through):
+    m2m_changed.connect(_catalog_changed, sender=_through, dispatch_uid=f"catalog_m2m_{_through.__name__}")
+m2m_changed.connect(_master_services_changed, sender=Master.services.through,
+                    dispatch_uid="page_cache_master_services")
+m2m_changed.connect(_related_services_changed, sender=Service.related_services.through,
+                    dispatch_uid="page_cache_related_services")
+for _model in (ServiceBlock, ServiceMedia):
+    post_save.connect(_service_content_changed, sender=_model, dispatch_uid=f"page_cache_save_{_model.__name__}")
+    post_delete.connect(_service_content_changed, sender=_model, dispatch_uid=f"page_cache_delete_{_model.__name__}")
+
+
+@receiver(post_save, sender=BundleItem)
+@receiver(post_delete, sender=BundleItem)
+def _bundle_item_changed(sender, instance, **kwargs):
+    schedule_bundle_totals([instance.bundle_id])
+
+
+@receiver(post_save, sender=ServiceOption)
+def _bundle_option_changed(sender, instance, **kwargs):
+    # Удалить вариант из комплекса нельзя (BundleItem.option — PROTECT),
+    # поэтому только save: цена/длительность могли измениться.
+    schedule_bundle_totals(instance.bundle_items.values_list("bundle_id", flat=True).distinct())
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def _site_settings_changed(sender, **kwargs):
+    bump_site_settings_generation()
+    transaction.on_commit(bump_site_settings_generation)
+    _purge_pages([SITE_SETTINGS_TAG])
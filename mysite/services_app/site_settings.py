@@ -0,0 +1,73 @@
+"""Кэшированный доступ к синглтону SiteSettings.
+
+SiteSettings читали на каждый рендер (context processor) и ещё раз-два во
+views — одна страница делала 2–3 одинаковых SELECT. `get_site_settings()`
+держит строку в памяти процесса, а актуальность сверяет по токену поколения
+в Django cache (Redis на проде) — это общий для всех gunicorn-воркеров ключ.
+services_app.signals меняет токен на save/delete SiteSettings (сразу и после
+коммита), и каждый воркер перечитывает строку при следующем обращении.
+
+Токен, а не счётчик — как у снимка каталога (services_app.catalog): после
+cache.clear() счётчик совпал бы со старым значением в памяти процесса.
+
+Возвращаемый объект общий для всех запросов процесса — только для чтения.
+Менять настройки — через SiteSettings.objects / админку (save → сигнал).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SITE_SETTINGS_GENERATION_KEY = "services:site_settings:generation"
+
+_lock = threading.Lock()
+_local: tuple[str, object] | None = None  # (токен поколения, SiteSettings | None)
+
+
+def _generation() -> str:
+    generation = cache.get(SITE_SETTINGS_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(SITE_SETTINGS_GENERATION_KEY, generation, None):
+            generation = cache.get(SITE_SETTINGS_GENERATION_KEY) or generation
+    return generation
+
+
+def _load():
+    from services_app.models import SiteSettings
+
+    return SiteSettings.objects.first()
+
+
+def get_site_settings():
+    """SiteSettings (или None, если строки нет) — из памяти процесса, пока поколение то же."""
+    global _local
+    try:
+        generation = _generation()
+    except Exception as exc:  # noqa: BLE001 — без кэша работаем как раньше, из БД
+        logger.warning("site_settings: cache недоступен: %s", exc)
+        return _load()
+
+    cached = _local
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    with _lock:
+        cached = _local
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        site = _load()
+        _local = (generation, site)
+    return site
+
+
+def bump_site_settings_generation() -> None:
+    """Новое поколение: все процессы перечитают SiteSettings при следующем обращении."""
+    try:
+        cache.set(SITE_SETTINGS_GENERATION_KEY, uuid.uuid4().hex, None)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("bump_site_settings_generation: cache недоступен: %s", exc)
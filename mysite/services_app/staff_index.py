@@ -0,0 +1,100 @@
+"""Индекс «услуга YClients → мастера» для api_get_staff.
+
+Живой путь YClientsAPI._get_staff_fallback_filter — это /book_staff плюс
+get_staff_services() на КАЖДОГО мастера последовательно: 10+ мастеров =
+10+ HTTP-запросов на критическом пути визарда записи.
+
+Индекс строится одним проходом (build_staff_index): /book_staff без
+фильтра + /company/{id}/services, где у каждой услуги есть массив staff.
+Если YClients не отдал staff в услугах — добираем get_staff_services()
+по мастерам, но уже в Celery-задаче, а не в запросе клиента.
+
+Хранится в Django cache (Redis на проде) одним ключом, обновляется
+beat-задачей services_app.tasks.refresh_staff_index. Читатели отвечают
+из индекса за O(1); если индекс холодный или старше
+YCLIENTS_STAFF_INDEX_MAX_AGE — возвращают None, и вызывающий идёт
+живым путём.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "yclients:staff_index"
+
+
+def _max_age() -> int:
+    return int(getattr(settings, "YCLIENTS_STAFF_INDEX_MAX_AGE", 3600))
+
+
+def build_staff_index(api) -> dict:
+    """Собрать индекс из YClients и положить в cache. Возвращает индекс.
+
+    YClientsAPIError из /book_staff пробрасывается — Celery-задача
+    залогирует и переживёт до следующего запуска, старый индекс остаётся.
+    """
+    from services_app.yclients_api import extract_staff_list, format_staff, is_staff_bookable
+
+    response = api._request("GET", f"/book_staff/{api.company_id}")
+    staff = {}
+    for item in extract_staff_list(response):
+        if is_staff_bookable(item) and item.get("id"):
+            staff[str(item["id"])] = format_staff(item)
+
+    service_staff: dict[str, list[str]] = {}
+    services = api.get_services()
+    has_staff_arrays = any(isinstance(s.get("staff"), list) for s in services)
+    if has_staff_arrays:
+        for svc in services:
+            for link in svc.get("staff") or []:
+                sid = str(link.get("id") if isinstance(link, dict) else link)
+                if sid in staff:
+                    service_staff.setdefault(str(svc.get("id")), []).append(sid)
+    else:
+        # Старый формат без staff в услугах — N запросов, но вне запроса клиента
+        for sid in staff:
+            for svc in api.get_staff_services(int(sid)):
+                if svc.get("id"):
+                    service_staff.setdefault(str(svc["id"]), []).append(sid)
+
+    index = {
+        "built_at": time.time(),
+        "staff": staff,
+        "service_staff": service_staff,
+    }
+    cache.set(CACHE_KEY, index, None)
+    logger.info(
+        "staff_index: built — staff=%d services=%d (bulk=%s)",
+        len(staff), len(service_staff), has_staff_arrays,
+    )
+    return index
+
+
+def get_staff_index(max_age: int | None = None) -> dict | None:
+    """Индекс, если он есть и не старше max_age секунд; иначе None."""
+    index = cache.get(CACHE_KEY)
+    if not index:
+        return None
+    age = time.time() - index["built_at"]
+    if age > (max_age if max_age is not None else _max_age()):
+        logger.info("staff_index: stale (age=%.0fs), fallback to live", age)
+        return None
+    return index
+
+
+def staff_for_service(service_id) -> list[dict] | None:
+    """Мастера для услуги из индекса или None (индекс холодный/устарел,
+    либо услуга в нём не встречалась — новую услугу спросим у YClients)."""
+    index = get_staff_index()
+    if index is None:
+        return None
+    staff_ids = index["service_staff"].get(str(service_id))
+    if staff_ids is None:
+        return None
+    return [index["staff"][sid] for sid in staff_ids if sid in index["staff"]]
+
@@ -0,0 +1,58 @@
+"""Celery-таски services_app: фоновые прогревы кэшей YClients и индекса FAQ, пересчёт комплексов."""
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+
+from services_app.yclients_api import YClientsAPIError, get_yclients_api
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="services_app.tasks.refresh_staff_index", ignore_result=True)
+def refresh_staff_index():
+    """Перестроить индекс услуга → мастера (services_app.staff_index).
+
+    Ошибка YClients не фатальна: старый индекс остаётся в кэше, а после
+    YCLIENTS_STAFF_INDEX_MAX_AGE api_get_staff сам уйдёт на живой путь.
+    """
+    from services_app.staff_index import build_staff_index
+
+    try:
+        index = build_staff_index(get_yclients_api())
+    except YClientsAPIError as exc:
+        logger.warning("refresh_staff_index: YClients failed: %s", exc)
+        return None
+    return {"staff": len(index["staff"]), "services": len(index["service_staff"])}
+
+
+@shared_task(name="services_app.tasks.reindex_help_articles", ignore_result=True)
+def reindex_help_articles():
+    """Инкрементальный reindex FAQ-индекса formulatela_mcp после правки HelpArticle.
+
+    Ставится из services_app.signals (debounce: одна таска на пачку правок).
+    Эмбеддятся только изменённые статьи, live-индекс не очищается. Пакет
+    formulatela_mcp ставится отдельно — без него таска ничего не делает.
+    """
+    from services_app.signals import HELP_ARTICLES_REINDEX_PENDING_KEY
+
+    # Снимаем флаг ДО чтения статей: правка во время reindex поставит новую таску.
+    cache.delete(HELP_ARTICLES_REINDEX_PENDING_KEY)
+    try:
+        from formulatela_mcp.embeddings.reindex import build_store, sync_help_articles
+    except ImportError as exc:
+        logger.warning("reindex_help_articles: formulatela_mcp недоступен: %s", exc)
+        return None
+    return sync_help_articles(build_store())
+
+
+@shared_task(name="services_app.tasks.recompute_bundle_totals", ignore_result=True)
+def recompute_bundle_totals():
+    """Сверить и пересчитать Bundle.computed_* по всем комплексам.
+
+    Сигналы держат их актуальными при правках через ORM; ночной прогон
+    ловит правки мимо сигналов (QuerySet.update, SQL руками).
+    """
+    from services_app.bundle_totals import recompute_bundle_totals as recompute
+
+    return {"updated": recompute()}
@@ -1,5 +1,7 @@
 import requests
 import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
 from typing import Dict, List, Optional
 from django.conf import settings
@@ -14,6 +16,156 @@ class YClientsAPIError(Exception):
     pass
 
 
+def is_staff_bookable(staff: dict) -> bool:
+    """Мастер активен, принимает онлайн-запись, не скрыт и не уволен."""
+    if 'active' in staff and not staff.get('active', True):
+        return False
+    if 'bookable' in staff and not staff.get('bookable', True):
+        return False
+    if staff.get('hidden', 0) == 1 or staff.get('fired', 0) == 1:
+        return False
+    return True
+
+
+def format_staff(staff: dict) -> dict:
+    """Сырой staff из YClients → формат, который отдаёт api_get_staff."""
+    return {
+        'id': staff.get('id'),
+        'name': staff.get('name', ''),
+        'specialization': staff.get('specialization', ''),
+        'rating': staff.get('rating', 0),
+        'avatar': staff.get('avatar', ''),
+        'position': staff.get('position', {}).get('title', '') if isinstance(staff.get('position'), dict) else ''
+    }
+
+
+def build_headers(partner_token: str, user_token: str) -> Dict[str, str]:
+    """Заголовки авторизации YClients (общие для sync и async клиентов)."""
+    # WAF-bypass заголовки: без User-Agent + X-Partner-Id YClients отдаёт 403.
+    return {
+        "Accept": "application/vnd.yclients.v2+json",
+        "Authorization": f"Bearer {partner_token}, User {user_token}",
+        "Content-Type": "application/json",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "X-Partner-Id": "11958",
+    }
+
+
+def extract_staff_list(response) -> List[dict]:
+    """Список мастеров из ответа /book_staff или /company/{id}/staff.
+
+    YClients отдаёт то data: [...], то data: {staff: [...]}, то {staff: [...]}.
+    """
+    if isinstance(response, list):
+        return response
+    if not isinstance(response, dict):
+        return []
+    if 'data' in response:
+        data = response['data']
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict) and isinstance(data.get('staff'), list):
+            return data['staff']
+        return []
+    if isinstance(response.get('staff'), list):
+        return response['staff']
+    return []
+
+
+def parse_book_dates(response) -> List[str]:
+    """Отсортированный список дат "YYYY-MM-DD" из ответа /book_dates."""
+    # YClients возвращает {'success': True, 'data': {'booking_dates': [...]}}
+    dates = []
+
+    if isinstance(response, dict):
+        data = response.get('data')
+        if isinstance(data, dict):
+            # booking_dates, или working_dates как запасной вариант
+            if 'booking_dates' in data:
+                dates = data['booking_dates']
+            elif 'working_dates' in data:
+                dates = data['working_dates']
+    elif isinstance(response, list):
+        # Если вернули список напрямую (старый формат API)
+        for item in response:
+            if isinstance(item, dict) and 'date' in item:
+                dates.append(item['date'])
+            elif isinstance(item, str):
+                dates.append(item)
+
+    if not isinstance(dates, list):
+        return []
+    return sorted(dates)
+
+
+def parse_available_times(data) -> List[str]:
+    """Слоты "HH:MM" из data ответа /book_times.
+
+    Элемент — строка "17:30" или объект; у объекта приоритет
+    time > datetime > seance_date.
+    """
+    times = []
+    if not isinstance(data, list):
+        return times
+
+    for item in data:
+        if isinstance(item, str):
+            times.append(item)
+        elif isinstance(item, dict):
+            time_str = item.get('time')
+
+            if not time_str:
+                dt = item.get('datetime')
+                if dt:
+                    # ISO формат: "2025-09-30T17:30:00"
+                    if 'T' in str(dt):
+                        time_str = str(dt).split('T')[1][:5]  # "17:30"
+                    else:
+                        time_str = str(dt)
+
+            if not time_str:
+                time_str = item.get('seance_date')
+
+            if time_str:
+                times.append(time_str)
+                seance_length_sec = item.get('seance_length')
+                if seance_length_sec:
+                    logger.debug(
+                        f"   Слот {time_str}: длительность {seance_length_sec // 60} мин"
+                    )
+    return times
+
+
+def build_booking_payload(
+    staff_id: int,
+    services: List[int],
+    datetime: str,
+    client: Dict,
+    comment: Optional[str] = None,
+    notify_by_sms: int = 0,
+    notify_by_email: int = 0,
+) -> Dict:
+    """Тело POST /book_record/{company_id}."""
+    data = {
+        "phone": client.get("phone"),
+        "fullname": client.get("name"),
+        "email": client.get("email", ""),
+        "appointments": [
+            {
+                "id": 1,
+                "services": services,
+                "staff_id": staff_id,
+                "datetime": datetime
+            }
+        ],
+        "notify_by_sms": notify_by_sms,
+        "notify_by_email": notify_by_email
+    }
+    if comment:
+        data["comment"] = comment
+    return data
+
+
 class YClientsAPI:
     """
     Клиент для работы с YClients REST API v2.
@@ -32,14 +184,7 @@ class YClientsAPI:
         self.user_token = user_token
         self.company_id = company_id
 
-        # WAF-bypass заголовки: без User-Agent + X-Partner-Id YClients отдаёт 403.
-        self.headers = {
-            "Accept": "application/vnd.yclients.v2+json",
-            "Authorization": f"Bearer {self.partner_token}, User {self.user_token}",
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "X-Partner-Id": "11958",
-        }
+        self.headers = build_headers(self.partner_token, self.user_token)
 
         # Session переиспользует TCP+TLS и применяет retry для всех запросов.
         self._session = requests.Session()
@@ -255,46 +400,12 @@ class YClientsAPI:
                 
                 logger.debug(f"📥 Raw staff response type: {type(response)}")
                 
-                staff_list = []
-                
-                # Обрабатываем ответ
-                if isinstance(response, dict):
-                    if 'data' in response:
-                        data = response['data']
-                        if isinstance(data, list):
-                            staff_list = data
-                        elif isinstance(data, dict) and 'staff' in data:
-                            staff_list = data['staff'] if isinstance(data['staff'], list) else []
-                    elif 'staff' in response:
-                        staff_list = response['staff'] if isinstance(response['staff'], list) else []
-                elif isinstance(response, list):
-                    staff_list = response
+                staff_list = extract_staff_list(response)
                 
                 logger.debug(f"📋 Извлечено мастеров из ответа: {len(staff_list)}")
                 
-                # Форматируем данные
-                result = []
-                for staff in staff_list:
-                    # Пропускаем неактивных
-                    if 'active' in staff and not staff.get('active', True):
-                        continue
-                    
-                    # Пропускаем тех, кто не принимает запись онлайн
-                    if 'bookable' in staff and not staff.get('bookable', True):
-                        continue
-                    
-                    # Пропускаем скрытых/уволенных мастеров
-                    if staff.get('hidden', 0) == 1 or staff.get('fired', 0) == 1:
-                        continue
-                    
-                    result.append({
-                        'id': staff.get('id'),
-                        'name': staff.get('name', ''),
-                        'specialization': staff.get('specialization', ''),
-                        'rating': staff.get('rating', 0),
-                        'avatar': staff.get('avatar', ''),
-                        'position': staff.get('position', {}).get('title', '') if isinstance(staff.get('position'), dict) else ''
-                    })
+                # Форматируем данные (неактивные/скрытые/уволенные отсеиваются)
+                result = [format_staff(staff) for staff in staff_list if is_staff_bookable(staff)]
                 
                 logger.info(f"✅ Отфильтровано активных мастеров: {len(result)} из {len(staff_list)}")
                 
@@ -311,6 +422,14 @@ class YClientsAPI:
         Fallback метод: получает мастеров через book_staff и проверяет услуги каждого
         Используется, если основной метод не сработал
         """
+        # Быстрый путь: prebuilt-индекс услуга → мастера (services_app.staff_index),
+        # обновляется Celery beat. Живой путь ниже — только при холодном индексе.
+        from services_app.staff_index import staff_for_service
+        indexed = staff_for_service(service_id)
+        if indexed is not None:
+            logger.info(f"⚡ Мастера для услуги {service_id} из индекса: {len(indexed)}")
+            return indexed
+
         logger.info(f"🔄 Используем fallback метод для фильтрации мастеров по услуге {service_id}")
         
         try:
@@ -319,30 +438,12 @@ class YClientsAPI:
             params = {'service_id': service_id}
             response = self._request('GET', endpoint, params=params)
             
-            staff_list = []
-            if isinstance(response, dict):
-                if 'data' in response:
-                    data = response['data']
-                    if isinstance(data, list):
-                        staff_list = data
-                    elif isinstance(data, dict) and 'staff' in data:
-                        staff_list = data['staff'] if isinstance(data['staff'], list) else []
-                elif 'staff' in response:
-                    staff_list = response['staff'] if isinstance(response['staff'], list) else []
-            elif isinstance(response, list):
-                staff_list = response
+            staff_list = extract_staff_list(response)
             
             # Проверяем услуги каждого мастера
             result = []
             for staff in staff_list:
-                # Пропускаем неактивных
-                if 'active' in staff and not staff.get('active', True):
-                    continue
-                
-                if 'bookable' in staff and not staff.get('bookable', True):
-                    continue
-                
-                if staff.get('hidden', 0) == 1 or staff.get('fired', 0) == 1:
+                if not is_staff_bookable(staff):
                     continue
                 
                 staff_id = staff.get('id')
@@ -363,14 +464,7 @@ class YClientsAPI:
                     logger.warning(f"⚠️ Не удалось получить услуги для мастера {staff_id}: {e}")
                     continue
                 
-                result.append({
-                    'id': staff.get('id'),
-                    'name': staff.get('name', ''),
-                    'specialization': staff.get('specialization', ''),
-                    'rating': staff.get('rating', 0),
-                    'avatar': staff.get('avatar', ''),
-                    'position': staff.get('position', {}).get('title', '') if isinstance(staff.get('position'), dict) else ''
-                })
+                result.append(format_staff(staff))
             
             logger.info(f"✅ Fallback: отфильтровано мастеров для услуги {service_id}: {len(result)} из {len(staff_list)}")
             return result
@@ -481,40 +575,12 @@ class YClientsAPI:
             
             logger.debug(f"Raw book_dates response: {response}")
             
-            # YClients возвращает {'success': True, 'data': {'booking_dates': [...]}}
-            dates = []
-            
-            if isinstance(response, dict):
-                # Проверяем наличие вложенной структуры
-                if 'data' in response:
-                    data = response['data']
-                    
-                    # Ищем booking_dates
-                    if 'booking_dates' in data:
-                        dates = data['booking_dates']
-                    # Или working_dates как запасной вариант
-                    elif 'working_dates' in data:
-                        dates = data['working_dates']
-                        
-            elif isinstance(response, list):
-                # Если вернули список напрямую (старый формат API)
-                for item in response:
-                    if isinstance(item, dict) and 'date' in item:
-                        dates.append(item['date'])
-                    elif isinstance(item, str):
-                        dates.append(item)
-            
-            # Убеждаемся что dates это список строк
-            if not isinstance(dates, list):
-                dates = []
+            dates = parse_book_dates(response)
             
             logger.info(f"✅ Найдено доступных дат: {len(dates)}")
             if dates:
                 logger.debug(f"Первые 5 дат: {dates[:5]}")
             
-            # Сортируем даты
-            dates.sort()
-            
             return dates
             
         except Exception as e:
@@ -604,41 +670,7 @@ YClients API ожидает service_ids[] (массив), а не service_id
             logger.debug(f"📦 Raw API response data length: {len(data) if isinstance(data, list) else 'N/A'}")
             
             # Обрабатываем ответ
-            times = []
-            
-            if isinstance(data, list):
-                for item in data:
-                    if isinstance(item, str):
-                        # Простая строка "17:30"
-                        times.append(item)
-                    elif isinstance(item, dict):
-                        # Объект со свойствами
-                        # Приоритет: time > datetime > seance_date
-                        time_str = item.get('time')
-                        
-                        if not time_str:
-                            # Извлекаем из datetime
-                            dt = item.get('datetime')
-                            if dt:
-                                # ISO формат: "2025-09-30T17:30:00"
-                                if 'T' in str(dt):
-                                    time_str = str(dt).split('T')[1][:5]  # "17:30"
-                                else:
-                                    time_str = str(dt)
-                        
-                        if not time_str:
-                            time_str = item.get('seance_date')
-                        
-                        if time_str:
-                            times.append(time_str)
-                            
-                            # ✅ ЛОГИРУЕМ seance_length для отладки
-                            seance_length_sec = item.get('seance_length')
-                            if seance_length_sec:
-                                seance_length_min = seance_length_sec // 60
-                                logger.debug(
-                                    f"   Слот {time_str}: длительность {seance_length_min} мин"
-                                )
+            times = parse_available_times(data)
             
             logger.info(
                 f"✅ Свободных слотов для мастера {staff_id} "
@@ -719,25 +751,10 @@ YClients API ожидает service_ids[] (массив), а не service_id
     ) -> Dict:
         """Создать запись клиента в YClients"""
         endpoint = f"/book_record/{self.company_id}"
-        
-        data = {
-            "phone": client.get("phone"),
-            "fullname": client.get("name"),
-            "email": client.get("email", ""),
-            "appointments": [
-                {
-                    "id": 1,
-                    "services": services,
-                    "staff_id": staff_id,
-                    "datetime": datetime
-                }
-            ],
-            "notify_by_sms": notify_by_sms,
-            "notify_by_email": notify_by_email
-        }
-        
-        if comment:
-            data["comment"] = comment
+        data = build_booking_payload(
+            staff_id, services, datetime, client, comment,
+            notify_by_sms=notify_by_sms, notify_by_email=notify_by_email,
+        )
         
         logger.info(
             f"🔖 Создание записи: staff={staff_id}, "
@@ -762,6 +779,11 @@ YClients API ожидает service_ids[] (массив), а не service_id
                 f"✅ Запись создана! "
                 f"Record ID: {booking_data.get('record_id')}"
             )
+
+            # Слот занят — сбрасываем закэшированную доступность мастера,
+            # иначе следующий клиент увидит уже занятое время.
+            from services_app.availability_cache import invalidate_staff
+            invalidate_staff(staff_id)
             
             return booking_data
             
@@ -775,6 +797,8 @@ YClients API ожидает service_ids[] (массив), а не service_id
         end_date: str,
         count: int = 200,
         page: int = 1,
+        changed_after: Optional[str] = None,
+        changed_before: Optional[str] = None,
     ) -> list:
         """
         Получить записи (визиты) за период.
@@ -784,6 +808,9 @@ YClients API ожидает service_ids[] (массив), а не service_id
             end_date:   Дата конца  "YYYY-MM-DD"
             count:      Количество записей за запрос (макс. 200)
             page:       Номер страницы
+            changed_after:  Только записи, изменённые после (ISO 8601) —
+                            инкрементальная синхронизация зеркала записей
+            changed_before: Только записи, изменённые до (ISO 8601)
 
         Returns:
             Список записей. Каждая запись содержит:
@@ -797,6 +824,10 @@ YClients API ожидает service_ids[] (массив), а не service_id
             "count": count,
             "page": page,
         }
+        if changed_after:
+            params["changed_after"] = changed_after
+        if changed_before:
+            params["changed_before"] = changed_before
         try:
             response = self._request("GET", endpoint, params=params)
             return response.get("data", [])
@@ -804,6 +835,152 @@ YClients API ожидает service_ids[] (массив), а не service_id
             logger.error("get_records error: %s", e)
             return []
 
+    def iter_records(
+        self,
+        start_date: str,
+        end_date: str,
+        count: int = 200,
+        changed_after: Optional[str] = None,
+        changed_before: Optional[str] = None,
+        max_pages: Optional[int] = None,
+        min_interval: Optional[float] = None,
+        prefetch: bool = True,
+    ) -> "RecordStream":
+        """
+        Все записи за период — поток по страницам (см. RecordStream).
+
+        В отличие от get_records не ограничен одной страницей и не глотает
+        ошибки: сбой посреди выгрузки — YClientsAPIError, а не молча
+        обрезанный результат.
+
+        Example:
+            stream = api.iter_records("2026-03-01", "2026-03-31")
+            revenue = sum(extract_record_revenue(r) for r in stream)
+            logger.info("%d записей за %.1fs", stream.fetched, stream.elapsed)
+        """
+        params = {"start_date": start_date, "end_date": end_date}
+        if changed_after:
+            params["changed_after"] = changed_after
+        if changed_before:
+            params["changed_before"] = changed_before
+        return RecordStream(
+            self, params,
+            count=count, max_pages=max_pages,
+            min_interval=min_interval, prefetch=prefetch,
+        )
+
+
+class RecordStream:
+    """
+    Итератор записей /records/{company_id} страница за страницей.
+
+    - пока вызывающий обрабатывает страницу N, страница N+1 уже грузится
+      в фоновом потоке (prefetch) — сеть и обработка перекрываются;
+    - rate budget: не чаще одного запроса в min_interval секунд
+      (YCLIENTS_RECORDS_PAGE_INTERVAL, по умолчанию 0.5s — как старые
+      ручные циклы с sleep); ожидание происходит в фоновом потоке;
+    - в памяти не больше двух страниц — агрегации идут за O(1) памяти;
+    - метрики после (и во время) обхода: pages, fetched, total
+      (meta.total_count YClients), elapsed, waited.
+
+    Повторный iter() начинает выгрузку заново.
+    """
+
+    def __init__(
+        self,
+        api: "YClientsAPI",
+        params: Dict,
+        *,
+        count: int = 200,
+        max_pages: Optional[int] = None,
+        min_interval: Optional[float] = None,
+        prefetch: bool = True,
+    ):
+        self._api = api
+        self._params = params
+        self.count = count
+        self.max_pages = max_pages
+        if min_interval is None:
+            min_interval = float(getattr(settings, "YCLIENTS_RECORDS_PAGE_INTERVAL", 0.5))
+        self.min_interval = min_interval
+        self.prefetch = prefetch
+        self._reset()
+
+    def _reset(self) -> None:
+        self.pages = 0
+        self.fetched = 0
+        self.total: Optional[int] = None
+        self.elapsed = 0.0
+        self.waited = 0.0
+        self._next_request_at = 0.0
+
+    def _fetch_page(self, page: int):
+        """Одна страница → (data, meta). Вызывается из фонового потока."""
+        wait = self._next_request_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+            self.waited += wait
+        self._next_request_at = time.monotonic() + self.min_interval
+
+        response = self._api._request(
+            "GET", f"/records/{self._api.company_id}",
+            params={**self._params, "count": self.count, "page": page},
+        )
+        if not response.get("success", True):
+            error_msg = response.get("meta", {}).get("message", "Unknown error")
+            raise YClientsAPIError(f"Failed to get records: {error_msg}")
+        return response.get("data") or [], response.get("meta") or {}
+
+    def _submit(self, executor: Optional[ThreadPoolExecutor], page: int) -> Future:
+        if executor is not None:
+            return executor.submit(self._fetch_page, page)
+        future: Future = Future()
+        try:
+            future.set_result(self._fetch_page(page))
+        except Exception as e:  # noqa: BLE001 — пробросится из future.result()
+            future.set_exception(e)
+        return future
+
+    def _has_more(self, page: int, batch_size: int) -> bool:
+        if batch_size < self.count:
+            return False
+        if self.max_pages is not None and page >= self.max_pages:
+            logger.warning("iter_records: достигнут лимит %d страниц", self.max_pages)
+            return False
+        return self.total is None or self.fetched + batch_size < self.total
+
+    def __iter__(self):
+        self._reset()
+        started = time.monotonic()
+        executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="yclients-records")
+            if self.prefetch else None
+        )
+        future: Optional[Future] = self._submit(executor, 1)
+        page = 1
+        try:
+            while future is not None:
+                data, meta = future.result()
+                self.pages += 1
+                if self.total is None and meta.get("total_count") is not None:
+                    self.total = int(meta["total_count"])
+                future = self._submit(executor, page + 1) if self._has_more(page, len(data)) else None
+                page += 1
+                for record in data:
+                    self.fetched += 1
+                    yield record
+        finally:
+            self.elapsed = time.monotonic() - started
+            if future is not None:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            logger.info(
+                "iter_records: %d/%s записей, %d стр. за %.1fs (rate-limit ожидание %.1fs)",
+                self.fetched, self.total if self.total is not None else "?",
+                self.pages, self.elapsed, self.waited,
+            )
+
 
 def _build_yclients_api() -> YClientsAPI:
     """Фабрика YClientsAPI из Django settings. Не кэшируется — используется
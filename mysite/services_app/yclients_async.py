@@ -0,0 +1,354 @@
+"""Асинхронный клиент YClients REST API на httpx.AsyncClient.
+
+Та же поверхность методов, что у синхронного YClientsAPI (get_staff,
+get_staff_services, get_services, get_book_dates, get_available_times,
+get_records, create_booking) и те же ответы/исключения — разбор ответов
+общий (services_app.yclients_api.parse_*/extract_*).
+
+Зачем: MAX-бот живёт в asyncio и без этого клиента вынужден гонять
+requests через sync_to_async (по потоку на вызов), а bulk-скрипты
+обходят мастеров по одному. Здесь:
+
+- один httpx.AsyncClient на экземпляр — пул keep-alive соединений
+  (аналог requests.Session в синхронном клиенте);
+- retry 502/503/504 и сетевых ошибок: 3 попытки, backoff 0.5s/1s/2s —
+  как urllib3 Retry у YClientsAPI;
+- не больше max_concurrency HTTP-запросов одновременно на экземпляр
+  (семафор вокруг самого запроса, rate-limit YClients);
+- gather_limited() — fan-out: десятки вызовов параллельно с собственным
+  лимитом. Семафоры разных уровней не вложены → вложенный fan-out
+  (get_staff(service_id) внутри gather_limited) не может зависнуть.
+
+Example:
+    async with build_async_yclients_api() as api:
+        services_by_staff = await api.get_services_for_staff([1, 2, 3])
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+from asgiref.sync import sync_to_async
+
+from services_app.yclients_api import (
+    YClientsAPI,
+    YClientsAPIError,
+    build_booking_payload,
+    build_headers,
+    extract_staff_list,
+    format_staff,
+    is_staff_bookable,
+    parse_available_times,
+    parse_book_dates,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # 0.5s, 1s, 2s между попытками
+DEFAULT_MAX_CONCURRENCY = 8
+REQUEST_TIMEOUT = 30
+
+
+class AsyncYClientsAPI:
+    """Async-клиент YClients. Используется как async context manager
+    (или явный aclose()), чтобы закрыть пул соединений."""
+
+    BASE_URL = YClientsAPI.BASE_URL
+
+    def __init__(
+        self,
+        partner_token: str,
+        user_token: str,
+        company_id: str,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.partner_token = partner_token
+        self.user_token = user_token
+        self.company_id = company_id
+        self.max_concurrency = max_concurrency
+        # Заголовки 1:1 с синхронным клиентом (WAF-bypass включительно)
+        self.headers = build_headers(partner_token, user_token)
+        self._client = client or httpx.AsyncClient(
+            base_url=self.BASE_URL,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        self._client.headers.update(self.headers)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self) -> "AsyncYClientsAPI":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # ── Транспорт ─────────────────────────────────────────────────────
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None,
+        headers=None,
+    ) -> Dict:
+        """HTTP-запрос с retry. Возвращает ПОЛНЫЙ JSON-ответ (success, data, meta).
+
+        Raises:
+            YClientsAPIError: те же тексты ошибок, что у YClientsAPI._request.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(
+                        method, endpoint, params=params, json=data, headers=headers,
+                    )
+            except httpx.TimeoutException:
+                if attempt < MAX_RETRIES:
+                    await self._backoff(attempt)
+                    continue
+                raise YClientsAPIError("API request timeout")
+            except httpx.TransportError:
+                if attempt < MAX_RETRIES:
+                    await self._backoff(attempt)
+                    continue
+                raise YClientsAPIError("API connection error")
+
+            if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                logger.info(
+                    "YClients async: %s %s → %s, retry %d",
+                    method, endpoint, response.status_code, attempt + 1,
+                )
+                await self._backoff(attempt)
+                continue
+            break
+
+        logger.debug(f"YClients async API: {method} {endpoint} → {response.status_code}")
+        if response.status_code >= 400:
+            logger.error(f"HTTP Error {response.status_code}: {response.text}")
+            raise YClientsAPIError(f"HTTP {response.status_code}: {response.text}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise YClientsAPIError(f"Invalid JSON response: {str(e)}")
+
+    @staticmethod
+    async def _backoff(attempt: int) -> None:
+        await asyncio.sleep(BACKOFF_FACTOR * (2 ** attempt))
+
+    # ── Fan-out ───────────────────────────────────────────────────────
+
+    async def gather_limited(
+        self,
+        factories: Iterable[Callable[[], Awaitable]],
+        *,
+        limit: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> list:
+        """Запустить вызовы параллельно, не больше limit (default
+        max_concurrency) одновременно. Порядок результатов = порядок фабрик.
+
+        Принимает фабрики (lambda: api.get_staff_services(1)), а не готовые
+        корутины — корутина создаётся только когда для неё есть слот.
+        """
+        semaphore = asyncio.Semaphore(limit or self.max_concurrency)
+
+        async def _run(factory):
+            async with semaphore:
+                return await factory()
+
+        return await asyncio.gather(
+            *(_run(f) for f in factories), return_exceptions=return_exceptions,
+        )
+
+    # ── Методы API ────────────────────────────────────────────────────
+
+    async def get_staff(self, service_id: Optional[int] = None) -> List[dict]:
+        """Мастера (все или умеющие service_id). Ошибка → [] как у YClientsAPI."""
+        try:
+            if service_id:
+                return await self._get_staff_for_service(service_id)
+            response = await self._request('GET', f'/company/{self.company_id}/staff')
+            return [format_staff(s) for s in extract_staff_list(response) if is_staff_bookable(s)]
+        except YClientsAPIError as e:
+            logger.error(f"❌ Ошибка получения мастеров: {e}")
+            return []
+
+    async def _get_staff_for_service(self, service_id: int) -> List[dict]:
+        from services_app.staff_index import staff_for_service
+
+        indexed = await sync_to_async(staff_for_service)(service_id)
+        if indexed is not None:
+            return indexed
+
+        response = await self._request(
+            'GET', f'/book_staff/{self.company_id}', params={'service_id': service_id},
+        )
+        candidates = [
+            s for s in extract_staff_list(response)
+            if is_staff_bookable(s) and s.get('id')
+        ]
+        # Услуги всех мастеров — параллельно, а не по одному как в sync-клиенте
+        services_by_staff = await self.get_services_for_staff([s['id'] for s in candidates])
+        return [
+            format_staff(s) for s in candidates
+            if service_id in {svc.get('id') for svc in services_by_staff.get(s['id'], [])}
+        ]
+
+    async def get_staff_services(self, staff_id: int) -> List[Dict]:
+        """Услуги мастера. Ошибка/success=false → []."""
+        return await self.get_services(staff_id=staff_id)
+
+    async def get_services_for_staff(self, staff_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+        """{staff_id: [услуги]} для многих мастеров разом (gather_limited)."""
+        staff_ids = list(staff_ids)
+        results = await self.gather_limited(
+            (lambda sid=sid: self.get_staff_services(sid)) for sid in staff_ids
+        )
+        return dict(zip(staff_ids, results))
+
+    async def get_services(
+        self, staff_id: Optional[int] = None, category_id: Optional[int] = None,
+    ) -> List[dict]:
+        params = {}
+        if staff_id:
+            params['staff_id'] = staff_id
+        if category_id:
+            params['category_id'] = category_id
+        try:
+            response = await self._request(
+                'GET', f'/company/{self.company_id}/services', params=params or None,
+            )
+        except YClientsAPIError as e:
+            logger.error(f"❌ Ошибка получения услуг: {e}")
+            return []
+        if not response.get('success', False):
+            error_msg = response.get('meta', {}).get('message', 'Unknown error')
+            logger.error(f"❌ API вернул ошибку: {error_msg}")
+            return []
+        return response.get('data', [])
+
+    async def get_book_dates(
+        self, staff_id: Optional[int] = None, service_ids: Optional[List[int]] = None,
+    ) -> List[str]:
+        params = {}
+        if staff_id:
+            params['staff_id'] = staff_id
+        if service_ids:
+            params['service_ids'] = ','.join(map(str, service_ids))
+        try:
+            response = await self._request('GET', f'/book_dates/{self.company_id}', params=params)
+        except YClientsAPIError as e:
+            logger.error(f"❌ Ошибка при получении доступных дат: {e}")
+            return []
+        return parse_book_dates(response)
+
+    async def get_available_times(
+        self,
+        staff_id: int,
+        date: str,
+        service_id: Optional[int] = None,
+        service_ids: Optional[List[int]] = None,
+    ) -> List[str]:
+        params = {}
+        if service_ids:
+            params['service_ids'] = service_ids
+        elif service_id:
+            params['service_ids'] = [service_id]
+        try:
+            response = await self._request(
+                'GET', f"/book_times/{self.company_id}/{staff_id}/{date}", params=params,
+            )
+        except YClientsAPIError as e:
+            logger.error(f"❌ Ошибка получения времени для staff_id={staff_id}, date={date}: {e}")
+            return []
+        if not response.get('success', False):
+            logger.warning(f"⚠️ API вернул success=false для book_times: {response}")
+            return []
+        return parse_available_times(response.get('data', []))
+
+    async def create_booking(
+        self,
+        staff_id: int,
+        services: List[int],
+        datetime: str,
+        client: Dict,
+        comment: Optional[str] = None,
+        notify_by_sms: int = 0,
+        notify_by_email: int = 0,
+    ) -> Dict:
+        """Создать запись. Ошибки — YClientsAPIError (как у sync-клиента)."""
+        data = build_booking_payload(
+            staff_id, services, datetime, client, comment,
+            notify_by_sms=notify_by_sms, notify_by_email=notify_by_email,
+        )
+        response = await self._request('POST', f"/book_record/{self.company_id}", data=data)
+        if not response.get('success', False):
+            error_msg = response.get('meta', {}).get('message', 'Unknown error')
+            raise YClientsAPIError(f"Failed to create booking: {error_msg}")
+        bookings = response.get('data', [])
+        if not bookings:
+            raise YClientsAPIError("No booking data returned")
+
+        from services_app.availability_cache import invalidate_staff
+        await sync_to_async(invalidate_staff)(staff_id)
+        logger.info(f"✅ Запись создана! Record ID: {bookings[0].get('record_id')}")
+        return bookings[0]
+
+    async def get_records(
+        self,
+        start_date: str,
+        end_date: str,
+        count: int = 200,
+        page: int = 1,
+        changed_after: Optional[str] = None,
+        changed_before: Optional[str] = None,
+    ) -> list:
+        params = {"start_date": start_date, "end_date": end_date, "count": count, "page": page}
+        if changed_after:
+            params["changed_after"] = changed_after
+        if changed_before:
+            params["changed_before"] = changed_before
+        try:
+            response = await self._request("GET", f"/records/{self.company_id}", params=params)
+        except YClientsAPIError as e:
+            logger.error("get_records error: %s", e)
+            return []
+        return response.get("data", [])
+
+
+def build_async_yclients_api(**kwargs) -> AsyncYClientsAPI:
+    """AsyncYClientsAPI из Django settings (те же YCLIENTS_* что у sync).
+
+    Не singleton: httpx.AsyncClient привязан к event loop, поэтому
+    владелец (бот, скрипт) создаёт клиент в своём loop и закрывает его.
+    """
+    from django.conf import settings
+
+    missing = [
+        k for k in ('YCLIENTS_PARTNER_TOKEN', 'YCLIENTS_USER_TOKEN', 'YCLIENTS_COMPANY_ID')
+        if not getattr(settings, k, '')
+    ]
+    if missing:
+        raise YClientsAPIError(
+            f"Missing YClients settings: {', '.join(missing)}\n"
+            "Please configure them in .env file"
+        )
+    return AsyncYClientsAPI(
+        partner_token=settings.YCLIENTS_PARTNER_TOKEN,
+        user_token=settings.YCLIENTS_USER_TOKEN,
+        company_id=settings.YCLIENTS_COMPANY_ID,
+        **kwargs,
+    )
@@ -11,6 +11,7 @@
     python sync_masters_services_from_yclients.py
 """
 
+import asyncio
 import os
 import sys
 import django
@@ -23,6 +24,7 @@ django.setup()
 
 from services_app.models import Master, Service, ServiceOption
 from services_app.yclients_api import get_yclients_api
+from services_app.yclients_async import build_async_yclients_api
 import logging
 
 # Настройка логирования
@@ -56,44 +58,27 @@ def get_all_staff_from_yclients() -> List[Dict]:
     return staff_list
 
 
-def get_staff_services(staff_id: int) -> List[Dict]:
+def fetch_all_staff_services(staff_ids: List[int]) -> Dict[int, List[Dict]]:
     """
-    Получить список услуг которые оказывает сотрудник
+    Получить услуги всех сотрудников одним параллельным проходом
+    
+    Раньше мастера обходились по одному (N последовательных запросов).
+    AsyncYClientsAPI шлёт их параллельно, не больше max_concurrency сразу.
     
     Args:
-        staff_id: ID сотрудника в YClients
+        staff_ids: ID сотрудников в YClients
         
     Returns:
-        List[Dict]: Список услуг сотрудника
+        Dict[int, List[Dict]]: staff_id → список услуг (пустой при ошибке)
     """
-    api = get_yclients_api()
+    async def _fetch():
+        async with build_async_yclients_api() as api:
+            return await api.get_services_for_staff(staff_ids)
     
-    try:
-        # YClients API v2: GET /api/v1/company/{company_id}/services?staff_id={staff_id}
-        endpoint = f'/api/v1/company/{api.company_id}/services'
-        params = {'staff_id': staff_id}
-        
-        logger.info(f"   🔍 Запрос услуг для staff_id={staff_id}")
-        
-        # Важно! Нужен заголовок Accept
-        headers = {
-            'Accept': 'application/vnd.yclients.v2+json'
-        }
-        
-        response = api._request('GET', endpoint, params=params, headers=headers)
-        
-        # Ответ в формате: {"success": true, "data": [...], "meta": {...}}
-        if response.get('success'):
-            services = response.get('data', [])
-            logger.info(f"   ✅ Получено услуг: {len(services)}")
-            return services
-        else:
-            logger.warning(f"   ⚠️ API вернул success=false")
-            return []
-        
-    except Exception as e:
-        logger.error(f"   ❌ Ошибка получения услуг для staff {staff_id}: {e}")
-        return []
+    logger.info(f"🔍 Параллельно запрашиваем услуги {len(staff_ids)} сотрудников...")
+    services_by_staff = asyncio.run(_fetch())
+    logger.info(f"✅ Получено услуг: {sum(len(v) for v in services_by_staff.values())}")
+    return services_by_staff
 
 
 def sync_master_to_db(staff_data: Dict) -> Master:
@@ -239,6 +224,9 @@ def sync_all_masters_services():
     total_masters_synced = 0
     total_services_added = 0
     
+    # Услуги всех мастеров — одним параллельным проходом до записи в БД
+    services_by_staff = fetch_all_staff_services([s.get('id') for s in staff_list])
+    
     # ШАГ 2: Обрабатываем каждого сотрудника
     for idx, staff_data in enumerate(staff_list, 1):
         staff_id = staff_data.get('id')
@@ -250,9 +238,8 @@ def sync_all_masters_services():
         master = sync_master_to_db(staff_data)
         total_masters_synced += 1
         
-        # 2.2: Получаем услуги сотрудника через API v2
-        logger.info(f"\n   📋 Получаем услуги мастера...")
-        yclients_services = get_staff_services(staff_id)
+        # 2.2: Услуги сотрудника (уже получены параллельно)
+        yclients_services = services_by_staff.get(staff_id, [])
         
         # 2.3: Синхронизируем услуги
         logger.info(f"\n   🔗 Синхронизация услуг в Django БД...")
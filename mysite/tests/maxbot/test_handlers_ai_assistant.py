@@ -251,6 +251,66 @@ def test_main_menu_includes_ask_button():
     assert PAYLOAD_MENU_ASK in payloads
 
 
+# ─── Stream-режим: первая фраза сразу, дальше edit'ы ─────────────────────
+
+
+def _fake_stream(*deltas):
+    async def _gen(**kwargs):
+        for d in deltas:
+            yield d
+    return _gen
+
+
+@pytest.mark.asyncio
+async def test_free_text_streams_first_sentence_then_edits(settings):
+    from maxbot.handlers.ai_assistant import on_free_text
+    from maxbot.response_cache import get_cached_answer
+
+    settings.MAXBOT_STREAMING_ENABLED = True
+    event = _make_text_message(user_id=20201, text="Как к вам записаться на массаж?")
+    sent = MagicMock()
+    sent.body.mid = "mid.S1"
+    event.bot.send_message = AsyncMock(return_value=sent)
+    event.bot.edit_message = AsyncMock()
+    ctx = MemoryContext(chat_id=100, user_id=20201)
+
+    with patch("maxbot.handlers.ai_assistant.chat_rag_stream",
+               _fake_stream("Запись через", " бот. Нажмите", " «Записаться».")), \
+         patch("maxbot.handlers.ai_assistant.chat_rag", AsyncMock()) as mock_rag:
+        await on_free_text(event, ctx)
+
+    mock_rag.assert_not_awaited()
+    # Первое сообщение — законченная фраза, не обрывок «Запись через»
+    event.bot.send_message.assert_awaited_once()
+    assert event.bot.send_message.await_args.kwargs["text"] == "Запись через бот. Нажмите"
+    final = event.bot.edit_message.await_args.kwargs
+    assert final["message_id"] == "mid.S1"
+    assert final["text"] == "Запись через бот. Нажмите «Записаться»."
+    assert await get_cached_answer("Как к вам записаться на массаж?") == final["text"]
+
+
+@pytest.mark.asyncio
+async def test_free_text_stream_hides_giveup_and_forwards_to_manager(settings):
+    from maxbot.handlers.ai_assistant import on_free_text
+    from services_app.models import BotInquiry
+
+    settings.MAXBOT_STREAMING_ENABLED = True
+    event = _make_text_message(user_id=20202, chat_id=555, text="смысл жизни?")
+    event.bot.edit_message = AsyncMock()
+    ctx = MemoryContext(chat_id=555, user_id=20202)
+
+    with patch("maxbot.handlers.ai_assistant.chat_rag_stream",
+               _fake_stream("Не знаю, передам ", "менеджеру. ", "Он ответит.")), \
+         patch("maxbot.handlers.ai_assistant.send_notification_telegram"):
+        await on_free_text(event, ctx)
+
+    assert await sync_to_async(BotInquiry.objects.filter(chat_id=555).count)() == 1
+    event.bot.send_message.assert_awaited_once()
+    assert "менеджер" in event.bot.send_message.await_args.kwargs["text"].lower()
+    assert "Не знаю" not in event.bot.send_message.await_args.kwargs["text"]
+    event.bot.edit_message.assert_not_awaited()
+
+
 # ─── Response cache — _get_ai_answer integration ──────────────────────────
 
 
@@ -309,6 +369,21 @@ async def test_get_ai_answer_returns_cached_without_calling_chat_rag(_clear_cach
     mock_rag.assert_not_awaited()
 
 
+@pytest.mark.asyncio
+async def test_get_ai_answer_cache_hit_counts_towards_warmup_priority(_clear_cache):
+    """Кэш-хит → +1 к частоте вопроса (по ней warmup выбирает топ)."""
+    from maxbot.handlers.ai_assistant import _get_ai_answer
+    from maxbot.question_tracker import top_questions
+    from maxbot.response_cache import set_cached_answer
+
+    await set_cached_answer("Как записаться?", "Кэш-ответ")
+    sender = MagicMock(user_id=30001, full_name="X")
+    await _get_ai_answer("Как записаться?", sender)
+    await _get_ai_answer("как записаться", sender)
+
+    assert top_questions(5) == [("как записаться", 2.0)]
+
+
 @pytest.mark.asyncio
 async def test_get_ai_answer_caches_successful_answer(_clear_cache):
     """После успешного ответа — следующий вызов того же вопроса кэш-хит."""
@@ -0,0 +1,146 @@
+"""maxbot.intent_classifier — TF-IDF по char n-граммам перед RAG/LLM."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from asgiref.sync import sync_to_async
+from model_bakery import baker
+
+from maxapi.context.context import MemoryContext
+from maxbot import intent_classifier
+from maxbot.intent_classifier import (
+    MENU_BOOK,
+    MENU_CONTACTS,
+    MENU_EXAMPLES,
+    MENU_SERVICES,
+    IntentClassifier,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_model():
+    intent_classifier.reset_for_tests()
+    yield
+    intent_classifier.reset_for_tests()
+
+
+def _make_text_message(*, user_id: int, text: str, chat_id: int = 100):
+    sender = MagicMock(user_id=user_id, full_name="Иван")
+    event = MagicMock()
+    event.message.sender = sender
+    event.message.recipient.chat_id = chat_id
+    event.message.body.text = text
+    event.bot.send_message = AsyncMock()
+    event.bot.send_action = AsyncMock()
+    return event
+
+
+def _menu_classifier() -> IntentClassifier:
+    return IntentClassifier([(label, t) for label, phrases in MENU_EXAMPLES.items() for t in phrases])
+
+
+@pytest.mark.parametrize("text,label", [
+    ("цены", MENU_SERVICES),
+    ("Прайс?", MENU_SERVICES),
+    ("адрес", MENU_CONTACTS),
+    ("Где вы находитесь?", MENU_CONTACTS),
+    ("записаться", MENU_BOOK),
+    ("записатся", MENU_BOOK),  # опечатка — n-граммы её переживают
+])
+def test_navigation_messages_are_confident(text, label):
+    prediction = _menu_classifier().classify(text, threshold=0.75)
+    assert prediction.label == label
+    assert prediction.confident
+    assert prediction.scores[label] == prediction.confidence
+
+
+@pytest.mark.parametrize("text", [
+    "сколько стоит массаж спины при остеохондрозе",
+    "можно ли делать массаж при беременности",
+    "абракадабра",
+])
+def test_content_questions_are_not_routed(text):
+    assert not _menu_classifier().classify(text, threshold=0.75).confident
+
+
+@pytest.mark.django_db
+def test_build_classifier_maps_faq_question_to_article_answer():
+    article = baker.make(
+        "services_app.HelpArticle", question="Есть ли у вас парковка?",
+        answer="Да, бесплатная парковка во дворе.", is_active=True,
+    )
+    baker.make("services_app.HelpArticle", question="Есть ли душ?", answer="Нет", is_active=False)
+
+    prediction = intent_classifier.build_classifier().classify("есть ли парковка", threshold=0.75)
+
+    assert prediction.label == f"faq:{article.id}"
+    assert prediction.is_faq and prediction.confident
+    assert prediction.answer == "Да, бесплатная парковка во дворе."
+
+
+@pytest.mark.asyncio
+async def test_predict_off_mode_returns_none(settings):
+    settings.MAXBOT_INTENT_CLASSIFIER_MODE = "off"
+    assert await intent_classifier.predict("цены") is None
+
+
+# ─── Handler ───────────────────────────────────────────────────────────────
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_on_mode_routes_navigation_to_menu_without_llm(settings):
+    from maxbot.handlers.ai_assistant import on_free_text
+
+    settings.MAXBOT_INTENT_CLASSIFIER_MODE = "on"
+    event = _make_text_message(user_id=30001, text="цены")
+    mock_menu = AsyncMock()
+    with patch("maxbot.handlers.ai_assistant._get_ai_answer", AsyncMock()) as mock_answer, \
+         patch.dict("maxbot.handlers.ai_assistant._MENU_ROUTES", {MENU_SERVICES: mock_menu}):
+        await on_free_text(event, MemoryContext(chat_id=100, user_id=30001))
+
+    mock_answer.assert_not_awaited()
+    mock_menu.assert_awaited_once_with(event.bot, 100)
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_on_mode_sends_faq_answer_with_menu(settings):
+    from maxbot.handlers.ai_assistant import on_free_text
+
+    settings.MAXBOT_INTENT_CLASSIFIER_MODE = "on"
+    await sync_to_async(baker.make)(
+        "services_app.HelpArticle", question="Есть ли у вас парковка?",
+        answer="Да, бесплатная парковка во дворе.", is_active=True,
+    )
+    event = _make_text_message(user_id=30002, text="Есть ли парковка?")
+    with patch("maxbot.handlers.ai_assistant._get_ai_answer", AsyncMock()) as mock_answer:
+        await on_free_text(event, MemoryContext(chat_id=100, user_id=30002))
+
+    mock_answer.assert_not_awaited()
+    sent = event.bot.send_message.await_args.kwargs
+    assert sent["text"] == "Да, бесплатная парковка во дворе."
+    assert sent["attachments"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_shadow_mode_answers_normally_and_records_sample(settings):
+    from maxbot.handlers.ai_assistant import on_free_text
+
+    settings.MAXBOT_INTENT_CLASSIFIER_MODE = "shadow"
+    event = _make_text_message(user_id=30003, text="адрес")
+    with patch("maxbot.handlers.ai_assistant._get_ai_answer",
+               AsyncMock(return_value="Мы на ул. Ленина, 1")) as mock_answer:
+        await on_free_text(event, MemoryContext(chat_id=100, user_id=30003))
+
+    mock_answer.assert_awaited_once()
+    assert event.bot.send_message.await_args.kwargs["text"] == "Мы на ул. Ленина, 1"
+
+    report = await sync_to_async(intent_classifier.shadow_report)()
+    assert report["total"] == 1
+    assert report["by_label"] == [(MENU_CONTACTS, 1)]
+    sample = report["samples"][0]
+    assert sample["text"] == "адрес" and sample["would_route"]
+    assert sample["answer"] == "Мы на ул. Ленина, 1"
@@ -182,6 +182,84 @@ async def test_chat_handles_mcp_tool_exception():
     assert result == "Не нашёл, передаю менеджеру"
 
 
+def _mock_openai_client_tools_then_text(calls: list[tuple[str, str]], final_text: str):
+    """OpenAI mock: первый ответ — несколько tool_calls разом, второй — текст."""
+    tool_calls = []
+    for n, (tool_name, tool_args) in enumerate(calls):
+        tc = MagicMock(id=f"call_{n}", type="function")
+        tc.function = MagicMock(arguments=tool_args)
+        tc.function.name = tool_name
+        tool_calls.append(tc)
+    resp1 = MagicMock(choices=[MagicMock(message=MagicMock(content="", tool_calls=tool_calls))])
+    resp2 = MagicMock(choices=[MagicMock(message=MagicMock(content=final_text, tool_calls=None))])
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=[resp1, resp2])
+    return client
+
+
+@pytest.mark.asyncio
+async def test_chat_runs_tool_calls_of_one_turn_concurrently():
+    """Несколько tool_calls одной итерации — параллельно, tool-сообщения в порядке вызовов."""
+    import asyncio
+
+    running = {"now": 0, "max": 0}
+    delays = {"get_services": 0.05, "search_faq": 0.02, "find_slots": 0.01}
+
+    async def _call(name, args):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(delays[name])
+        running["now"] -= 1
+        if name == "search_faq":
+            raise RuntimeError("MCP died")
+        return MagicMock(content=[MagicMock(text=f'"{name}"')])
+
+    mcp = _mock_mcp_client(list(delays))
+    mcp.call_tool = AsyncMock(side_effect=_call)
+    openai = _mock_openai_client_tools_then_text(
+        [(name, "{}") for name in delays], final_text="Готово",
+    )
+    timings: list[dict] = []
+    result = await chat_with_tools(
+        messages=[{"role": "user", "content": "?"}],
+        mcp_client=mcp, openai_client=openai, timings=timings,
+    )
+
+    assert result == "Готово"
+    assert running["max"] == 3
+    sent = openai.chat.completions.create.await_args_list[1].kwargs["messages"]
+    tool_msgs = [m for m in sent if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_msgs] == ["call_0", "call_1", "call_2"]
+    assert tool_msgs[0]["content"] == '"get_services"'
+    assert "MCP died" in tool_msgs[1]["content"]  # сбой изолирован в своём сообщении
+    assert tool_msgs[2]["content"] == '"find_slots"'
+    assert [t["tools"] for t in timings] == [3, 0]
+
+
+@pytest.mark.asyncio
+async def test_chat_parallel_tool_calls_respect_limit():
+    import asyncio
+
+    running = {"now": 0, "max": 0}
+
+    async def _call(name, args):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return MagicMock(content=[MagicMock(text='"ok"')])
+
+    mcp = _mock_mcp_client(["ping"])
+    mcp.call_tool = AsyncMock(side_effect=_call)
+    openai = _mock_openai_client_tools_then_text([("ping", "{}")] * 5, final_text="ok")
+    await chat_with_tools(
+        messages=[{"role": "user", "content": "?"}],
+        mcp_client=mcp, openai_client=openai, max_parallel_tools=2,
+    )
+    assert mcp.call_tool.await_count == 5
+    assert running["max"] == 2
+
+
 # ─── chat_rag (RAG-as-context, новый flow для AI-помощника) ────────────────
 
 
@@ -290,6 +368,49 @@ async def test_chat_rag_returns_giveup_when_search_faq_crashes():
     assert result == LLM_GIVEUP_MESSAGE
 
 
+def _mock_openai_stream(deltas: list[str | None]):
+    """OpenAI mock: create(stream=True) → async-итератор chunk'ов с delta.content."""
+    async def _stream():
+        for delta in deltas:
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=delta))])
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=_stream())
+    return client
+
+
+@pytest.mark.asyncio
+async def test_chat_rag_stream_yields_deltas_in_order():
+    from maxbot.llm import chat_rag_stream
+    mcp = _mcp_with_search_faq_response([
+        {"question": "Как записаться?", "answer": "Через бот.", "score": 0.85},
+    ])
+    openai = _mock_openai_stream(["Запись ", None, "через бот."])
+
+    chunks = [c async for c in chat_rag_stream(
+        user_text="Хочу записаться", system_prompt="...", mcp_client=mcp, openai_client=openai,
+    )]
+
+    assert chunks == ["Запись ", "через бот."]
+    assert openai.chat.completions.create.await_args.kwargs["stream"] is True
+
+
+@pytest.mark.asyncio
+async def test_chat_rag_stream_giveup_when_search_faq_crashes():
+    from maxbot.llm import LLM_GIVEUP_MESSAGE, chat_rag_stream
+    mock = MagicMock()
+    mock.ensure_started = AsyncMock()
+    mock.call_tool = AsyncMock(side_effect=RuntimeError("MCP died"))
+    openai = MagicMock()
+
+    chunks = [c async for c in chat_rag_stream(
+        user_text="?", system_prompt="...", mcp_client=mock, openai_client=openai,
+    )]
+
+    assert chunks == [LLM_GIVEUP_MESSAGE]
+    openai.chat.completions.create.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_chat_max_iterations_returns_giveup_message():
     """Если LLM зациклил tool_calls — после max_iterations возвращаем fallback."""
@@ -166,3 +166,229 @@ async def test_start_failure_cleans_stack():
         # Можно попробовать ещё раз без застрявшего session
         with pytest.raises(RuntimeError):
             await client.ensure_started()
+
+
+# ─── Пул сессий ─────────────────────────────────────────────────────────────
+
+
+def _session_factory(call_tool=None):
+    """Как _patched_mcp, но каждый spawn — новый session-мок (список sessions)."""
+    sessions = []
+
+    def _make():
+        session = AsyncMock()
+        tool = MagicMock()
+        tool.name = "ping"
+        session.list_tools = AsyncMock(return_value=MagicMock(tools=[tool]))
+        session.call_tool = AsyncMock(side_effect=call_tool) if call_tool else AsyncMock()
+        sessions.append(session)
+        return session
+
+    @asynccontextmanager
+    async def fake_stdio_client(params):
+        yield (MagicMock(), MagicMock())
+
+    @asynccontextmanager
+    async def fake_session_ctx(read, write):
+        yield _make()
+
+    return sessions, fake_stdio_client, fake_session_ctx
+
+
+@pytest.mark.asyncio
+async def test_pool_grows_when_all_sessions_busy():
+    import asyncio
+
+    release = asyncio.Event()
+
+    async def slow_call(name, args):
+        await release.wait()
+        return MagicMock()
+
+    sessions, stdio_ctx, session_ctx = _session_factory(slow_call)
+    with patch("maxbot.mcp_client.stdio_client", stdio_ctx), \
+         patch("maxbot.mcp_client.ClientSession", session_ctx):
+        client = MaxbotMCPClient(pool_size=2)
+        first = asyncio.create_task(client.call_tool("search_faq", {}))
+        await asyncio.sleep(0.01)
+        assert len(sessions) == 1  # одиночный вызов пул не растит
+        second = asyncio.create_task(client.call_tool("search_faq", {}))
+        await asyncio.sleep(0.01)
+        assert len(sessions) == 2  # второй встал в очередь — вторая поднята фоном
+        third = asyncio.create_task(client.call_tool("search_faq", {}))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(first, second, third)
+        # Третий вызов ушёл в свободную вторую сессию, а не в очередь к первой
+        assert [s.call_tool.await_count for s in sessions] == [2, 1]
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_transport_failure_respawns_and_retries():
+    calls = {"n": 0}
+
+    async def flaky(name, args):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise BrokenPipeError("subprocess died")
+        return "ok"
+
+    sessions, stdio_ctx, session_ctx = _session_factory(flaky)
+    with patch("maxbot.mcp_client.stdio_client", stdio_ctx), \
+         patch("maxbot.mcp_client.ClientSession", session_ctx):
+        client = MaxbotMCPClient(pool_size=1)
+        assert await client.call_tool("ping", {}) == "ok"
+        assert len(sessions) == 2
+        stats = client.stats()
+        assert stats["pool"][0]["restarts"] == 1
+        assert stats["tools"]["ping"]["errors"] == 0
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_mcp_error_is_not_retried():
+    from mcp.shared.exceptions import McpError
+    from mcp.types import ErrorData
+
+    async def bad_tool(name, args):
+        raise McpError(ErrorData(code=-32602, message="unknown tool"))
+
+    sessions, stdio_ctx, session_ctx = _session_factory(bad_tool)
+    with patch("maxbot.mcp_client.stdio_client", stdio_ctx), \
+         patch("maxbot.mcp_client.ClientSession", session_ctx):
+        client = MaxbotMCPClient(pool_size=1)
+        with pytest.raises(McpError):
+            await client.call_tool("nope", {})
+        assert len(sessions) == 1  # сессия жива, без перезапуска
+        assert client.stats()["tools"]["nope"]["errors"] == 1
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_call_timeout_raises_and_counts():
+    import asyncio
+
+    async def hang(name, args):
+        await asyncio.sleep(10)
+
+    sessions, stdio_ctx, session_ctx = _session_factory(hang)
+    with patch("maxbot.mcp_client.stdio_client", stdio_ctx), \
+         patch("maxbot.mcp_client.ClientSession", session_ctx):
+        client = MaxbotMCPClient(pool_size=1, call_timeout=0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.call_tool("search_faq", {})
+        assert client.stats()["tools"]["search_faq"]["timeouts"] == 1
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_health_check_respawns_dead_session():
+    sessions, stdio_ctx, session_ctx = _session_factory()
+    with patch("maxbot.mcp_client.stdio_client", stdio_ctx), \
+         patch("maxbot.mcp_client.ClientSession", session_ctx):
+        client = MaxbotMCPClient(pool_size=1)
+        await client.ensure_started()
+        assert await client.health_check() == {0: True}
+
+        sessions[0].send_ping = AsyncMock(side_effect=BrokenPipeError())
+        assert await client.health_check() == {0: False}
+        assert len(sessions) == 2
+        await client.call_tool("ping", {})
+        sessions[1].call_tool.assert_awaited_once_with("ping", {})
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_latency_histogram_per_tool():
+    sessions, stdio_ctx, session_ctx = _session_factory()
+    with patch("maxbot.mcp_client.stdio_client", stdio_ctx), \
+         patch("maxbot.mcp_client.ClientSession", session_ctx):
+        client = MaxbotMCPClient(pool_size=1)
+        for _ in range(3):
+            await client.call_tool("search_faq", {"query": "q"})
+        await client.call_tool("ping", {})
+        tools = client.stats()["tools"]
+        assert tools["search_faq"]["count"] == 3
+        assert tools["search_faq"]["buckets"]["<=50"] == 3
+        assert tools["ping"]["count"] == 1
+        await client.close()
+
+
+# ─── Реальный subprocess ────────────────────────────────────────────────────
+
+
+_ECHO_SERVER = '''
+import asyncio, os
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("echo")
+
+@mcp.tool()
+async def slow() -> str:
+    await asyncio.sleep(0.3)
+    return "done"
+
+@mcp.tool()
+def pid() -> int:
+    return os.getpid()
+
+mcp.run()
+'''
+
+
+def _process_gone(pid: int) -> bool:
+    import os
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    return False
+
+
+@pytest.mark.asyncio
+async def test_real_subprocess_sessions_close_from_other_task(tmp_path, caplog):
+    """Сессии, поднятые фоном (_grow) и перезапущенные (_restart) в других задачах,
+    close() закрывает без ошибок cancel scope и без осиротевших subprocess'ов."""
+    import asyncio
+    import sys
+
+    from mcp.client.stdio import StdioServerParameters
+
+    script = tmp_path / "echo_server.py"
+    script.write_text(_ECHO_SERVER)
+    client = MaxbotMCPClient(pool_size=2, call_timeout=20)
+    client._build_server_params = lambda: StdioServerParameters(
+        command=sys.executable, args=[str(script)])
+
+    async def pids() -> list[int]:
+        results = [await s.session.call_tool("pid", {}) for s in client._alive()]
+        return [int(r.content[0].text) for r in results]
+
+    try:
+        first = asyncio.create_task(client.call_tool("slow", {}))
+        await asyncio.sleep(0.1)
+        second = asyncio.create_task(client.call_tool("slow", {}))  # сессия занята — _grow фоном
+        await asyncio.gather(first, second)
+        for _ in range(200):
+            if len(client._alive()) == 2:
+                break
+            await asyncio.sleep(0.05)
+        assert len(client._alive()) == 2
+
+        # Перезапуск из отдельной задачи, как делает _check после таймаута
+        slot = client._slots[1]
+        await asyncio.create_task(client._restart(slot, failed=slot.session))
+        assert slot.restarts == 1
+        started = await pids()
+    finally:
+        await client.close()
+
+    assert not client._alive()
+    assert "exception" not in caplog.text  # не «Attempted to exit cancel scope in a different task»
+    for _ in range(100):
+        if all(_process_gone(p) for p in started):
+            break
+        await asyncio.sleep(0.05)
+    assert all(_process_gone(p) for p in started)
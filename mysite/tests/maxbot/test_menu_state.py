@@ -205,3 +205,58 @@ async def test_works_when_context_empty_dict():
     await send_with_main_menu(bot=bot, chat_id=100, text="X", bot_user=bot_user)
     bot.edit_message.assert_not_awaited()  # nothing to edit
     bot.send_message.assert_awaited_once()
+
+
+# ─── StreamingMenuReply — ответ дописывается по мере stream'а LLM ─────────
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_streaming_reply_sends_once_then_throttles_edits():
+    from maxbot.menu_state import CTX_LAST_MENU_TEXT, StreamingMenuReply
+
+    bot_user = await amake("services_app.BotUser", max_user_id=70100, context={})
+    bot = _make_bot_with_send("mid.STREAM")
+    clock = _FakeClock()
+    reply = StreamingMenuReply(bot=bot, chat_id=100, bot_user=bot_user,
+                               min_edit_interval=1.0, clock=clock)
+
+    await reply.update("Запись через бот.")
+    clock.now += 0.3
+    await reply.update("Запись через бот. Кнопка")  # < интервала — не редактируем
+    clock.now += 1.0
+    await reply.update("Запись через бот. Кнопка «Записаться»")
+    await reply.finish("Запись через бот. Кнопка «Записаться» внизу.")
+
+    bot.send_message.assert_awaited_once()
+    assert [c.kwargs["text"] for c in bot.edit_message.await_args_list] == [
+        "Запись через бот. Кнопка «Записаться»",
+        "Запись через бот. Кнопка «Записаться» внизу.",
+    ]
+    assert all(c.kwargs["message_id"] == "mid.STREAM" for c in bot.edit_message.await_args_list)
+    # В state — финальный текст: снятие меню потом не откатит сообщение к первой фразе
+    await sync_to_async(bot_user.refresh_from_db)()
+    assert bot_user.context[CTX_LAST_MENU_TEXT] == "Запись через бот. Кнопка «Записаться» внизу."
+
+
+@pytest.mark.asyncio
+async def test_streaming_reply_final_edit_failure_sends_full_text():
+    from maxbot.menu_state import StreamingMenuReply
+
+    bot_user = await amake("services_app.BotUser", max_user_id=70101, context={})
+    bot = _make_bot_with_send("mid.STREAM")
+    bot.edit_message = AsyncMock(side_effect=RuntimeError("too many edits"))
+    reply = StreamingMenuReply(bot=bot, chat_id=100, bot_user=bot_user)
+
+    await reply.update("Первая фраза.")
+    await reply.finish("Первая фраза. И полный ответ.")
+
+    assert bot.send_message.await_count == 2
+    assert bot.send_message.await_args.kwargs["text"] == "Первая фраза. И полный ответ."
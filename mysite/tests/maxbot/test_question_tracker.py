@@ -0,0 +1,106 @@
+"""Частоты вопросов AI-помощника (maxbot.question_tracker) и перенос топа в warm set."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+
+from maxbot import question_tracker
+from maxbot.question_tracker import FREQ_KEY, _RedisZSet, record_question, top_questions
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _record(*questions):
+    for q in questions:
+        async_to_sync(record_question)(q)
+
+
+def test_record_normalizes_and_ranks():
+    _record("Как записаться?", "как записаться", "Режим работы", "ок")
+    assert top_questions(5) == [("как записаться", 2.0), ("режим работы", 1.0)]
+
+
+def test_decay_halves_scores_per_half_life_and_drops_tail(settings):
+    settings.MAXBOT_QUESTION_FREQ_HALF_LIFE = 100
+    _record("как записаться", "как записаться", "режим работы")
+
+    assert question_tracker.decay(now=1000.0) == 1.0  # первый вызов — только отметка времени
+    assert question_tracker.decay(now=1100.0) == pytest.approx(0.5)
+    assert top_questions(5) == [("как записаться", 1.0), ("режим работы", 0.5)]
+
+    question_tracker.decay(now=1100.0 + 100 * 4)  # ×1/16: 0.03 < MIN_SCORE
+    assert top_questions(5) == [("как записаться", 0.0625)]
+
+
+def test_redis_zset_uses_sorted_set_commands():
+    client = MagicMock()
+    client.zrevrange.return_value = [("как записаться".encode(), 3.0)]
+    zset = _RedisZSet(client, FREQ_KEY)
+
+    zset.incr("как записаться")
+    zset.decay(0.5)
+
+    client.zincrby.assert_called_once_with(FREQ_KEY, 1.0, "как записаться")
+    client.pipeline.return_value.zunionstore.assert_called_once_with(FREQ_KEY, {FREQ_KEY: 0.5})
+    assert zset.top(1) == [("как записаться", 3.0)]
+
+
+def test_zset_on_redis_cache_uses_own_client(settings, monkeypatch):
+    from django.core.cache.backends.redis import RedisCache
+
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://primary:6379/1,redis://replica:6379/1",
+    }}
+    monkeypatch.setattr(question_tracker, "_redis_client", None)
+    monkeypatch.setattr(question_tracker, "cache", RedisCache(settings.CACHES["default"]["LOCATION"], {}))
+    with patch("redis.Redis.from_url") as from_url:
+        zset = question_tracker._zset()
+        question_tracker._zset()
+
+    from_url.assert_called_once_with("redis://primary:6379/1")  # write-сервер, клиент один
+    assert isinstance(zset, _RedisZSet)
+    zset.incr("как записаться")
+    from_url.return_value.zincrby.assert_called_once_with(":1:" + FREQ_KEY, 1.0, "как записаться")
+
+
+@pytest.mark.asyncio
+async def test_record_failure_does_not_raise():
+    with patch("maxbot.question_tracker._zset", side_effect=ConnectionError("redis down")):
+        await record_question("как записаться")
+
+
+@pytest.mark.asyncio
+async def test_promote_hot_questions_warms_top_by_demand(settings):
+    from maxbot.warmup import promote_hot_questions
+
+    settings.MAXBOT_WARMUP_TOP_N = 2
+    for _ in range(3):
+        await record_question("есть ли парковка")
+
+    with patch("maxbot.warmup.POPULAR_QUESTIONS", ["как записаться", "режим работы"]), \
+         patch("maxbot.popular_questions.BotInquiry") as inquiry, \
+         patch("maxbot.warmup.chat_rag", AsyncMock(return_value="ответ")) as rag:
+        inquiry.objects.filter.return_value.values_list.return_value.iterator.return_value = []
+        await promote_hot_questions(mcp_client=MagicMock(call_tool=AsyncMock()))
+
+    warmed = [c.kwargs["user_text"] for c in rag.await_args_list]
+    assert warmed == ["есть ли парковка", "как записаться"]
+    metrics = question_tracker.metrics()
+    assert metrics["warm_set"] == warmed
+    assert metrics["top"][0] == {"question": "есть ли парковка", "score": 3.0, "warm": True}
+    assert metrics["last_warmup"]["cached"] == 2
+
+
+@pytest.mark.django_db
+def test_admin_hot_questions_page(admin_client):
+    _record("как записаться", "как записаться")
+    resp = admin_client.get("/admin/services_app/botinquiry/hot-questions/")
+    assert resp.status_code == 200
+    assert "как записаться" in resp.content.decode()
@@ -0,0 +1,167 @@
+"""Семантический кэш AI-ответов MAX-бота (maxbot.semantic_cache)."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from model_bakery import baker
+
+from maxbot.semantic_cache import SemanticCache
+
+# Вектора «эмбеддингов»: записаться / перефраз (cos≈0.96) / пограничный (cos≈0.9) / цены
+VECTORS = {
+    "как записаться": [1.0, 0.0, 0.0],
+    "как к вам записаться": [0.96, 0.28, 0.0],
+    "можно записаться онлайн": [0.9, 0.0, 0.436],
+    "сколько стоит массаж": [0.0, 1.0, 0.0],
+}
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, text):
+        self.calls.append(text)
+        return np.asarray(VECTORS[text], dtype=np.float32)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    SemanticCache.reset_for_tests()
+    yield
+    cache.clear()
+    SemanticCache.reset_for_tests()
+
+
+def _make(**kwargs):
+    kwargs.setdefault("embed", FakeEmbedder())
+    return SemanticCache(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_paraphrase_hits_above_threshold():
+    sc = _make(threshold=0.92)
+    await sc.store("Как записаться?", "Через кнопку «Записаться».")
+
+    result = await sc.lookup("Как к вам записаться?")
+
+    assert result.answer == "Через кнопку «Записаться»."
+    assert result.matched_question == "как записаться"
+    assert result.score == pytest.approx(0.96, abs=1e-3)
+    assert sc.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_near_miss_and_miss_are_counted_separately():
+    sc = _make(threshold=0.92, near_miss_margin=0.05)
+    await sc.store("как записаться", "ответ")
+
+    near = await sc.lookup("можно записаться онлайн")
+    far = await sc.lookup("сколько стоит массаж")
+
+    assert near.answer is None and near.score == pytest.approx(0.9, abs=1e-3)
+    assert far.answer is None
+    stats = sc.stats()
+    assert (stats["hits"], stats["near_misses"], stats["misses"]) == (0, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_store_reuses_lookup_vector():
+    embed = FakeEmbedder()
+    sc = _make(embed=embed)
+    result = await sc.lookup("сколько стоит массаж")
+    await sc.store("сколько стоит массаж", "от 2000 ₽", result.vector)
+    assert embed.calls == ["сколько стоит массаж"]
+    assert len(sc) == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    sc = _make(ttl=60, clock=clock)
+    await sc.store("как записаться", "ответ")
+
+    clock.now += 61
+    assert (await sc.lookup("как к вам записаться")).answer is None
+    assert len(sc) == 0
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used():
+    sc = _make(max_entries=2)
+    await sc.store("как записаться", "запись")
+    await sc.store("сколько стоит массаж", "цены")
+    assert (await sc.lookup("как к вам записаться")).answer == "запись"  # «записаться» — свежий
+
+    await sc.store("можно записаться онлайн", "онлайн")
+
+    assert len(sc) == 2
+    assert (await sc.lookup("сколько стоит массаж")).answer is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_help_article_change_invalidates_cache():
+    sc = _make()
+    await sc.lookup("как записаться")  # зафиксировали поколение
+    await sc.store("как записаться", "старый ответ")
+
+    await sync_to_async(baker.make)("services_app.HelpArticle", question="Как записаться?", answer="Новый")
+
+    assert (await sc.lookup("как записаться")).answer is None
+    assert len(sc) == 0
+    assert sc.stats()["invalidations"] == 1
+
+
+@pytest.mark.django_db
+def test_help_article_save_survives_cache_outage(settings):
+    settings.HELP_ARTICLES_AUTO_REINDEX = False
+    with patch("services_app.signals.cache.incr", side_effect=ConnectionError("redis down")):
+        article = baker.make("services_app.HelpArticle", question="Как записаться?")
+        article.delete()
+
+
+@pytest.mark.asyncio
+async def test_embedding_failure_is_a_miss():
+    sc = _make(embed=AsyncMock(side_effect=RuntimeError("proxy down")))
+    assert (await sc.lookup("как записаться")).answer is None
+    await sc.store("как записаться", "ответ")
+    assert len(sc) == 0
+    assert sc.stats()["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_disabled_without_openai_key(settings):
+    settings.OPENAI_API_KEY = ""
+    sc = SemanticCache.instance()
+    assert not sc.enabled
+    await sc.store("как записаться", "ответ")
+    assert (await sc.lookup("как записаться")).answer is None
+    assert sc.stats()["misses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_ai_answer_serves_paraphrase_without_chat_rag():
+    from maxbot.handlers.ai_assistant import _get_ai_answer
+
+    sc = _make()
+    sender = MagicMock(user_id=50001, full_name="X")
+    with patch.object(SemanticCache, "instance", return_value=sc), \
+         patch("maxbot.handlers.ai_assistant.chat_rag",
+               AsyncMock(return_value="Через кнопку «Записаться».")) as mock_rag:
+        first = await _get_ai_answer("Как записаться?", sender)
+        second = await _get_ai_answer("Как к вам записаться?", sender)
+
+    assert first == second == "Через кнопку «Записаться»."
+    assert mock_rag.await_count == 1
@@ -1,6 +1,8 @@
 """maxbot.warmup — прогрев response cache при старте процесса бота."""
 from __future__ import annotations
 
+import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -78,6 +80,116 @@ async def test_warmup_does_not_cache_giveup(_clear_cache):
     assert await get_cached_answer("странный вопрос") is None
 
 
+@pytest.mark.asyncio
+async def test_warmup_pre_embeds_questions_in_one_batch(_clear_cache):
+    """Эмбеддинги всех вопросов — одним вызовом MCP embed_queries до chat_rag."""
+    from maxbot.warmup import warmup_response_cache
+
+    questions = ["как записаться", "сколько стоит"]
+    mcp_client = MagicMock()
+    mcp_client.call_tool = AsyncMock()
+
+    with _patch_questions(questions), \
+         patch("maxbot.warmup.chat_rag", AsyncMock(return_value="ответ")):
+        await warmup_response_cache(mcp_client=mcp_client)
+
+    mcp_client.call_tool.assert_awaited_once_with("embed_queries", {"queries": questions})
+
+
+@pytest.mark.asyncio
+async def test_repeat_cycle_does_not_re_embed_known_questions(_clear_cache):
+    """Повторный цикл: вопросы из семантического кэша не эмбеддятся ни в MCP, ни в OpenAI."""
+    import numpy as np
+
+    from maxbot.semantic_cache import SemanticCache
+    from maxbot.warmup import warmup_response_cache
+
+    embedded = []
+
+    async def embed(text):
+        embedded.append(text)
+        return np.ones(3, dtype=np.float32)
+
+    SemanticCache._instance = SemanticCache(embed=embed)
+    questions = ["как записаться", "сколько стоит"]
+    mcp_client = MagicMock(call_tool=AsyncMock())
+    try:
+        with patch("maxbot.warmup.chat_rag", AsyncMock(return_value="ответ")):
+            await warmup_response_cache(mcp_client=mcp_client, questions=questions, rps=0)
+            assert sorted(embedded) == sorted(questions)
+
+            await warmup_response_cache(
+                mcp_client=mcp_client, questions=questions + ["режим работы"], rps=0,
+            )
+    finally:
+        SemanticCache.reset_for_tests()
+
+    assert embedded[2:] == ["режим работы"]
+    assert mcp_client.call_tool.await_args_list[-1].args == (
+        "embed_queries", {"queries": ["режим работы"]},
+    )
+
+
+@pytest.mark.asyncio
+async def test_warmup_runs_questions_concurrently_within_limit(_clear_cache):
+    """Пул: одновременно в chat_rag не больше concurrency вопросов, но больше одного."""
+    from maxbot.warmup import warmup_response_cache
+
+    running = peak = 0
+
+    async def slow_rag(**kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return "ответ"
+
+    questions = [f"вопрос {n}" for n in range(6)]
+    with patch("maxbot.warmup.chat_rag", slow_rag):
+        result = await warmup_response_cache(
+            mcp_client=MagicMock(call_tool=AsyncMock()), questions=questions, concurrency=2, rps=0,
+        )
+
+    assert result == {"cached": 6, "skipped": 0, "failed": 0}
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_warmup_respects_rps_budget_and_order(_clear_cache):
+    """Старты chat_rag не чаще rps в секунду и в порядке приоритета."""
+    from maxbot.warmup import warmup_response_cache
+
+    starts = []
+
+    async def rag(user_text, **kwargs):
+        starts.append((user_text, time.monotonic()))
+        return "ответ"
+
+    questions = ["вопрос один", "вопрос два", "вопрос три"]
+    with patch("maxbot.warmup.chat_rag", rag):
+        await warmup_response_cache(
+            mcp_client=MagicMock(call_tool=AsyncMock()), questions=questions, concurrency=3, rps=20,
+        )
+
+    assert [q for q, _ in starts] == questions
+    assert starts[-1][1] - starts[0][1] >= 2 / 20 - 0.01
+
+
+@pytest.mark.asyncio
+async def test_warmup_saves_time_to_warm_stats(_clear_cache):
+    from maxbot.warmup import WARMUP_STATS_KEY, warmup_response_cache
+
+    with patch("maxbot.warmup.chat_rag", AsyncMock(return_value="ответ")):
+        await warmup_response_cache(
+            mcp_client=MagicMock(call_tool=AsyncMock()), questions=["вопрос один"], rps=0,
+        )
+
+    stats = await sync_to_async(cache.get)(WARMUP_STATS_KEY)
+    assert stats["cached"] == 1
+    assert 0 <= stats["time_to_first_s"] <= stats["time_to_warm_s"] <= stats["elapsed_s"]
+
+
 # ─── Robustness ───────────────────────────────────────────────────────────
 
 
@@ -145,3 +257,36 @@ def test_popular_questions_nonempty_strings():
     assert all(isinstance(q, str) and q.strip() for q in POPULAR_QUESTIONS)
     # Защита от копипасты — хотим уникальный набор
     assert len(POPULAR_QUESTIONS) == len(set(POPULAR_QUESTIONS))
+
+
+# ─── Приоритет по реальному трафику ──────────────────────────────────────
+
+
+def test_rank_questions_orders_by_frequency_then_baseline():
+    from collections import Counter
+
+    from maxbot.popular_questions import rank_questions
+
+    baseline = ["как записаться", "режим работы", "какой адрес"]
+    counts = Counter({"какой адрес": 5, "есть ли парковка": 3, "разовый вопрос": 1})
+
+    assert rank_questions(baseline, counts, limit=4) == [
+        "какой адрес", "есть ли парковка", "как записаться", "режим работы",
+    ]
+
+
+@pytest.mark.django_db
+def test_observed_counts_merge_tracker_and_inquiries(_clear_cache):
+    from asgiref.sync import async_to_sync
+    from model_bakery import baker
+
+    from maxbot.popular_questions import observed_counts
+    from maxbot.question_tracker import record_question
+
+    async_to_sync(record_question)("Как записаться?")
+    async_to_sync(record_question)("как  записаться")
+    baker.make("services_app.BotInquiry", question="Есть ли парковка?", _quantity=2)
+
+    counts = observed_counts()
+    assert counts["как записаться"] == 2
+    assert counts["есть ли парковка"] == 2
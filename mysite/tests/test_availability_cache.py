@@ -0,0 +1,144 @@
+"""Тесты кэша доступности YClients: hit/miss, stale-while-revalidate, инвалидация."""
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+
+from services_app import availability_cache
+from services_app.yclients_api import YClientsAPI
+
+
+BOOK_TIMES_OK = {
+    "success": True,
+    "data": [{"time": "10:00", "seance_length": 3600}],
+}
+
+
+def _api():
+    api = MagicMock()
+    api.company_id = "884045"
+    api._request.return_value = BOOK_TIMES_OK
+    api.get_book_dates.return_value = ["2026-03-01", "2026-03-02"]
+    return api
+
+
+@pytest.fixture(autouse=True)
+def _sync_refresh(monkeypatch):
+    """Фоновый refresh — синхронно, чтобы тесты были детерминированными."""
+    monkeypatch.setattr(availability_cache, "_spawn", lambda fn: fn())
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_book_times_second_call_is_hit():
+    api = _api()
+    r1 = availability_cache.get_book_times(api, 1, "2026-03-01", service_ids=["10"])
+    r2 = availability_cache.get_book_times(api, 1, "2026-03-01", service_ids=["10"])
+    assert r1 == r2 == BOOK_TIMES_OK
+    api._request.assert_called_once()
+    stats = availability_cache.get_stats()
+    assert stats["miss"] == 1
+    assert stats["hit"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_book_times_key_depends_on_service_ids_and_date():
+    api = _api()
+    availability_cache.get_book_times(api, 1, "2026-03-01", service_ids=["10"])
+    availability_cache.get_book_times(api, 1, "2026-03-01", service_ids=["11"])
+    availability_cache.get_book_times(api, 1, "2026-03-02", service_ids=["10"])
+    assert api._request.call_count == 3
+
+
+def test_book_times_success_false_not_cached():
+    api = _api()
+    api._request.return_value = {"success": False, "meta": {"message": "x"}}
+    r = availability_cache.get_book_times(api, 1, "2026-03-01")
+    assert r["success"] is False
+    availability_cache.get_book_times(api, 1, "2026-03-01")
+    assert api._request.call_count == 2
+
+
+def test_stale_entry_served_and_refreshed():
+    api = _api()
+    availability_cache.get_book_times(api, 1, "2026-03-01")
+    api._request.return_value = {"success": True, "data": [{"time": "12:00"}]}
+
+    # Сдвигаем «сейчас» за fresh TTL, но в пределах stale-окна
+    later = time.time() + availability_cache._times_fresh_ttl() + 1
+    with patch("services_app.availability_cache.time.time", return_value=later):
+        stale = availability_cache.get_book_times(api, 1, "2026-03-01")
+    # Клиент получил stale-ответ мгновенно…
+    assert stale == BOOK_TIMES_OK
+    # …а фон обновил ключ
+    fresh = availability_cache.get_book_times(api, 1, "2026-03-01")
+    assert fresh["data"][0]["time"] == "12:00"
+    stats = availability_cache.get_stats()
+    assert stats["stale"] == 1
+    assert stats["refresh"] == 1
+
+
+def test_invalidate_staff_drops_only_that_staff():
+    api = _api()
+    availability_cache.get_book_times(api, 1, "2026-03-01")
+    availability_cache.get_book_times(api, 2, "2026-03-01")
+    availability_cache.invalidate_staff(1)
+    availability_cache.get_book_times(api, 1, "2026-03-01")
+    availability_cache.get_book_times(api, 2, "2026-03-01")
+    # staff=1 перезапрошен, staff=2 — из кэша
+    assert api._request.call_count == 3
+    assert availability_cache.get_stats()["invalidate"] == 1
+
+
+def test_invalidate_staff_swallows_cache_errors():
+    with patch.object(availability_cache.cache, "incr", side_effect=ConnectionError("redis down")):
+        availability_cache.invalidate_staff(1)  # не бросает
+
+
+def test_book_dates_cached_but_empty_not_cached():
+    api = _api()
+    assert availability_cache.get_book_dates(api, staff_id=1) == ["2026-03-01", "2026-03-02"]
+    availability_cache.get_book_dates(api, staff_id=1)
+    api.get_book_dates.assert_called_once()
+
+    api.get_book_dates.return_value = []
+    assert availability_cache.get_book_dates(api, staff_id=2) == []
+    availability_cache.get_book_dates(api, staff_id=2)
+    assert api.get_book_dates.call_count == 3
+
+
+def test_create_booking_invalidates_staff():
+    api = YClientsAPI(partner_token="p", user_token="u", company_id="884045")
+    with patch.object(api, "_request", return_value=BOOK_TIMES_OK) as mock_req:
+        availability_cache.get_book_times(api, 7, "2026-03-01")
+        availability_cache.get_book_times(api, 7, "2026-03-01")
+        assert mock_req.call_count == 1
+
+    booked = {"success": True, "data": [{"record_id": 1, "record_hash": "h"}]}
+    with patch.object(api, "_request", return_value=booked):
+        api.create_booking(staff_id=7, services=[10], datetime="2026-03-01T10:00:00",
+                           client={"name": "Анна", "phone": "+79990000000"})
+
+    with patch.object(api, "_request", return_value=BOOK_TIMES_OK) as mock_req:
+        availability_cache.get_book_times(api, 7, "2026-03-01")
+        assert mock_req.call_count == 1
+
+
+@pytest.mark.django_db
+def test_available_times_view_uses_cache(client, mock_yclients_api):
+    with patch("services_app.yclients_api.get_yclients_api", return_value=mock_yclients_api):
+        client.get("/api/booking/available_times/?staff_id=1&date=2026-03-01")
+        resp = client.get("/api/booking/available_times/?staff_id=1&date=2026-03-01")
+    assert resp.status_code == 200
+    assert resp.json()["data"]["times"] == ["10:00", "11:00"]
+    mock_yclients_api._request.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_health_exposes_cache_stats(client):
+    resp = client.get("/api/agents/health/")
+    body = resp.json()
+    assert "yclients_cache" in body
+    assert "hit_ratio" in body["yclients_cache"]
@@ -3,7 +3,7 @@
 Мокается YClientsAPI (через DI в конструктор) — реальный YClients API не
 дёргается. Паттерн моков — как mock_yclients_api в conftest.py.
 """
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -41,6 +41,13 @@ class TestCreateRecordHappyPath:
         assert service_order.yclients_record_id == "98765"
         assert service_order.yclients_record_hash == "abc123hash"
 
+    def test_persists_record_when_cache_is_down(self, fake_yclients, service_order):
+        # Redis лежит — запись в YClients уже создана, record_id должен сохраниться
+        with patch("services_app.availability_cache.cache.incr", side_effect=ConnectionError("redis down")):
+            YClientsBookingService(api=fake_yclients).create_record(service_order)
+        service_order.refresh_from_db()
+        assert service_order.yclients_record_id == "98765"
+
     def test_passes_staff_id_and_service_id(self, fake_yclients, service_order):
         svc = YClientsBookingService(api=fake_yclients)
         svc.create_record(service_order)
@@ -0,0 +1,116 @@
+"""Денормализованные Bundle.computed_price / computed_min_duration (services_app.bundle_totals)."""
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from services_app import bundle_totals
+from services_app.models import Bundle
+
+
+@pytest.fixture(autouse=True)
+def _no_page_cache(settings):
+    settings.PAGE_CACHE_ENABLED = False
+
+
+def _option(price, duration):
+    return baker.make("services_app.ServiceOption", price=Decimal(price), duration_min=duration,
+                      is_active=True)
+
+
+@pytest.fixture
+def bundle(db, django_capture_on_commit_callbacks):
+    b = Bundle.objects.create(name="Спа-день", is_active=True)
+    with django_capture_on_commit_callbacks(execute=True):
+        # группа 1 идёт параллельно (макс. 60), группа 2 — после неё + пауза 10
+        baker.make("services_app.BundleItem", bundle=b, option=_option(1000, 60), parallel_group=1)
+        baker.make("services_app.BundleItem", bundle=b, option=_option(500, 30), parallel_group=1)
+        baker.make("services_app.BundleItem", bundle=b, option=_option(700, 45), parallel_group=2,
+                   gap_after_min=10)
+    b.refresh_from_db()
+    return b
+
+
+def test_items_fill_computed_totals(bundle):
+    assert bundle.computed_price == Decimal("2200.00")
+    assert bundle.computed_min_duration == 115
+    assert bundle.compute_min_totals() == (bundle.computed_price, bundle.computed_min_duration)
+
+
+def test_option_price_change_recomputes_after_commit(bundle, django_capture_on_commit_callbacks):
+    option = bundle.items.get(parallel_group=2).option
+    with django_capture_on_commit_callbacks(execute=True):
+        option.price = Decimal("900")
+        option.duration_min = 50
+        option.save()
+        bundle.refresh_from_db()
+        assert bundle.computed_price == Decimal("2200.00")  # до коммита — старое значение
+
+    bundle.refresh_from_db()
+    assert bundle.computed_price == Decimal("2400.00")
+    assert bundle.computed_min_duration == 120
+
+
+def test_item_delete_recomputes(bundle, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        bundle.items.get(parallel_group=2).delete()
+    bundle.refresh_from_db()
+    assert (bundle.computed_price, bundle.computed_min_duration) == (Decimal("1500.00"), 60)
+
+
+def test_batch_of_edits_recomputes_once(bundle, django_capture_on_commit_callbacks):
+    with patch("services_app.bundle_totals.recompute_bundle_totals",
+               wraps=bundle_totals.recompute_bundle_totals) as recompute:
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                for item in bundle.items.select_related("option"):
+                    item.option.price += 100
+                    item.option.save()
+    recompute.assert_called_once_with({bundle.pk})
+    bundle.refresh_from_db()
+    assert bundle.computed_price == Decimal("2500.00")
+
+
+def test_bundle_detail_queries_do_not_grow_with_other_bundles(client, bundle):
+    def render_queries():
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get(f"/kompleks/{bundle.slug}/").status_code == 200
+        return len(ctx.captured_queries)
+
+    baker.make(Bundle, is_active=True, computed_price=Decimal("3000"), computed_min_duration=90)
+    client.get(f"/kompleks/{bundle.slug}/")  # прогрев SiteSettings
+    with_one = render_queries()
+    baker.make(Bundle, is_active=True, computed_price=Decimal("3000"), computed_min_duration=90,
+               _quantity=2)
+    assert render_queries() == with_one
+
+
+def test_command_verifies_and_backfills(bundle):
+    Bundle.objects.filter(pk=bundle.pk).update(computed_price=0, computed_min_duration=0)
+
+    with pytest.raises(CommandError, match="Расхождений: 1"):
+        call_command("recompute_bundle_totals", "--verify", stdout=StringIO())
+
+    out = StringIO()
+    call_command("recompute_bundle_totals", stdout=out)
+    assert "Пересчитано комплексов: 1" in out.getvalue()
+    bundle.refresh_from_db()
+    assert bundle.computed_price == Decimal("2200.00")
+
+    out = StringIO()
+    call_command("recompute_bundle_totals", "--verify", stdout=out)
+    assert "Все комплексы сходятся" in out.getvalue()
+
+
+def test_celery_task_fixes_edits_behind_signals(bundle):
+    from services_app.tasks import recompute_bundle_totals
+
+    Bundle.objects.filter(pk=bundle.pk).update(computed_min_duration=1)
+    assert recompute_bundle_totals() == {"updated": 1}
+    bundle.refresh_from_db()
+    assert bundle.computed_min_duration == 115
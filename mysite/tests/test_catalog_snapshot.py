@@ -0,0 +1,95 @@
+"""Снимок каталога публичных страниц (services_app.catalog) + инвалидация сигналами."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from services_app import catalog
+
+CATALOG_TABLES = (
+    "services_app_service", "services_app_serviceoption", "services_app_servicecategory",
+    "services_app_master", "services_app_bundle", "services_app_bundleitem",
+    "services_app_promotion", "services_app_review", "services_app_faq",
+)
+
+
+@pytest.fixture(autouse=True)
+def _no_page_cache(settings):
+    # Меряем рендер, а не ответ из кэша страниц (services_app.page_cache)
+    settings.PAGE_CACHE_ENABLED = False
+
+
+@pytest.fixture
+def catalog_data(db):
+    cat = baker.make("services_app.ServiceCategory", name="Массажи", slug="massazhi", is_active=True)
+    svc = baker.make("services_app.Service", name="Классический массаж", category=cat,
+                     is_active=True, is_popular=True)
+    baker.make("services_app.ServiceOption", service=svc, price=2000, duration_min=60,
+               units=1, is_active=True)
+    master = baker.make("services_app.Master", name="Анна", is_active=True)
+    master.services.add(svc)
+    return {"category": cat, "service": svc, "master": master}
+
+
+def _catalog_queries(ctx) -> list[str]:
+    return [q["sql"] for q in ctx.captured_queries if any(t in q["sql"] for t in CATALOG_TABLES)]
+
+
+@pytest.mark.parametrize("url", [
+    reverse("website:home"),
+    reverse("website:services"),
+    reverse("website:masters"),
+    reverse("website:bundles"),
+    reverse("website:certificates"),
+    "/kategorii/massazhi/",
+])
+def test_pages_render_from_snapshot_without_catalog_queries(client, catalog_data, url):
+    assert client.get(url).status_code == 200  # прогрев снимка
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    assert _catalog_queries(ctx) == []
+
+
+def test_snapshot_is_shared_through_cache(catalog_data):
+    first = catalog.get_catalog()
+    catalog._local = None  # другой процесс: памяти нет, снимок — из cache
+    with CaptureQueriesContext(connection) as ctx:
+        second = catalog.get_catalog()
+    assert ctx.captured_queries == []
+    assert second.generation == first.generation
+    assert [s["service"].name for s in second.top_items] == ["Классический массаж"]
+
+
+def test_service_save_invalidates_snapshot(client, catalog_data):
+    client.get(reverse("website:services"))
+    before = catalog.catalog_generation()
+
+    svc = catalog_data["service"]
+    svc.name = "Массаж спины"
+    svc.save()
+
+    assert catalog.catalog_generation() != before
+    assert "Массаж спины" in client.get("/kategorii/massazhi/").content.decode()
+
+
+def test_m2m_change_invalidates_snapshot(catalog_data):
+    before = catalog.get_catalog()
+    extra = baker.make("services_app.Service", name="Обёртывание", is_active=True)
+    generation = catalog.catalog_generation()
+
+    catalog_data["master"].services.add(extra)
+
+    assert catalog.catalog_generation() != generation
+    master = catalog.get_catalog().masters[0]
+    assert {s.name for s in master.services.all()} == {"Классический массаж", "Обёртывание"}
+    assert before.generation != catalog.get_catalog().generation
+
+
+def test_inactive_category_is_404(client, catalog_data):
+    cat = catalog_data["category"]
+    cat.is_active = False
+    cat.save()
+    assert client.get("/kategorii/massazhi/").status_code == 404
+    assert client.get(f"/services/{cat.pk}/").status_code == 404
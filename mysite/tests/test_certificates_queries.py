@@ -0,0 +1,49 @@
+"""Страница /certificates/ — число запросов не растёт с числом комплексов-сертификатов."""
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+URL = "/certificates/"
+
+
+@pytest.fixture(autouse=True)
+def _no_page_cache(settings):
+    settings.PAGE_CACHE_ENABLED = False
+
+
+def _make_bundles(count: int, start: int = 0, fixed_price=None) -> None:
+    for i in range(start, start + count):
+        bundle = baker.make("services_app.Bundle", name=f"Комплекс {i}", slug=f"kompleks-{i}",
+                            is_active=True, is_certificate=True, order=i, fixed_price=fixed_price)
+        for price, quantity in ((1000, 2), (500, 1)):
+            option = baker.make("services_app.ServiceOption", price=Decimal(price), duration_min=60,
+                                is_active=True)
+            baker.make("services_app.BundleItem", bundle=bundle, option=option, quantity=quantity)
+
+
+def _render_queries(client) -> int:
+    client.get(URL)  # прогрев снимка каталога и SiteSettings
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(URL)
+    assert resp.status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_bundles(client):
+    _make_bundles(1)
+    with_one = _render_queries(client)
+    _make_bundles(5, start=1)
+    assert _render_queries(client) == with_one
+
+
+@pytest.mark.django_db
+def test_bundle_price_keeps_quantity_and_fixed_price(client):
+    _make_bundles(1)
+    _make_bundles(1, start=1, fixed_price=Decimal("1990"))
+    content = client.get(URL).content.decode()
+    assert 'data-bundle-price="2500"' in content  # 1000 × 2 + 500
+    assert 'data-bundle-price="1990"' in content
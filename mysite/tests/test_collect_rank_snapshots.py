@@ -124,3 +124,104 @@ class TestFuzzyClusterMatching:
         # "массажа спины в пензе" совпадает с обоими keywords, но считается 1 раз
         assert snap.matched_queries == 1
         assert snap.total_clicks == 5
+
+
+@pytest.mark.django_db
+class TestBulkUpsert:
+    def test_write_queries_do_not_grow_with_rows(self, patched_wm, django_assert_max_num_queries):
+        """Сотни запросов Вебмастера и десятки кластеров — константа запросов к БД."""
+        from agents.models import SeoClusterSnapshot, SeoRankSnapshot
+        from agents.tasks import collect_rank_snapshots
+
+        patched_wm.get_query_stats.return_value = [
+            {"query": f"массаж {i}", "clicks": i, "impressions": i * 2, "ctr": 0.5, "avg_position": 3.0}
+            for i in range(300)
+        ]
+        baker.make("agents.SeoKeywordCluster", keywords=["массаж спины"], is_active=True, _quantity=30)
+
+        with django_assert_max_num_queries(12):
+            collect_rank_snapshots()
+
+        assert SeoRankSnapshot.objects.filter(query__gt="").count() == 300
+        assert SeoClusterSnapshot.objects.count() == 30
+
+    def test_cluster_write_failure_rolls_back_rank_rows(self, patched_wm):
+        """Сырые и кластерные снимки — одна транзакция: без кластеров нет и сырых."""
+        from agents import _bulk
+        from agents.models import SeoClusterSnapshot, SeoRankSnapshot
+        from agents.tasks import collect_rank_snapshots
+
+        real_upsert = _bulk.bulk_upsert
+
+        def failing_upsert(model, objs, **kwargs):
+            if model is SeoClusterSnapshot:
+                raise RuntimeError("soft time limit")
+            return real_upsert(model, objs, **kwargs)
+
+        baker.make("agents.SeoKeywordCluster", keywords=["массаж спины"], is_active=True)
+        with patch("agents._bulk.bulk_upsert", failing_upsert), \
+                pytest.raises(RuntimeError):
+            collect_rank_snapshots()
+
+        assert not SeoRankSnapshot.objects.exists()
+
+    def test_rerun_updates_values_and_keeps_created_at(self, patched_wm):
+        from agents.models import SeoClusterSnapshot, SeoRankSnapshot
+        from agents.tasks import collect_rank_snapshots
+
+        cluster = baker.make(
+            "agents.SeoKeywordCluster", keywords=["массаж спины"], is_active=True,
+        )
+        collect_rank_snapshots()
+        row = SeoRankSnapshot.objects.get(query="массажа спины в пензе")
+
+        patched_wm.get_query_stats.return_value = [
+            {**QUERY_STATS[1], "clicks": 9, "impressions": 20},
+        ]
+        collect_rank_snapshots()
+
+        updated = SeoRankSnapshot.objects.get(pk=row.pk)
+        assert updated.clicks == 9
+        assert updated.created_at == row.created_at
+        snap = SeoClusterSnapshot.objects.get(cluster=cluster)
+        assert snap.total_clicks == 9
+
+    def test_bulk_upsert_collapses_duplicate_keys(self):
+        from agents._bulk import bulk_upsert
+        from agents.models import SeoRankSnapshot
+
+        today = datetime.date.today()
+        rows = [
+            SeoRankSnapshot(week_start=today, page_url="", query="массаж", clicks=1),
+            SeoRankSnapshot(week_start=today, page_url="", query="массаж", clicks=7),
+        ]
+        written = bulk_upsert(
+            SeoRankSnapshot, rows,
+            unique_fields=SeoRankSnapshot.UPSERT_KEY,
+            update_fields=SeoRankSnapshot.UPSERT_FIELDS,
+        )
+        assert written == 1
+        assert SeoRankSnapshot.objects.get(query="массаж").clicks == 7
+
+
+@pytest.mark.django_db
+def test_seo_landing_fallback_saves_snapshots():
+    """Fallback SEOLandingAgent на API Вебмастера сохраняет данные в SeoRankSnapshot."""
+    from agents.agents.seo_landing import SEOLandingAgent, _get_week_start
+    from agents.models import SeoRankSnapshot
+
+    week_start = _get_week_start(datetime.date.today() - datetime.timedelta(days=7))
+    client = MagicMock()
+    client.get_top_pages.return_value = PAGE_STATS
+    client.get_top_queries.return_value = QUERY_STATS
+    with patch("agents.agents.seo_landing.YandexWebmasterClient.from_settings",
+               return_value=client) as from_settings:
+        result = SEOLandingAgent()._fetch_webmaster_data(week_start)
+        # Окно запроса, а не дата прогона
+        assert set(SeoRankSnapshot.objects.values_list("week_start", flat=True)) == {week_start}
+        again = SEOLandingAgent()._fetch_webmaster_data(week_start)
+
+    assert len(result["top_queries"]) == len(QUERY_STATS)
+    assert SeoRankSnapshot.objects.count() == len(QUERY_STATS) + len(PAGE_STATS)
+    from_settings.assert_called_once()  # второй прогон — из БД
+    assert len(again["top_queries"]) == len(QUERY_STATS)
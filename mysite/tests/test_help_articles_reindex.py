@@ -0,0 +1,71 @@
+"""Правка HelpArticle → Celery-таска инкрементального reindex FAQ (services_app.signals)."""
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+
+from services_app.signals import HELP_ARTICLES_REINDEX_PENDING_KEY
+
+
+@pytest.fixture
+def apply_async():
+    with patch("services_app.tasks.reindex_help_articles.apply_async") as mock:
+        yield mock
+
+
+@pytest.mark.django_db
+def test_disabled_by_default(settings, apply_async, django_capture_on_commit_callbacks):
+    settings.HELP_ARTICLES_AUTO_REINDEX = False
+    with django_capture_on_commit_callbacks(execute=True):
+        baker.make("services_app.HelpArticle", question="Как записаться?")
+    apply_async.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_batch_of_edits_schedules_single_task_after_commit(
+    settings, apply_async, django_capture_on_commit_callbacks,
+):
+    settings.HELP_ARTICLES_AUTO_REINDEX = True
+    settings.HELP_ARTICLES_REINDEX_DELAY = 10
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        article = baker.make("services_app.HelpArticle", question="Как записаться?")
+        article.answer = "Через бота."
+        article.save()
+        article.delete()
+        apply_async.assert_not_called()  # до коммита — ничего
+
+    assert len(callbacks) == 3
+    apply_async.assert_called_once_with(countdown=10)
+
+
+@pytest.mark.django_db
+def test_broker_failure_does_not_break_save(settings, apply_async, django_capture_on_commit_callbacks):
+    settings.HELP_ARTICLES_AUTO_REINDEX = True
+    apply_async.side_effect = ConnectionError("redis down")
+    with django_capture_on_commit_callbacks(execute=True):
+        baker.make("services_app.HelpArticle", question="Как записаться?")
+    assert cache.get(HELP_ARTICLES_REINDEX_PENDING_KEY) is None  # следующая правка попробует снова
+
+
+def test_task_clears_pending_flag_and_syncs_index():
+    from services_app.tasks import reindex_help_articles
+
+    cache.set(HELP_ARTICLES_REINDEX_PENDING_KEY, 1)
+    with patch("formulatela_mcp.embeddings.reindex.build_store") as build_store, \
+         patch("formulatela_mcp.embeddings.reindex.sync_help_articles",
+               return_value={"indexed": 1, "upserted": 1, "deleted": 0, "unchanged": 0}) as sync:
+        result = reindex_help_articles()
+
+    assert cache.get(HELP_ARTICLES_REINDEX_PENDING_KEY) is None
+    sync.assert_called_once_with(build_store.return_value)
+    assert result["upserted"] == 1
+
+
+@pytest.mark.django_db
+def test_cache_failure_does_not_break_save(settings, apply_async, django_capture_on_commit_callbacks):
+    settings.HELP_ARTICLES_AUTO_REINDEX = True
+    with patch("services_app.signals.cache.add", side_effect=ConnectionError("redis down")), \
+         django_capture_on_commit_callbacks(execute=True):
+        baker.make("services_app.HelpArticle", question="Как записаться?")
+    apply_async.assert_not_called()
@@ -3,10 +3,13 @@
 Unit-тесты на каждый QC check + integration тесты на агента.
 """
 import json
+from difflib import SequenceMatcher
+from unittest.mock import patch
 
 import pytest
 from model_bakery import baker
 
+from agents import _minhash
 from agents.agents.qc_checks import (
     ContentDuplicateCheck,
     InternalLinksCheck,
@@ -164,6 +167,100 @@ def test_content_duplicate_fails_on_copy():
     assert result.severity == "critical"
 
 
+_LONG_TEXT = (
+    "Классический массаж спины в Пензе снимает мышечное напряжение, улучшает "
+    "кровообращение и помогает при сидячей работе. Сеанс длится 60 минут, "
+    "мастер подбирает интенсивность под ваше самочувствие. "
+)
+
+
+@pytest.mark.django_db
+def test_landing_save_indexes_minhash_bands():
+    lp = _make_landing(slug="indexed", blocks={"intro": _LONG_TEXT})
+    assert len(lp.content_minhash) == _minhash.NUM_PERM
+    assert lp.lsh_bands.count() == _minhash.BANDS
+
+    before = set(lp.lsh_bands.values_list("band", flat=True))
+    lp.blocks = {"intro": "Совсем другой текст про лазерную эпиляцию и уход за кожей"}
+    lp.save()
+    assert set(lp.lsh_bands.values_list("band", flat=True)) != before
+
+    # Сохранение без blocks индекс не трогает
+    lp.status = LandingPage.STATUS_REVIEW
+    lp.save(update_fields=["status"])
+    assert lp.lsh_bands.count() == _minhash.BANDS
+
+
+def test_minhash_estimates_jaccard_of_near_copy():
+    edited = _LONG_TEXT.replace("60 минут", "90 минут")
+    sig_a = _minhash.signature({"intro": _LONG_TEXT})
+    sig_b = _minhash.signature({"intro": edited})
+    sig_c = _minhash.signature({"intro": "Лазерная эпиляция диодным лазером, курс из шести процедур."})
+    assert _minhash.estimate_jaccard(sig_a, sig_b) > 0.8
+    assert _minhash.estimate_jaccard(sig_a, sig_c) < 0.2
+    assert set(_minhash.band_keys(sig_a)) & set(_minhash.band_keys(sig_b))
+
+
+@pytest.mark.django_db
+def test_content_duplicate_finds_near_copy_via_lsh_only():
+    for i in range(30):
+        _make_landing(
+            slug=f"other-{i}",
+            h1=f"H1 {i}",
+            blocks={"intro": f"Уникальная страница номер {i}: " + "абвгдежзиклмнопрст"[i % 17:] * 3},
+            status=LandingPage.STATUS_PUBLISHED,
+        )
+    _make_landing(slug="original", h1="Оригинал", blocks={"intro": _LONG_TEXT}, status=LandingPage.STATUS_PUBLISHED)
+    lp = _make_landing(slug="copy", h1="Копия", blocks={"intro": _LONG_TEXT.replace("60 минут", "90 минут")})
+
+    with patch("agents.agents.qc_checks.SequenceMatcher", wraps=SequenceMatcher) as matcher:
+        result = ContentDuplicateCheck().run(lp)
+
+    assert not result.passed
+    assert result.details["duplicate_slug"] == "original"
+    assert matcher.call_count < 5
+
+
+@pytest.mark.django_db
+def test_content_duplicate_checks_unindexed_published_pages():
+    blocks = {"intro": _LONG_TEXT}
+    original = _make_landing(slug="original", blocks=blocks, status=LandingPage.STATUS_PUBLISHED)
+    # Индекс потерян (например, после queryset.update) — страница всё равно сравнивается
+    original.lsh_bands.all().delete()
+    LandingPage.objects.filter(pk=original.pk).update(content_minhash=[])
+
+    result = ContentDuplicateCheck().run(_make_landing(slug="copy", blocks=blocks))
+    assert not result.passed
+
+
+@pytest.mark.django_db
+def test_find_duplicate_pairs_reports_corpus():
+    _make_landing(slug="a", h1="A", blocks={"intro": _LONG_TEXT})
+    _make_landing(slug="b", h1="B", blocks={"intro": _LONG_TEXT + " Запись онлайн."})
+    _make_landing(slug="c", h1="C", blocks={"intro": "Лазерная эпиляция диодным лазером, курс из шести процедур."})
+
+    pairs = _minhash.find_duplicate_pairs()
+    assert [(a, b) for a, b, _ in pairs] in ([("a", "b")], [("b", "a")])
+    assert pairs[0][2] >= 0.85
+    assert _minhash.find_duplicate_pairs(statuses=[LandingPage.STATUS_PUBLISHED]) == []
+
+
+@pytest.mark.django_db
+def test_find_landing_duplicates_command_reindexes():
+    from io import StringIO
+
+    from django.core.management import call_command
+
+    a = _make_landing(slug="a", h1="A", blocks={"intro": _LONG_TEXT})
+    _make_landing(slug="b", h1="B", blocks={"intro": _LONG_TEXT})
+    a.lsh_bands.all().delete()
+
+    out = StringIO()
+    call_command("find_landing_duplicates", "--reindex", stdout=out)
+    assert "/a/ ↔ /b/" in out.getvalue() or "/b/ ↔ /a/" in out.getvalue()
+    assert a.lsh_bands.count() == _minhash.BANDS
+
+
 # ── SEOLandingQCAgent (integration) ────────────────────────────────────────
 
 @pytest.mark.django_db
@@ -54,6 +54,16 @@ class TestServiceQuerySet:
             for s in Service.objects.active().with_category():
                 _ = s.category.name
 
+    def test_with_min_bookable_price_ignores_unbookable_options(self):
+        svc = baker.make("services_app.Service")
+        baker.make("services_app.ServiceOption", service=svc, price=3000, yclients_service_id="1")
+        baker.make("services_app.ServiceOption", service=svc, price=1000, yclients_service_id="")
+        baker.make("services_app.ServiceOption", service=svc, price=500, yclients_service_id="2",
+                   is_active=False)
+        empty = baker.make("services_app.Service")
+        prices = dict(Service.objects.with_min_bookable_price().values_list("pk", "min_price"))
+        assert prices == {svc.pk: Decimal("3000"), empty.pk: None}
+
 
 # ── ServiceOption ──────────────────────────────────────────────────────────
 
@@ -72,6 +82,14 @@ class TestServiceOptionQuerySet:
         baker.make("services_app.ServiceOption", service=svc2)
         assert ServiceOption.objects.for_service(svc1).count() == 2
 
+    def test_bookable_requires_active_and_yclients_id(self):
+        svc = baker.make("services_app.Service")
+        ok = baker.make("services_app.ServiceOption", service=svc, yclients_service_id="42")
+        baker.make("services_app.ServiceOption", service=svc, yclients_service_id="")
+        baker.make("services_app.ServiceOption", service=svc, yclients_service_id=None)
+        baker.make("services_app.ServiceOption", service=svc, yclients_service_id="43", is_active=False)
+        assert list(ServiceOption.objects.bookable()) == [ok]
+
 
 # ── ServiceCategory ────────────────────────────────────────────────────────
 
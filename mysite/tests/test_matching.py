@@ -1,7 +1,7 @@
 """Юнит-тесты fuzzy-matching для SEO-кластеризации."""
 import pytest
 
-from agents._matching import cluster_match, tokens
+from agents._matching import QueryIndex, cluster_match, tokens
 
 
 class TestTokens:
@@ -53,3 +53,123 @@ class TestClusterMatch:
         kw = tokens("классический массаж спины расслабляющий")
         q = tokens("массаж классический пенза")  # пересечение: массаж, классический = 2/4
         assert cluster_match(kw, q) is True
+
+
+class TestQueryIndex:
+    QUERIES = [
+        "массаж спины пенза",
+        "антицеллюлитный массаж",
+        "тотальное бикини в пензе",
+        "лазерная эпиляция бикини пенза",
+        "массаж остеохондроз",
+        "формула тела пенза",
+        "",
+    ]
+
+    def _naive(self, keywords, queries, min_overlap=0.5):
+        q_tokens = [tokens(q) for q in queries]
+        result = []
+        for kw in keywords:
+            for qid, qt in enumerate(q_tokens):
+                if qid not in result and cluster_match(tokens(kw), qt, min_overlap):
+                    result.append(qid)
+        return result
+
+    @pytest.mark.parametrize("keywords", [
+        ["массаж пенза"],
+        ["лазерная эпиляция бикини", "массаж спины"],
+        ["массаж при остеохондрозе позвоночника", "антицеллюлитный массаж ягодиц"],
+        ["формула"],
+        [""],
+        [],
+    ])
+    def test_matches_naive_loop_in_same_order(self, keywords):
+        index = QueryIndex(self.QUERIES)
+        assert index.match_keywords(keywords) == self._naive(keywords, self.QUERIES)
+
+    @pytest.mark.parametrize("min_overlap", [0.0, 0.3, 0.5, 0.67, 1.0, 1.5])
+    def test_thresholds_match_cluster_match(self, min_overlap):
+        keywords = ["классический массаж спины расслабляющий", "лазерная эпиляция бикини"]
+        index = QueryIndex(self.QUERIES)
+        assert index.match_keywords(keywords, min_overlap) == \
+            self._naive(keywords, self.QUERIES, min_overlap)
+
+    def test_random_equivalence(self):
+        import random
+
+        rng = random.Random(5)
+        words = [f"w{i}" for i in range(40)]
+        q_sets = [frozenset(rng.sample(words, rng.randint(0, 5))) for _ in range(300)]
+        index = QueryIndex(None, token_sets=q_sets)
+        for _ in range(200):
+            kw = frozenset(rng.sample(words, rng.randint(0, 6)))
+            expected = [i for i, q in enumerate(q_sets) if cluster_match(kw, q)]
+            assert index.match_tokens(kw) == expected
+
+
+class TestLemmaCache:
+    @pytest.fixture(autouse=True)
+    def _fresh_process(self, monkeypatch):
+        from agents import _matching
+
+        monkeypatch.setattr(_matching, "_local", {})
+        monkeypatch.setattr(_matching, "_stats", dict.fromkeys(_matching.STAT_NAMES, 0))
+
+    def test_second_process_reads_shared_cache_without_analyzer(self, monkeypatch):
+        from agents import _matching
+
+        first = tokens("массажа спины")
+        # «Новый воркер»: пустая память, анализатор не загружен
+        monkeypatch.setattr(_matching, "_local", {})
+        monkeypatch.setattr(_matching, "_MORPH", None)
+        monkeypatch.setattr(_matching, "_analyzer", lambda: pytest.fail("analyzer loaded"))
+
+        assert tokens("массажа спины") == first
+        stats = _matching.lemma_cache_stats()
+        assert stats["shared"] == 2 and stats["analyzer_loaded"] is False
+
+    def test_counters_warm_shared_miss(self):
+        from agents import _matching
+
+        tokens("массаж лица")
+        tokens("массаж лица")
+        stats = _matching.lemma_cache_stats()
+        assert stats["miss"] == 2
+        assert stats["warm"] == 2
+        assert stats["hit_ratio"] == 0.5
+
+    def test_flush_stats_accumulates_shared_counters(self):
+        from agents import _matching
+
+        tokens("массаж лица")
+        _matching.flush_stats()
+        tokens("массаж лица")
+        _matching.flush_stats()
+        assert _matching.get_shared_stats()["miss"] == 2
+        assert _matching.get_shared_stats()["warm"] == 2
+        assert _matching.lemma_cache_stats()["miss"] == 0
+
+    def test_tokens_many_matches_tokens(self):
+        from agents._matching import tokens_many
+
+        phrases = ["массажа спины в пензе", "", "Лазерная эпиляция"]
+        assert tokens_many(phrases) == [tokens(p) for p in phrases]
+
+    @pytest.mark.django_db
+    def test_seed_from_db_fills_shared_cache(self):
+        import datetime
+
+        from django.core.cache import cache
+        from model_bakery import baker
+
+        from agents import _matching
+
+        baker.make("agents.SeoKeywordCluster", keywords=["прессотерапия ног"])
+        baker.make("agents.SeoRankSnapshot", week_start=datetime.date.today(), query="обёртывания пенза")
+        baker.make(
+            "agents.LandingPage", slug="x", meta_title="Кедровая бочка",
+            blocks=[{"type": "faq", "items": [{"q": "Сколько длится сеанс"}]}],
+        )
+        assert _matching.seed_from_db() >= 4
+        for word in ("прессотерапия", "обёртывания", "кедровая", "сеанс"):
+            assert cache.get(_matching.CACHE_KEY_PREFIX + word)
@@ -0,0 +1,160 @@
+"""Кэш HTML публичных страниц (services_app.page_cache): теги, сброс сигналами, ETag/304."""
+import re
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from agents.models import LandingPage
+
+
+@pytest.fixture
+def service(db):
+    cat = baker.make("services_app.ServiceCategory", name="Массажи", slug="massazhi", is_active=True)
+    svc = baker.make("services_app.Service", name="Классический массаж", slug="klassicheskij",
+                     category=cat, is_active=True)
+    baker.make("services_app.ServiceOption", service=svc, price=2000, duration_min=60, units=1,
+               yclients_service_id="101", is_active=True)
+    return svc
+
+
+URL = "/uslugi/klassicheskij/"
+
+
+def _form_token(response) -> str:
+    return re.search(r'name="csrfmiddlewaretoken" value="([^"]*)"', response.content.decode()).group(1)
+
+
+def test_second_hit_is_served_without_queries(client, service):
+    first = client.get(URL)
+    assert first["X-Page-Cache"] == "MISS"
+    with CaptureQueriesContext(connection) as ctx:
+        second = client.get(URL)
+    assert second["X-Page-Cache"] == "HIT"
+    assert ctx.captured_queries == []
+    token_free = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]*"')
+    assert token_free.sub(b"", second.content) == token_free.sub(b"", first.content)
+    assert second["ETag"] == first["ETag"]
+    assert second["Last-Modified"] == first["Last-Modified"]
+
+
+def test_if_none_match_returns_304(client, service):
+    etag = client.get(URL)["ETag"]
+    resp = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304
+    assert resp["ETag"] == etag
+    assert resp.content == b""
+    assert client.get(URL, HTTP_IF_NONE_MATCH='"other"').status_code == 200
+
+
+def test_hit_gets_visitor_csrf_token_and_cookie(service):
+    first = Client().get(URL)
+    visitor = Client(enforce_csrf_checks=True)
+    hit = visitor.get(URL)
+    assert hit["X-Page-Cache"] == "HIT"
+    assert settings.CSRF_COOKIE_NAME in hit.cookies
+    assert _form_token(hit) and _form_token(hit) != _form_token(first)
+    assert hit["ETag"] == first["ETag"]
+
+    # Токен из HTML и cookie проходят CSRF у не-exempt API (400 — пустая заявка, не 403)
+    resp = visitor.post("/api/bundle/request/", data="{}", content_type="application/json",
+                        HTTP_X_CSRFTOKEN=_form_token(hit))
+    assert resp.status_code == 400
+
+
+def test_bundle_page_sets_csrf_cookie_for_modal(db):
+    bundle = baker.make("services_app.Bundle", name="Спа-день", slug="spa-den", is_active=True)
+    url = f"/kompleks/{bundle.slug}/"
+    assert Client().get(url)["X-Page-Cache"] == "MISS"
+
+    visitor = Client(enforce_csrf_checks=True)
+    hit = visitor.get(url)
+    assert hit["X-Page-Cache"] == "HIT"
+    # bundle_modal.js шлёт X-CSRFToken из cookie
+    resp = visitor.post("/api/bundle/request/", data="{}", content_type="application/json",
+                        HTTP_X_CSRFTOKEN=visitor.cookies[settings.CSRF_COOKIE_NAME].value)
+    assert resp.status_code == 400
+
+
+def test_tracking_params_share_entry(client, service):
+    client.get(URL)
+    assert client.get(URL + "?utm_source=yandex&yclid=1")["X-Page-Cache"] == "HIT"
+    assert client.get(URL + "?page=2")["X-Page-Cache"] == "MISS"
+
+
+def test_service_save_purges_page(client, service):
+    client.get(URL)
+    service.seo_h1 = "Новый заголовок"
+    service.save()
+    resp = client.get(URL)
+    assert resp["X-Page-Cache"] == "MISS"
+    assert "Новый заголовок" in resp.content.decode()
+
+
+def test_option_price_purges_service_and_master_pages(client, service):
+    master = baker.make("services_app.Master", name="Анна", slug="anna", is_active=True)
+    master.services.add(service)
+    client.get(URL)
+    client.get("/masters/anna/")
+
+    option = service.options.get()
+    option.price = 2500
+    option.save()
+
+    assert client.get(URL)["X-Page-Cache"] == "MISS"
+    assert client.get("/masters/anna/")["X-Page-Cache"] == "MISS"
+
+
+def test_activated_related_service_purges_page(client, service):
+    other = baker.make("services_app.Service", name="Массаж спины", slug="spina", is_active=False)
+    service.related_services.add(other)
+    assert "Массаж спины" not in client.get(URL).content.decode()
+
+    other.is_active = True
+    other.save()
+
+    assert "Массаж спины" in client.get(URL).content.decode()
+
+
+def test_unrelated_change_keeps_entry(client, service):
+    client.get(URL)
+    baker.make("services_app.Review", is_active=True)
+    baker.make("services_app.Service", name="Другая услуга", is_active=True)
+    assert client.get(URL)["X-Page-Cache"] == "HIT"
+
+
+def test_site_settings_save_purges_every_page(client, service):
+    site = baker.make("services_app.SiteSettings", contact_phone="111")
+    client.get(URL)
+    site.contact_phone = "222"
+    site.save()
+    assert client.get(URL)["X-Page-Cache"] == "MISS"
+
+
+def test_session_requests_bypass_cache(client, service, admin_user):
+    client.get(URL)
+    client.force_login(admin_user)
+    assert "X-Page-Cache" not in client.get(URL)
+
+
+def test_404_is_not_cached(client, db):
+    assert client.get("/uslugi/net-takoj/").status_code == 404
+    baker.make("services_app.Service", name="Новая", slug="net-takoj", is_active=True)
+    assert client.get("/uslugi/net-takoj/").status_code == 200
+
+
+@pytest.mark.django_db
+def test_landing_unpublish_purges_page(client):
+    landing = baker.make(LandingPage, slug="massazh-spiny-penza", status=LandingPage.STATUS_PUBLISHED,
+                         h1="Массаж спины в Пензе", blocks={})
+    url = f"/{landing.slug}/"
+    assert client.get(url).status_code == 200
+    assert client.get(url)["X-Page-Cache"] == "HIT"
+
+    landing.status = LandingPage.STATUS_DRAFT
+    landing.save()
+
+    assert client.get(url).status_code == 404
@@ -1,5 +1,6 @@
 """Тесты для retention dashboard — модель + Celery задача."""
 import datetime
+import itertools
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -7,9 +8,13 @@ import pytest
 from agents.models import RetentionSnapshot
 
 
+_RECORD_IDS = itertools.count(1)
+
+
 def _make_record(client_id, phone, date, services_cost, service_name="Массаж"):
     """Helper: создаёт мок-запись YClients."""
     return {
+        "id": next(_RECORD_IDS),
         "date": f"{date} 10:00:00",
         "client": {"id": client_id, "phone": phone, "name": f"Client {client_id}"},
         "services": [{"title": service_name, "cost": services_cost, "amount": 1}],
@@ -49,7 +54,7 @@ def test_collect_retention_basic(mock_api_factory, mock_report, mock_summary):
     today = datetime.date.today()
     api = MagicMock()
     mock_api_factory.return_value = api
-    api.get_records.return_value = [
+    api.iter_records.return_value = [
         # Клиент 1: 3 визита (returning)
         _make_record(101, "79001111111", str(today - datetime.timedelta(days=60)), 3000),
         _make_record(101, "79001111111", str(today - datetime.timedelta(days=30)), 3500),
@@ -89,7 +94,7 @@ def test_collect_retention_empty_records(mock_api_factory, mock_report, mock_sum
     """При 0 записей snapshot не создаётся."""
     api = MagicMock()
     mock_api_factory.return_value = api
-    api.get_records.return_value = []
+    api.iter_records.return_value = []
 
     from agents.tasks import collect_retention_metrics
     collect_retention_metrics()
@@ -106,7 +111,7 @@ def test_collect_retention_all_returning(mock_api_factory, mock_report, mock_sum
     today = datetime.date.today()
     api = MagicMock()
     mock_api_factory.return_value = api
-    api.get_records.return_value = [
+    api.iter_records.return_value = [
         _make_record(201, "79011111111", str(today - datetime.timedelta(days=50)), 3000),
         _make_record(201, "79011111111", str(today - datetime.timedelta(days=20)), 3500),
         _make_record(202, "79022222222", str(today - datetime.timedelta(days=40)), 2000),
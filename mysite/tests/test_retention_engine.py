@@ -0,0 +1,169 @@
+"""Векторный движок удержания: эквивалентность прежнему циклу, окна, зеркало."""
+import datetime
+import random
+from collections import defaultdict
+
+import pytest
+
+from agents.agents._revenue import extract_record_revenue
+from agents.retention import VisitFrame
+
+TODAY = datetime.date(2026, 4, 15)
+
+
+def _reference(records, today, period_days):
+    """Прежний per-client цикл collect_retention_metrics — эталон."""
+    clients = defaultdict(lambda: {"visits": [], "revenue": 0.0, "services": []})
+    for rec in records:
+        client = rec.get("client") or {}
+        key = client.get("id") or client.get("phone")
+        visit_date = str(rec.get("date", ""))[:10]
+        if not key or len(visit_date) < 10:
+            continue
+        clients[key]["visits"].append(visit_date)
+        clients[key]["revenue"] += extract_record_revenue(rec)
+        for svc in rec.get("services") or []:
+            clients[key]["services"].append(svc.get("title") or svc.get("name") or "?")
+
+    new = returning = r30 = r60 = r90 = churn = visits = 0
+    revenue = 0.0
+    churned_services = defaultdict(int)
+    cohorts = defaultdict(lambda: defaultdict(set))
+    for key, data in clients.items():
+        dates = sorted(set(data["visits"]))
+        first = datetime.date.fromisoformat(dates[0])
+        last = datetime.date.fromisoformat(dates[-1])
+        visits += len(dates)
+        revenue += data["revenue"]
+        if len(dates) == 1:
+            new += 1
+        else:
+            returning += 1
+            gap = (datetime.date.fromisoformat(dates[1]) - first).days
+            r30 += gap <= 30
+            r60 += gap <= 60
+            r90 += gap <= 90
+        if (today - last).days > 90:
+            churn += 1
+            for name in set(data["services"]):
+                churned_services[name] += 1
+        for d in dates:
+            vd = datetime.date.fromisoformat(d)
+            off = (vd.year - first.year) * 12 + (vd.month - first.month)
+            cohorts[first.strftime("%Y-%m")][f"m{off}"].add(key)
+
+    total = len(clients)
+    return {
+        "total_clients": total,
+        "new_clients": new,
+        "returning_clients": returning,
+        "retention_30d": r30 / total * 100,
+        "retention_60d": r60 / total * 100,
+        "retention_90d": r90 / total * 100,
+        "avg_frequency": (visits / total) / max(period_days / 30.0, 1),
+        "avg_check": revenue / visits,
+        "avg_ltv": revenue / total,
+        "churn_count": churn,
+        "churned_services": dict(churned_services),
+        "cohort_data": {
+            m: {k: round(len(v) / (len(o.get("m0", set())) or 1) * 100) for k, v in sorted(o.items())}
+            for m, o in sorted(cohorts.items())
+        },
+    }
+
+
+def _random_records(n, seed=1):
+    rng = random.Random(seed)
+    services = ["Массаж", "LPG", "Депиляция", "Обёртывание", "Прессотерапия"]
+    records = []
+    for i in range(n):
+        client_id = rng.randint(1, n // 4 or 1)
+        date = TODAY - datetime.timedelta(days=rng.randint(0, 400))
+        records.append({
+            "id": i + 1,
+            "date": f"{date} 12:00:00",
+            "client": {"id": client_id, "phone": f"79{client_id:09d}"},
+            "staff": {"id": rng.choice([1, 2, 3])},
+            "services": [
+                {"title": rng.choice(services), "cost": rng.choice([1500, 2500, 4000])}
+                for _ in range(rng.randint(1, 2))
+            ],
+        })
+    # запись без клиента и без даты — должны игнорироваться, как раньше
+    records.append({"id": n + 1, "date": f"{TODAY} 10:00:00", "client": {}, "services": []})
+    records.append({"id": n + 2, "date": "", "client": {"id": 1}, "services": []})
+    return records
+
+
+def test_matches_reference_loop():
+    records = _random_records(3000)
+    expected = _reference(records, TODAY, 400)
+
+    metrics = VisitFrame.from_records(records).compute(TODAY, 400)
+
+    for name in (
+        "total_clients", "new_clients", "returning_clients", "churn_count",
+    ):
+        assert getattr(metrics, name) == expected[name], name
+    for name in (
+        "retention_30d", "retention_60d", "retention_90d",
+        "avg_frequency", "avg_check", "avg_ltv",
+    ):
+        assert getattr(metrics, name) == pytest.approx(expected[name]), name
+    assert metrics.cohort_data == expected["cohort_data"]
+    top = sorted(expected["churned_services"].items(), key=lambda x: (-x[1], x[0]))[:10]
+    assert metrics.top_churned_services == [{"service": s, "count": c} for s, c in top]
+
+
+def test_same_day_records_count_as_one_visit():
+    records = [
+        {"date": "2026-04-01", "client": {"id": 1}, "services": [{"title": "A", "cost": 100}]},
+        {"date": "2026-04-01", "client": {"id": 1}, "services": [{"title": "B", "cost": 200}]},
+    ]
+    metrics = VisitFrame.from_records(records).compute(TODAY, 180)
+    assert metrics.total_visits == 1
+    assert metrics.new_clients == 1
+    assert metrics.avg_check == 300.0
+
+
+def test_window_by_dates_and_staff_without_refetch():
+    records = _random_records(1500, seed=7)
+    frame = VisitFrame.from_records(records)
+    start = TODAY - datetime.timedelta(days=180)
+
+    in_window = [r for r in records if r["date"][:10] >= str(start)]
+    assert frame.window(start, TODAY).compute(TODAY, 180).total_clients == \
+        _reference(in_window, TODAY, 180)["total_clients"]
+
+    staff_2 = [r for r in records if (r.get("staff") or {}).get("id") == 2]
+    expected = _reference(staff_2, TODAY, 400)
+    metrics = frame.window(staff_id=2).compute(TODAY, 400)
+    assert metrics.total_clients == expected["total_clients"]
+    assert metrics.cohort_data == expected["cohort_data"]
+    assert {d["service"]: d["count"] for d in metrics.top_churned_services}.items() <= \
+        expected["churned_services"].items()
+
+
+def test_empty_frame_returns_none():
+    assert VisitFrame.from_records([]).compute(TODAY, 180) is None
+    frame = VisitFrame.from_records(_random_records(100))
+    assert frame.window(staff_id=999).compute(TODAY, 180) is None
+
+
+@pytest.mark.django_db
+def test_from_mirror_matches_from_records():
+    from unittest.mock import MagicMock
+
+    from agents import yclients_records
+
+    records = _random_records(400, seed=3)
+    api = MagicMock()
+    api.iter_records.return_value = records
+    yclients_records.sync_records(api)
+
+    from_db = VisitFrame.from_mirror().compute(TODAY, 400)
+    from_api = VisitFrame.from_records(records).compute(TODAY, 400)
+    assert from_db.total_clients == from_api.total_clients
+    assert from_db.avg_check == pytest.approx(from_api.avg_check)
+    assert from_db.cohort_data == from_api.cohort_data
+    assert from_db.top_churned_services == from_api.top_churned_services
@@ -0,0 +1,79 @@
+"""Страница услуги /uslugi/<slug>/ — фиксированное число запросов (без N+1 по связанным услугам)."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+
+@pytest.fixture(autouse=True)
+def _no_page_cache(settings):
+    # Меряем рендер, а не ответ из кэша страниц (services_app.page_cache)
+    settings.PAGE_CACHE_ENABLED = False
+
+
+@pytest.fixture
+def service(db):
+    cat = baker.make("services_app.ServiceCategory", name="Массажи", slug="massazhi", is_active=True)
+    svc = baker.make("services_app.Service", name="Классический массаж", slug="klassicheskij",
+                     category=cat, is_active=True)
+    baker.make("services_app.ServiceOption", service=svc, price=2000, duration_min=60, units=1,
+               yclients_service_id="101", is_active=True)
+    baker.make("services_app.ServiceOption", service=svc, price=3500, duration_min=90, units=1,
+               yclients_service_id="102", is_active=True)
+    baker.make("services_app.ServiceBlock", service=svc, block_type="text", title="Показания",
+               content="<p>Показания</p>", order=1, is_active=True)
+    baker.make("services_app.ServiceMedia", service=svc, media_type="photo", display_mode="single",
+               insert_after_order=1, is_active=True, _quantity=2)
+    return svc
+
+
+def _attach_related(service, count: int, start: int = 0) -> None:
+    for i in range(start, start + count):
+        rs = baker.make("services_app.Service", name=f"Связанная {i}", slug=f"related-{i}",
+                        is_active=True, order=i)
+        baker.make("services_app.ServiceOption", service=rs, price=1000 + i, yclients_service_id=str(i),
+                   is_active=True)
+        baker.make("services_app.ServiceOption", service=rs, price=500, yclients_service_id="",
+                   is_active=True)  # без YClients — в «от … ₽» не участвует
+        service.related_services.add(rs)
+
+
+def _render_queries(client, url: str) -> int:
+    client.get(url)  # прогрев снимка каталога и SiteSettings
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    return len(ctx.captured_queries)
+
+
+def test_query_count_does_not_grow_with_related_services(client, service):
+    url = f"/uslugi/{service.slug}/"
+    _attach_related(service, 1)
+    with_one = _render_queries(client, url)
+    _attach_related(service, 10, start=1)  # 11 связанных
+    assert _render_queries(client, url) == with_one
+    # услуга + варианты + блоки + медиа + связанные услуги
+    assert with_one <= 6
+
+
+def test_related_services_show_min_bookable_price(client, service):
+    _attach_related(service, 2)
+    content = client.get(f"/uslugi/{service.slug}/").content.decode()
+    assert "Связанная 0" in content and "Связанная 1" in content
+    assert "от 1000 ₽" in content
+    assert "от 1001 ₽" in content
+    assert "от 500 ₽" not in content
+
+
+def test_inactive_related_and_options_are_hidden(client, service):
+    hidden = baker.make("services_app.Service", name="Скрытая услуга", is_active=False)
+    service.related_services.add(hidden)
+    baker.make("services_app.ServiceOption", service=service, price=9999, duration_min=120,
+               yclients_service_id="103", is_active=False)
+    resp = client.get(f"/uslugi/{service.slug}/")
+    content = resp.content.decode()
+    assert "Скрытая услуга" not in content
+    assert resp.context["options_count"] == 2
+    assert resp.context["durations"] == [60, 90]
+    assert resp.context["has_blocks"] and resp.context["has_media"]
+    assert list(resp.context["media_by_position"]) == [1]
@@ -0,0 +1,62 @@
+"""Кэш синглтона SiteSettings (services_app.site_settings) + ленивый context processor."""
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from services_app.models import SiteSettings
+from services_app.site_settings import get_site_settings
+from website.context_processors import settings as settings_processor
+
+
+def _site_settings_queries(ctx) -> list[str]:
+    return [q["sql"] for q in ctx.captured_queries if "services_app_sitesettings" in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_repeated_reads_hit_process_cache():
+    baker.make(SiteSettings, contact_phone="111")
+    assert get_site_settings().contact_phone == "111"
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(3):
+            assert get_site_settings().contact_phone == "111"
+    assert ctx.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_save_invalidates_cached_settings():
+    site = baker.make(SiteSettings, contact_phone="111")
+    get_site_settings()
+    site.contact_phone = "222"
+    site.save()
+    assert get_site_settings().contact_phone == "222"
+
+
+@pytest.mark.django_db
+def test_missing_row_is_cached_as_none():
+    assert get_site_settings() is None
+    with CaptureQueriesContext(connection) as ctx:
+        assert get_site_settings() is None
+    assert ctx.captured_queries == []
+    baker.make(SiteSettings, contact_phone="333")
+    assert get_site_settings().contact_phone == "333"
+
+
+@pytest.mark.django_db
+def test_context_processor_is_lazy():
+    baker.make(SiteSettings, contact_phone="444")
+    with CaptureQueriesContext(connection) as ctx:
+        context = settings_processor(RequestFactory().get("/"))
+    assert _site_settings_queries(ctx) == []
+    assert context["settings"].contact_phone == "444"
+
+
+@pytest.mark.django_db
+def test_page_reads_site_settings_once_per_change(client):
+    baker.make(SiteSettings, contact_phone="8 (8412) 39-34-33")
+    client.get("/contacts/")
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get("/contacts/")
+    assert "39-34-33" in resp.content.decode()
+    assert _site_settings_queries(ctx) == []
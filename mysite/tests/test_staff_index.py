@@ -0,0 +1,125 @@
+"""Тесты индекса услуга → мастера: bulk-сборка, O(1) ответ, fallback на живой путь."""
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from services_app import staff_index
+from services_app.yclients_api import YClientsAPI
+
+
+BOOK_STAFF = {
+    "success": True,
+    "data": [
+        {"id": 1, "name": "Анна", "hidden": 0, "fired": 0},
+        {"id": 2, "name": "Иван", "hidden": 0, "fired": 0},
+        {"id": 3, "name": "Уволенная", "hidden": 0, "fired": 1},
+    ],
+}
+SERVICES = {
+    "success": True,
+    "data": [
+        {"id": 100, "title": "Массаж", "staff": [{"id": 1}, {"id": 2}, {"id": 3}]},
+        {"id": 200, "title": "LPG", "staff": [{"id": 2}]},
+    ],
+}
+
+
+def _api():
+    return YClientsAPI(partner_token="p", user_token="u", company_id="884045")
+
+
+def _fake_request(method, endpoint, params=None, data=None, headers=None):
+    if endpoint.startswith("/book_staff/"):
+        return BOOK_STAFF
+    if endpoint.endswith("/services"):
+        return SERVICES
+    raise AssertionError(f"unexpected endpoint {endpoint}")
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_build_index_in_two_requests():
+    api = _api()
+    with patch.object(api, "_request", side_effect=_fake_request) as mock_req:
+        index = staff_index.build_staff_index(api)
+    assert mock_req.call_count == 2
+    assert set(index["staff"]) == {"1", "2"}  # уволенная отсеяна
+    assert index["service_staff"] == {"100": ["1", "2"], "200": ["2"]}
+
+
+def test_build_index_falls_back_to_per_staff_services():
+    """Без staff-массивов в услугах — добираем get_staff_services по мастерам."""
+    api = _api()
+    plain_services = {"success": True, "data": [{"id": 100}, {"id": 200}]}
+
+    def fake(method, endpoint, params=None, data=None, headers=None):
+        if endpoint.startswith("/book_staff/"):
+            return BOOK_STAFF
+        if params and params.get("staff_id") == 1:
+            return {"success": True, "data": [{"id": 100}]}
+        if params and params.get("staff_id") == 2:
+            return {"success": True, "data": [{"id": 100}, {"id": 200}]}
+        return plain_services
+
+    with patch.object(api, "_request", side_effect=fake):
+        index = staff_index.build_staff_index(api)
+    assert index["service_staff"] == {"100": ["1", "2"], "200": ["2"]}
+
+
+def test_get_staff_answers_from_index_without_http():
+    api = _api()
+    with patch.object(api, "_request", side_effect=_fake_request):
+        staff_index.build_staff_index(api)
+
+    with patch.object(api, "_request") as mock_req:
+        result = api.get_staff(service_id=200)
+    mock_req.assert_not_called()
+    assert [s["id"] for s in result] == [2]
+    assert result[0]["name"] == "Иван"
+
+
+@override_settings(YCLIENTS_STAFF_INDEX_MAX_AGE=60)
+def test_stale_index_falls_back_to_live_path():
+    api = _api()
+    with patch.object(api, "_request", side_effect=_fake_request):
+        staff_index.build_staff_index(api)
+
+    later = time.time() + 61
+    with patch("services_app.staff_index.time.time", return_value=later):
+        assert staff_index.staff_for_service(200) is None
+
+
+def test_unknown_service_falls_back_to_live_path():
+    api = _api()
+    with patch.object(api, "_request", side_effect=_fake_request):
+        staff_index.build_staff_index(api)
+    assert staff_index.staff_for_service(999) is None
+
+
+def test_cold_index_uses_live_path():
+    api = _api()
+    with patch.object(api, "_request", return_value=BOOK_STAFF) as mock_req, \
+         patch.object(api, "get_staff_services", return_value=[{"id": 100}]) as mock_services:
+        result = api.get_staff(service_id=100)
+    mock_req.assert_called_once()
+    assert mock_services.call_count == 2
+    assert [s["id"] for s in result] == [1, 2]
+
+
+def test_refresh_task_builds_index():
+    from services_app.tasks import refresh_staff_index
+
+    api = _api()
+    with patch("services_app.tasks.get_yclients_api", return_value=api), \
+         patch.object(api, "_request", side_effect=_fake_request):
+        result = refresh_staff_index()
+    assert result == {"staff": 2, "services": 2}
+    assert staff_index.get_staff_index() is not None
@@ -1,6 +1,8 @@
 """
 Юнит-тесты YClientsAPI. Реальных HTTP-запросов нет.
 """
+import time
+
 import pytest
 import requests as real_requests
 from unittest.mock import patch, MagicMock
@@ -229,6 +231,94 @@ def test_get_records_error_returns_empty():
         assert api.get_records("2026-03-01", "2026-03-31") == []
 
 
+# ─── iter_records ────────────────────────────────────────────────────────────
+
+def _paged_request(pages, total=None, calls=None):
+    def fake(method, endpoint, params=None, data=None, headers=None):
+        if calls is not None:
+            calls.append(params["page"])
+        meta = {"total_count": total} if total is not None else {}
+        return {"success": True, "data": pages.get(params["page"], []), "meta": meta}
+    return fake
+
+
+def test_iter_records_streams_all_pages():
+    api = _make_api()
+    calls = []
+    pages = {1: [{"id": 1}, {"id": 2}], 2: [{"id": 3}, {"id": 4}], 3: [{"id": 5}]}
+    with patch.object(api, "_request", side_effect=_paged_request(pages, calls=calls)):
+        stream = api.iter_records("2026-03-01", "2026-03-31", count=2, min_interval=0)
+        assert [r["id"] for r in stream] == [1, 2, 3, 4, 5]
+    assert calls == [1, 2, 3]
+    assert stream.pages == 3
+    assert stream.fetched == 5
+    assert stream.elapsed >= 0
+
+
+def test_iter_records_stops_at_total_count():
+    """meta.total_count известен — лишнюю пустую страницу не запрашиваем."""
+    api = _make_api()
+    calls = []
+    pages = {1: [{"id": 1}, {"id": 2}], 2: [{"id": 3}, {"id": 4}]}
+    with patch.object(api, "_request", side_effect=_paged_request(pages, total=4, calls=calls)):
+        stream = api.iter_records("2026-03-01", "2026-03-31", count=2, min_interval=0)
+        assert len(list(stream)) == 4
+    assert calls == [1, 2]
+    assert stream.total == 4
+
+
+def test_iter_records_prefetches_next_page():
+    """Страница 2 запрошена до того, как потребитель дочитал страницу 1."""
+    api = _make_api()
+    calls = []
+    pages = {1: [{"id": 1}, {"id": 2}], 2: [{"id": 3}]}
+    with patch.object(api, "_request", side_effect=_paged_request(pages, calls=calls)):
+        it = iter(api.iter_records("2026-03-01", "2026-03-31", count=2, min_interval=0))
+        assert next(it)["id"] == 1
+        for _ in range(50):
+            if calls == [1, 2]:
+                break
+            time.sleep(0.01)
+        assert calls == [1, 2]
+        assert [r["id"] for r in it] == [2, 3]
+
+
+def test_iter_records_respects_rate_budget():
+    api = _make_api()
+    pages = {1: [{"id": 1}], 2: [{"id": 2}], 3: []}
+    with patch.object(api, "_request", side_effect=_paged_request(pages)), \
+         patch("services_app.yclients_api.time.sleep") as mock_sleep:
+        stream = api.iter_records(
+            "2026-03-01", "2026-03-31", count=1, min_interval=5, prefetch=False,
+        )
+        list(stream)
+    # 3 запроса → 2 паузы, каждая не длиннее интервала
+    assert mock_sleep.call_count == 2
+    assert all(0 < c.args[0] <= 5 for c in mock_sleep.call_args_list)
+
+
+def test_iter_records_passes_changed_after():
+    api = _make_api()
+    with patch.object(api, "_request", return_value={"success": True, "data": []}) as mock_req:
+        list(api.iter_records("2026-03-01", "2026-03-31", changed_after="2026-03-05T10:00:00"))
+    assert mock_req.call_args.kwargs["params"]["changed_after"] == "2026-03-05T10:00:00"
+
+
+def test_iter_records_error_raises_instead_of_truncating():
+    api = _make_api()
+    pages = {1: [{"id": 1}, {"id": 2}]}
+
+    def fake(method, endpoint, params=None, data=None, headers=None):
+        if params["page"] == 2:
+            raise YClientsAPIError("HTTP 502")
+        return {"success": True, "data": pages[1]}
+
+    with patch.object(api, "_request", side_effect=fake):
+        stream = api.iter_records("2026-03-01", "2026-03-31", count=2, min_interval=0)
+        with pytest.raises(YClientsAPIError):
+            list(stream)
+
+
 # ─── authenticate ────────────────────────────────────────────────────────────
 
 def test_authenticate_success_returns_user_token():
@@ -0,0 +1,167 @@
+"""
+Юнит-тесты AsyncYClientsAPI. HTTP — через httpx.MockTransport, сети нет.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from services_app import yclients_async
+from services_app.yclients_api import YClientsAPIError
+from services_app.yclients_async import AsyncYClientsAPI
+
+
+def _make_api(handler, **kwargs):
+    client = httpx.AsyncClient(
+        base_url=AsyncYClientsAPI.BASE_URL,
+        transport=httpx.MockTransport(handler),
+    )
+    return AsyncYClientsAPI("p", "u", "884045", client=client, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    async def _instant(attempt):
+        return None
+    monkeypatch.setattr(AsyncYClientsAPI, "_backoff", staticmethod(_instant))
+
+
+async def test_request_returns_full_json():
+    def handler(request):
+        assert request.url.path == "/api/v1/test"
+        assert request.headers["X-Partner-Id"] == "11958"
+        return httpx.Response(200, json={"success": True, "data": [1]})
+
+    async with _make_api(handler) as api:
+        assert await api._request("GET", "/test") == {"success": True, "data": [1]}
+
+
+async def test_request_retries_5xx_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"success": True})
+
+    async with _make_api(handler) as api:
+        assert (await api._request("GET", "/x"))["success"] is True
+    assert len(calls) == 3
+
+
+async def test_request_gives_up_after_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(502, text="bad gateway")
+
+    async with _make_api(handler) as api:
+        with pytest.raises(YClientsAPIError, match="HTTP 502"):
+            await api._request("GET", "/x")
+    assert len(calls) == yclients_async.MAX_RETRIES + 1
+
+
+async def test_request_4xx_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(422, text="{}")
+
+    async with _make_api(handler) as api:
+        with pytest.raises(YClientsAPIError, match="HTTP 422"):
+            await api._request("GET", "/x")
+    assert len(calls) == 1
+
+
+async def test_connection_error_maps_to_yclients_error():
+    def handler(request):
+        raise httpx.ConnectError("boom")
+
+    async with _make_api(handler) as api:
+        with pytest.raises(YClientsAPIError, match="connection error"):
+            await api._request("GET", "/x")
+
+
+async def test_get_book_dates_and_times_share_sync_parsing():
+    def handler(request):
+        if request.url.path.startswith("/api/v1/book_dates/"):
+            return httpx.Response(200, json={
+                "success": True, "data": {"booking_dates": ["2026-03-02", "2026-03-01"]},
+            })
+        return httpx.Response(200, json={
+            "success": True,
+            "data": [{"time": "10:00"}, {"datetime": "2026-03-01T11:30:00"}],
+        })
+
+    async with _make_api(handler) as api:
+        assert await api.get_book_dates(staff_id=1) == ["2026-03-01", "2026-03-02"]
+        assert await api.get_available_times(1, "2026-03-01", service_id=5) == ["10:00", "11:30"]
+
+
+async def test_get_staff_for_service_fans_out_concurrently(db):
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        if request.url.path.startswith("/api/v1/book_staff/"):
+            return httpx.Response(200, json={
+                "success": True,
+                "data": [{"id": i, "name": f"M{i}"} for i in range(1, 7)],
+            })
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        staff_id = int(request.url.params["staff_id"])
+        services = [{"id": 100}] if staff_id % 2 else [{"id": 200}]
+        return httpx.Response(200, json={"success": True, "data": services})
+
+    async with _make_api(handler, max_concurrency=3) as api:
+        result = await api.get_staff(service_id=100)
+
+    assert [s["id"] for s in result] == [1, 3, 5]
+    assert 1 < peak <= 3
+
+
+async def test_gather_limited_keeps_order_and_isolates_errors():
+    async with _make_api(lambda r: httpx.Response(200, json={})) as api:
+        async def ok(i):
+            await asyncio.sleep(0.001 * (5 - i))
+            return i
+
+        async def fail():
+            raise ValueError("x")
+
+        results = await api.gather_limited(
+            [lambda i=i: ok(i) for i in range(5)] + [fail],
+            limit=2,
+            return_exceptions=True,
+        )
+    assert results[:5] == [0, 1, 2, 3, 4]
+    assert isinstance(results[5], ValueError)
+
+
+async def test_create_booking_posts_payload_and_invalidates(db, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(
+        "services_app.availability_cache.invalidate_staff", invalidated.append,
+    )
+
+    def handler(request):
+        body = json.loads(request.content)
+        assert body["appointments"][0]["staff_id"] == 7
+        assert body["comment"] == "тест"
+        return httpx.Response(200, json={"success": True, "data": [{"record_id": 42}]})
+
+    async with _make_api(handler) as api:
+        booking = await api.create_booking(
+            staff_id=7, services=[10], datetime="2026-03-01T10:00:00",
+            client={"name": "Анна", "phone": "+79990000000"}, comment="тест",
+        )
+    assert booking["record_id"] == 42
+    assert invalidated == [7]
@@ -0,0 +1,146 @@
+"""Тесты зеркала записей YClients: бэкфилл, инкремент по watermark, чтение."""
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+
+from agents import yclients_records
+from agents.models import YClientsRecord
+
+
+def _rec(record_id, date, cost=1000, *, client_id=1, staff_id=7, changed="2026-03-01T10:00:00+0300", **extra):
+    rec = {
+        "id": record_id,
+        "date": f"{date} 10:00:00",
+        "datetime": f"{date}T10:00:00+03:00",
+        "client": {"id": client_id, "phone": f"7900000000{client_id}"},
+        "staff": {"id": staff_id, "name": "Ольга"},
+        "services": [{"id": 55, "title": "Массаж", "cost": cost}],
+        "last_change_date": changed,
+    }
+    rec.update(extra)
+    return rec
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api():
+    return MagicMock()
+
+
+@pytest.mark.django_db
+def test_backfill_upserts_indexed_columns(api):
+    api.iter_records.return_value = [_rec(1, "2026-03-01", 2500, client_id=10, staff_id=3)]
+
+    result = yclients_records.sync_records(api)
+
+    assert result == {"mode": "backfill", "fetched": 1, "upserted": 1}
+    row = YClientsRecord.objects.get(record_id=1)
+    assert row.date == datetime.date(2026, 3, 1)
+    assert row.client_key == "10"
+    assert row.staff_id == 3
+    assert row.service_id == 55
+    assert row.revenue == 2500.0
+    assert "changed_after" not in api.iter_records.call_args.kwargs
+
+
+@pytest.mark.django_db
+def test_incremental_sync_uses_watermark_and_updates_in_place(api):
+    api.iter_records.return_value = [_rec(1, "2026-03-01", 1000, changed="2026-03-01T10:00:00+0300")]
+    yclients_records.sync_records(api)
+
+    api.iter_records.reset_mock()
+    api.iter_records.return_value = [
+        _rec(1, "2026-03-01", 1500, changed="2026-03-02T12:00:00+0300"),
+        _rec(2, "2026-03-03", 900, changed="2026-03-02T12:30:00+0300"),
+    ]
+    result = yclients_records.sync_records(api)
+
+    assert result["mode"] == "incremental"
+    changed_after = api.iter_records.call_args.kwargs["changed_after"]
+    # watermark 10:00 минус перекрытие 10 минут
+    assert changed_after.startswith("2026-03-01T09:50:00")
+    assert YClientsRecord.objects.count() == 2
+    assert YClientsRecord.objects.get(record_id=1).revenue == 1500.0
+
+
+@pytest.mark.django_db
+def test_sync_upserts_stream_in_chunks(api, monkeypatch):
+    monkeypatch.setattr(yclients_records, "UPSERT_CHUNK", 2)
+    api.iter_records.return_value = iter([_rec(i, "2026-03-01") for i in range(1, 6)])
+
+    result = yclients_records.sync_records(api)
+
+    assert result["fetched"] == result["upserted"] == 5
+    assert YClientsRecord.objects.count() == 5
+
+
+@pytest.mark.django_db
+def test_duplicates_in_batch_keep_last(api):
+    api.iter_records.return_value = [_rec(1, "2026-03-01", 100), _rec(1, "2026-03-01", 200)]
+    assert yclients_records.sync_records(api)["upserted"] == 1
+    assert YClientsRecord.objects.get(record_id=1).revenue == 200.0
+
+
+@pytest.mark.django_db
+def test_get_records_reads_mirror_without_http_and_skips_deleted(api):
+    api.iter_records.return_value = [
+        _rec(1, "2026-03-01"),
+        _rec(2, "2026-03-05"),
+        _rec(3, "2026-03-05", deleted=True),
+        _rec(4, "2026-04-01"),
+    ]
+    with patch("services_app.yclients_api.get_yclients_api", return_value=api):
+        yclients_records.sync_records()
+        api.iter_records.reset_mock()
+        records = yclients_records.get_records("2026-03-01", datetime.date(2026, 3, 31))
+
+    api.iter_records.assert_not_called()
+    assert [r["id"] for r in records] == [1, 2]
+    assert records[0]["services"][0]["title"] == "Массаж"
+
+
+@pytest.mark.django_db
+def test_get_records_syncs_when_stale(api):
+    api.iter_records.return_value = [_rec(1, "2026-03-01")]
+    with patch("services_app.yclients_api.get_yclients_api", return_value=api):
+        records = yclients_records.get_records("2026-03-01", "2026-03-31")
+    assert api.iter_records.called
+    assert len(records) == 1
+
+
+@pytest.mark.django_db
+def test_get_records_serves_mirror_when_sync_fails(api):
+    api.iter_records.return_value = [_rec(1, "2026-03-01")]
+    yclients_records.sync_records(api)
+    cache.clear()  # синхронизация «давно»
+
+    with patch("services_app.yclients_api.get_yclients_api", side_effect=RuntimeError("down")):
+        records = yclients_records.get_records("2026-03-01", "2026-03-31")
+    assert len(records) == 1
+
+
+@pytest.mark.django_db
+def test_get_records_raises_when_mirror_empty_and_sync_fails():
+    with patch("services_app.yclients_api.get_yclients_api", side_effect=RuntimeError("down")):
+        with pytest.raises(RuntimeError):
+            yclients_records.get_records("2026-03-01", "2026-03-31")
+
+
+@pytest.mark.django_db
+def test_analytics_gather_yclients_reads_mirror(api):
+    from agents.agents.analytics import _gather_yclients
+
+    api.iter_records.return_value = [_rec(1, "2026-03-01", 3000), _rec(2, "2026-03-02", 2000)]
+    yclients_records.sync_records(api)
+
+    data = _gather_yclients("2026-03-01", "2026-03-07")
+    assert data["yclients_total"] == 2
+    assert data["yclients_revenue"] == 5000
@@ -1,12 +1,16 @@
 from django.conf import settings as django_settings
+from django.utils.functional import SimpleLazyObject
 
-from services_app.models import SiteSettings
+from services_app.site_settings import get_site_settings
 
 
 def settings(request):
-    """Добавляет settings в контекст всех шаблонов"""
+    """Добавляет settings в контекст всех шаблонов.
+
+    Лениво: шаблон, который не трогает settings, не платит ничего.
+    """
     return {
-        'settings': SiteSettings.objects.first(),
+        'settings': SimpleLazyObject(get_site_settings),
         'YANDEX_VERIFICATION': getattr(django_settings, 'YANDEX_VERIFICATION', ''),
     }
 
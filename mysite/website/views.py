@@ -1,11 +1,15 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
 from collections import defaultdict
 from django.core.exceptions import ValidationError
-from django.db.models import Prefetch
+from django.db.models import Prefetch, prefetch_related_objects
 from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django_ratelimit.decorators import ratelimit
+from services_app import availability_cache
+from services_app.catalog import get_catalog
+from services_app.page_cache import cache_public_page, model_tag, object_tag, tag_response
+from services_app.site_settings import get_site_settings
 from services_app.yclients_api import get_yclients_api, YClientsAPIError
 import logging
 import json
@@ -30,12 +34,13 @@ def _booking_idempotency_key(*parts: str) -> str:
     return f"booking-idem:{digest}"
 
 from services_app.models import (
-    SiteSettings,
     ServiceCategory,
     Service,
     Master,
     FAQ,
     ServiceOption,
+    ServiceBlock,
+    ServiceMedia,
     Promotion,
     Bundle,
     BundleItem,
@@ -48,82 +53,29 @@ from services_app.models import (
 
 
 def _settings():
-    return SiteSettings.objects.first()
+    return get_site_settings()
 
 def home(request):
-    # Популярные услуги + первый активный вариант ServiceOption для каждой
-    services = Service.objects.active().popular().with_options().with_category()[:6]
-
-    top_items = []
-    for svc in services:
-        # все активные варианты уже отсортированы в options_qs
-        opts = list(svc.options.all())
-        top_items.append({"service": svc, "options": opts})
-
-    # Категории услуг для секции "Услуги салона"
-    categories = ServiceCategory.objects.with_active_services().order_by("order", "name")[:8]
-
-    # Мастера для секции "Наши мастера"
-    masters = Master.objects.active().with_services().order_by("name")[:4]
-
-    promos = list(
-        Promotion.objects.active()
-        .prefetch_related("options__service")[:3]
-    )
-
-    # Для кнопки «Записаться» на промо-баннере: pinned-option + fixed цена
-    # со скидкой (YClients API требует yclients_service_id, поэтому
-    # фильтруем options по его наличию).
-    promo_booking_svc_id = None
-    promo_booking_svc_name = ""
-    promo_booking_option_id = None
-    promo_booking_price = None
-    if promos:
-        first_promo = promos[0]
-        first_opt = (
-            first_promo.options.filter(yclients_service_id__isnull=False).first()
-            or first_promo.options.first()
-        )
-        if first_opt and first_opt.service_id:
-            promo_booking_svc_id = first_opt.service_id
-            promo_booking_svc_name = first_promo.title or first_opt.service.name
-            promo_booking_option_id = first_opt.id
-            pct = int(first_promo.discount_percent or 0)
-            price = first_opt.price or 0
-            if pct > 0:
-                price = price * (100 - pct) / 100
-            promo_booking_price = int(price)
-
-    reviews = Review.objects.active()[:3]
-
+    # Каталожные секции — из снимка (services_app.catalog), без запросов к БД
+    catalog = get_catalog()
     ctx = {
         "settings": _settings(),
-        "top_items": top_items,
-        "categories": categories,
-        "masters": masters,
-        "faq": FAQ.objects.filter(is_active=True).order_by("order", "id")[:6],
-        "promotions": promos,
-        "promo_booking_svc_id": promo_booking_svc_id,
-        "promo_booking_svc_name": promo_booking_svc_name,
-        "promo_booking_option_id": promo_booking_option_id,
-        "promo_booking_price": promo_booking_price,
-        "reviews": reviews,
+        "top_items": catalog.top_items,
+        "categories": catalog.home_categories,
+        "masters": catalog.home_masters,
+        "faq": catalog.faq,
+        "promotions": catalog.home_promotions,
+        **catalog.promo_booking,
+        "reviews": catalog.reviews,
     }
     return render(request, "website/home.html", ctx)
 
 def services(request):
-    categories = (
-        ServiceCategory.objects.active().prefetch_related("services")
-        .order_by("order", "name")
-    )
-    
-    # Промо для баннера (если нужно)
-    promos = Promotion.objects.active()[:1]
-
+    catalog = get_catalog()
     return render(request, "website/services.html", {
         "settings": _settings(),
-        "categories": categories,
-        "promotions": promos,
+        "categories": catalog.categories,
+        "promotions": catalog.promotions,
     })
 
 
@@ -136,20 +88,13 @@ def promotions(request):
 
 
 def masters(request):
-    from django.db.models import Count, Q, Prefetch
-    active_services = Service.objects.active().order_by("order", "name")
-    items = (
-        Master.objects.active()
-        .prefetch_related(Prefetch("services", queryset=active_services))
-        .annotate(svc_count=Count("services", filter=Q(services__is_active=True), distinct=True))
-        .order_by("order", "name")
-    )
     return render(request, "website/masters.html", {
         "settings": _settings(),
-        "masters": items,
+        "masters": get_catalog().masters,
     })
 
 
+@cache_public_page
 def master_detail_by_slug(request, slug):
     """ЧПУ-страница мастера: /masters/<slug>/."""
     svc_qs = Service.objects.active().with_category().prefetch_related("options")
@@ -202,7 +147,9 @@ def _render_master_detail(request, master):
         "seo_title":       seo_title,
         "seo_description": seo_description,
     }
-    return render(request, "website/master_detail.html", context)
+    tags = [object_tag(Master, master.pk), model_tag(Master), model_tag(ServiceCategory)]
+    tags += [object_tag(Service, s.pk) for s in services_qs]
+    return tag_response(render(request, "website/master_detail.html", context), tags)
 
 
 def contacts(request):
@@ -244,46 +191,15 @@ def _min_option(service):
     return opts[0] if opts else None
     
 def bundles(request):
-    svc_qs = Service.objects.with_options()
-
-    items_qs = (BundleItem.objects
-                .select_related("bundle", "option", "option__service")
-                .prefetch_related(Prefetch("option__service", queryset=svc_qs))
-                .order_by("order"))
-
-    bundles_qs = (Bundle.objects.active()
-                  .prefetch_related(Prefetch("items", queryset=items_qs))
-                  .order_by("order", "id"))
-
-    bundles = []
-    for b in bundles_qs:
-        items = list(b.items.all())
-        min_price, min_duration = b.compute_min_totals()
-        bundles.append({
-            "bundle": b,
-            "items": items,
-            "min_price": min_price,
-            "min_duration": min_duration,
-            "price": b.fixed_price,
-        })
-
-    # Лечебные комплексы — услуги с "комплекс" в названии.
-    # Нестандартный порядок (units, duration_min) — используем with_options и
-    # .order_by поверх для этой выборки.
-    complex_opt_qs = (ServiceOption.objects.active()
-                      .order_by("order", "units", "duration_min"))
-    complex_services = (Service.objects.active()
-                        .filter(name__icontains='комплекс')
-                        .prefetch_related(Prefetch('options', queryset=complex_opt_qs))
-                        .order_by('name'))
-
+    catalog = get_catalog()
     return render(request, "website/bundles.html", {
         "settings": _settings(),
-        "bundles": bundles,
-        "complex_services": complex_services,
+        "bundles": catalog.bundles,
+        "complex_services": catalog.complex_services,
     })
 
 
+@cache_public_page
 def bundle_detail_by_slug(request, slug):
     """Детальная страница комплекса по ЧПУ-url /kompleks/<slug>/."""
     svc_qs = Service.objects.with_options()
@@ -312,21 +228,21 @@ def bundle_detail(request, bundle_id):
 def _render_bundle_detail(request, bundle):
     """Сборка контекста детальной страницы комплекса."""
     items = list(bundle.items.all())
-    min_price, min_duration = bundle.compute_min_totals()
+    min_price, min_duration = bundle.computed_price, bundle.computed_min_duration
     price = bundle.fixed_price if bundle.fixed_price is not None else min_price
 
     # Похожие комплексы — другие активные, кроме этого
     other_bundles_qs = (
         Bundle.objects.active().exclude(pk=bundle.pk).order_by("order", "id")[:3]
     )
-    other_bundles = []
-    for b in other_bundles_qs:
-        b_min_price, b_min_duration = b.compute_min_totals()
-        other_bundles.append({
+    other_bundles = [
+        {
             "bundle":       b,
-            "price":        b.fixed_price if b.fixed_price is not None else b_min_price,
-            "min_duration": b_min_duration,
-        })
+            "price":        b.fixed_price if b.fixed_price is not None else b.computed_price,
+            "min_duration": b.computed_min_duration,
+        }
+        for b in other_bundles_qs
+    ]
 
     seo_title = bundle.seo_title or f"{bundle.name} — комплекс услуг"
     seo_description = bundle.seo_description or (
@@ -347,7 +263,9 @@ def _render_bundle_detail(request, bundle):
         "seo_h1":          seo_h1,
         "subtitle":        bundle.subtitle,
     }
-    return render(request, "website/bundle_detail.html", context)
+    tags = [object_tag(Bundle, bundle.pk), model_tag(Bundle), model_tag(ServiceCategory)]
+    tags += [object_tag(Service, it.option.service_id) for it in items if it.option]
+    return tag_response(render(request, "website/bundle_detail.html", context), tags)
 
 
 logger = logging.getLogger(__name__)
@@ -441,19 +359,17 @@ def api_available_times(request):
         api = get_yclients_api()
         
         try:
-            # Вызываем _request напрямую чтобы получить полный ответ с seance_length
-            endpoint = f"/book_times/{api.company_id}/{staff_id}/{date}"
-            
-            params = {}
+            # Полный ответ book_times (с seance_length) через локальный кэш
+            # доступности — повторные клики по той же дате не ходят в YClients.
+            service_ids = []
             if yclients_service_id:
                 # ✅ ИСПРАВЛЕНИЕ: YClients API ожидает service_ids (массив)
-                params['service_ids'] = [yclients_service_id]
+                service_ids = [yclients_service_id]
                 logger.info(f"📋 Фильтрация по услуге YClients ID: {yclients_service_id}")
             
-            logger.info(f"📡 Запрос к YClients: {endpoint}")
-            logger.debug(f"   Параметры: {params}")
-            
-            response = api._request('GET', endpoint, params=params)
+            response = availability_cache.get_book_times(
+                api, staff_id, date, service_ids=service_ids
+            )
             
             if not response.get('success', False):
                 logger.warning(f"⚠️ API вернул success=false: {response}")
@@ -821,39 +737,42 @@ def api_create_booking(request):
             'error': str(e)
         }, status=500)
 
+@cache_public_page
 def category_services_by_slug(request, slug):
     """ЧПУ-версия страницы категории: /kategorii/<slug>/."""
-    category = get_object_or_404(ServiceCategory, slug=slug, is_active=True)
-    return _render_category_services(request, category)
+    catalog = get_catalog()
+    category = catalog.category(slug=slug)
+    if category is None:
+        raise Http404("Категория не найдена")
+    return _render_category_services(request, category, catalog)
 
 
 def category_services(request, category_id):
     """Legacy-роут /services/<int:id>/. 301 на ЧПУ если есть slug."""
-    category = get_object_or_404(ServiceCategory, pk=category_id, is_active=True)
+    catalog = get_catalog()
+    category = catalog.category(pk=category_id)
+    if category is None:
+        raise Http404("Категория не найдена")
     if category.slug:
         from django.shortcuts import redirect
         return redirect("website:category_services_by_slug", slug=category.slug, permanent=True)
-    return _render_category_services(request, category)
+    return _render_category_services(request, category, catalog)
 
 
-def _render_category_services(request, category):
+def _render_category_services(request, category, catalog):
     """Общая логика рендера страницы категории (услуги + другие категории)."""
-    services_qs = category.services.active().prefetch_related("options")
-
-    other_categories = (
-        ServiceCategory.objects.active()
-        .exclude(pk=category.pk)
-        .prefetch_related("services")
-        .order_by("order", "name")
-    )
-
-    return render(request, "website/category_services.html", {
+    services = catalog.category_services.get(category.pk, [])
+    response = render(request, "website/category_services.html", {
         "settings": _settings(),
         "category": category,
-        "services": services_qs,
-        "other_categories": other_categories,
+        "services": services,
+        "other_categories": [c for c in catalog.categories if c.pk != category.pk],
     })
+    tags = [object_tag(ServiceCategory, category.pk), model_tag(ServiceCategory)]
+    tags += [object_tag(Service, s.pk) for s in services]
+    return tag_response(response, tags)
 
+@cache_public_page
 def service_detail_by_slug(request, slug):
     """
     ЧПУ-версия страницы услуги: /uslugi/klassicheskij-massazh/
@@ -886,51 +805,8 @@ def service_detail(request, service_id):
     
     return _render_service_detail(request, service)
 
-def _render_service_detail(request, service):
-
-    # 2. Варианты услуги (только с yclients_service_id)
-    options = service.options.filter(
-        is_active=True
-    ).exclude(
-        yclients_service_id__isnull=True
-    ).exclude(
-        yclients_service_id=''
-    ).order_by('order', 'duration_min', 'units')
-    
-    options_list = list(options)
-    
-    # 3. Уникальные длительности и количества
-    durations = sorted(set(opt.duration_min for opt in options_list))
-    quantities = set(opt.units for opt in options_list)
-    
-    # 4. Проверяем: одинаковое ли количество для ВСЕХ длительностей
-    all_qty_pairs = set((opt.units, opt.get_unit_type_display()) for opt in options_list)
-    is_single_quantity = len(all_qty_pairs) == 1
-    single_qty_value = None
-    single_qty_display = None
-    if is_single_quantity and all_qty_pairs:
-        single_qty_value, single_qty_display = all_qty_pairs.pop()
-    
-    # 5. Другие категории
-    other_categories = ServiceCategory.objects.active().exclude(
-        pk=service.category_id
-    ).exclude(
-        image__isnull=True
-    ).exclude(
-        image_mobile__isnull=True
-    ).exclude(
-        slug__isnull=True
-    ).exclude(
-        slug=''
-    ).exclude(
-        image=''
-    ).order_by('order')
-
-    # 6. Контентные блоки (SEO-лендинг)
-    blocks = service.blocks.filter(is_active=True).order_by('order')
-
-    media_items = list(service.media.filter(is_active=True).order_by('order'))
-    
+def _service_media_layout(media_items):
+    """Карусели по carousel_group + раскладка для мобильного: insert_after_order → записи."""
     carousels = {}
     single_media = []
     for m in media_items:
@@ -949,8 +825,59 @@ def _render_service_detail(request, service):
         media_by_position.setdefault(pos, []).append(
             {'type': 'carousel', 'group': group_name, 'items': items}
         )
+    return carousels, media_by_position
+
+
+def _render_service_detail(request, service):
+    """
+    Рендер страницы услуги — фиксированное число запросов, сколько бы
+    связанных услуг, блоков и медиа ни было: варианты, блоки, медиа и
+    связанные услуги (с annotate min_price) — одним prefetch-планом,
+    другие категории — из снимка каталога.
+    """
+    prefetch_related_objects(
+        [service],
+        # 2. Варианты услуги (только с yclients_service_id)
+        Prefetch(
+            'options',
+            queryset=ServiceOption.objects.bookable().order_by('order', 'duration_min', 'units'),
+            to_attr='bookable_options',
+        ),
+        # 6. Контентные блоки (SEO-лендинг)
+        Prefetch('blocks', queryset=ServiceBlock.objects.filter(is_active=True).order_by('order'),
+                 to_attr='active_blocks'),
+        Prefetch('media', queryset=ServiceMedia.objects.filter(is_active=True).order_by('order'),
+                 to_attr='active_media'),
+        Prefetch(
+            'related_services',
+            queryset=Service.objects.active().with_category().with_min_bookable_price().order_by('order'),
+            to_attr='active_related',
+        ),
+    )
+    options_list = service.bookable_options
     
-    logger.info(f"Других категорий с фото: {other_categories.count()}")
+    # 3. Уникальные длительности и количества
+    durations = sorted(set(opt.duration_min for opt in options_list))
+    quantities = set(opt.units for opt in options_list)
+    
+    # 4. Проверяем: одинаковое ли количество для ВСЕХ длительностей
+    all_qty_pairs = set((opt.units, opt.get_unit_type_display()) for opt in options_list)
+    is_single_quantity = len(all_qty_pairs) == 1
+    single_qty_value = None
+    single_qty_display = None
+    if is_single_quantity and all_qty_pairs:
+        single_qty_value, single_qty_display = all_qty_pairs.pop()
+    
+    # 5. Другие категории — только с фото и slug
+    other_categories = [
+        cat for cat in get_catalog().categories
+        if cat.pk != service.category_id
+        and cat.image and cat.image_mobile.name is not None and cat.slug
+    ]
+
+    blocks = service.active_blocks
+    media_items = service.active_media
+    carousels, media_by_position = _service_media_layout(media_items)
     
     # 7. SEO — fallback на название услуги если поля пусты
     _price_str = f" — от {int(service.price_from)} ₽" if service.price_from else ''
@@ -966,26 +893,11 @@ def _render_service_detail(request, service):
     else:
         seo_description = ""
     seo_h1 = service.seo_h1 or service.name
-    
-    related_services = (
-        service.related_services.active()
-        .with_category()
-        .prefetch_related('options')
-        .order_by('order')
-    )
 
-    related_with_prices = []
-    for rs in related_services:
-        min_price = None
-        active_options = rs.options.filter(is_active=True).exclude(
-            yclients_service_id__isnull=True
-        ).exclude(yclients_service_id='')
-        if active_options.exists():
-            min_price = active_options.order_by('price').first().price
-        related_with_prices.append({
-            'service': rs,
-            'min_price': min_price,
-        })
+    related_with_prices = [
+        {'service': rs, 'min_price': rs.min_price}
+        for rs in service.active_related
+    ]
 
     context = {
         'service': service,
@@ -998,7 +910,7 @@ def _render_service_detail(request, service):
         'single_quantity_value': single_qty_value,
         'single_quantity_unit_type_display': single_qty_display,
         'other_categories': other_categories,
-        'settings': SiteSettings.objects.first(),
+        'settings': _settings(),
         # SEO
         'seo_title': seo_title,
         'seo_description': seo_description,
@@ -1006,7 +918,7 @@ def _render_service_detail(request, service):
         'subtitle': service.subtitle,
         # Контентные блоки
         'blocks': blocks,
-        'has_blocks': blocks.exists(),
+        'has_blocks': len(blocks) > 0,
 
         'media_items': media_items,
         'media_by_position': media_by_position,
@@ -1017,7 +929,9 @@ def _render_service_detail(request, service):
         'has_related': len(related_with_prices) > 0,
     }
     
-    return render(request, 'website/service_detail.html', context)
+    tags = [object_tag(Service, s.pk) for s in [service, *service.active_related]]
+    tags.append(model_tag(ServiceCategory))
+    return tag_response(render(request, 'website/service_detail.html', context), tags)
 
 @require_GET
 def api_service_options(request):
@@ -1123,8 +1037,8 @@ def api_available_dates(request):
         
         api = get_yclients_api()
         
-        # Получаем доступные даты
-        dates = api.get_book_dates(staff_id=int(staff_id))
+        # Получаем доступные даты (через кэш доступности)
+        dates = availability_cache.get_book_dates(api, staff_id=int(staff_id))
         
         logger.info(f"✅ Найдено доступных дат: {len(dates)}")
         logger.debug(f"Dates: {dates}")
@@ -1310,7 +1224,7 @@ def api_bundle_request(request):
 
     # --- Онлайн-оплата: создаём Order + YooKassa payment ---
     if payment_method == "online":
-        site = SiteSettings.objects.first()
+        site = _settings()
         if not site or not site.online_payment_enabled:
             return JsonResponse({"success": False, "error": "online_payment_disabled"}, status=400)
         if not bundle:
@@ -1538,30 +1452,11 @@ logger = logging.getLogger(__name__)
 
 def certificates(request):
     """Страница подарочных сертификатов"""
-    from django.db.models import Count, Q, Prefetch
-
-    active_options = ServiceOption.objects.filter(is_active=True).order_by("price")
-    all_services = (
-        Service.objects.active()
-        .select_related("category")
-        .prefetch_related(Prefetch("options", queryset=active_options))
-        .order_by("category__order", "order", "name")
-    )
-    service_categories = (
-        ServiceCategory.objects.active()
-        .annotate(svc_count=Count("services", filter=Q(services__is_active=True)))
-        .filter(svc_count__gt=0)
-        .order_by("order", "name")
-    )
-    bundles_as_certs = (
-        Bundle.objects.filter(is_active=True, is_certificate=True)
-        .prefetch_related("items__option__service")
-        .order_by("order")
-    )
+    catalog = get_catalog()
     return render(request, "website/certificates.html", {
-        "all_services": all_services,
-        "service_categories": service_categories,
-        "bundles": bundles_as_certs,
+        "all_services": catalog.certificate_services,
+        "service_categories": catalog.certificate_categories,
+        "bundles": catalog.certificate_bundles,
         "themes": CERTIFICATE_THEME_CHOICES,
         "settings": _settings(),
     })
@@ -1686,7 +1581,7 @@ def api_certificate_request(request):
         theme = bundle.certificate_theme if (cert_type == "bundle" and bundle) else "pink"
 
     # --- Онлайн-оплата: проверка feature flag ---
-    site = SiteSettings.objects.first()
+    site = _settings()
     if payment_method == "online":
         if not site or not site.online_payment_enabled:
             return JsonResponse({"success": False, "error": "online_payment_disabled"}, status=400)
@@ -1,12 +1,27 @@
 """Embedding store для семантического поиска по HelpArticle (FAQ).
 
 Абстракция (`store.py::EmbeddingStore`) + реализации:
-- `chroma_backend.py::ChromaStore` — Chroma локально (default для MVP)
+- `numpy_backend.py::NumpyStore` — матрица float32 в .npy (mmap), поиск
+  одним матрично-векторным произведением; провайдеры — `providers.py`
+- `chroma_backend.py::ChromaStore` — Chroma локально (исходный MVP)
 - (опц. позже) PgVector для prod scale
 
+Backend выбирается EMBEDDING_BACKEND (chroma | numpy), провайдер —
+EMBEDDING_PROVIDER; см. `reindex.py::build_store`.
+
 Reindex: `reindex.py::reindex_help_articles(store)`.
+
+ChromaStore импортируется лениво: с numpy-backend'ом chromadb (сотни MB
+heap) в процесс не попадает вовсе.
 """
 from .store import EmbeddingStore, SearchResult
-from .chroma_backend import ChromaStore
+from .numpy_backend import NumpyStore
+
+__all__ = ["EmbeddingStore", "SearchResult", "ChromaStore", "NumpyStore"]
+
 
-__all__ = ["EmbeddingStore", "SearchResult", "ChromaStore"]
+def __getattr__(name):
+    if name == "ChromaStore":
+        from .chroma_backend import ChromaStore
+        return ChromaStore
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,150 @@
+"""Кэш эмбеддингов по хешу содержимого: память (LRU) + диск.
+
+Каждый search_faq заново эмбеддил запрос (OpenAI через прокси ~0.3-1.5s
+или MiniLM на CPU), reindex — все статьи целиком. CachedProvider
+оборачивает любой провайдер:
+
+- ключ — sha256(имя провайдера + текст): смена модели не отдаёт чужие
+  вектора, одинаковый текст из reindex и из запроса — одна запись;
+- порядок поиска: LRU в памяти → `<cache_dir>/<ab>/<key>.npy` → провайдер;
+- промахи всей пачки уходят провайдеру одним вызовом (дубли схлопнуты,
+  кусками по BATCH_SIZE) — это и есть batch-embed API для reindex и
+  прогрева запросов (MCP tool `embed_queries`);
+- счётчики memory_hits / disk_hits / misses / provider_calls — для MCP
+  tool `stats`.
+
+Диск — best-effort: нет прав или места — работаем только с памятью.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from .providers import EmbeddingProvider
+
+
+logger = logging.getLogger(__name__)
+
+MEMORY_SIZE = 2048
+BATCH_SIZE = 256  # лимит OpenAI — 2048 input'ов на запрос, держимся с запасом
+
+
+class CachedProvider:
+    """EmbeddingProvider с кэшем по хешу текста. Сам тоже EmbeddingProvider."""
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        cache_dir: str | None = None,
+        memory_size: int = MEMORY_SIZE,
+    ):
+        self._provider = provider
+        self.name = provider.name
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._memory_size = memory_size
+        self._dir = Path(cache_dir) if cache_dir else None
+        if self._dir is not None:
+            try:
+                self._dir.mkdir(parents=True, exist_ok=True)
+            except OSError as exc:
+                logger.warning("Кэш эмбеддингов на диске отключён (%s): %s", self._dir, exc)
+                self._dir = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "provider_calls": 0}
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Эмбеддинги пачки: из кэша, недостающие — одним batch-вызовом провайдера."""
+        if not texts:
+            return self._provider.embed([])
+        keys = [self._key(t) for t in texts]
+        found: dict[str, np.ndarray] = {}
+        missing: dict[str, str] = {}
+
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self._memory_get(key)
+            if vector is not None:
+                self._stats["memory_hits"] += 1
+            else:
+                vector = self._disk_get(key)
+                if vector is not None:
+                    self._stats["disk_hits"] += 1
+                    self._memory_put(key, vector)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+
+        if missing:
+            self._stats["misses"] += len(missing)
+            miss_keys = list(missing)
+            for start in range(0, len(miss_keys), BATCH_SIZE):
+                chunk = miss_keys[start:start + BATCH_SIZE]
+                self._stats["provider_calls"] += 1
+                vectors = self._provider.embed([missing[k] for k in chunk])
+                for key, vector in zip(chunk, vectors):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    found[key] = vector
+                    self._memory_put(key, vector)
+                    self._disk_put(key, vector)
+
+        return np.stack([found[k] for k in keys])
+
+    def stats(self) -> dict:
+        lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+        hits = lookups - self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk": str(self._dir) if self._dir else None,
+        }
+
+    # ── Внутреннее ────────────────────────────────────────────────────
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _memory_get(self, key: str) -> np.ndarray | None:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+        return vector
+
+    def _memory_put(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_size:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self._dir / key[:2] / f"{key}.npy"
+
+    def _disk_get(self, key: str) -> np.ndarray | None:
+        if self._dir is None:
+            return None
+        try:
+            return np.load(self._disk_path(key))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Битый файл кэша эмбеддингов %s: %s", key, exc)
+            return None
+
+    def _disk_put(self, key: str, vector: np.ndarray) -> None:
+        if self._dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as fh:
+                np.save(fh, vector)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Не удалось записать кэш эмбеддингов %s: %s", key, exc)
@@ -6,6 +6,9 @@
 - `provider="openai"` (text-embedding-3-small) — через прокси из
   `TELEGRAM_PROXY`/`OPENAI_PROXY` (api.openai.com заблокирован в РФ).
   Используется в проде.
+
+Эмбеддинги считаются через CachedProvider (cache.py) и передаются в Chroma
+явно: повторные запросы и неизменённые статьи при reindex не ходят в модель.
 """
 from __future__ import annotations
 
@@ -14,8 +17,11 @@ import os
 from pathlib import Path
 
 import chromadb
+import numpy as np
 from chromadb.utils import embedding_functions
 
+from .cache import CachedProvider
+from .providers import normalize_rows
 from .store import EmbeddingStore, IndexItem, SearchResult
 
 
@@ -57,6 +63,17 @@ def _build_embedding_function(provider: str):
     raise ValueError(f"Неизвестный embedding provider: {provider!r}")
 
 
+class _ChromaFunctionProvider:
+    """embedding_function Chroma как EmbeddingProvider (для CachedProvider)."""
+
+    def __init__(self, fn, provider: str):
+        self._fn = fn
+        self.name = f"chroma:{provider}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return normalize_rows(self._fn(list(texts)))
+
+
 class ChromaStore(EmbeddingStore):
     """Chroma persistent store для FAQ-эмбеддингов.
 
@@ -64,6 +81,7 @@ class ChromaStore(EmbeddingStore):
         persist_path: каталог для filesystem persistence (создаётся если нет)
         collection_name: имя коллекции (для разных сущностей — разные коллекции)
         provider: "default" (локально, для тестов/dev) или "openai" (prod)
+        cache_dir: каталог дискового кэша эмбеддингов (None — только память)
     """
 
     def __init__(
@@ -71,6 +89,7 @@ class ChromaStore(EmbeddingStore):
         persist_path: str,
         collection_name: str = "help_articles",
         provider: str = "default",
+        cache_dir: str | None = None,
     ):
         self._persist_path = persist_path
         self._collection_name = collection_name
@@ -79,6 +98,9 @@ class ChromaStore(EmbeddingStore):
         Path(persist_path).mkdir(parents=True, exist_ok=True)
         self._client = chromadb.PersistentClient(path=persist_path)
         self._embedding_fn = _build_embedding_function(provider)
+        self._embedder = CachedProvider(
+            _ChromaFunctionProvider(self._embedding_fn, provider), cache_dir=cache_dir,
+        )
         self._collection = self._client.get_or_create_collection(
             name=collection_name,
             embedding_function=self._embedding_fn,
@@ -98,17 +120,18 @@ class ChromaStore(EmbeddingStore):
         self._collection.upsert(
             ids=[i.id for i in items],
             documents=[i.text for i in items],
+            embeddings=self._embedder.embed([i.text for i in items]).tolist(),
             metadatas=metadatas,
         )
 
     def search(self, query: str, k: int = 3) -> list[SearchResult]:
         if k <= 0:
             return []
-        actual_k = min(k, self.count()) if self.count() > 0 else 0
+        actual_k = min(k, self.count())  # count() — один вызов, не два
         if actual_k == 0:
             return []
         result = self._collection.query(
-            query_texts=[query],
+            query_embeddings=self._embedder.embed([query]).tolist(),
             n_results=actual_k,
             include=["documents", "metadatas", "distances"],
         )
@@ -128,6 +151,10 @@ class ChromaStore(EmbeddingStore):
             for i in range(len(ids))
         ]
 
+    def delete(self, ids: list[str]) -> None:
+        if ids:
+            self._collection.delete(ids=list(ids))
+
     def delete_all(self) -> None:
         """Удалить collection полностью и пересоздать пустой (для full reindex)."""
         try:
@@ -143,3 +170,15 @@ class ChromaStore(EmbeddingStore):
 
     def count(self) -> int:
         return self._collection.count()
+
+    def metadatas(self) -> dict[str, dict]:
+        result = self._collection.get(include=["metadatas"])
+        return {i: (m or {}) for i, m in zip(result["ids"], result["metadatas"] or [])}
+
+    def embed_queries(self, queries: list[str]) -> int:
+        """Прогреть кэш эмбеддингов запросов одним batch-вызовом."""
+        self._embedder.embed(list(queries))
+        return len(queries)
+
+    def cache_stats(self) -> dict:
+        return self._embedder.stats()
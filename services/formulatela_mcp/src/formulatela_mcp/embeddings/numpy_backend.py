@@ -0,0 +1,216 @@
+"""In-process векторный индекс на NumPy (альтернатива ChromaStore).
+
+FAQ — несколько сотен HelpArticle; держать ради них chromadb-клиент
+(~600MB heap, секунды на старт subprocess'а) незачем. NumpyStore хранит:
+
+- `vectors.npy` — float32-матрица N×dim с L2-нормированными строками,
+  читается через np.load(mmap_mode="r") — страницы грузит ОС по мере нужды;
+- `items.json`  — ids, тексты, metadata и имя провайдера эмбеддингов.
+
+search = эмбеддинг запроса (CachedProvider: LRU + диск по хешу текста) +
+одно матрично-векторное произведение + argpartition для top-k. Запись
+(reindex) — во временные файлы и os.replace: сначала vectors.npy, затем
+items.json. Читатель
+(MCP-subprocess) по mtime items.json замечает новый индекс и
+перечитывает его; пока размеры не сошлись — работает со старым снимком.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .cache import MEMORY_SIZE, CachedProvider
+from .providers import EmbeddingProvider, build_provider
+from .store import EmbeddingStore, IndexItem, SearchResult
+
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+ITEMS_FILE = "items.json"
+
+
+class NumpyStore(EmbeddingStore):
+    """Векторный индекс FAQ в памяти процесса (mmap .npy).
+
+    Args:
+        path: каталог индекса (создаётся если нет)
+        provider: имя провайдера ("openai" / "default" / "hashing") или объект
+        cache_dir: каталог дискового кэша эмбеддингов (None — только память)
+        memory_cache_size: сколько эмбеддингов держать в памяти (LRU)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        provider: str | EmbeddingProvider = "default",
+        cache_dir: str | None = None,
+        memory_cache_size: int = MEMORY_SIZE,
+    ):
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        if isinstance(provider, str):
+            provider = build_provider(provider)
+        if not isinstance(provider, CachedProvider):
+            provider = CachedProvider(provider, cache_dir=cache_dir, memory_size=memory_cache_size)
+        self._provider = provider
+
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadatas: list[dict] = []
+        self._vectors: np.ndarray | None = None
+        self._index_provider: str | None = None
+        self._stamp: tuple | None = None
+        self._reload_if_changed()
+
+    # ── EmbeddingStore ────────────────────────────────────────────────
+
+    def upsert(self, items: list[IndexItem]) -> None:
+        if not items:
+            return
+        self._reload_if_changed()
+        self._check_provider()
+        new_vectors = self._provider.embed([i.text for i in items])
+
+        position = {item_id: n for n, item_id in enumerate(self._ids)}
+        ids, texts, metadatas = list(self._ids), list(self._texts), list(self._metadatas)
+        rows = [np.asarray(self._vectors)] if self._vectors is not None and len(ids) else []
+        matrix = np.concatenate(rows) if rows else np.zeros((0, new_vectors.shape[1]), dtype=np.float32)
+        matrix = np.array(matrix, dtype=np.float32)  # копия из mmap — пишем в неё
+
+        appended = []
+        for item, vector in zip(items, new_vectors):
+            if item.id in position:
+                n = position[item.id]
+                matrix[n] = vector
+                texts[n], metadatas[n] = item.text, dict(item.metadata)
+            else:
+                position[item.id] = len(ids)
+                ids.append(item.id)
+                texts.append(item.text)
+                metadatas.append(dict(item.metadata))
+                appended.append(vector)
+        if appended:
+            matrix = np.concatenate([matrix, np.stack(appended)])
+        self._write(ids, texts, metadatas, matrix)
+
+    def search(self, query: str, k: int = 3) -> list[SearchResult]:
+        if k <= 0:
+            return []
+        self._reload_if_changed()
+        total = len(self._ids)
+        if total == 0:
+            return []
+        self._check_provider()
+
+        scores = np.asarray(self._vectors) @ self._provider.embed([query])[0]
+        k = min(k, total)
+        top = np.argpartition(-scores, k - 1)[:k] if k < total else np.arange(total)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            SearchResult(
+                id=self._ids[n],
+                text=self._texts[n],
+                metadata=self._metadatas[n],
+                # как у ChromaStore: similarity в [0, 1]
+                score=max(0.0, float(scores[n])),
+            )
+            for n in top.tolist()
+        ]
+
+    def delete(self, ids: list[str]) -> None:
+        self._reload_if_changed()
+        drop = set(ids)
+        keep = [n for n, item_id in enumerate(self._ids) if item_id not in drop]
+        if len(keep) == len(self._ids):
+            return
+        matrix = np.asarray(self._vectors)[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+        self._write(
+            [self._ids[n] for n in keep],
+            [self._texts[n] for n in keep],
+            [self._metadatas[n] for n in keep],
+            matrix,
+        )
+
+    def delete_all(self) -> None:
+        self._write([], [], [], np.zeros((0, 0), dtype=np.float32))
+
+    def metadatas(self) -> dict[str, dict]:
+        self._reload_if_changed()
+        return dict(zip(self._ids, self._metadatas))
+
+    def count(self) -> int:
+        self._reload_if_changed()
+        return len(self._ids)
+
+    def embed_queries(self, queries: list[str]) -> int:
+        """Прогреть кэш эмбеддингов запросов одним batch-вызовом. Возвращает число запросов."""
+        self._provider.embed(list(queries))
+        return len(queries)
+
+    def cache_stats(self) -> dict:
+        return self._provider.stats()
+
+    # ── Внутреннее ────────────────────────────────────────────────────
+
+    def _check_provider(self) -> None:
+        if self._ids and self._index_provider != self._provider.name:
+            raise RuntimeError(
+                f"Индекс {self._path} построен провайдером {self._index_provider!r}, "
+                f"а сейчас {self._provider.name!r} — перезапустите reindex"
+            )
+
+    def _items_stamp(self) -> tuple | None:
+        try:
+            st = (self._path / ITEMS_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _reload_if_changed(self) -> None:
+        stamp = self._items_stamp()
+        if stamp == self._stamp:
+            return
+        if stamp is None:
+            self._ids, self._texts, self._metadatas, self._vectors = [], [], [], None
+            self._index_provider, self._stamp = None, None
+            return
+        try:
+            manifest = json.loads((self._path / ITEMS_FILE).read_text(encoding="utf-8"))
+            ids = manifest["ids"]
+            vectors = np.load(self._path / VECTORS_FILE, mmap_mode="r") if ids else None
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("NumpyStore: не удалось прочитать индекс %s: %s", self._path, exc)
+            return
+        if vectors is not None and vectors.shape[0] != len(ids):
+            logger.info("NumpyStore: индекс %s пишется, остаёмся на прежнем снимке", self._path)
+            return
+        self._ids = ids
+        self._texts = manifest["texts"]
+        self._metadatas = manifest["metadatas"]
+        self._vectors = vectors
+        self._index_provider = manifest.get("provider")
+        self._stamp = stamp
+
+    def _write(self, ids, texts, metadatas, matrix: np.ndarray) -> None:
+        vectors_tmp = self._path / (VECTORS_FILE + ".tmp")
+        with open(vectors_tmp, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(matrix, dtype=np.float32))
+        os.replace(vectors_tmp, self._path / VECTORS_FILE)
+
+        manifest = {
+            "provider": self._provider.name,
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "ids": ids,
+            "texts": texts,
+            "metadatas": metadatas,
+        }
+        items_tmp = self._path / (ITEMS_FILE + ".tmp")
+        items_tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(items_tmp, self._path / ITEMS_FILE)
+        self._stamp = None
+        self._reload_if_changed()
@@ -0,0 +1,122 @@
+"""Провайдеры эмбеддингов для NumpyStore (без chromadb в проде).
+
+- `openai` — text-embedding-3-small через прокси из
+  `TELEGRAM_PROXY`/`OPENAI_PROXY` (api.openai.com заблокирован в РФ). Прод.
+- `default` — all-MiniLM-L6-v2 (ONNX-модель Chroma, ~80MB, скачивается
+  при первом вызове). chromadb импортируется лениво — только здесь.
+- `hashing` — feature hashing символьных 3-грамм, без модели и сети.
+  Только лексическая близость: для тестов и локальной разработки офлайн.
+
+Все провайдеры возвращают float32-матрицу (len(texts) × dim) с
+L2-нормированными строками — косинус = скалярное произведение.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from typing import Protocol
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+OPENAI_MODEL = "text-embedding-3-small"
+HASHING_DIM = 512
+
+
+class EmbeddingProvider(Protocol):
+    """Интерфейс провайдера. name попадает в манифест индекса."""
+
+    name: str
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Эмбеддинги пачки текстов, строки L2-нормированы."""
+        ...
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class OpenAIProvider:
+    """OpenAI embeddings одной пачкой на вызов (порядок — по index ответа)."""
+
+    def __init__(self, model: str = OPENAI_MODEL):
+        api_key = os.environ.get("OPENAI_API_KEY", "")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY не задан — не могу использовать openai провайдер")
+        from openai import OpenAI
+
+        kwargs = {"api_key": api_key}
+        proxy = os.environ.get("TELEGRAM_PROXY") or os.environ.get("OPENAI_PROXY")
+        if proxy:
+            import httpx
+            kwargs["http_client"] = httpx.Client(proxy=proxy)
+            logger.info("OpenAI embeddings будут идти через прокси %s", proxy[:20] + "...")
+        self._client = OpenAI(**kwargs)
+        self.model = model
+        self.name = f"openai:{model}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        resp = self._client.embeddings.create(model=self.model, input=list(texts))
+        rows = sorted(resp.data, key=lambda d: d.index)
+        return normalize_rows([row.embedding for row in rows])
+
+
+class DefaultProvider:
+    """all-MiniLM-L6-v2 из chromadb (та же модель, что у ChromaStore provider=default)."""
+
+    name = "default:all-MiniLM-L6-v2"
+
+    def __init__(self):
+        from chromadb.utils import embedding_functions
+
+        self._fn = embedding_functions.DefaultEmbeddingFunction()
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize_rows(self._fn(list(texts)))
+
+
+class HashingProvider:
+    """Feature hashing символьных 3-грамм слов: офлайн, детерминированно."""
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            padded = f"<{word}>"
+            for i in range(max(len(padded) - 2, 1)):
+                digest = hashlib.blake2b(padded[i:i + 3].encode("utf-8"), digest_size=8).digest()
+                h = int.from_bytes(digest, "little")
+                vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        return vec
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return normalize_rows(np.stack([self._vector(t) for t in texts]))
+
+
+def build_provider(provider: str) -> EmbeddingProvider:
+    """Провайдер по имени из EMBEDDING_PROVIDER."""
+    if provider == "openai":
+        return OpenAIProvider()
+    if provider == "default":
+        return DefaultProvider()
+    if provider == "hashing":
+        return HashingProvider()
+    raise ValueError(f"Неизвестный embedding provider: {provider!r}")
@@ -1,14 +1,21 @@
 """Reindex HelpArticle → embedding store.
 
 Запуск:
-    python -m formulatela_mcp.embeddings.reindex
+    python -m formulatela_mcp.embeddings.reindex          # инкрементально
+    python -m formulatela_mcp.embeddings.reindex --full   # с нуля (смена провайдера)
 
-На проде — после правки HelpArticle через Django admin (можно повесить
-Django signal post_save на HelpArticle для автоматического reindex одного
-документа в будущем — Фаза 2.2+).
+Reindex инкрементальный: в metadata каждого документа лежит `content_hash`
+(sha256 индексируемого текста). Эмбеддятся и upsert'ятся только новые и
+изменённые статьи, удаляются только пропавшие (удалённые/выключенные) —
+store ни в какой момент не пустеет, search_faq работает во время reindex.
+
+На проде reindex запускает Celery-таска services_app.tasks.reindex_help_articles
+по post_save/post_delete HelpArticle (HELP_ARTICLES_AUTO_REINDEX=1).
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
 import logging
 import os
 from pathlib import Path
@@ -19,12 +26,17 @@ setup_django()
 
 from services_app.models import HelpArticle  # noqa: E402
 
-from .chroma_backend import ChromaStore  # noqa: E402
 from .store import EmbeddingStore, IndexItem  # noqa: E402
 
 
 logger = logging.getLogger(__name__)
 
+CONTENT_HASH_KEY = "content_hash"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 
 def _help_article_to_index_item(article: HelpArticle) -> IndexItem:
     """Подготавливает один HelpArticle к индексированию.
@@ -39,42 +51,117 @@ def _help_article_to_index_item(article: HelpArticle) -> IndexItem:
         metadata={
             "question": article.question,
             "answer": article.answer,
+            CONTENT_HASH_KEY: content_hash(text),
         },
     )
 
 
-def reindex_help_articles(store: EmbeddingStore) -> int:
-    """Полный reindex active HelpArticle. Возвращает количество индексированных."""
-    articles = list(HelpArticle.objects.active().order_by("id"))
-    if not articles:
-        logger.warning("reindex_help_articles: нет active HelpArticle, store очищен")
+def sync_help_articles(store: EmbeddingStore, full: bool = False) -> dict:
+    """Привести store к active HelpArticle, трогая только разницу.
+
+    Сравнивает `content_hash` из metadata store'а с текущими статьями:
+    новые и изменённые — один upsert (эмбеддинги batch'ем через кэш
+    store'а), пропавшие — delete по id. Сначала upsert, потом delete:
+    читатель видит либо старый, либо новый набор, но не пустой store.
+
+    full=True — с нуля: delete_all + upsert всех статей. Нужен только при
+    смене EMBEDDING_PROVIDER (старые вектора несовместимы с новыми).
+
+    Returns: {"indexed", "upserted", "deleted", "unchanged"}.
+    """
+    items = [_help_article_to_index_item(a) for a in HelpArticle.objects.active().order_by("id")]
+    if full:
         store.delete_all()
-        return 0
+        indexed: dict[str, dict] = {}
+    else:
+        indexed = store.metadatas()
+
+    changed = [
+        item for item in items
+        if indexed.get(item.id, {}).get(CONTENT_HASH_KEY) != item.metadata[CONTENT_HASH_KEY]
+    ]
+    current_ids = {item.id for item in items}
+    removed = [item_id for item_id in indexed if item_id not in current_ids]
+
+    store.upsert(changed)
+    store.delete(removed)
+
+    result = {
+        "indexed": len(items),
+        "upserted": len(changed),
+        "deleted": len(removed),
+        "unchanged": len(items) - len(changed),
+    }
+    if not items:
+        logger.warning("reindex_help_articles: нет active HelpArticle, store очищен")
+    logger.info("reindex_help_articles: %s", result)
+    return result
+
 
-    items = [_help_article_to_index_item(a) for a in articles]
-    store.delete_all()
-    store.upsert(items)
-    logger.info("reindex_help_articles: проиндексировано %d статей", len(items))
-    return len(items)
+def reindex_help_articles(store: EmbeddingStore, full: bool = False) -> int:
+    """Reindex active HelpArticle (см. sync_help_articles). Возвращает количество индексированных."""
+    return sync_help_articles(store, full=full)["indexed"]
 
 
-def get_default_store_path() -> str:
-    """Каталог для Chroma persistence. Override через CHROMA_PATH env."""
+def get_backend() -> str:
+    """Backend индекса: EMBEDDING_BACKEND=chroma (default) | numpy."""
+    return os.environ.get("EMBEDDING_BACKEND", "chroma")
+
+
+def get_default_store_path(backend: str | None = None) -> str:
+    """Каталог индекса. Override через CHROMA_PATH / VECTOR_INDEX_PATH env."""
+    if (backend or get_backend()) == "numpy":
+        return os.environ.get("VECTOR_INDEX_PATH", "/var/lib/formulatela-mcp/vectors")
     default = "/var/lib/formulatela-mcp/chroma"
     return os.environ.get("CHROMA_PATH", default)
 
 
+def get_embedding_cache_path(store_path: str) -> str:
+    """Каталог дискового кэша эмбеддингов. Override через EMBEDDING_CACHE_PATH env.
+
+    По умолчанию — рядом с индексом: reindex (CLI) и MCP-subprocess делят
+    один кэш, и прогретые reindex'ом тексты не эмбеддятся повторно.
+    """
+    return os.environ.get("EMBEDDING_CACHE_PATH") or os.path.join(store_path, "embedding_cache")
+
+
+def build_store(backend: str | None = None, provider: str | None = None) -> EmbeddingStore:
+    """Store по EMBEDDING_BACKEND / EMBEDDING_PROVIDER (один и тот же в reindex и main)."""
+    backend = backend or get_backend()
+    provider = provider or os.environ.get("EMBEDDING_PROVIDER", "default")
+    store_path = get_default_store_path(backend)
+    cache_dir = get_embedding_cache_path(store_path)
+    if backend == "numpy":
+        from .numpy_backend import NumpyStore
+        return NumpyStore(path=store_path, provider=provider, cache_dir=cache_dir)
+    if backend == "chroma":
+        from .chroma_backend import ChromaStore
+        return ChromaStore(persist_path=store_path, provider=provider, cache_dir=cache_dir)
+    raise ValueError(f"Неизвестный EMBEDDING_BACKEND: {backend!r}")
+
+
 def main() -> None:
     """CLI entrypoint: `python -m formulatela_mcp.embeddings.reindex`."""
+    parser = argparse.ArgumentParser(description="Reindex HelpArticle → embedding store")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="переиндексировать с нуля (после смены EMBEDDING_PROVIDER)",
+    )
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    backend = get_backend()
     provider = os.environ.get("EMBEDDING_PROVIDER", "default")
-    store_path = get_default_store_path()
+    store_path = get_default_store_path(backend)
     Path(store_path).mkdir(parents=True, exist_ok=True)
 
-    logger.info("Reindex: store=%s provider=%s", store_path, provider)
-    store = ChromaStore(persist_path=store_path, provider=provider)
-    count = reindex_help_articles(store)
-    print(f"OK: {count} HelpArticle indexed at {store_path}")
+    logger.info("Reindex: backend=%s store=%s provider=%s", backend, store_path, provider)
+    store = build_store(backend, provider)
+    result = sync_help_articles(store, full=args.full)
+    print(
+        f"OK: {result['indexed']} HelpArticle indexed at {store_path} "
+        f"(upserted={result['upserted']}, deleted={result['deleted']})"
+    )
 
 
 if __name__ == "__main__":
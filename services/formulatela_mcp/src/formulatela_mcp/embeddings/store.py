@@ -39,10 +39,26 @@ class EmbeddingStore(Protocol):
         """Top-k документов отсортированных по убыванию similarity."""
         ...
 
+    def delete(self, ids: list[str]) -> None:
+        """Удалить документы по `id` (отсутствующие — игнорируются)."""
+        ...
+
     def delete_all(self) -> None:
         """Очистить store (для полного reindex)."""
         ...
 
+    def metadatas(self) -> dict[str, dict]:
+        """metadata всех документов по `id` (для инкрементального reindex)."""
+        ...
+
     def count(self) -> int:
         """Число документов в store."""
         ...
+
+    def embed_queries(self, queries: list[str]) -> int:
+        """Заранее посчитать (batch) и закэшировать эмбеддинги запросов."""
+        ...
+
+    def cache_stats(self) -> dict:
+        """Счётчики кэша эмбеддингов (hits/misses/provider_calls)."""
+        ...
@@ -26,34 +26,30 @@ def ping() -> str:
     return "pong"
 
 
-# Singleton ChromaStore — instance один на subprocess, переиспользуется на
-# каждый call_tool. Без этого chromadb client (~600MB heap) пересоздавался
-# на КАЖДЫЙ запрос — главная причина 2.4s gap в latency-логах.
-_chroma_store_singleton = None
-
-
-def _get_chroma_store():
-    global _chroma_store_singleton
-    if _chroma_store_singleton is not None:
-        return _chroma_store_singleton
-    from formulatela_mcp.embeddings.chroma_backend import ChromaStore
-    from formulatela_mcp.embeddings.reindex import get_default_store_path
-    import os
-    provider = os.environ.get("EMBEDDING_PROVIDER", "default")
-    _chroma_store_singleton = ChromaStore(
-        persist_path=get_default_store_path(),
-        provider=provider,
-    )
-    return _chroma_store_singleton
+# Singleton store — instance один на subprocess, переиспользуется на каждый
+# call_tool. Без этого chromadb client (~600MB heap) пересоздавался на
+# КАЖДЫЙ запрос — главная причина 2.4s gap в latency-логах. С
+# EMBEDDING_BACKEND=numpy chromadb не импортируется вовсе: индекс — mmap
+# .npy на десятки MB, старт subprocess'а — доли секунды.
+_store_singleton = None
+
+
+def _get_store():
+    global _store_singleton
+    if _store_singleton is not None:
+        return _store_singleton
+    from formulatela_mcp.embeddings.reindex import build_store
+    _store_singleton = build_store()
+    return _store_singleton
 
 
 @mcp.tool()
 def search_faq(query: str, k: int = 3) -> dict:
     """Найти top-k FAQ-статей семантически близких к query.
 
-    Использует embeddings (см. embeddings/chroma_backend.py). Возвращает
-    список dict'ов отсортированных по убыванию similarity. Каждый dict
-    содержит:
+    Использует embeddings (см. embeddings/: numpy_backend.py или
+    chroma_backend.py — по EMBEDDING_BACKEND). Возвращает список dict'ов
+    отсортированных по убыванию similarity. Каждый dict содержит:
         - question: str — формулировка вопроса
         - answer: str — ответ для клиента
         - score: float — similarity 0..1, где 1 = идеальное совпадение
@@ -66,7 +62,7 @@ def search_faq(query: str, k: int = 3) -> dict:
         k: сколько результатов вернуть (1..10)
     """
     k = max(1, min(k, 10))
-    store = _get_chroma_store()  # singleton, без re-init
+    store = _get_store()  # singleton, без re-init
     results = store.search(query, k=k)
     # Возвращаем dict-обёртку (НЕ list) — FastMCP сериализует list[dict] странно
     # (только первый элемент в content[0]). Dict гарантированно один JSON.
@@ -82,6 +78,37 @@ def search_faq(query: str, k: int = 3) -> dict:
     }
 
 
+@mcp.tool()
+def embed_queries(queries: list[str]) -> dict:
+    """Заранее посчитать эмбеддинги запросов одним batch-вызовом.
+
+    maxbot.warmup зовёт его при старте с популярными вопросами: их
+    последующие search_faq берут эмбеддинг из кэша, без round-trip'а к
+    модели. Не больше 256 запросов за вызов.
+
+    Args:
+        queries: тексты запросов ровно в том виде, в каком их передадут в search_faq
+    """
+    queries = [q for q in queries if isinstance(q, str) and q][:256]
+    return {"embedded": _get_store().embed_queries(queries)}
+
+
+@mcp.tool()
+def stats() -> dict:
+    """Состояние индекса FAQ: backend, число документов, счётчики кэша эмбеддингов.
+
+    embedding_cache: memory_hits / disk_hits / misses / provider_calls /
+    hit_rate — сколько эмбеддингов отдано из кэша и сколько раз звали модель.
+    """
+    from formulatela_mcp.embeddings.reindex import get_backend
+    store = _get_store()
+    return {
+        "backend": get_backend(),
+        "documents": store.count(),
+        "embedding_cache": store.cache_stats(),
+    }
+
+
 # T-XX (Фаза 2.2): search_services
 # T-XX (Фаза 2.3): find_master, find_slot, book_via_yclients
 
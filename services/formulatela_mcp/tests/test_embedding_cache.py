@@ -0,0 +1,105 @@
+"""Кэш эмбеддингов (embeddings/cache.py) + MCP tools embed_queries / stats."""
+import numpy as np
+import pytest
+from model_bakery import baker
+
+from formulatela_mcp.embeddings.cache import CachedProvider
+from formulatela_mcp.embeddings.numpy_backend import NumpyStore
+from formulatela_mcp.embeddings.providers import HashingProvider
+from formulatela_mcp.embeddings.store import IndexItem
+
+
+class CountingProvider(HashingProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+
+def test_batch_embeds_only_missing_texts_once():
+    provider = CountingProvider()
+    cached = CachedProvider(provider)
+    cached.embed(["a b", "c d"])
+
+    vectors = cached.embed(["c d", "e f", "e f", "a b"])
+
+    assert provider.calls == [["a b", "c d"], ["e f"]]
+    assert vectors.shape == (4, provider.dim)
+    np.testing.assert_array_equal(vectors[1], vectors[2])
+    stats = cached.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["provider_calls"]) == (2, 3, 2)
+
+
+def test_disk_cache_survives_new_process(tmp_path):
+    CachedProvider(HashingProvider(), cache_dir=str(tmp_path)).embed(["как записаться"])
+
+    provider = CountingProvider()
+    fresh = CachedProvider(provider, cache_dir=str(tmp_path))
+    fresh.embed(["как записаться"])
+
+    assert provider.calls == []
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_cache_key_includes_provider_name(tmp_path):
+    CachedProvider(HashingProvider(dim=128), cache_dir=str(tmp_path)).embed(["текст"])
+    vector = CachedProvider(HashingProvider(dim=256), cache_dir=str(tmp_path)).embed(["текст"])
+    assert vector.shape == (1, 256)
+
+
+def test_memory_lru_is_bounded():
+    cached = CachedProvider(HashingProvider(), memory_size=2)
+    cached.embed(["a", "b", "c"])
+    assert cached.stats()["memory_entries"] == 2
+
+
+def test_reindex_reuses_cached_embeddings(tmp_path):
+    provider = CountingProvider()
+    store = NumpyStore(path=str(tmp_path), provider=provider, cache_dir=str(tmp_path / "cache"))
+    items = [IndexItem(id=str(i), text=f"статья {i}", metadata={}) for i in range(3)]
+    store.upsert(items)
+    store.delete_all()
+    store.upsert(items + [IndexItem(id="3", text="новая статья", metadata={})])
+
+    assert provider.calls == [[f"статья {i}" for i in range(3)], ["новая статья"]]
+
+
+@pytest.fixture
+def numpy_env(tmp_path, monkeypatch):
+    from formulatela_mcp import main
+    monkeypatch.setenv("EMBEDDING_BACKEND", "numpy")
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("VECTOR_INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr(main, "_store_singleton", None)
+    return main
+
+
+@pytest.mark.django_db(transaction=True)
+def test_embed_queries_prewarms_search_faq(numpy_env):
+    from formulatela_mcp.embeddings.reindex import reindex_help_articles
+    main = numpy_env
+    baker.make("services_app.HelpArticle", question="Как записаться?", answer="Через бота.", is_active=True)
+    reindex_help_articles(main._get_store())
+
+    assert main.embed_queries(["как записаться", "сколько стоит"]) == {"embedded": 2}
+    before = main.stats()["embedding_cache"]
+    main.search_faq("как записаться", k=1)
+    after = main.stats()["embedding_cache"]
+
+    assert after["provider_calls"] == before["provider_calls"]
+    assert after["memory_hits"] == before["memory_hits"] + 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stats_tool_reports_backend_and_documents(numpy_env):
+    main = numpy_env
+    result = main.stats()
+    assert result["backend"] == "numpy"
+    assert result["documents"] == 0
+    assert {"memory_hits", "disk_hits", "misses", "hit_rate"} <= set(result["embedding_cache"])
+
+    tool_names = list(main.mcp._tool_manager._tools.keys())
+    assert {"stats", "embed_queries"} <= set(tool_names)
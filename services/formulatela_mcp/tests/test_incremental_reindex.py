@@ -0,0 +1,113 @@
+"""Инкрементальный reindex HelpArticle по content_hash (sync_help_articles)."""
+import pytest
+from model_bakery import baker
+
+from formulatela_mcp.embeddings.numpy_backend import NumpyStore
+from formulatela_mcp.embeddings.providers import HashingProvider
+from formulatela_mcp.embeddings.store import IndexItem
+
+
+class CountingProvider(HashingProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+
+class NeverEmptyStore(NumpyStore):
+    """Падает, если reindex очищает индекс целиком."""
+
+    def delete_all(self):
+        raise AssertionError("incremental reindex не должен вызывать delete_all")
+
+
+@pytest.fixture
+def provider():
+    return CountingProvider()
+
+
+@pytest.fixture
+def store(tmp_path, provider):
+    return NeverEmptyStore(path=str(tmp_path), provider=provider)
+
+
+def _make_article(question, answer="Ответ", is_active=True):
+    return baker.make("services_app.HelpArticle", question=question, answer=answer, is_active=is_active)
+
+
+def test_numpy_store_delete_by_ids(tmp_path):
+    store = NumpyStore(path=str(tmp_path), provider="hashing")
+    store.upsert([IndexItem(id=str(i), text=f"текст {i}", metadata={"n": i}) for i in range(3)])
+    store.delete(["1", "missing"])
+    assert store.metadatas() == {"0": {"n": 0}, "2": {"n": 2}}
+    assert store.search("текст 2", k=1)[0].id == "2"
+
+    store.delete(["0", "2"])
+    assert store.count() == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_embeds_only_changed_articles(store, provider):
+    from formulatela_mcp.embeddings.reindex import sync_help_articles
+
+    first = _make_article("Как записаться?")
+    second = _make_article("Сколько стоит массаж?")
+    assert sync_help_articles(store) == {"indexed": 2, "upserted": 2, "deleted": 0, "unchanged": 0}
+
+    provider.calls.clear()
+    second.answer = "От 2000 рублей."
+    second.save()
+    result = sync_help_articles(store)
+
+    assert result == {"indexed": 2, "upserted": 1, "deleted": 0, "unchanged": 1}
+    assert provider.calls == [[f"Вопрос: {second.question}\n\nОтвет: От 2000 рублей."]]
+    assert store.metadatas()[str(first.id)]["question"] == "Как записаться?"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_deletes_only_removed_articles(store, provider):
+    from formulatela_mcp.embeddings.reindex import sync_help_articles
+
+    kept = _make_article("Как записаться?")
+    hidden = _make_article("Есть ли парковка?")
+    gone = _make_article("Где вы находитесь?")
+    sync_help_articles(store)
+
+    provider.calls.clear()
+    hidden.is_active = False
+    hidden.save()
+    gone.delete()
+    result = sync_help_articles(store)
+
+    assert result == {"indexed": 1, "upserted": 0, "deleted": 2, "unchanged": 1}
+    assert provider.calls == []
+    assert set(store.metadatas()) == {str(kept.id)}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_is_noop_when_nothing_changed(store, provider):
+    from formulatela_mcp.embeddings.reindex import sync_help_articles
+
+    _make_article("Как записаться?")
+    sync_help_articles(store)
+    stamp = store._stamp
+    provider.calls.clear()
+
+    assert sync_help_articles(store)["upserted"] == 0
+    assert provider.calls == []
+    assert store._stamp == stamp  # индекс на диске не переписан
+
+
+@pytest.mark.django_db(transaction=True)
+def test_full_sync_rebuilds_from_scratch(tmp_path):
+    from formulatela_mcp.embeddings.reindex import sync_help_articles
+
+    store = NumpyStore(path=str(tmp_path), provider="hashing")
+    store.upsert([IndexItem(id="stale", text="old", metadata={})])
+    _make_article("Как записаться?")
+
+    assert sync_help_articles(store, full=True)["upserted"] == 1
+    assert store.count() == 1
@@ -0,0 +1,145 @@
+"""NumpyStore: in-process индекс FAQ (mmap .npy) + выбор backend'а по env.
+
+Провайдер 'hashing' — офлайн, без модели: тесты не ходят в сеть.
+"""
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from model_bakery import baker
+
+from formulatela_mcp.embeddings.numpy_backend import NumpyStore
+from formulatela_mcp.embeddings.providers import HashingProvider
+from formulatela_mcp.embeddings.store import IndexItem
+
+
+class CountingProvider(HashingProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NumpyStore(path=str(tmp_path), provider="hashing")
+
+
+def _faq_items():
+    return [
+        IndexItem(id="record", text="Как записаться на приём к мастеру", metadata={"question": "Запись"}),
+        IndexItem(id="prices", text="Сколько стоит массаж спины", metadata={"question": "Цены"}),
+        IndexItem(id="hours", text="Режим работы салона по выходным", metadata={"question": "Часы"}),
+    ]
+
+
+def test_empty_store(store):
+    assert store.count() == 0
+    assert store.search("что угодно", k=3) == []
+
+
+def test_search_returns_relevant_first_with_unit_scores(store):
+    store.upsert(_faq_items())
+    results = store.search("хочу записаться к мастеру", k=3)
+    assert [r.id for r in results][0] == "record"
+    assert len(results) == 3
+    assert all(0.0 <= r.score <= 1.0 for r in results)
+    assert results[0].score >= results[1].score >= results[2].score
+    assert results[0].metadata == {"question": "Запись"}
+
+
+def test_search_caps_k_to_collection_size(store):
+    store.upsert(_faq_items()[:2])
+    assert len(store.search("массаж", k=10)) == 2
+
+
+def test_upsert_is_idempotent_and_updates_text(store):
+    store.upsert([IndexItem(id="1", text="text v1", metadata={})])
+    store.upsert([IndexItem(id="1", text="text v2", metadata={}), IndexItem(id="2", text="other", metadata={})])
+    assert store.count() == 2
+    assert store.search("text v2", k=1)[0].text == "text v2"
+
+
+def test_delete_all_clears(store):
+    store.upsert(_faq_items())
+    store.delete_all()
+    assert store.count() == 0
+    store.upsert(_faq_items()[:1])
+    assert store.count() == 1
+
+
+def test_index_is_memory_mapped_and_visible_to_other_instances(tmp_path):
+    writer = NumpyStore(path=str(tmp_path), provider="hashing")
+    reader = NumpyStore(path=str(tmp_path), provider="hashing")
+    writer.upsert(_faq_items())
+
+    assert reader.count() == 3  # перечитал по mtime items.json
+    assert isinstance(reader._vectors, np.memmap)
+    assert reader.search("цены на массаж", k=1)[0].id == "prices"
+
+
+def test_query_embeddings_are_cached(tmp_path):
+    provider = CountingProvider()
+    store = NumpyStore(path=str(tmp_path), provider=provider)
+    store.upsert(_faq_items())
+    provider.calls.clear()
+
+    store.search("как записаться", k=1)
+    store.search("как записаться", k=2)
+
+    assert provider.calls == [["как записаться"]]
+
+
+def test_provider_mismatch_raises(tmp_path):
+    NumpyStore(path=str(tmp_path), provider="hashing").upsert(_faq_items())
+
+    other = HashingProvider(dim=256)  # другое имя и размерность
+    with pytest.raises(RuntimeError, match="reindex"):
+        NumpyStore(path=str(tmp_path), provider=other).search("массаж")
+
+
+def test_numpy_backend_does_not_import_chromadb():
+    code = (
+        "import sys, formulatela_mcp.embeddings.numpy_backend; "
+        "print('chromadb' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_build_store_selects_backend_from_env(tmp_path, monkeypatch):
+    from formulatela_mcp.embeddings.reindex import build_store
+    monkeypatch.setenv("EMBEDDING_BACKEND", "numpy")
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("VECTOR_INDEX_PATH", str(tmp_path))
+    store = build_store()
+    assert isinstance(store, NumpyStore)
+    assert store._path == tmp_path
+
+    with pytest.raises(ValueError):
+        build_store(backend="faiss")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_search_faq_with_numpy_backend(tmp_path, monkeypatch):
+    from formulatela_mcp import main
+    from formulatela_mcp.embeddings.reindex import build_store, reindex_help_articles
+
+    monkeypatch.setenv("EMBEDDING_BACKEND", "numpy")
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("VECTOR_INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr(main, "_store_singleton", None)
+
+    baker.make("services_app.HelpArticle", question="Как записаться?",
+               answer="Через бота или по телефону.", is_active=True)
+    baker.make("services_app.HelpArticle", question="Сколько стоит массаж?",
+               answer="От 1500 рублей.", is_active=True)
+    reindex_help_articles(build_store())
+
+    results = main.search_faq("как записаться", k=2)["results"]
+    assert results[0]["question"] == "Как записаться?"
+    assert results[0]["score"] >= results[1]["score"]